@@ -0,0 +1,90 @@
+"""
+Benchmark the MIP warm start option of the behavior agents.
+
+The SD6 example is run twice, without and with "warm_start" in the
+decision-making settings. The solver runtime and the number of explored
+branch-and-bound nodes of the adopted decisions are summed over all behavior
+agents and years.
+"""
+import os
+import sys
+import time
+
+import dill
+
+from py_champ.models.sd6_model import SD6Model
+
+sys.setrecursionlimit(10000)
+
+wd = os.getcwd()
+with open(os.path.join(wd, "Inputs_SD6.pkl"), "rb") as f:
+    (
+        aquifers_dict,
+        fields_dict,
+        wells_dict,
+        finances_dict,
+        behaviors_dict,
+        prec_aw_step,
+        crop_price_step,
+        shared_config,
+    ) = dill.load(f)
+
+crop_options = ["corn", "sorghum", "soybeans", "wheat", "fallow"]
+tech_options = ["center pivot LEPA"]
+area_split = 1
+seed = 3
+
+pars = {
+    "perceived_risk": 0.7539013390415119,
+    "forecast_trust": 0.8032197483934305,
+    "sa_thre": 0.14215821111637678,
+    "un_thre": 0.0773514357873846,
+}
+
+
+def run(warm_start, var_hint=False):
+    for behavior_dict in behaviors_dict.values():
+        behavior_dict["decision_making"]["warm_start"] = warm_start
+        behavior_dict["decision_making"]["var_hint"] = var_hint
+
+    m = SD6Model(
+        pars=pars,
+        crop_options=crop_options,
+        tech_options=tech_options,
+        area_split=area_split,
+        aquifers_dict=aquifers_dict,
+        fields_dict=fields_dict,
+        wells_dict=wells_dict,
+        finances_dict=finances_dict,
+        behaviors_dict=behaviors_dict,
+        prec_aw_step=prec_aw_step,
+        init_year=2007,
+        end_year=2022,
+        lema_options=(True, "wr_LEMA_5yr", 2013),
+        show_step=False,
+        seed=seed,
+        shared_config=shared_config,
+        # kwargs
+        crop_price_step=crop_price_step,
+    )
+    runtime = 0.0
+    node_count = 0.0
+    start = time.time()
+    for _i in range(15):
+        m.step()
+        for behavior in m.behaviors.values():
+            runtime += behavior.gp_Runtime or 0.0
+            node_count += behavior.gp_NodeCount or 0.0
+    wall_time = time.time() - start
+    m.end()
+    return wall_time, runtime, node_count
+
+
+results = {
+    "cold start": run(warm_start=False),
+    "warm start": run(warm_start=True),
+    "warm start + hint": run(warm_start=True, var_hint=True),
+}
+print(f"{'':<20}{'wall time [s]':>15}{'solver time [s]':>18}{'nodes':>12}")
+for name, (wall_time, runtime, node_count) in results.items():
+    print(f"{name:<20}{wall_time:>15.2f}{runtime:>18.2f}{node_count:>12.0f}")
@@ -0,0 +1,124 @@
+"""
+Report the approximation errors of the piecewise-linear ("pwl") formulation.
+
+First, the maximum interpolation errors of the yield curves and the energy
+term are listed for different numbers of breakpoints. Then, the SD6 example is
+simulated with the exact ("nonconvex") formulation. After each year, the
+deliberation problem of every behavior agent is solved again with the exact
+formulation and with the "pwl" formulation on the same inputs, and the
+differences of the objective values, irrigation depths, and crop choices are
+reported.
+"""
+import copy
+import os
+import sys
+
+import dill
+import numpy as np
+
+from py_champ.components.optimization import pwl_max_errors
+from py_champ.models.sd6_model import SD6Model
+
+sys.setrecursionlimit(10000)
+
+wd = os.getcwd()
+with open(os.path.join(wd, "Inputs_SD6.pkl"), "rb") as f:
+    (
+        aquifers_dict,
+        fields_dict,
+        wells_dict,
+        finances_dict,
+        behaviors_dict,
+        prec_aw_step,
+        crop_price_step,
+        shared_config,
+    ) = dill.load(f)
+
+crop_options = ["corn", "sorghum", "soybeans", "wheat", "fallow"]
+tech_options = ["center pivot LEPA"]
+area_split = 1
+seed = 3
+n_years = 3
+breakpoints = [5, 10, 20, 30]
+
+pars = {
+    "perceived_risk": 0.7539013390415119,
+    "forecast_trust": 0.8032197483934305,
+    "sa_thre": 0.14215821111637678,
+    "un_thre": 0.0773514357873846,
+}
+
+#%% Maximum interpolation errors
+water_yield_curves = shared_config["field"]["water_yield_curves"]
+columns = [*crop_options, "energy"]
+print("Maximum interpolation errors (yield rate for crops; relative for energy)")
+print(f"{'breakpoints':<12}" + "".join(f"{c:>12}" for c in columns))
+for n in breakpoints:
+    errors = pwl_max_errors(water_yield_curves, n)
+    print(f"{n:<12}" + "".join(f"{errors[c]:>12.5f}" for c in columns))
+
+#%% Errors in the solutions
+m = SD6Model(
+    pars=pars,
+    crop_options=crop_options,
+    tech_options=tech_options,
+    area_split=area_split,
+    aquifers_dict=aquifers_dict,
+    fields_dict=fields_dict,
+    wells_dict=wells_dict,
+    finances_dict=finances_dict,
+    behaviors_dict=behaviors_dict,
+    prec_aw_step=prec_aw_step,
+    init_year=2007,
+    end_year=2022,
+    lema_options=(True, "wr_LEMA_5yr", 2013),
+    show_step=False,
+    seed=seed,
+    shared_config=shared_config,
+    # kwargs
+    crop_price_step=crop_price_step,
+)
+
+
+def solve(behavior, formulation, pwl_breakpoints=10):
+    dm_dict = behavior.dm_dict
+    dm_dict["formulation"] = formulation
+    dm_dict["pwl_breakpoints"] = pwl_breakpoints
+    sols = behavior.make_dm(
+        state="Deliberation", dm_sols=copy.deepcopy(behavior.pre_dm_sols)
+    )
+    dm_dict["formulation"] = "nonconvex"
+    fid = behavior.field_ids[0]
+    crop = np.argmax(sols[fid]["i_crop"][0, :, 0])
+    irr_depth = sols[fid]["irr_depth"][0, :, 0].sum()
+    return sols["obj"], irr_depth, crop
+
+
+errors = {n: [] for n in breakpoints}
+for _i in range(n_years):
+    m.step()
+    for behavior in m.behaviors.values():
+        obj, irr_depth, crop = solve(behavior, "nonconvex")
+        for n in breakpoints:
+            obj_pwl, irr_depth_pwl, crop_pwl = solve(behavior, "pwl", n)
+            errors[n].append(
+                (
+                    abs(obj_pwl - obj) / max(abs(obj), 1),
+                    abs(irr_depth_pwl - irr_depth),
+                    crop_pwl != crop,
+                )
+            )
+m.end()
+
+n_dms = len(errors[breakpoints[0]])
+print(f"\nDifferences to the exact formulation over {n_dms} decisions")
+print(
+    f"{'breakpoints':<12}{'max rel obj':>14}{'mean rel obj':>14}"
+    + f"{'max irr [cm]':>14}{'crop changes':>14}"
+)
+for n in breakpoints:
+    e = np.array(errors[n], dtype=float)
+    print(
+        f"{n:<12}{e[:, 0].max():>14.5f}{e[:, 0].mean():>14.5f}"
+        + f"{e[:, 1].max():>14.3f}{e[:, 2].sum():>14.0f}"
+    )
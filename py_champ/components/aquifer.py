@@ -4,6 +4,9 @@
 import warnings
 
 import mesa
+import numpy as np
+
+from .array_attribute import ArrayAttribute
 
 
 class Aquifer(mesa.Agent):
@@ -64,8 +67,20 @@ class Aquifer(mesa.Agent):
     of the High Plains aquifer in Kansas. Water International, 43(6), 815-828.
     https://doi.org/10.1080/02508060.2018.1515566
 
+    The states below are stored in the arrays of a StateStore if the aquifer
+    is attached to one.
     """
 
+    # States stored in a StateStore (see StateStore)
+    aq_a = ArrayAttribute(nullable=True)
+    aq_b = ArrayAttribute(nullable=True)
+    area = ArrayAttribute(nullable=True)
+    sy = ArrayAttribute(nullable=True)
+    st = ArrayAttribute()
+    dwl = ArrayAttribute()
+    t = ArrayAttribute(dtype=int)
+    withdrawal = ArrayAttribute(nullable=True)
+
     def __init__(self, unique_id, model, settings: dict):
         """Initialize an Aquifer agent in the Mesa model."""
         # MESA required attributes => (unique_id, model)
@@ -127,7 +142,8 @@ class Aquifer(mesa.Agent):
         -----
         The method calculates the change in water level either based on static
         inflow, using 'aq_a' and 'aq_b' coefficients or dynamic inflow,
-        applying 'sy' and 'area' of the aquifer.
+        applying 'sy' and 'area' of the aquifer. See step_aquifers() for
+        stepping many aquifers with the static inflow in one call.
         """
         self.t += 1
 
@@ -150,3 +166,143 @@ class Aquifer(mesa.Agent):
                 stacklevel=2,
             )
         return dwl
+
+
+def calc_dwl(withdrawal, aq_a, aq_b):
+    """
+    Calculate the change in water level of aquifers with the static inflow in
+    one vectorized call as Aquifer.step() of each aquifer.
+
+    Parameters
+    ----------
+    withdrawal : 1d array
+        The withdrawal from each aquifer [m-ha].
+    aq_a, aq_b : 1d array
+        The static inflow coefficients of each aquifer (see Aquifer).
+
+    Returns
+    -------
+    1d array
+        The change in water level of each aquifer [m].
+
+    """
+    return aq_b - aq_a * withdrawal
+
+
+def check_static_inflow(aquifers, aq_a, aq_b):
+    """
+    Check that the static inflow coefficients of the aquifers are given.
+
+    Parameters
+    ----------
+    aquifers : list
+        The Aquifer agents.
+    aq_a, aq_b : 1d array
+        The static inflow coefficients of each aquifer, where the ones not
+        given are NaN.
+
+    Raises
+    ------
+    ValueError
+        If aq_a or aq_b of an aquifer is not given.
+
+    """
+    missing = np.flatnonzero(np.isnan(aq_a) | np.isnan(aq_b))
+    if missing.size:
+        ids = [aquifers[i].unique_id for i in missing]
+        raise ValueError(f"aq_a and aq_b of the aquifers {ids} are not given.")
+
+
+def step_aquifers(aquifers, withdrawal):
+    """
+    Step the Aquifer agents with the static inflow in one vectorized call,
+    which gives the same results as Aquifer.step() of each aquifer. The
+    agents of a class overriding step() are stepped one by one instead.
+
+    Parameters
+    ----------
+    aquifers : list
+        The Aquifer agents.
+    withdrawal : 1d array
+        The withdrawal from each aquifer [m-ha].
+
+    Returns
+    -------
+    1d array
+        The change in water level of each aquifer [m].
+
+    """
+    if any(type(aquifer).step is not Aquifer.step for aquifer in aquifers):
+        return np.array(
+            [aquifer.step(w) for aquifer, w in zip(aquifers, withdrawal, strict=True)]
+        )
+    aq_a, aq_b = (
+        np.array([getattr(aquifer, k) for aquifer in aquifers], dtype=float)
+        for k in ("aq_a", "aq_b")
+    )
+    check_static_inflow(aquifers, aq_a, aq_b)
+    dwl = calc_dwl(withdrawal, aq_a, aq_b)
+    st = np.array([aquifer.st for aquifer in aquifers], dtype=float) + dwl
+    for i, aquifer in enumerate(aquifers):
+        aquifer.t += 1
+        aquifer.dwl_list.append(dwl[i])
+        aquifer.st = st[i]
+        aquifer.dwl = dwl[i]
+        aquifer.withdrawal = withdrawal[i]
+        # Check st is not negative
+        if st[i] < 0:
+            warnings.warn(
+                f"The saturated thickness is negative in aquifer {aquifer.unique_id}.",
+                stacklevel=2,
+            )
+    return dwl
+
+
+def get_well_aquifers(wells, aquifers):
+    """
+    Get the position of the aquifer of each well, which is len(aquifers) for
+    a well whose aquifer is not given.
+
+    Parameters
+    ----------
+    wells : dict
+        The Well agents, mapped by their IDs.
+    aquifers : dict
+        The Aquifer agents, mapped by their IDs.
+
+    Returns
+    -------
+    1d array
+        The aquifer position of each well.
+
+    """
+    positions = {aq_id: i for i, aq_id in enumerate(aquifers)}
+    return np.array(
+        [positions.get(well.aquifer_id, len(aquifers)) for well in wells.values()],
+        dtype=int,
+    )
+
+
+def sum_withdrawals(well_aquifers, withdrawals, n_aquifers):
+    """
+    Sum the withdrawals of the wells by aquifer.
+
+    Parameters
+    ----------
+    well_aquifers : 1d array
+        The aquifer position of each well. See get_well_aquifers().
+    withdrawals : 1d array
+        The withdrawal of each well [m-ha].
+    n_aquifers : int
+        The number of aquifers.
+
+    Returns
+    -------
+    1d array
+        The withdrawal from each aquifer [m-ha].
+
+    """
+    withdrawals = np.asarray(withdrawals, dtype=float)
+    # The withdrawals of the wells without a given aquifer are in the last bin.
+    sums = np.bincount(well_aquifers, weights=withdrawals, minlength=n_aquifers + 1)
+    return sums[:n_aquifers]
@@ -0,0 +1,85 @@
+import numpy as np
+
+
+class ArrayAttribute:
+    """
+    An attribute of an agent that is stored in the arrays of a StateStore once
+    the agent is attached to it. The agent then becomes a view of its row in
+    the arrays, i.e., reading or setting the attribute reads or sets the row.
+    Before that, the attribute is stored in the agent as usual. Reading an
+    array-valued attribute (e.g., i_crop of Field) returns a copy of the row,
+    so the value is not overwritten when the store steps the agents.
+
+    Parameters
+    ----------
+    dtype : type, optional
+        The dtype of the array. The default is float.
+    nullable : bool, optional
+        If True, None is stored as NaN and NaN is read as None. Only for
+        scalar attributes. The default is False.
+    options : str, optional
+        The name of the model attribute listing the options (e.g.,
+        "crop_options"), where an option (or a list of options) is stored as
+        its index (or indices) and None as -1. The default is None.
+
+    """
+
+    def __init__(self, dtype=float, nullable=False, options=None):
+        self.dtype = int if options is not None else dtype
+        self.nullable = nullable
+        self.options = options
+
+    def __set_name__(self, owner, name):
+        """Record the name of the attribute in the owner class."""
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        """Read the attribute from the agent or its row in the arrays."""
+        if obj is None:
+            return self
+        row = obj.__dict__.get("_state_row")
+        if row is None:
+            try:
+                return obj.__dict__[self.name]
+            except KeyError:
+                raise AttributeError(
+                    f"'{type(obj).__name__}' object has no attribute '{self.name}'"
+                ) from None
+        arrays, i = row
+        value = arrays[self.name][i]
+        if self.options is not None:
+            return self._decode(obj, value)
+        if self.nullable and isinstance(value, float) and np.isnan(value):
+            return None
+        if isinstance(value, np.ndarray):
+            return value.copy()
+        return value
+
+    def __set__(self, obj, value):
+        """Set the attribute in the agent or its row in the arrays."""
+        row = obj.__dict__.get("_state_row")
+        if row is None:
+            obj.__dict__[self.name] = value
+            return
+        arrays, i = row
+        arrays[self.name][i] = self.encode(obj, value)
+
+    def encode(self, obj, value):
+        """Convert a value of the attribute to its value in the array."""
+        if self.options is not None:
+            if value is None:
+                return -1
+            options = getattr(obj.model, self.options)
+            if isinstance(value, str):
+                return options.index(value)
+            return [options.index(v) for v in value]
+        if value is None:
+            return np.nan
+        return value
+
+    def _decode(self, obj, value):
+        """Convert a value in the array to its option(s)."""
+        options = getattr(obj.model, self.options)
+        if np.ndim(value) == 0:
+            return None if value < 0 else options[value]
+        return [options[v] for v in value]
@@ -8,6 +8,24 @@ import numpy as np
 import pandas as pd
 from scipy.stats import truncnorm
 
+from .decomposition import OptimizationDecomposed
+from .optimization import (
+    OptimizationFixedChoices,
+    solve_batch,
+    solve_fixed_choices,
+)
+from .preflight import preflight_dm_args
+from .screening import (
+    expand_sols,
+    reduce_sols,
+    screen_crop_options,
+    screen_tech_options,
+    take_options,
+)
+from .solver import GRB
+from .solver_budget import TIME_LIMIT
+from .well_kernel import WellKernel
+
 
 class Behavior(mesa.Agent):
     """
@@ -45,7 +63,23 @@ class Behavior(mesa.Agent):
         >>>         "keep_gp_model": False,
         >>>         "keep_gp_output": False,
         >>>         "display_summary": False,
-        >>>         "display_report": False
+        >>>         "display_report": False,
+        >>>         "persistent_model": False,  # Reuse the opt model every year.
+        >>>         "warm_start": False,  # Start from the previous decisions.
+        >>>         "var_hint": False,  # Also use them as variable hints.
+        >>>         "formulation": "nonconvex",  # or "convex" or "pwl"
+        >>>         "pwl_breakpoints": 10,  # For the "pwl" formulation.
+        >>>         "solver": "gurobi",  # or "highs" for the "pwl" formulation.
+        >>>         "fast_fixed_choices": False,  # Solver-free given crop & tech.
+        >>>         "batch_social_comparison": False,  # Evaluate all at once.
+        >>>         "gurobi_names": True,  # Name gurobi variables & constraints.
+        >>>         "tighten_bounds": False,  # Derive finite variable bounds.
+        >>>         "symmetry_breaking": False,  # Order identical area splits.
+        >>>         "dominance_pruning": False,  # Drop dominated crops & techs.
+        >>>         "prec_scenarios": None,  # No. of precipitation scenarios.
+        >>>         "approx_points": None,  # No. of points to approximate horizon.
+        >>>         "horizon_decomposition": False,  # Solve each year separately.
+        >>>         "feasibility_preflight": False,  # Relax infeasible inputs.
         >>>         },
         >>>     "water_rights": {
         >>>         "<name>": {
@@ -159,6 +193,7 @@ class Behavior(mesa.Agent):
         self.num_fields = len(fields)
         self.num_wells = len(wells)
         self.total_field_area = sum([field.field_area for _, field in self.fields.items()])
+        self.well_kernel = WellKernel.from_wells(list(wells.values()))
 
         # Initialize CONSUMAT
         self.state = None
@@ -185,6 +220,8 @@ class Behavior(mesa.Agent):
         self.profit = None
         self.yield_rate = None
 
+        self.percieved_risk_scenarios = None
+
         # Initial calculation
         self.process_percieved_risks(par_perceived_risk=self.pars["perceived_risk"])
         # Since perceived_risk and forecast_trust are not dynamically updated,
@@ -203,6 +240,9 @@ class Behavior(mesa.Agent):
         # Run the optimization to solve irr depth with every other variables
         # fixed.
         self.pre_dm_sols = None
+        # The optimization model kept under the persistent mode.
+        self.dm = None
+        self.dm_key = None
         self.dm_sols = self.make_dm(None, dm_sols=dm_sols, init=True)
 
         # Run the simulation to calculate satisfaction and uncertainty
@@ -242,6 +282,14 @@ class Behavior(mesa.Agent):
         -----
         This method calculates the perceived risks based on the truncated normal distribution
         parameters for each crop. The calculated values are stored in the `percieved_risks` attribute.
+
+        If "prec_scenarios" (K) is given in the decision-making settings, the
+        K equally probable scenarios of the perceived risks are also stored in
+        the `percieved_risk_scenarios` attribute. The scenarios are the
+        quantiles at qu + 2 * min(qu, 1 - qu) * ((k + 0.5) / K - 0.5), which
+        are evenly spaced around and centered on the calibrated
+        par_perceived_risk (qu) within (0, 1). Hence, K = 1 gives the perceived
+        risks above, and qu = 0.5 gives the quantiles at (k + 0.5) / K.
         """
         # Compute percieved_risks (i.e., ECDF^(-1)(qu)) for each field and crop.
         percieved_risks = {}
@@ -264,6 +312,32 @@ class Behavior(mesa.Agent):
             }
         self.percieved_risks = percieved_risks
 
+        n_scen = self.dm_dict.get("prec_scenarios")
+        if n_scen:
+            qu = par_perceived_risk
+            qs = qu + 2 * min(qu, 1 - qu) * ((np.arange(n_scen) + 0.5) / n_scen - 0.5)
+            percieved_risk_scenarios = {}
+            for fi, field in self.fields.items():
+                truncated_normal_pars = field.truncated_normal_pars
+                percieved_risk_scenarios[fi] = {
+                    crop: np.zeros(n_scen)
+                    if crop == "fallow"
+                    else np.array(
+                        [
+                            round(r, 4)
+                            for r in truncnorm.ppf(
+                                q=qs,
+                                a=truncated_normal_pars[crop][0],
+                                b=truncated_normal_pars[crop][1],
+                                loc=truncated_normal_pars[crop][2],
+                                scale=truncated_normal_pars[crop][3],
+                            )
+                        ]
+                    )
+                    for crop in self.model.crop_options
+                }
+            self.percieved_risk_scenarios = percieved_risk_scenarios
+
     def update_perceived_prec_aw(self, par_forecast_confidence, year=None):
         """
         Update the perceived precipitation available water based on forecast trust.
@@ -318,6 +392,36 @@ class Behavior(mesa.Agent):
                 }
                 perceived_prec_aw[fi][year] = perceived_prec_aw_f
 
+    def get_perceived_prec_aw_scenarios(self, field_id, year):
+        """
+        Get the perceived precipitation available water of the precipitation
+        scenarios (see process_percieved_risks()) based on forecast trust.
+
+        Parameters
+        ----------
+        field_id : str
+            The field id.
+        year : int
+            The year.
+
+        Returns
+        -------
+        list
+            The dictionaries of the perceived prec_aw of each crop, one for
+            each scenario.
+        """
+        fotr = self.pars["forecast_trust"]
+        prec_aw = self.model.prec_aw_step[self.fields[field_id].prec_aw_id][year]
+        risks = self.percieved_risk_scenarios[field_id]
+        n_scen = self.dm_dict["prec_scenarios"]
+        return [
+            {
+                crop: round(risks[crop][k] * (1 - fotr) + prec_aw[crop] * fotr, 4)
+                for crop in risks
+            }
+            for k in range(n_scen)
+        ]
+
     def step(self):
         """
         Perform a single step of the behavior agent's actions.
@@ -357,10 +461,10 @@ class Behavior(mesa.Agent):
             self.make_dm_deliberation()
 
         # Retrieve opt info
-        dm_sols = self.dm_sols
-        self.gp_status = dm_sols.get("gp_status")
-        self.gp_MIPGap = dm_sols.get("gp_MIPGap")
-        self.gp_report = dm_sols.get("gp_report")
+        self._retrieve_dm_info()
+        budget = getattr(self.model, "solver_budget", None)
+        if budget is not None:
+            budget.finish(self.unique_id)
 
         ### Simulation
         # Note prec_aw_dict have to be updated externally first.
@@ -368,6 +472,45 @@ class Behavior(mesa.Agent):
 
         return self
 
+    def _retrieve_dm_info(self):
+        """Retrieve the solver information of the decision-making solutions."""
+        dm_sols = self.dm_sols
+        self.gp_status = dm_sols.get("gp_status")
+        self.gp_MIPGap = dm_sols.get("gp_MIPGap")
+        self.gp_Runtime = dm_sols.get("gp_Runtime")
+        self.gp_NodeCount = dm_sols.get("gp_NodeCount")
+        self.gp_report = dm_sols.get("gp_report")
+
+    def _get_dm_requests(self):
+        """
+        Get the decision problems to solve under the agent's CONSUMAT state
+        as a list of (state, neighbor) pairs for make_dm(), where the
+        previous decisions (pre_dm_sols) are given. See step_batch().
+        """
+        state = self.state
+        if state == "Imitation":
+            return [("Imitation", self._get_imitated_neighbor())]
+        if state == "Social comparison":
+            return [
+                ("Repetition" if neighbor is None else "Social comparison", neighbor)
+                for neighbor in self._get_candidates().values()
+            ]
+        if state == "Repetition":
+            return [("Repetition", None)]
+        if state in ("Deliberation", "FixCrop"):
+            return [("Deliberation", None)]
+        return []
+
+    def _set_dm_sols(self, sols_list):
+        """
+        Set the decision-making solutions given the solutions of the decision
+        problems from _get_dm_requests(). See step_batch().
+        """
+        if self.state == "Social comparison":
+            self._compare_candidates(self._get_candidates(), sols_list)
+        elif sols_list:
+            self.dm_sols = sols_list[0]
+
     def run_simulation(self):
         """
         Run the simulation for the Behavior agent for one time step.
@@ -394,9 +537,6 @@ class Behavior(mesa.Agent):
         prec_aw_step = self.model.prec_aw_step  # read prec_aw_step from mesa model
         aquifers = self.aquifers  # aquifer objects
         fields = self.fields  # field objects
-        wells = self.wells  # well objects
-        dm_dict = self.dm_dict  # decision-making settings
-        consumat_dict = self.consumat_dict  # CONSUMAT settings
         dm_sols = self.dm_sols  # optimization outputs
 
         ##### Simulate fields
@@ -412,30 +552,49 @@ class Behavior(mesa.Agent):
             )
 
         ##### Simulate wells (energy consumption)
-        allo_r = dm_sols["allo_r"]  # Well allocation ratio from optimization
-        allo_r_w = dm_sols["allo_r_w"]  # Well allocation ratio from optimization
+        # All the wells are simulated in one pass (see WellKernel), where
+        # pumping_days remains fixed.
+        wells = list(self.wells.values())
+        withdrawal, pumping_rate, l_pr = self._get_well_inputs()
+        dwl = np.array([aquifers[well.aquifer_id].dwl for well in wells])
+        self.well_kernel.step_wells(wells, withdrawal, dwl, pumping_rate, l_pr)
+
+        self._update_consumat()
+
+    def _get_well_inputs(self):
+        """
+        Get the withdrawal, pumping_rate, and l_pr of the wells (in the order
+        of self.wells) from the simulated fields and the well allocation
+        ratios. The total irrigation volume (irr_vol) is updated.
+        """
+        fields = self.fields
+        dm_sols = self.dm_sols
         field_ids = dm_sols["field_ids"]
         well_ids = dm_sols["well_ids"]
         self.irr_vol = sum([field.irr_vol_per_field for _, field in fields.items()])
 
-        for k, wid in enumerate(well_ids):
-            well = wells[wid]
-            # We only take first year optimization solution for simulation.
-            withdrawal = self.irr_vol * allo_r_w[k, 0]
-            pumping_rate = sum(
-                [
-                    fields[fid].pumping_rate * allo_r[f, k, 0]
-                    for f, fid in enumerate(field_ids)
-                ]
-            )
-            l_pr = sum(
-                [fields[fid].l_pr * allo_r[f, k, 0] for f, fid in enumerate(field_ids)]
-            )
-            dwl = aquifers[well.aquifer_id].dwl
-            # pumping_days remains fixed unless it is given.
-            well.step(
-                withdrawal=withdrawal, dwl=dwl, pumping_rate=pumping_rate, l_pr=l_pr
-            )
+        # We only take first year optimization solution for simulation.
+        order = [well_ids.index(wid) for wid in self.wells]
+        # Well allocation ratios from optimization
+        allo_r = dm_sols["allo_r"][:, order, 0]  # (n_f, n_w)
+        allo_r_w = dm_sols["allo_r_w"][order, 0]  # (n_w)
+        pumping_rates = np.array([fields[fid].pumping_rate for fid in field_ids])
+        l_prs = np.array([fields[fid].l_pr for fid in field_ids])
+        withdrawal = self.irr_vol * allo_r_w
+        pumping_rate = pumping_rates @ allo_r
+        l_pr = l_prs @ allo_r
+        return withdrawal, pumping_rate, l_pr
+
+    def _update_consumat(self):
+        """
+        Update the finance and the CONSUMAT state of the agent from the
+        simulated fields and wells. See run_simulation().
+        """
+        fields = self.fields  # field objects
+        wells = self.wells  # well objects
+        dm_dict = self.dm_dict  # decision-making settings
+        consumat_dict = self.consumat_dict  # CONSUMAT settings
+        dm_sols = self.dm_sols  # optimization outputs
 
         ##### Calulate profit and pumping cost
         self.finance.step(fields=fields, wells=wells)
@@ -526,32 +685,533 @@ class Behavior(mesa.Agent):
         optimization and constraints applied depend on the agent's current state, as defined
         by the CONSUMAT theory. The method returns updated decision-making solutions that
         guide the agent's actions in subsequent steps.
+
+        If "persistent_model" is True in the decision-making settings, the
+        optimization model is built once and kept by the agent. In the
+        subsequent calls, only the year-dependent data (e.g., precipitation,
+        water levels, prices, given decisions, and water rights) are updated in
+        place. The model is rebuilt only if its structure changes.
+
+        If the model has a decision_cache (see DecisionCache), the solution of
+        an identical decision problem solved before by any agent is reused.
+
+        If the model has model_templates (see ModelTemplates), a new
+        optimization model is copied from a template of the same structure
+        built before by any agent, and only the agent's data are filled in.
+
+        If "fast_fixed_choices" is True in the decision-making settings, the
+        decisions with given crop types and irrigation technologies (i.e., the
+        initial decisions, "Repetition", "Social comparison", and "Imitation")
+        are made by OptimizationFixedChoices, which optimizes the irrigation
+        depths without building a Gurobi model.
+
+        If "dominance_pruning" is True in the decision-making settings, the
+        crop types and irrigation technologies that are provably dominated
+        given the perceived precipitation and prices (see
+        screen_crop_options() and screen_tech_options()) are removed before
+        "Deliberation" models are built. The solutions are mapped back to all
+        the options.
+
+        If "prec_scenarios" (K) is given in the decision-making settings, the
+        decisions except the initial one are made over K equally probable
+        perceived precipitation scenarios centered on the perceived risk (see
+        process_percieved_risks() and get_perceived_prec_aw_scenarios()) in
+        one model, where the crop types,
+        rainfed option, and irrigation technologies are shared by all
+        scenarios. The expected irrigation depths over the scenarios are
+        applied.
+
+        If "approx_points" (k) is given in the decision-making settings, the
+        planning horizon is approximated with k evenly spaced years (see
+        "approx_horizon" in Optimization.setup_ini_model()), which keeps long
+        horizons with multi-year water rights affordable.
+
+        If "horizon_decomposition" is True in the decision-making settings,
+        the models over a planning horizon longer than a year are solved
+        year by year with OptimizationDecomposed, which falls back to a
+        single model if the decomposition fails. These models are not kept
+        or copied from the model templates.
+
+        If the model has a solver_budget (see SolverBudget), the TimeLimit
+        and MIPGap of the solve are assigned by the budget.
+
+        If "feasibility_preflight" is True in the decision-making settings,
+        the inputs that make the model infeasible (e.g., a remaining water
+        right overdrawn below zero) are relaxed to a fallback decision problem
+        with a warning before the model is built (see preflight_dm_args()).
         """
-        aquifers = self.aquifers  # aquifer objects
-        fields = self.fields  # field objects
-        wells = self.wells  # well objects
         dm_dict = self.dm_dict  # decision-making settings
-        consumat_dict = self.consumat_dict
+        pending = self._prepare_dm(state, dm_sols, neighbor, init)
+        if pending["sols"] is None:
+            # Assign the TimeLimit and MIPGap from the solver budget if the
+            # model has one.
+            budget = getattr(self.model, "solver_budget", None)
+            params = self.gb_dict
+            if budget is not None:
+                params = budget.get_params(self.unique_id, **params)
+            dm = pending["dm"]
+            dm.solve(
+                keep_gp_model=pending["keep_gp_model"] or budget is not None,
+                keep_gp_output=dm_dict["keep_gp_output"],
+                display_report=dm_dict["display_report"],
+                **params,
+            )
+            if budget is not None:
+                budget.record(self.unique_id, dm.sols, params)
+                if dm.sols.get("gp_status") == TIME_LIMIT and "obj" not in dm.sols:
+                    # No solution is found within the budget. Solve it again
+                    # with the agent's own settings.
+                    params = budget.get_fallback_params(**self.gb_dict)
+                    dm.resolve(display_report=dm_dict["display_report"], **params)
+                    budget.record(self.unique_id, dm.sols, params, requeued=True)
+                if not pending["keep_gp_model"] and dm.model is not None:
+                    dm.model.dispose()
+        return self._finish_dm(pending)
+
+    def _prepare_dm(
+        self,
+        state,
+        dm_sols,
+        neighbor=None,
+        init=False,
+        batch_keys=None,
+        defer_build=False,
+    ):
+        """
+        Set up the optimization model of make_dm() without solving it.
 
-        dm = self.optimization_class(
-            unique_id=self.unique_id,
-            log_to_console=self.gb_dict.get("LogToConsole"),
-            gpenv=self.model.gpenv,
+        Parameters
+        ----------
+        state : str
+            The CONSUMAT state of the decision. See make_dm().
+        dm_sols : dict
+            The previous decision-making solutions of the agent. See make_dm().
+        neighbor : Behavior, optional
+            The neighbor to compare with or imitate. See make_dm(). The
+            default is None.
+        init : bool, optional
+            If True, the initial decision is made. See make_dm(). The default
+            is False.
+        batch_keys : dict, optional
+            The pending decisions of the models to be solved in the same
+            batch, mapped by their decision cache keys. If the key of this
+            model is among them, the model is not set up and its solutions are
+            taken from the decision cache after the batch is solved (see
+            step_batch()). The default is None.
+        defer_build : bool, optional
+            If True, a model to be built from scratch and not kept by the
+            agent is not built. Instead, pending["job"] holds the inputs to
+            build and solve it elsewhere (see solve_dm_job()), and its
+            solutions are stored in pending["job_sols"]. The default is
+            False.
+
+        Returns
+        -------
+        dict
+            The pending decision, where "dm" is the optimization model to be
+            solved with keep_gp_model=pending["keep_gp_model"] and "sols" is
+            the solutions if they are taken from the decision cache. Pass it
+            to _finish_dm() after solving the model.
+        """
+        dm_dict = self.dm_dict  # decision-making settings
+        fields_args, wells_args, wrs_args = self._get_dm_args(
+            state, dm_sols, neighbor, init
+        )
+        # Relax the inputs that make the model infeasible before building it.
+        if dm_dict.get("feasibility_preflight", False):
+            fields_args, wells_args, wrs_args = self._preflight_dm_args(
+                fields_args, wells_args, wrs_args
+            )
+        pending = {
+            "dm": None,
+            "sols": None,
+            "options": None,
+            "cache_key": None,
+            "keep": False,
+            "keep_gp_model": dm_dict["keep_gp_model"],
+            "dm_key": None,
+            "wait": False,
+            "shared": False,
+            "discard": False,
+            "job": None,
+            "job_sols": None,
+        }
+
+        # Reuse the solution of an identical decision problem if the model has
+        # a decision cache.
+        if self._get_cached_dm(pending, fields_args, wells_args, wrs_args, batch_keys):
+            return pending
+
+        # Use the solver-free fast path if the crop types and irrigation
+        # technologies are all given.
+        fast = dm_dict.get("fast_fixed_choices", False) and all(
+            args["i_crop"] is not None and args["i_te"] is not None
+            for args in fields_args.values()
+        )
+        # Solve the model year by year if the horizon decomposition is on.
+        decompose = dm_dict.get("horizon_decomposition", False) and not fast
+        # Remove the dominated crop types and irrigation technologies before
+        # building the model if the dominance pruning is on. The reduced model
+        # is built from scratch and is not kept.
+        options = None
+        if dm_dict.get("dominance_pruning", False) and not fast:
+            options = self._screen_dm_options(fields_args)
+        # Reuse the agent's optimization model if the persistent mode is on and
+        # the model structure is unchanged. Only the year-dependent data are
+        # updated in place.
+        keep = (
+            dm_dict.get("persistent_model", False)
+            and not fast
+            and not decompose
+            and options is None
+        )
+        dm_key = self._get_dm_key(fields_args, wells_args)
+        dm, spec = self._build_dm(
+            fields_args,
+            wells_args,
+            wrs_args,
+            fast=fast,
+            decompose=decompose,
+            options=options,
+            reuse=keep and self.dm is not None and self.dm_key == dm_key,
+            defer=defer_build and not keep,
         )
 
-        dm.setup_ini_model(
-            target=dm_dict["target"],
-            horizon=dm_dict["horizon"],
-            area_split=self.model.area_split,
-            crop_options=self.model.crop_options,
-            tech_options=self.model.tech_options,
-            consumat_dict=consumat_dict,
-            approx_horizon=False,
-            gurobi_kwargs={},
+        job = None
+        if dm is None:
+            job = {
+                "spec": spec,
+                "start_sols": None,
+                "var_hint": False,
+                "tighten_bounds": dm_dict.get("tighten_bounds", False),
+            }
+
+        # Warm start from the previous decisions of the agent or the neighbor.
+        if dm_dict.get("warm_start", False) and not init:
+            self._set_dm_start(dm, job, dm_sols, neighbor, options)
+
+        if dm_dict.get("tighten_bounds", False) and job is None:
+            dm.tighten_bounds()
+
+        pending.update(
+            dm=dm,
+            job=job,
+            options=options,
+            keep=keep,
+            keep_gp_model=dm_dict["keep_gp_model"] or keep,
+            dm_key=dm_key,
+        )
+        return pending
+
+    def _preflight_dm_args(self, fields_args, wells_args, wrs_args):
+        """
+        Relax the inputs that make the optimization model infeasible with a
+        warning for each relaxed input. See preflight_dm_args().
+        """
+        fields_args, wells_args, wrs_args, issues = preflight_dm_args(
+            fields_args,
+            wells_args,
+            wrs_args,
+            {fi: field.water_yield_curves for fi, field in self.fields.items()},
+        )
+        for issue in issues:
+            warnings.warn(f"{self.unique_id}: {issue}", stacklevel=3)
+        return fields_args, wells_args, wrs_args
+
+    def _get_cached_dm(self, pending, fields_args, wells_args, wrs_args, batch_keys):
+        """
+        Take the solutions of a pending decision from the decision cache of
+        the model if it has one. Return True if the decision is taken from
+        the cache or waits for another model in the batch (see _prepare_dm()).
+        """
+        cache = getattr(self.model, "decision_cache", None)
+        if cache is None:
+            return False
+        cache_ids = list(self.fields) + list(self.wells)
+        cache_key = self._get_dm_cache_key(cache, fields_args, wells_args, wrs_args)
+        pending["cache_key"] = cache_key
+        cached_sols = cache.get(cache_key, cache_ids)
+        if cached_sols is not None:
+            pending["sols"] = cached_sols
+            return True
+        if batch_keys is not None:
+            if cache_key in batch_keys:
+                pending["wait"] = True
+                batch_keys[cache_key]["shared"] = True
+                return True
+            batch_keys[cache_key] = pending
+        return False
+
+    def _get_dm_key(self, fields_args, wells_args):
+        """
+        Get the structure of the optimization model, which must be unchanged
+        to reuse the agent's model under the persistent mode.
+        """
+        dm_dict = self.dm_dict
+        return (
+            tuple(self.fields),
+            tuple(self.wells),
+            tuple(w["pumping_capacity"] is None for w in wells_args.values()),
+            dm_dict["horizon"],
+            dm_dict.get("formulation", "nonconvex"),
+            dm_dict.get("pwl_breakpoints", 10),
+            dm_dict.get("solver", "gurobi"),
+            dm_dict.get("symmetry_breaking", False),
+            dm_dict.get("approx_points"),
+            self._get_n_scenarios(fields_args),
+            self.model.area_split,
+            tuple(self.model.crop_options),
+            tuple(self.model.tech_options),
         )
 
+    def _build_dm(
+        self, fields_args, wells_args, wrs_args, fast, decompose, options, reuse, defer
+    ):
+        """
+        Build the optimization model of _prepare_dm() or take it from the
+        agent or the model templates.
+
+        Parameters
+        ----------
+        fields_args, wells_args, wrs_args : dict
+            The inputs of the model. See _get_dm_args().
+        fast : bool
+            If True, the model is solved by OptimizationFixedChoices.
+        decompose : bool
+            If True, the model is solved by OptimizationDecomposed.
+        options : tuple or None
+            The indices of the crop types and irrigation technologies left by
+            the dominance pruning. None if the pruning is off.
+        reuse : bool
+            If True, the agent's model is updated in place.
+        defer : bool
+            If True, a model to be built from scratch is not built.
+
+        Returns
+        -------
+        tuple
+            (dm, spec), where dm is the model, or None if it is not built, and
+            spec is the inputs to build it elsewhere (see solve_dm_job()).
+
+        """
+        fields = self.fields
+        wells = self.wells
+        optimization_class = (
+            OptimizationDecomposed if decompose else self.optimization_class
+        )
+        if options is not None:
+            crop_idx, tech_idx = options
+            spec = self._get_dm_spec(
+                optimization_class,
+                {
+                    fi: {
+                        **args,
+                        "pre_i_crop": take_options(args["pre_i_crop"], crop_idx, 1),
+                        "pre_i_te": take_options(args["pre_i_te"], tech_idx, 0),
+                    }
+                    for fi, args in fields_args.items()
+                },
+                wells_args,
+                wrs_args,
+                crop_options=[self.model.crop_options[i] for i in crop_idx],
+                tech_options=[self.model.tech_options[i] for i in tech_idx],
+            )
+            dm = None if defer else setup_dm(spec, gpenv=self.model.gpenv)
+            return dm, spec
+        if reuse:
+            # Take the model out of the agent until the decision is finished.
+            dm = self.dm
+            self.dm = None
+            self.dm_key = None
+            self._update_dm(dm, fields_args, wells_args, wrs_args)
+            return dm, None
+
+        if self.dm is not None and not fast:
+            self.dispose_dm()
+        # Copy the model from a template of the same structure if the model has
+        # model templates.
+        templates = getattr(self.model, "model_templates", None)
+        if decompose or fast:
+            templates = None
+        dm = None
+        if templates is not None:
+            template_ids = list(fields) + list(wells)
+            template_key = self._get_dm_template_key(templates, fields_args, wells_args)
+            dm = templates.get(
+                template_key,
+                template_ids,
+                unique_id=self.unique_id,
+                log_to_console=self.gb_dict.get("LogToConsole"),
+                gpenv=self.model.gpenv,
+            )
+            if dm is not None:
+                self._update_dm(dm, fields_args, wells_args, wrs_args)
+                return dm, None
+        if defer and not fast and templates is None:
+            spec = self._get_dm_spec(
+                optimization_class, fields_args, wells_args, wrs_args
+            )
+            return None, spec
+        if fast:
+            optimization_class = OptimizationFixedChoices
+        dm = self._setup_dm(optimization_class, fields_args, wells_args, wrs_args)
+        if templates is not None:
+            templates.put(template_key, template_ids, dm)
+        return dm, None
+
+    def _set_dm_start(self, dm, job, dm_sols, neighbor, options):
+        """
+        Warm start the optimization model (or its job) of _prepare_dm() from
+        the previous decisions of the agent or the neighbor.
+        """
+        dm_dict = self.dm_dict
+        fields = self.fields
+        if neighbor is not None:
+            start_sols = {
+                fi: neighbor.pre_dm_sols[neighbor.field_ids[i]]
+                for i, fi in enumerate(fields)
+            }
+        else:
+            start_sols = dm_sols
+        if options is not None:
+            start_sols = reduce_sols(start_sols, list(fields), *options)
+        if job is not None:
+            job["start_sols"] = start_sols
+            job["var_hint"] = dm_dict.get("var_hint", False)
+        else:
+            dm.set_start(start_sols, var_hint=dm_dict.get("var_hint", False))
+
+    def _finish_dm(self, pending):
+        """
+        Collect the solutions of a pending decision from _prepare_dm() after
+        its optimization model is solved.
+
+        Returns
+        -------
+        dict
+            The decision-making solutions. See make_dm().
+        """
+        cache = getattr(self.model, "decision_cache", None)
+        cache_ids = list(self.fields) + list(self.wells)
+        if pending["wait"]:
+            # Solved by another model in the same batch
+            return cache.get(pending["cache_key"], cache_ids)
+        if pending["sols"] is not None:
+            return pending["sols"]
+
+        dm = pending["dm"]
+        options = pending["options"]
+        dm_sols = pending["job_sols"] if dm is None else dm.sols
+        if dm_sols is None:
+            warnings.warn(
+                "Gurobi returns empty solutions (likely due to infeasible problem.",
+                stacklevel=2,
+            )
+        elif options is not None and "obj" in dm_sols:
+            crop_idx, tech_idx = options
+            expand_sols(
+                dm_sols,
+                list(self.fields),
+                crop_idx,
+                len(self.model.crop_options),
+                tech_idx,
+                len(self.model.tech_options),
+            )
+        # Only optimal solutions are cached (e.g., not the ones stopped by the
+        # time limit), unless other models in the batch wait for them (see
+        # step_batch()).
+        if cache is not None and dm_sols is not None and "obj" in dm_sols:
+            optimal = dm_sols.get("gp_status") == GRB.OPTIMAL
+            if optimal or pending["shared"]:
+                cache.put(pending["cache_key"], cache_ids, dm_sols)
+                pending["discard"] = not optimal
+        if pending["keep"]:
+            # Keep the model and its environment for the next decision.
+            if self.dm is not None and self.dm is not dm:
+                self.dispose_dm()
+            self.dm = dm
+            self.dm_key = pending["dm_key"]
+        elif dm is not None:
+            dm.depose_gp_env()  # Delete the entire environment to release memory.
+
+        return dm_sols
+
+    def make_dm_batch(self, neighbors):
+        """
+        Make the decisions with the given crop types and irrigation
+        technologies of multiple candidates in one vectorized pass (see
+        solve_fixed_choices()).
+
+        Parameters
+        ----------
+        neighbors : list
+            The neighboring agents, whose previous crop types and irrigation
+            technologies are evaluated. None stands for the agent's own
+            previous choices (i.e., "Repetition").
+
+        Returns
+        -------
+        list
+            The decision-making solutions of the candidates.
+        """
+        dm_dict = self.dm_dict
+        cache = getattr(self.model, "decision_cache", None)
+        cache_ids = list(self.fields) + list(self.wells)
+        sols_list = [None] * len(neighbors)
+        dms = []
+        for i, neighbor in enumerate(neighbors):
+            state = "Repetition" if neighbor is None else "Social comparison"
+            fields_args, wells_args, wrs_args = self._get_dm_args(
+                state, self.pre_dm_sols, neighbor
+            )
+            cache_key = None
+            if cache is not None:
+                cache_key = self._get_dm_cache_key(
+                    cache, fields_args, wells_args, wrs_args
+                )
+                sols_list[i] = cache.get(cache_key, cache_ids)
+                if sols_list[i] is not None:
+                    continue
+            dm = self._setup_dm(
+                OptimizationFixedChoices, fields_args, wells_args, wrs_args
+            )
+            dms.append((i, dm, cache_key))
+
+        solve_fixed_choices(
+            [dm for _, dm, _ in dms],
+            display_report=dm_dict["display_report"],
+            **self.gb_dict,
+        )
+        for i, dm, cache_key in dms:
+            sols_list[i] = dm.sols
+            if (
+                cache is not None
+                and "obj" in dm.sols
+                and dm.sols.get("gp_status") == GRB.OPTIMAL
+            ):
+                cache.put(cache_key, cache_ids, dm.sols)
+            dm.depose_gp_env()
+        return sols_list
+
+    def _get_dm_args(self, state, dm_sols, neighbor=None, init=False):
+        """
+        Collect the inputs of the fields, wells, and water rights for the
+        optimization model. See make_dm().
+
+        Returns
+        -------
+        tuple
+            (fields_args, wells_args, wrs_args)
+
+        """
+        aquifers = self.aquifers  # aquifer objects
+        fields = self.fields  # field objects
+        wells = self.wells  # well objects
+        dm_dict = self.dm_dict  # decision-making settings
+
         perceived_prec_aw = self.perceived_prec_aw
         current_year = self.model.current_year
+        fields_args = {}
         for i, (fi, field) in enumerate(fields.items()):
             # Note: Since field type is given as an input, we do not constrain
             # i_rainfed under any condition. Behavior agent will only adopt
@@ -561,51 +1221,21 @@ class Behavior(mesa.Agent):
             if init:
                 # Optimize irrigation depth with others variables given.
                 # Apply the actual prec_aw (not the perceived one)
-                dm.setup_constr_field(
-                    field_id=fi,
-                    field_area=field.field_area,
-                    prec_aw=self.model.prec_aw_step[field.prec_aw_id][current_year],
-                    water_yield_curves=field.water_yield_curves,
-                    tech_pumping_rate_coefs=field.tech_pumping_rate_coefs,
-                    pre_i_crop=dm_sols_fi["i_crop"],
-                    pre_i_te=dm_sols_fi["i_te"],
-                    field_type=field.field_type,
-                    i_crop=dm_sols_fi["i_crop"],
-                    i_rainfed=None,
-                    i_te=dm_sols_fi["i_te"],
-                )
+                prec_aw = self.model.prec_aw_step[field.prec_aw_id][current_year]
+                i_crop = dm_sols_fi["i_crop"]
+                i_te = dm_sols_fi["i_te"]
 
             elif state == "Deliberation":
                 # optimize irrigation depth, crop choice, tech choice
-                dm.setup_constr_field(
-                    field_id=fi,
-                    field_area=field.field_area,
-                    prec_aw=perceived_prec_aw[fi][current_year],
-                    water_yield_curves=field.water_yield_curves,
-                    tech_pumping_rate_coefs=field.tech_pumping_rate_coefs,
-                    pre_i_crop=dm_sols_fi["i_crop"],
-                    pre_i_te=dm_sols_fi["i_te"],
-                    field_type=field.field_type,
-                    i_crop=None,
-                    i_rainfed=None,
-                    i_te=None,
-                )
+                prec_aw = perceived_prec_aw[fi][current_year]
+                i_crop = None
+                i_te = None
 
             elif state == "Repetition":
                 # only optimize irrigation depth
-                dm.setup_constr_field(
-                    field_id=fi,
-                    field_area=field.field_area,
-                    prec_aw=perceived_prec_aw[fi][current_year],
-                    water_yield_curves=field.water_yield_curves,
-                    tech_pumping_rate_coefs=field.tech_pumping_rate_coefs,
-                    pre_i_crop=dm_sols_fi["i_crop"],
-                    pre_i_te=dm_sols_fi["i_te"],
-                    field_type=field.field_type,
-                    i_crop=dm_sols_fi["i_crop"],
-                    i_rainfed=None,
-                    i_te=dm_sols_fi["i_te"],
-                )
+                prec_aw = perceived_prec_aw[fi][current_year]
+                i_crop = dm_sols_fi["i_crop"]
+                i_te = dm_sols_fi["i_te"]
 
             else:  # social comparason & imitation
                 # We assume this behavioral agent has the same number of fields
@@ -613,46 +1243,41 @@ class Behavior(mesa.Agent):
                 # A small patch may be needed in the future to generalize this.
                 fi_neighbor = neighbor.field_ids[i]
                 dm_sols_neighbor_fi = neighbor.pre_dm_sols[fi_neighbor]
+                prec_aw = perceived_prec_aw[fi][current_year]
+                i_crop = dm_sols_neighbor_fi["i_crop"]
+                i_te = dm_sols_neighbor_fi["i_te"]
+
+            if not init and dm_dict.get("prec_scenarios"):
+                # Use the precipitation scenarios instead
+                prec_aw = self.get_perceived_prec_aw_scenarios(fi, current_year)
+
+            fields_args[fi] = {
+                "prec_aw": prec_aw,
+                "pre_i_crop": dm_sols_fi["i_crop"],
+                "pre_i_te": dm_sols_fi["i_te"],
+                "field_type": field.field_type,
+                "i_crop": i_crop,
+                "i_rainfed": None,
+                "i_te": i_te,
+            }
 
-                dm.setup_constr_field(
-                    field_id=fi,
-                    field_area=field.field_area,
-                    prec_aw=perceived_prec_aw[fi][current_year],
-                    water_yield_curves=field.water_yield_curves,
-                    tech_pumping_rate_coefs=field.tech_pumping_rate_coefs,
-                    pre_i_crop=dm_sols_fi["i_crop"],
-                    pre_i_te=dm_sols_fi["i_te"],
-                    field_type=field.field_type,
-                    i_crop=dm_sols_neighbor_fi["i_crop"],
-                    i_rainfed=None,
-                    i_te=dm_sols_neighbor_fi["i_te"],
-                )
-
+        wells_args = {}
         for wi, well in wells.items():
             aquifer_id = well.aquifer_id
             proj_dwl = np.mean(aquifers[aquifer_id].dwl_list[-dm_dict["n_dwl"] :])
-
-            dm.setup_constr_well(
-                well_id=wi,
-                dwl=proj_dwl,
-                st=well.st,
-                l_wt=well.l_wt,
-                r=well.r,
-                k=well.k,
-                sy=well.sy,
-                eff_pump=well.eff_pump,
-                eff_well=well.eff_well,
-                pumping_days=well.pumping_days,
-                pumping_capacity=well.pumping_capacity,
-                rho=well.rho,
-                g=well.g,
-            )
+            wells_args[wi] = {
+                "dwl": proj_dwl,
+                "st": well.st,
+                "l_wt": well.l_wt,
+                "pumping_capacity": well.pumping_capacity,
+            }
 
         if init:  # Inputted
             wr_dict = self.wr_dict
         else:  # Use agent's own water rights (for social comparison and imitation)
             wr_dict = dm_sols["water_rights"]
 
+        wrs_args = {}
         for wr_id, v in self.wr_dict.items():
             if v["status"]:  # Check whether the wr is activated
                 # Extract the water right setting from the previous opt run,
@@ -663,44 +1288,351 @@ class Behavior(mesa.Agent):
                 if (
                     wr_args is None
                 ):  # when we introduce the water rights for the first time (LEMA)
-                    dm.setup_constr_wr(
-                        water_right_id=wr_id,
-                        wr_depth=v["wr_depth"],
-                        applied_field_ids=v["applied_field_ids"],
-                        time_window=v["time_window"],
-                        remaining_tw=v["remaining_tw"],
-                        remaining_wr=v["remaining_wr"],
-                        tail_method=v["tail_method"],
-                    )
-                else:
-                    dm.setup_constr_wr(
-                        water_right_id=wr_id,
-                        wr_depth=wr_args["wr_depth"],
-                        applied_field_ids=wr_args["applied_field_ids"],
-                        time_window=wr_args["time_window"],
-                        remaining_tw=wr_args["remaining_tw"],
-                        remaining_wr=wr_args["remaining_wr"],
-                        tail_method=wr_args["tail_method"],
+                    wr_args = v
+                wrs_args[wr_id] = {
+                    "wr_depth": wr_args["wr_depth"],
+                    "applied_field_ids": wr_args["applied_field_ids"],
+                    "time_window": wr_args["time_window"],
+                    "remaining_tw": wr_args["remaining_tw"],
+                    "remaining_wr": wr_args["remaining_wr"],
+                    "tail_method": wr_args["tail_method"],
+                }
+
+        return fields_args, wells_args, wrs_args
+
+    def _get_dm_cache_key(self, cache, fields_args, wells_args, wrs_args):
+        """
+        Build the fingerprint of the decision problem for the decision cache.
+        The field and well ids are replaced by their positions so that the
+        solutions can be shared among agents.
+        """
+        fields = self.fields
+        wells = self.wells
+        dm_dict = self.dm_dict
+        consumat_dict = self.consumat_dict
+        budget = getattr(self.model, "solver_budget", None)
+        return cache.make_key(
+            {
+                "optimization_class": self.optimization_class.__qualname__,
+                "decision_making": {
+                    k: dm_dict.get(k)
+                    for k in (
+                        "target",
+                        "horizon",
+                        "formulation",
+                        "pwl_breakpoints",
+                        "solver",
+                        "symmetry_breaking",
+                        "approx_points",
+                        "horizon_decomposition",
+                        "fast_fixed_choices",
+                        "dominance_pruning",
+                        "tighten_bounds",
+                        "prec_scenarios",
                     )
+                },
+                "consumat": consumat_dict,
+                "gurobi": self.gb_dict,
+                # The MIPGap may be loosened by the solver budget.
+                "solver_budget": None
+                if budget is None
+                else (budget.mip_gap, budget.max_gap),
+                "area_split": self.model.area_split,
+                "crop_options": self.model.crop_options,
+                "tech_options": self.model.tech_options,
+                "fields": {
+                    fi: {
+                        "field_area": field.field_area,
+                        "water_yield_curves": field.water_yield_curves,
+                        "tech_pumping_rate_coefs": field.tech_pumping_rate_coefs,
+                        **fields_args[fi],
+                    }
+                    for fi, field in fields.items()
+                },
+                "wells": {
+                    wi: {
+                        "r": well.r,
+                        "k": well.k,
+                        "sy": well.sy,
+                        "eff_pump": well.eff_pump,
+                        "eff_well": well.eff_well,
+                        "pumping_days": well.pumping_days,
+                        "rho": well.rho,
+                        "g": well.g,
+                        **wells_args[wi],
+                    }
+                    for wi, well in wells.items()
+                },
+                "water_rights": wrs_args,
+                "finance": self.finance.finance_dict,
+            },
+            list(fields) + list(wells),
+        )
 
-        dm.setup_constr_finance(self.finance.finance_dict)
-        dm.setup_obj(alpha_dict=None)  # no dynamic update for alpha.
-        dm.finish_setup(display_summary=dm_dict["display_summary"])
-        dm.solve(
-            keep_gp_model=dm_dict["keep_gp_model"],
-            keep_gp_output=dm_dict["keep_gp_output"],
-            display_report=dm_dict["display_report"],
-            **self.gb_dict,
+    def _get_dm_template_key(self, templates, fields_args, wells_args):
+        """
+        Build the fingerprint of the model structure for the model templates.
+        The inputs that can be updated in place (see _update_dm()) are
+        excluded.
+        """
+        fields = self.fields
+        wells = self.wells
+        dm_dict = self.dm_dict
+        return templates.make_key(
+            {
+                "optimization_class": self.optimization_class.__qualname__,
+                "decision_making": {
+                    k: dm_dict.get(k)
+                    for k in (
+                        "target",
+                        "horizon",
+                        "formulation",
+                        "pwl_breakpoints",
+                        "solver",
+                        "symmetry_breaking",
+                        "approx_points",
+                        "gurobi_names",
+                    )
+                },
+                "consumat": self.consumat_dict,
+                "n_scenarios": self._get_n_scenarios(fields_args),
+                "area_split": self.model.area_split,
+                "crop_options": self.model.crop_options,
+                "tech_options": self.model.tech_options,
+                "fields": {
+                    fi: {
+                        "field_area": field.field_area,
+                        "water_yield_curves": field.water_yield_curves,
+                        "tech_pumping_rate_coefs": field.tech_pumping_rate_coefs,
+                    }
+                    for fi, field in fields.items()
+                },
+                "wells": {
+                    wi: {
+                        "eff_pump": well.eff_pump,
+                        "rho": well.rho,
+                        "g": well.g,
+                        "pumping_capacity": wells_args[wi]["pumping_capacity"]
+                        is None,
+                    }
+                    for wi, well in wells.items()
+                },
+            },
+            list(fields) + list(wells),
         )
-        dm_sols = dm.sols
-        if dm_sols is None:
-            warnings.warn(
-                "Gurobi returns empty solutions (likely due to infeasible problem.",
-                stacklevel=2,
+
+    def _update_dm(self, dm, fields_args, wells_args, wrs_args):
+        """
+        Update the data of an existing optimization model in place, i.e., the
+        model kept under the persistent mode or copied from a template. See
+        make_dm().
+        """
+        for fi, field_args in fields_args.items():
+            dm.update_constr_field(field_id=fi, **field_args)
+        for wi, well in self.wells.items():
+            dm.update_constr_well(
+                well_id=wi,
+                r=well.r,
+                k=well.k,
+                sy=well.sy,
+                eff_well=well.eff_well,
+                pumping_days=well.pumping_days,
+                **wells_args[wi],
             )
-        dm.depose_gp_env()  # Delete the entire environment to release memory.
+        dm.remove_constr_wr()
+        for wr_id, wr_args in wrs_args.items():
+            dm.setup_constr_wr(water_right_id=wr_id, **wr_args)
+        dm.update_constr_finance(self.finance.finance_dict)
 
-        return dm_sols
+    def _screen_dm_options(self, fields_args):
+        """
+        Screen the crop types and irrigation technologies of a decision with
+        both to be optimized. Only the profit target with the "nonconvex" or
+        "convex" formulation is screened since the dominance is derived from
+        the exact water-yield curves and the revenue. See make_dm().
+
+        Returns
+        -------
+        tuple or None
+            The indices of the kept crop types and techs. None if nothing is
+            removed.
+
+        """
+        dm_dict = self.dm_dict
+        if dm_dict["target"] != "profit" or dm_dict.get(
+            "formulation", "nonconvex"
+        ) not in ("nonconvex", "convex"):
+            return None
+        if any(
+            args["i_crop"] is not None
+            or args["i_rainfed"] is not None
+            or args["i_te"] is not None
+            for args in fields_args.values()
+        ):
+            return None
+        crop_options = self.model.crop_options
+        tech_options = self.model.tech_options
+        finance_dict = self.finance.finance_dict
+        crop_idx = screen_crop_options(
+            crop_options,
+            [
+                {
+                    "water_yield_curves": field.water_yield_curves,
+                    "prec_aw": fields_args[fi]["prec_aw"],
+                    "pre_i_crop": fields_args[fi]["pre_i_crop"],
+                }
+                for fi, field in self.fields.items()
+            ],
+            finance_dict,
+        )
+        tech_idx = screen_tech_options(
+            tech_options,
+            [
+                {
+                    "tech_pumping_rate_coefs": field.tech_pumping_rate_coefs,
+                    "pre_i_te": fields_args[fi]["pre_i_te"],
+                }
+                for fi, field in self.fields.items()
+            ],
+            finance_dict,
+        )
+        if len(crop_idx) == len(crop_options) and len(tech_idx) == len(tech_options):
+            return None
+        return crop_idx, tech_idx
+
+    def _setup_dm(
+        self,
+        optimization_class,
+        fields_args,
+        wells_args,
+        wrs_args,
+        crop_options=None,
+        tech_options=None,
+    ):
+        """
+        Create an optimization model with the given class and set up the
+        fields, wells, water rights, finance, and objective. See make_dm().
+        The crop types and irrigation technologies of the model are used if
+        crop_options and tech_options are not given.
+
+        Returns
+        -------
+        object
+            The optimization model ready to be solved.
+
+        """
+        spec = self._get_dm_spec(
+            optimization_class,
+            fields_args,
+            wells_args,
+            wrs_args,
+            crop_options,
+            tech_options,
+        )
+        return setup_dm(spec, gpenv=self.model.gpenv)
+
+    def _get_dm_spec(
+        self,
+        optimization_class,
+        fields_args,
+        wells_args,
+        wrs_args,
+        crop_options=None,
+        tech_options=None,
+    ):
+        """
+        Collect the inputs of _setup_dm() into a picklable dictionary, from
+        which setup_dm() builds the model without the agent (e.g., in a
+        worker process of DecisionPool).
+        """
+        fields = self.fields
+        wells = self.wells
+        dm_dict = self.dm_dict
+        # Approximate the planning horizon with a few points if given.
+        approx_points = dm_dict.get("approx_points")
+        return {
+            "optimization_class": optimization_class,
+            "unique_id": self.unique_id,
+            "log_to_console": self.gb_dict.get("LogToConsole"),
+            "names": dm_dict.get("gurobi_names", True),
+            "ini_model": {
+                "target": dm_dict["target"],
+                "horizon": dm_dict["horizon"],
+                "area_split": self.model.area_split,
+                "crop_options": self.model.crop_options
+                if crop_options is None
+                else crop_options,
+                "tech_options": self.model.tech_options
+                if tech_options is None
+                else tech_options,
+                "consumat_dict": self.consumat_dict,
+                "approx_horizon": approx_points is not None,
+                "gurobi_kwargs": {},
+                "formulation": dm_dict.get("formulation", "nonconvex"),
+                "pwl_breakpoints": dm_dict.get("pwl_breakpoints", 10),
+                "solver": dm_dict.get("solver", "gurobi"),
+                "symmetry_breaking": dm_dict.get("symmetry_breaking", False),
+                "scenario_weights": self._get_scenario_weights(fields_args),
+                "approx_points": 2 if approx_points is None else approx_points,
+            },
+            "fields": {
+                fi: {
+                    "field_area": field.field_area,
+                    "water_yield_curves": field.water_yield_curves,
+                    "tech_pumping_rate_coefs": field.tech_pumping_rate_coefs,
+                    **fields_args[fi],
+                }
+                for fi, field in fields.items()
+            },
+            "wells": {
+                wi: {
+                    "r": well.r,
+                    "k": well.k,
+                    "sy": well.sy,
+                    "eff_pump": well.eff_pump,
+                    "eff_well": well.eff_well,
+                    "pumping_days": well.pumping_days,
+                    "rho": well.rho,
+                    "g": well.g,
+                    **wells_args[wi],
+                }
+                for wi, well in wells.items()
+            },
+            "water_rights": wrs_args,
+            "finance_dict": self.finance.finance_dict,
+            "display_summary": dm_dict["display_summary"],
+        }
+
+    def _get_n_scenarios(self, fields_args):
+        """Get the number of the precipitation scenarios of the inputs."""
+        prec_aw = next(iter(fields_args.values()))["prec_aw"]
+        return len(prec_aw) if isinstance(prec_aw, list) else 1
+
+    def _get_scenario_weights(self, fields_args):
+        """
+        Get the weights of the equally probable precipitation scenarios. None
+        if the precipitation is given as a single perception.
+        """
+        prec_aw = next(iter(fields_args.values()))["prec_aw"]
+        if not isinstance(prec_aw, list):
+            return None
+        return [1 / len(prec_aw)] * len(prec_aw)
+
+    def dispose_dm(self):
+        """
+        Dispose the optimization model and its Gurobi environment kept under
+        the persistent mode (i.e., "persistent_model" is True in the
+        decision-making settings).
+
+        Returns
+        -------
+        None
+        """
+        if self.dm is not None:
+            self.dm.model.dispose()
+            self.dm.depose_gp_env()
+        self.dm = None
+        self.dm_key = None
 
     def make_dm_deliberation(self):
         """
@@ -751,19 +1683,53 @@ class Behavior(mesa.Agent):
         3. Compares the agent's original choice with the selected agent's choice.
 
         4. Updates the `dm_sols` attribute based on the comparison.
+
+        Identical candidate decisions (i.e., crop types and irrigation
+        technologies) among the neighbors and the agent's original choice are
+        evaluated only once. If "batch_social_comparison" is True in the
+        decision-making settings, all the candidates are evaluated in one
+        vectorized pass (see make_dm_batch()).
+        """
+        candidates = self._get_candidates()
+        if self.dm_dict.get("batch_social_comparison", False):
+            sols_list = self.make_dm_batch(list(candidates.values()))
+        else:
+            sols_list = [
+                self.make_dm(
+                    state="Repetition" if neighbor is None else "Social comparison",
+                    dm_sols=self.pre_dm_sols,
+                    neighbor=neighbor,
+                )
+                for neighbor in candidates.values()
+            ]
+        self._compare_candidates(candidates, sols_list)
+
+    def _get_candidates(self):
+        """
+        Get the unique candidate decisions of the "Social comparison" state
+        as a dictionary of the neighbors keyed by their choices (see
+        _get_choices_key()), where None stands for the agent's original
+        choice.
+        """
+        # !!! Here we assume no. fields, n_c and split are the same across agents
+        # Keep this for now.
+        neighbors = [self.model.behaviors[bid] for bid in self.behavior_ids_in_network]
+        candidates = {}
+        for neighbor in [*neighbors, None]:
+            candidates.setdefault(self._get_choices_key(neighbor), neighbor)
+        return candidates
+
+    def _compare_candidates(self, candidates, sols_list):
+        """
+        Select the decision-making solutions of the "Social comparison" state
+        given the solutions of the candidates from _get_candidates().
         """
         behavior_ids_in_network = self.behavior_ids_in_network
+        neighbors = [self.model.behaviors[bid] for bid in behavior_ids_in_network]
+        sols_dict = dict(zip(candidates, sols_list, strict=True))
+
         # Evaluate comparable
-        dm_sols_list = []
-        for behavior_id in behavior_ids_in_network:
-            # !!! Here we assume no. fields, n_c and split are the same across agents
-            # Keep this for now.
-            dm_sols = self.make_dm(
-                state="Social comparison",
-                dm_sols=self.pre_dm_sols,
-                neighbor=self.model.behaviors[behavior_id],
-            )
-            dm_sols_list.append(dm_sols)
+        dm_sols_list = [sols_dict[self._get_choices_key(n)] for n in neighbors]
         objs = [s["obj"] for s in dm_sols_list]
         max_obj = max(objs)
         select_behavior_index = objs.index(max_obj)
@@ -772,12 +1738,31 @@ class Behavior(mesa.Agent):
         ]
 
         # Agent's original choice
-        dm_sols = self.make_dm(state="Repetition", dm_sols=self.pre_dm_sols)
+        dm_sols = sols_dict[self._get_choices_key(None)]
         if dm_sols["obj"] >= max_obj:
             self.dm_sols = dm_sols
         else:
             self.dm_sols = dm_sols_list[select_behavior_index]
 
+    def _get_choices_key(self, neighbor=None):
+        """
+        Get a hashable key of the crop types and irrigation technologies of
+        the neighbor or the agent's own (if neighbor is None) previous
+        decisions.
+        """
+        if neighbor is None:
+            sols = [self.pre_dm_sols[fi] for fi in self.field_ids]
+        else:
+            sols = [neighbor.pre_dm_sols[fi] for fi in neighbor.field_ids]
+        key = []
+        for sols_fi in sols[: len(self.field_ids)]:
+            for v in (sols_fi["i_crop"], sols_fi["i_te"]):
+                if isinstance(v, str):
+                    key.append(v)
+                else:
+                    key.append(tuple(np.asarray(v, dtype=float).ravel().round(6)))
+        return tuple(key)
+
     def make_dm_imitation(self):
         """
         Make decision under the "Imitation" CONSUMAT state.
@@ -795,6 +1780,14 @@ class Behavior(mesa.Agent):
         2. Updates the `dm_sols` attribute by calling the `make_dm` method
            with the current state set to "Imitation" and using the selected agent's solutions.
         """
+        neighbor = self._get_imitated_neighbor()
+
+        self.dm_sols = self.make_dm(
+            state="Imitation", dm_sols=self.pre_dm_sols, neighbor=neighbor
+        )
+
+    def _get_imitated_neighbor(self):
+        """Get the neighbor imitated under the "Imitation" state."""
         selected_behavior_id_in_network = self.selected_behavior_id_in_network
         if selected_behavior_id_in_network is None:
             try:  # if rngen is given in the model
@@ -806,11 +1799,7 @@ class Behavior(mesa.Agent):
                     self.behavior_ids_in_network
                 )
 
-        neighbor = self.model.behaviors[selected_behavior_id_in_network]
-
-        self.dm_sols = self.make_dm(
-            state="Imitation", dm_sols=self.pre_dm_sols, neighbor=neighbor
-        )
+        return self.model.behaviors[selected_behavior_id_in_network]
 
 
 class Behavior4SingleFieldAndWell(mesa.Agent):
@@ -1326,7 +2315,7 @@ class Behavior4SingleFieldAndWell(mesa.Agent):
             dm.setup_constr_well(
                 well_id=wi,
                 dwl=proj_dwl,
-                B=well.B,
+                b=well.B,
                 l_wt=well.l_wt,
                 eff_pump=well.eff_pump,
                 pumping_capacity=well.pumping_capacity,
@@ -2107,7 +3096,7 @@ class Behavior_1f1w_ci(mesa.Agent):
             dm.setup_constr_well(
                 well_id=wi,
                 dwl=proj_dwl,
-                B=well.B,
+                b=well.B,
                 l_wt=well.l_wt,
                 eff_pump=well.eff_pump,
                 pumping_capacity=well.pumping_capacity,
@@ -2281,3 +3270,377 @@ class Behavior_1f1w_ci(mesa.Agent):
         self.dm_sols = self.make_dm(
             state="Imitation", dm_sols=self.pre_dm_sols, neighbor=neighbor
         )
+
+
+def setup_dm(spec, gpenv=None):
+    """
+    Build an optimization model from the inputs collected by
+    Behavior._get_dm_spec().
+
+    Parameters
+    ----------
+    spec : dict
+        The inputs of the model.
+    gpenv : object, optional
+        See Optimization.__init__(). The default Gurobi environment of the
+        process is used if None. The default is None.
+
+    Returns
+    -------
+    object
+        The optimization model ready to be solved.
+
+    """
+    dm = spec["optimization_class"](
+        unique_id=spec["unique_id"],
+        log_to_console=spec["log_to_console"],
+        gpenv=gpenv,
+        names=spec["names"],
+    )
+    dm.setup_ini_model(**spec["ini_model"])
+    for fi, field_args in spec["fields"].items():
+        dm.setup_constr_field(field_id=fi, **field_args)
+    for wi, well_args in spec["wells"].items():
+        dm.setup_constr_well(well_id=wi, **well_args)
+    for wr_id, wr_args in spec["water_rights"].items():
+        dm.setup_constr_wr(water_right_id=wr_id, **wr_args)
+    dm.setup_constr_finance(spec["finance_dict"])
+    dm.setup_obj(alpha_dict=None)  # no dynamic update for alpha.
+    dm.finish_setup(display_summary=spec["display_summary"])
+    return dm
+
+
+def solve_dm_job(job, gpenv=None, **kwargs):
+    """
+    Build and solve an optimization model left by Behavior._prepare_dm()
+    with defer_build=True.
+
+    Parameters
+    ----------
+    job : dict
+        pending["job"] of the pending decision.
+    gpenv : object, optional
+        See setup_dm(). The default is None.
+    **kwargs :
+        The arguments of solve() (e.g., display_report and the Gurobi
+        settings).
+
+    Returns
+    -------
+    dict
+        The solutions of the model (dm.sols).
+
+    """
+    dm = setup_dm(job["spec"], gpenv=gpenv)
+    if job["start_sols"] is not None:
+        dm.set_start(job["start_sols"], var_hint=job["var_hint"])
+    if job["tighten_bounds"]:
+        dm.tighten_bounds()
+    dm.solve(keep_gp_model=False, **kwargs)
+    if gpenv is not None:
+        dm.depose_gp_env()
+    return dm.sols
+
+
+def step_batch(behaviors, pool=None, merge=True, store=None):
+    """
+    Step the Behavior agents in order with their optimization models solved
+    in batches, which gives the same results as calling step() of each
+    agent in order, up to alternative optima of the models.
+
+    The step has two phases. First, the optimization models of all the
+    agents are set up, and the models of the agents in the same CONSUMAT
+    state are solved together in one block-diagonal model (see
+    solve_batch()). Then, the decisions are applied and simulated agent by
+    agent. This works since the decisions of the agents depend only on the
+    previous decisions (pre_dm_sols) and the states at the beginning of the
+    step. The identical decision problems in a batch are solved once if the
+    model has a decision cache.
+
+    If the model has a solver_budget (see SolverBudget), the TimeLimit and
+    MIPGap of each batch are assigned by the budget, and the solves stopped
+    by the time limit are re-queued with the budget left before the
+    decisions are applied.
+
+    The agents keeping the Gurobi output ("keep_gp_output") or evaluating
+    the "Social comparison" candidates with "batch_social_comparison" make
+    their decisions by themselves in the first phase.
+
+    If a pool (see DecisionPool) is given, the optimization models that are
+    built from scratch and not kept by the agents are built and solved one
+    by one in the worker processes of the pool instead, which gives the
+    same results as the serial step. The other models (e.g., the ones kept
+    under the persistent mode or copied from the model templates) are
+    solved in this process as above while the workers run. The solves in
+    the pool are recorded by the solver budget but are not re-queued.
+
+    If a store (see StateStore) is given, the fields and the wells of all
+    the agents are simulated in one vectorized call each (see
+    run_simulation_batch()).
+
+    Parameters
+    ----------
+    behaviors : list
+        The Behavior agents in the order of their steps.
+    pool : DecisionPool, optional
+        The pool of worker processes solving the models. The default is
+        None.
+    merge : bool, optional
+        If False, the models of the agents in the same state are solved one
+        by one instead of in one block-diagonal model. The default is True.
+    store : StateStore, optional
+        The state store of the fields, wells, and aquifers of the agents.
+        The default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+    if not behaviors:
+        return
+    budget = getattr(behaviors[0].model, "solver_budget", None)
+
+    # Set up the optimization models
+    batch_keys = {}
+    groups = {}
+    solved = []  # (behavior, pending, params) of the solved models
+    submitted = []  # (behavior, pending, params, future) of the pool jobs
+    pendings_list = [
+        _prepare_batch_dms(behavior, batch_keys, pool, groups, solved, submitted)
+        for behavior in behaviors
+    ]
+
+    # Solve the models of the agents in the same state together
+    solved += _solve_batch_groups(groups, merge)
+
+    for behavior, pending, params, future in submitted:
+        pending["job_sols"] = future.result()
+        if budget is not None:
+            budget.record(behavior.unique_id, pending["job_sols"], params)
+
+    if budget is not None:
+        _requeue_batch_dms(solved, budget)
+
+    sols_lists = _collect_batch_dms(behaviors, pendings_list, batch_keys)
+
+    # Apply the decisions and run the simulation in order
+    for behavior, sols_list in zip(behaviors, sols_lists, strict=True):
+        if sols_list is not None:
+            behavior._set_dm_sols(sols_list)
+        behavior._retrieve_dm_info()
+        if budget is not None:
+            budget.finish(behavior.unique_id)
+        if store is None:
+            behavior.run_simulation()
+    if store is not None:
+        run_simulation_batch(behaviors, store)
+
+
+def _prepare_batch_dms(behavior, batch_keys, pool, groups, solved, submitted):
+    """
+    Set up the optimization models of an agent's decisions in step_batch()
+    and dispatch them (see _dispatch_batch_dm()). Return the pending
+    decisions, or None if the agent makes its decisions by itself.
+    """
+    behavior.t += 1
+    dm_dict = behavior.dm_dict
+    if behavior.state == "Social comparison" and dm_dict.get(
+        "batch_social_comparison", False
+    ):
+        behavior.make_dm_social_comparison()
+        return None
+    pendings = [
+        behavior._prepare_dm(
+            dm_state,
+            behavior.pre_dm_sols,
+            neighbor,
+            batch_keys=batch_keys,
+            defer_build=pool is not None and not dm_dict["keep_gp_output"],
+        )
+        for dm_state, neighbor in behavior._get_dm_requests()
+    ]
+    to_solve = [
+        pending
+        for pending in pendings
+        if pending["dm"] is not None or pending["job"] is not None
+    ]
+    for pending in to_solve:
+        _dispatch_batch_dm(
+            behavior, pending, len(to_solve), pool, groups, solved, submitted
+        )
+    return pendings
+
+
+def _dispatch_batch_dm(behavior, pending, n_solves, pool, groups, solved, submitted):
+    """
+    Submit a pending decision of step_batch() to the pool, solve it if the
+    agent keeps the Gurobi output, or add it to the group of its state.
+    """
+    dm_dict = behavior.dm_dict
+    budget = getattr(behavior.model, "solver_budget", None)
+    params = behavior.gb_dict
+    if budget is not None:
+        params = budget.get_params(behavior.unique_id, n_solves=n_solves, **params)
+    if pending["job"] is not None:
+        future = pool.submit(
+            pending["job"], display_report=dm_dict["display_report"], **params
+        )
+        submitted.append((behavior, pending, params, future))
+        return
+    if dm_dict["keep_gp_output"]:
+        pending["dm"].solve(
+            keep_gp_model=pending["keep_gp_model"] or budget is not None,
+            keep_gp_output=True,
+            display_report=dm_dict["display_report"],
+            **params,
+        )
+        solved.append((behavior, pending, params))
+        return
+    key = (
+        behavior.state,
+        pending["keep_gp_model"] or budget is not None,
+        dm_dict["display_report"],
+        tuple(sorted(behavior.gb_dict.items())),
+    )
+    groups.setdefault(key, []).append((behavior, pending, params))
+
+
+def _solve_batch_groups(groups, merge):
+    """
+    Solve the models of each group of step_batch() together and return the
+    solved entries.
+    """
+    solved = []
+    for (_, keep_gp_model, display_report, gb_items), entries in groups.items():
+        kwargs = dict(gb_items)
+        params_list = [params for _, _, params in entries]
+        if all("TimeLimit" in params for params in params_list):
+            # Give the batch the total time and the tightest gap assigned
+            # (see solve_models()).
+            kwargs["TimeLimit"] = np.mean([p["TimeLimit"] for p in params_list])
+            kwargs["MIPGap"] = min(p["MIPGap"] for p in params_list)
+        if merge:
+            solve_batch(
+                [pending["dm"] for _, pending, _ in entries],
+                keep_gp_model=keep_gp_model,
+                display_report=display_report,
+                **kwargs,
+            )
+        else:
+            for _, pending, params in entries:
+                pending["dm"].solve(
+                    keep_gp_model=keep_gp_model,
+                    display_report=display_report,
+                    **params,
+                )
+        solved += entries
+    return solved
+
+
+def _requeue_batch_dms(solved, budget):
+    """
+    Record the solves of step_batch() in the solver budget and re-queue the
+    ones stopped by the time limit with the budget left, where the best
+    incumbents are kept (see Optimization.resolve()).
+    """
+    for behavior, pending, params in solved:
+        budget.record(behavior.unique_id, pending["dm"].sols, params)
+    unfinished = [
+        (behavior, pending)
+        for behavior, pending, _ in solved
+        if pending["dm"].sols.get("gp_status") == TIME_LIMIT
+    ]
+    for k, (behavior, pending) in enumerate(unfinished):
+        dm = pending["dm"]
+        params = budget.get_requeue_params(len(unfinished) - k, **behavior.gb_dict)
+        if params is None:
+            if "obj" in dm.sols:
+                continue
+            # No solution to fall back on. Use the agent's own settings.
+            params = budget.get_fallback_params(**behavior.gb_dict)
+        dm.resolve(display_report=behavior.dm_dict["display_report"], **params)
+        budget.record(behavior.unique_id, dm.sols, params, requeued=True)
+    # Release the models kept for the re-queue.
+    for _, pending, _ in solved:
+        dm = pending["dm"]
+        if not pending["keep_gp_model"] and getattr(dm, "model", None) is not None:
+            dm.model.dispose()
+
+
+def _collect_batch_dms(behaviors, pendings_list, batch_keys):
+    """
+    Collect the solutions of the pending decisions of step_batch(), where the
+    ones waiting for other models in the batch are collected last.
+    """
+    sols_lists = [None] * len(behaviors)
+    for wait in (False, True):
+        pairs = zip(behaviors, pendings_list, strict=True)
+        for i, (behavior, pendings) in enumerate(pairs):
+            if pendings is None:
+                continue
+            if sols_lists[i] is None:
+                sols_lists[i] = [None] * len(pendings)
+            for j, pending in enumerate(pendings):
+                if pending["wait"] == wait:
+                    sols_lists[i][j] = behavior._finish_dm(pending)
+    # Remove the solutions that are only cached for the models waiting for
+    # them, e.g., the ones stopped by the time limit.
+    if behaviors:
+        cache = getattr(behaviors[0].model, "decision_cache", None)
+        for key, pending in batch_keys.items():
+            if pending["discard"]:
+                cache.discard(key)
+    return sols_lists
+
+
+def run_simulation_batch(behaviors, store):
+    """
+    Run the simulation of the Behavior agents for one time step, which gives
+    the same results as calling run_simulation() of each agent in order. The
+    fields of all the agents are simulated in one vectorized call, then the
+    wells, and then the finances and the CONSUMAT states agent by agent.
+    This works since the agents only share the aquifers, which are not
+    updated until all the agents are simulated.
+
+    Parameters
+    ----------
+    behaviors : list
+        The Behavior agents in the order of their steps.
+    store : StateStore
+        The state store of the fields, wells, and aquifers of the agents.
+
+    Returns
+    -------
+    None.
+
+    """
+    if not behaviors:
+        return
+    model = behaviors[0].model
+
+    ##### Simulate fields
+    rows, irr_depth, i_crop, i_te = [], [], [], []
+    for behavior in behaviors:
+        dm_sols = behavior.dm_sols
+        for fi in behavior.fields:
+            rows.append(store.field_rows[fi])
+            irr_depth.append(dm_sols[fi]["irr_depth"][:, :, [0]])
+            i_crop.append(dm_sols[fi]["i_crop"])
+            i_te.append(dm_sols[fi]["i_te"])
+    if rows:
+        rows = np.array(rows, dtype=int)
+        prec_aw = store.get_prec_aw(model.prec_aw_step, model.current_year, rows)
+        store.step_fields(rows, np.stack(irr_depth), np.stack(i_crop), i_te, prec_aw)
+
+    ##### Simulate wells (energy consumption)
+    rows = [store.well_rows[wid] for behavior in behaviors for wid in behavior.wells]
+    if rows:
+        inputs = [behavior._get_well_inputs() for behavior in behaviors]
+        withdrawal, pumping_rate, l_pr = (
+            np.concatenate(v) for v in zip(*inputs, strict=True)
+        )
+        store.step_wells(np.array(rows, dtype=int), withdrawal, pumping_rate, l_pr)
+
+    for behavior in behaviors:
+        behavior._update_consumat()
@@ -0,0 +1,217 @@
+from collections import OrderedDict
+from copy import deepcopy
+
+import numpy as np
+
+
+class DecisionCache:
+    """
+    A least-recently-used (LRU) cache of the decision-making solutions
+    (dm_sols), which can be shared by all behavior agents over the simulation.
+    Farmers facing an identical optimization problem (e.g., the same crop and
+    technology options, precipitation, prices, water rights, and similar
+    aquifer conditions) reuse the solution instead of solving the model again.
+
+    Since the fields and wells of different agents have different ids, the
+    fingerprint of a problem is built with the ids replaced by their
+    positions, and the ids in a cached solution are renamed to those of the
+    requesting agent on a hit.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        The maximum number of cached solutions. The least recently used
+        solution is evicted when the cache is full. If None, the cache size is
+        unlimited. The default is 1024.
+    rounding : dict, optional
+        The number of decimals used to round the named inputs (e.g.,
+        {"dwl": 2, "st": 1}) in the fingerprint. Rounding allows agents with
+        similar aquifer conditions to share a solution, which then becomes an
+        approximation. The default is None (exact match).
+
+    Attributes
+    ----------
+    hits : int
+        The number of cache hits.
+    misses : int
+        The number of cache misses.
+    evictions : int
+        The number of evicted solutions.
+
+    Examples
+    --------
+    >>> # Share a cache among all behavior agents of a model
+    >>> cache = DecisionCache(maxsize=5000, rounding={"dwl": 2, "st": 1})
+    >>> m = SD6Model(..., decision_cache=cache)
+    >>> cache.info()
+    """
+
+    def __init__(self, maxsize=1024, rounding=None):
+        if maxsize is not None and maxsize < 1:
+            raise ValueError("maxsize must be a positive integer or None.")
+        self.maxsize = maxsize
+        self.rounding = {} if rounding is None else dict(rounding)
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        """Return the number of cached solutions."""
+        return len(self._cache)
+
+    def make_key(self, inputs, ids):
+        """
+        Build a hashable fingerprint of the optimization inputs.
+
+        Parameters
+        ----------
+        inputs : dict
+            All inputs of the optimization model. Nested dictionaries, lists,
+            and arrays are supported.
+        ids : list
+            The field and well ids, which are replaced by their positions.
+
+        Returns
+        -------
+        tuple
+            The fingerprint.
+
+        """
+        id_map = {i: f"<{k}>" for k, i in enumerate(ids)}
+        return freeze(inputs, id_map, self.rounding)
+
+    def get(self, key, ids):
+        """
+        Get a deep copy of the cached solution with its field and well ids
+        renamed to the given ones.
+
+        Parameters
+        ----------
+        key : tuple
+            The fingerprint from make_key().
+        ids : list
+            The field and well ids of the requesting agent in the same order
+            as in make_key().
+
+        Returns
+        -------
+        dict or None
+            The solution. None if the key is not cached.
+
+        """
+        item = self._cache.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self._cache.move_to_end(key)
+        self.hits += 1
+        cached_ids, sols = item
+        id_map = dict(zip(cached_ids, ids, strict=True))
+        return _rename_ids(deepcopy(sols), id_map)
+
+    def put(self, key, ids, sols):
+        """
+        Store a deep copy of a solution.
+
+        Parameters
+        ----------
+        key : tuple
+            The fingerprint from make_key().
+        ids : list
+            The field and well ids used in the solution.
+        sols : dict
+            The solution (dm_sols).
+
+        Returns
+        -------
+        None.
+
+        """
+        self._cache[key] = (list(ids), deepcopy(sols))
+        self._cache.move_to_end(key)
+        if self.maxsize is not None and len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key):
+        """
+        Remove a cached solution if it exists.
+
+        Parameters
+        ----------
+        key : tuple
+            The fingerprint from make_key().
+
+        Returns
+        -------
+        None.
+
+        """
+        self._cache.pop(key, None)
+
+    def clear(self):
+        """Remove all cached solutions and reset the statistics."""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def info(self):
+        """
+        Return the cache statistics.
+
+        Returns
+        -------
+        dict
+            hits, misses, evictions, hit_rate, size, and maxsize.
+
+        """
+        n = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / n if n > 0 else 0.0,
+            "size": len(self._cache),
+            "maxsize": self.maxsize,
+        }
+
+
+def freeze(obj, id_map, rounding=None, name=None):
+    """
+    Convert obj into a hashable object recursively, where the strings and
+    dictionary keys in id_map are replaced and the floats and arrays named in
+    rounding are rounded.
+    """
+    rounding = {} if rounding is None else rounding
+    if isinstance(obj, dict):
+        items = (
+            (id_map.get(k, k), freeze(v, id_map, rounding, k)) for k, v in obj.items()
+        )
+        return tuple(sorted(items, key=lambda item: repr(item[0])))
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v, id_map, rounding, name) for v in obj)
+    if isinstance(obj, np.ndarray):
+        obj = np.asarray(obj, dtype=float)
+        if name in rounding:
+            obj = obj.round(rounding[name])
+        return (obj.shape, tuple(obj.ravel().tolist()))
+    if isinstance(obj, (float, np.floating)):
+        if name in rounding:
+            return round(float(obj), rounding[name])
+        return float(obj)
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, str):
+        return id_map.get(obj, obj)
+    return obj
+
+
+def _rename_ids(obj, id_map):
+    """Rename the ids in the dictionary keys and lists of a solution."""
+    if isinstance(obj, dict):
+        return {id_map.get(k, k): _rename_ids(v, id_map) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [id_map.get(v, v) if isinstance(v, str) else v for v in obj]
+    return obj
@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import gurobipy as gp
+
+from .behavior import solve_dm_job
+
+
+class DecisionPool:
+    """
+    A persistent pool of worker processes that build and solve the
+    optimization models of the behavior agents in parallel, which can be
+    shared by all behavior agents over the simulation (see step_batch()).
+
+    A step then has two phases. First, the decisions of all the agents are
+    made in the pool, where each agent only reads the previous decisions
+    (pre_dm_sols) and the states of itself and its neighbors at the
+    beginning of the step. Then, the decisions are applied and the fields,
+    wells, and finances are simulated agent by agent in the original order.
+    The results are identical to the serial step since every model is built
+    and solved as in the serial step.
+
+    The workers are started on the first step and kept until close() (e.g.,
+    by SD6Model.end()). Each worker solves its models in one long-lived
+    Gurobi environment (the default environment of the process) instead of
+    starting a new environment for every model. The workers are spawned, so
+    a script creating the pool must guard its entry point with
+    ``if __name__ == "__main__":``.
+
+    Note that Gurobi uses all the cores for each solve by default. Set
+    "Threads" to 1 in the Gurobi settings of the agents (for both the serial
+    and the parallel runs, since the solutions may depend on it) to avoid
+    oversubscribing the cores.
+
+    Parameters
+    ----------
+    n_workers : int, optional
+        The number of worker processes. The default is None (the number of
+        cores).
+    log_to_console : int, optional
+        The LogToConsole parameter of the Gurobi environments of the
+        workers. The default is 0.
+
+    Examples
+    --------
+    >>> # Solve the models of all behavior agents with 16 workers
+    >>> pool = DecisionPool(n_workers=16)
+    >>> m = SD6Model(..., decision_pool=pool)
+    >>> for _ in range(10):
+    >>>     m.step()
+    >>> m.end()  # Close the pool
+    """
+
+    def __init__(self, n_workers=None, log_to_console=0):
+        if n_workers is not None and n_workers < 1:
+            raise ValueError("n_workers must be a positive integer or None.")
+        self.n_workers = os.cpu_count() if n_workers is None else n_workers
+        self.log_to_console = log_to_console
+        self._executor = None
+
+    def __enter__(self):
+        """Return the pool itself."""
+        return self
+
+    def __exit__(self, *exc):
+        """Close the pool."""
+        self.close()
+
+    def submit(self, job, **kwargs):
+        """
+        Submit a model to be built and solved by a worker.
+
+        Parameters
+        ----------
+        job : dict
+            pending["job"] of a pending decision. See
+            Behavior._prepare_dm().
+        **kwargs :
+            The arguments of solve() (e.g., display_report and the Gurobi
+            settings).
+
+        Returns
+        -------
+        concurrent.futures.Future
+            The future of the solutions of the model (dm.sols).
+
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.n_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.log_to_console,),
+            )
+        return self._executor.submit(solve_dm_job, job, **kwargs)
+
+    def close(self):
+        """
+        Shut down the worker processes. They are started again if a model is
+        submitted afterward.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def _init_worker(log_to_console):
+    """Start the default Gurobi environment of a worker process."""
+    gp.setParam("LogToConsole", log_to_console)
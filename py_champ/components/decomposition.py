@@ -0,0 +1,488 @@
+import time
+import warnings
+from itertools import pairwise
+
+import gurobipy as gp
+import numpy as np
+
+from .optimization import FIRST_STAGE_KEYS, DeferredOptimization, Optimization
+from .solver import SolverResult
+
+# The solution entries added by Optimization._finish_sols(), which are not
+# stacked over the years.
+_FINISH_KEYS = (
+    "obj",
+    "field_ids",
+    "well_ids",
+    "gp_status",
+    "gp_MIPGap",
+    "gp_Runtime",
+    "gp_NodeCount",
+    "Sa",
+    "water_rights",
+    "gp_report",
+)
+
+
+class OptimizationDecomposed(DeferredOptimization):
+    """
+    A replacement of Optimization for long planning horizons, which solves a
+    small model for each year instead of one model over the whole horizon.
+
+    The years of the planning horizon share the crop types, rainfed option,
+    and irrigation technologies (the first-stage decisions). Otherwise, they
+    are only coupled by the water rights with a time_window larger than 1,
+    since the water levels are projected with the given dwl. The water right
+    of each time window is coordinated by allocating budgets to its years:
+    each year is solved with its irrigation depth capped at the budgets on a
+    grid (n_grid steps of the water right), and the budgets maximizing the
+    objective are found by dynamic programming. The yearly models are solved
+    in two phases.
+
+    1. With the first-stage decisions optimized in each year, the budgets
+       are allocated. If all the years agree on the first-stage decisions,
+       the allocation is a solution of the original model.
+    2. Otherwise, each of the found first-stage decisions is given to all the
+       years and the budgets are allocated again. The best one is used.
+
+    The grid is then refined (doubled) until the objective improves by less
+    than gap_tol. Since the budgets are allocated on a grid, the irrigation
+    depths may differ slightly from those of Optimization when a water right
+    is binding. The yearly models are solved only once if no water right is
+    binding. If the refinement does not converge within max_refine
+    steps, the model is solved as a whole by Optimization, which is also
+    used for the settings that are not supported (i.e., approx_horizon,
+    multiple precipitation scenarios, or overlapping multi-year water
+    rights). The number of the solved yearly models grows linearly with the
+    planning horizon.
+
+    Parameters
+    ----------
+    unique_id, log_to_console, gpenv, names :
+        See Optimization.__init__(). Each yearly model has its own Gurobi
+        environment if gpenv is given.
+    n_grid : int, optional
+        The initial number of the budget steps of a water right. The default
+        is 8.
+    gap_tol : float, optional
+        The relative improvement of the objective by a grid refinement to
+        accept the solution. The default is 1e-3.
+    max_refine : int, optional
+        The maximum number of grid refinements. The default is 3.
+    max_candidates : int, optional
+        The maximum number of first-stage decisions evaluated in phase 2.
+        The default is 3.
+
+    Examples
+    --------
+    >>> dm = OptimizationDecomposed(unique_id="farmer")
+    >>> dm.setup_ini_model(horizon=10, ...)
+    >>> ...  # The same setup as Optimization
+    >>> dm.finish_setup()
+    >>> dm.solve()
+    >>> dm.sols["gp_MIPGap"]  # The improvement of the last grid refinement
+    """
+
+    def __init__(
+        self,
+        unique_id="",
+        log_to_console=1,
+        gpenv=None,
+        names=True,
+        n_grid=8,
+        gap_tol=1e-3,
+        max_refine=3,
+        max_candidates=3,
+    ):
+        super().__init__(
+            unique_id=unique_id,
+            log_to_console=log_to_console,
+            gpenv=gpenv,
+            names=names,
+        )
+        if int(n_grid) < 1:
+            raise ValueError("n_grid has to be a positive integer.")
+        self.n_grid = int(n_grid)
+        self.gap_tol = gap_tol
+        self.max_refine = max_refine
+        self.max_candidates = max_candidates
+
+    def _setup_fast(self):
+        """
+        Split the water rights into the yearly ones and the time windows.
+        Return False if the model cannot be decomposed.
+        """
+        if self.horizon < 2 or self.approx_years is not None or self.n_scen > 1:
+            return False
+        if self._finance_dict is None or not getattr(
+            self, "obj_post_calculation", False
+        ):
+            return False
+        windows = self._get_windows()
+        if windows is None:
+            return False  # Overlapping multi-year water rights
+        self._yearly_wrs, self._windows = windows
+        return True
+
+    def _get_windows(self):
+        """
+        Get the water right of each year (None if in a time window) for each
+        water right and the time windows as (start, end, wr,
+        applied_field_ids), where the periods are clipped to the planning
+        horizon as in Optimization. Return None if the time windows overlap.
+        """
+        horizon = self.horizon
+        yearly_wrs = []
+        windows = []
+        for fids, blocks in self._wr_blocks:
+            wrs = [None] * horizon
+            for start, end, wr in blocks:
+                end = min(end, horizon)
+                if end - start == 1:
+                    wrs[start] = wr
+                elif end - start > 1:
+                    windows.append((start, end, wr, fids))
+            yearly_wrs.append(wrs)
+        windows.sort(key=lambda w: w[0])
+        for (_, end, _, _), (start, _, _, _) in pairwise(windows):
+            if start < end:
+                return None
+        return yearly_wrs, windows
+
+    def _solve_fast(self, display_report=True, **kwargs):
+        """
+        Solve the yearly models (see the class description). The model falls
+        back to Optimization if the refinement does not converge, a yearly
+        model has no solution, or the decomposition fails.
+        """
+        start = time.perf_counter()
+        self._solve_kwargs = kwargs
+        self._node_count = 0
+        self._years = []
+        result = None
+        try:
+            result = self._decompose()
+        except (ArithmeticError, LookupError, ValueError, gp.GurobiError) as e:
+            warnings.warn(
+                f"{self.unique_id}: The horizon decomposition failed ({e!r}). The"
+                " model is solved as a whole.",
+                stacklevel=2,
+            )
+        finally:
+            self._dispose_years()
+        if result is None:
+            self._fall_back()
+            Optimization.solve(self, display_report=display_report, **kwargs)
+            return
+
+        year_sols, obj, gap = result
+        obj, gap = float(obj), float(gap)
+        self.sols = self._stack_years(year_sols)
+        self.optimal_obj_value = obj
+        result = SolverResult(
+            status=2,
+            obj_val=obj,
+            mip_gap=gap,
+            runtime=time.perf_counter() - start,
+            node_count=self._node_count,
+        )
+        self._finish_sols(result, display_report)
+
+    def _decompose(self):
+        """
+        Run the two phases on grids refined until convergence. Return the
+        yearly solutions, the objective, and the relative improvement of the
+        last refinement, or None if the decomposition fails.
+        """
+        free = self._new_years()
+        fixed = {}
+        obj = None
+        for r in range(self.max_refine + 1):
+            n_grid = self.n_grid * 2**r
+            # Phase 1
+            result = self._allocate(free, n_grid)
+            if result is None:
+                return None
+            sols, _, binding = result
+            candidates = self._get_candidates(free, sols)
+            if r == 0 and len(candidates) == 1 and not binding:
+                # The unconstrained yearly solutions agree.
+                return result[0], result[1], 0.0
+
+            # Phase 2
+            best = None
+            for key, choices in candidates[: self.max_candidates]:
+                if key not in fixed:
+                    fixed[key] = self._new_years(choices)
+                result = self._allocate(fixed[key], n_grid)
+                if result is not None and (best is None or result[1] > best[1]):
+                    best = result
+            if best is None:
+                return None
+            if obj is not None:
+                gap = max(best[1] - obj, 0) / max(abs(best[1]), 1)
+                if gap <= self.gap_tol:
+                    return best[0], best[1], gap
+            obj = best[1]
+        return None
+
+    def _allocate(self, years, n_grid):
+        """
+        Allocate the water right of each time window to its years on a grid
+        of n_grid steps. Return the yearly solutions, the objective, and
+        whether any water right is binding, or None if a yearly model has no
+        solution.
+        """
+        horizon = self.horizon
+        sols = [None] * horizon
+        binding = False
+        for t in range(horizon):
+            res = self._solve_year(years[t], None)
+            if res is None:
+                return None
+            sols[t] = res
+        for w_start, w_end, wr, _ in self._windows:
+            window = range(w_start, w_end)
+            if sum(sols[t][1] for t in window) <= wr + 1e-6:
+                continue
+            binding = True
+            # values[i][u]: the results of the i-th year with u steps
+            step = max(wr, 0) / n_grid
+            values = [
+                [self._solve_year(years[t], u * step) for u in range(n_grid + 1)]
+                for t in window
+            ]
+            alloc = _allocate_steps(
+                [[-np.inf if r is None else r[0] for r in v] for v in values], n_grid
+            )
+            if alloc is None:
+                return None
+            for i, t in enumerate(window):
+                sols[t] = values[i][alloc[i]]
+        obj = sum(r[0] for r in sols) / horizon
+        return [r[2] for r in sols], obj, binding
+
+    def _new_years(self, choices=None):
+        """Build the models of all the years (see _build_year())."""
+        years = [self._build_year(t, choices) for t in range(self.horizon)]
+        self._years.append(years)
+        return years
+
+    def _build_year(self, t, choices=None):
+        """
+        Build the model of year t from the recorded inputs, where the
+        multi-year water right is replaced by the budget of the year (see
+        _solve_year()). The first-stage decisions are fixed if choices are
+        given.
+        """
+        horizon = self.horizon
+        dm = Optimization(**{**self._init_kwargs, "unique_id": f"{self.unique_id}_{t}"})
+        i_wr = 0
+        for name, kwargs in self._calls:
+            if name == "setup_ini_model":
+                kwargs = {**kwargs, "horizon": 1, "approx_horizon": False}
+            elif name == "setup_constr_field":
+                kwargs = {
+                    **kwargs,
+                    "prec_aw": _get_year_values(kwargs["prec_aw"], t, horizon),
+                }
+                if choices is not None:
+                    kwargs.update(choices[kwargs["field_id"]])
+            elif name == "setup_constr_well":
+                kwargs = {**kwargs, "l_wt": kwargs["l_wt"] - kwargs["dwl"] * t}
+            elif name == "setup_constr_wr":
+                wr = self._yearly_wrs[i_wr][t]
+                i_wr += 1
+                if wr is None:
+                    continue
+                kwargs = {
+                    "water_right_id": kwargs["water_right_id"],
+                    "wr_depth": wr,
+                    "applied_field_ids": kwargs["applied_field_ids"],
+                }
+            elif name == "setup_constr_finance":
+                # The change costs are spread over the planning horizon.
+                finance_dict = kwargs["finance_dict"]
+                kwargs = {
+                    "finance_dict": {
+                        **finance_dict,
+                        "crop_change_cost": {
+                            k: v / horizon
+                            for k, v in finance_dict["crop_change_cost"].items()
+                        },
+                        "irr_tech_change_cost": {
+                            k: v / horizon
+                            for k, v in finance_dict["irr_tech_change_cost"].items()
+                        },
+                    }
+                }
+            getattr(dm, name)(**kwargs)
+        dm.finish_setup(display_summary=False)
+        budget = self._add_budget(dm, t)
+        dm.model.update()
+        return {"t": t, "dm": dm, "budget": budget, "cap": None, "sols": {}}
+
+    def _add_budget(self, dm, t):
+        """
+        Add the budget of year t in its time window to the model of the year.
+        Return the budget constraint, or None if the year is not in a time
+        window.
+        """
+        for w_start, w_end, _, fids in self._windows:
+            if w_start <= t < w_end:
+                dm.setup_constr_wr(
+                    water_right_id="budget",
+                    wr_depth=gp.GRB.INFINITY,
+                    applied_field_ids=fids,
+                )
+                return dm.constrs["water_rights"]["budget"][0]
+        return None
+
+    def _solve_year(self, year, cap):
+        """
+        Solve the model of a year with the irrigation depth of its time window
+        capped at cap (None for no cap). Return the objective, the capped
+        irrigation depth, and the solutions, or None if no solution is found.
+        The results are stored for each cap.
+        """
+        key = None if cap is None else round(cap, 9)
+        if key in year["sols"]:
+            return year["sols"][key]
+        dm = year["dm"]
+        if year["budget"] is not None and year["cap"] != key:
+            year["budget"].RHS = gp.GRB.INFINITY if cap is None else cap
+            year["cap"] = key
+        dm.solve(keep_gp_model=True, display_report=False, **self._solve_kwargs)
+        res = None
+        sols = dm.sols
+        if "obj" in sols:
+            self._node_count += sols["gp_NodeCount"] or 0
+            metric = {"profit": "profit", "yield_rate": "y_y"}[self.target]
+            res = (sols[metric][0], self._get_irr(year["t"], sols), sols)
+        year["sols"][key] = res
+        return res
+
+    def _get_irr(self, t, sols):
+        """Get the irrigation depth of year t constrained by its time window."""
+        for w_start, w_end, _, fids in self._windows:
+            if w_start <= t < w_end:
+                if fids == "all":
+                    irr_sub = sols["irr_depth_per_field"]
+                else:
+                    irr_sub = sum(sols[fid]["irr_depth"] for fid in fids) / len(fids)
+                return float(np.sum(irr_sub[:, :, 0])) / self.n_s
+        return 0
+
+    def _get_candidates(self, years, sols):
+        """
+        Get the first-stage decisions of the given yearly solutions sorted by
+        their frequency, followed by the others found in solving the years.
+        Return a list of (key, choices).
+        """
+        counts = {}
+        for i, results in enumerate(
+            [[(s,) for s in sols]]
+            + [[r for r in year["sols"].values() if r is not None] for year in years]
+        ):
+            for r in results:
+                choices = self._get_choices(r[-1])
+                key = tuple(v.tobytes() for c in choices.values() for v in c.values())
+                n, _ = counts.get(key, ((0, 0), choices))
+                n = (n[0] + 1, n[1]) if i == 0 else (n[0], n[1] + 1)
+                counts[key] = (n, choices)
+        return [
+            (key, choices)
+            for key, (_, choices) in sorted(
+                counts.items(), key=lambda x: x[1][0], reverse=True
+            )
+        ]
+
+    def _get_choices(self, sols):
+        """Get the first-stage decisions of each field from the solutions."""
+        return {
+            fid: {
+                "i_crop": np.round(sols[fid]["i_crop"]),
+                "i_rainfed": np.round(sols[fid]["i_rainfed"]),
+                "i_te": np.round(sols[fid]["i_te"]),
+            }
+            for fid in self.field_ids
+        }
+
+    def _stack_years(self, year_sols):
+        """
+        Stack the yearly solutions along the horizon axis in the format of
+        Optimization. The first-stage decisions are taken from the first
+        year.
+        """
+
+        def stack(ds, top=False):
+            out = {}
+            for k, v in ds[0].items():
+                if top and k in _FINISH_KEYS:
+                    continue
+                if isinstance(v, dict):
+                    out[k] = stack([d[k] for d in ds])
+                elif (
+                    isinstance(v, np.ndarray)
+                    and v.ndim > 0
+                    and v.shape[-1] == 1
+                    and k not in FIRST_STAGE_KEYS
+                ):
+                    out[k] = np.concatenate([d[k] for d in ds], axis=-1)
+                else:
+                    out[k] = v
+            return out
+
+        sols = stack(year_sols, top=True)
+        sols["Sa"] = {}
+        return sols
+
+    def _dispose_years(self):
+        """Dispose the yearly models and their Gurobi environments."""
+        for year in (year for years in self._years for year in years):
+            year["dm"].model.dispose()
+            if year["dm"].gpenv is not None:
+                year["dm"].depose_gp_env()
+        self._years = []
+
+
+def _get_year_values(prec_aw, t, horizon):
+    """
+    Get the precipitation of year t, where the values given for each year of
+    the planning horizon are indexed and the others are kept.
+    """
+    prec_aw_t = {}
+    for crop, v in prec_aw.items():
+        v = np.asarray(v)
+        prec_aw_t[crop] = v[t] if v.ndim > 0 and len(v) == horizon else v
+    return prec_aw_t
+
+
+def _allocate_steps(values, n_steps):
+    """
+    Maximize the sum of values[i][u_i] subject to sum(u_i) <= n_steps by
+    dynamic programming, where values[i] is given for u_i = 0, ..., n_steps.
+    Return the steps u_i, or None if no finite value exists.
+    """
+    # best[u]: the maximum of the years so far using u steps in total
+    best = np.full(n_steps + 1, -np.inf)
+    best[0] = 0
+    choices = []
+    for v in values:
+        v = np.asarray(v, dtype=float)
+        new = np.full(n_steps + 1, -np.inf)
+        arg = np.zeros(n_steps + 1, dtype=int)
+        for u in range(n_steps + 1):
+            cand = best[: u + 1][::-1] + v[: u + 1]  # u_i = 0, ..., u
+            arg[u] = int(np.argmax(cand))
+            new[u] = cand[arg[u]]
+        best = new
+        choices.append(arg)
+    u = int(np.argmax(best))
+    if best[u] == -np.inf:
+        return None
+    steps = []
+    for arg in reversed(choices):
+        steps.append(arg[u])
+        u -= arg[u]
+    return steps[::-1]
@@ -0,0 +1,154 @@
+from itertools import pairwise
+
+import numpy as np
+
+
+def get_yield_pieces(a, b, c, wmax, min_y_ratio, prec, ub, tol=1e-6):
+    """
+    Split the irrigation depth range [0, ub] into pieces, where the yield
+    rate of the water-yield curve is a quadratic function of the irrigation
+    depth d in each piece. The pieces are separated by the saturation point
+    (w = wmax), the minimum yield ratio cutoff, and the upper bound of the
+    yield rate (1).
+
+    Parameters
+    ----------
+    a, b, c : float
+        Coefficients of the water-yield curve a * x^2 + b * x + c, where
+        x = min(w / wmax, 1).
+    wmax : float
+        The water requirement of the crop [cm].
+    min_y_ratio : float
+        The yield rate is zero below this ratio.
+    prec : float
+        Available precipitation [cm].
+    ub : float
+        Upper bound of the irrigation depth [cm].
+    tol : float, optional
+        Tolerance of the yield rate upper bound. The default is 1e-6.
+
+    Returns
+    -------
+    list
+        A list of (lo, hi, y2, y1, y0), where the yield rate is
+        y2 * d^2 + y1 * d + y0 for lo <= d <= hi. Infeasible pieces (yield
+        rate > 1) are excluded. An empty list means no feasible d exists.
+
+    """
+    if ub < 0:
+        return []
+    points = [0, ub, wmax - prec]
+    for level in (min_y_ratio, 1):
+        # x = (d + prec) / wmax
+        points += [x * wmax - prec for x in _get_roots(a, b, c, level)]
+    points = np.unique(np.clip(points, 0, ub))
+    if len(points) == 1:
+        intervals = [(points[0], points[0])]
+    else:
+        intervals = list(pairwise(points))
+
+    pieces = []
+    for lo, hi in intervals:
+        mid = (lo + hi) / 2
+        if mid + prec >= wmax:  # Saturated (w_ = 1)
+            coefs = (0, 0, a + b + c)
+        else:
+            coefs = (
+                a / wmax**2,
+                2 * a * prec / wmax**2 + b / wmax,
+                a * prec**2 / wmax**2 + b * prec / wmax + c,
+            )
+        yw = coefs[0] * mid**2 + coefs[1] * mid + coefs[2]
+        if yw > 1 + tol:
+            continue
+        if yw < min_y_ratio:
+            coefs = (0, 0, 0)
+        pieces.append((lo, hi, *coefs))
+    return pieces
+
+
+def _get_roots(a, b, c, level):
+    """Get the real roots of a * x^2 + b * x + c = level."""
+    if a != 0:
+        disc = b**2 - 4 * a * (c - level)
+        if disc < 0:
+            return []
+        return [(-b + sign * disc**0.5) / (2 * a) for sign in (-1, 1)]
+    if b != 0:
+        return [(level - c) / b]
+    return []
+
+
+def combine_pieces(pieces):
+    """
+    Expand all combinations of the yearly pieces given by get_yield_pieces().
+
+    Parameters
+    ----------
+    pieces : list
+        A list of the pieces of each year (n_h).
+
+    Returns
+    -------
+    tuple
+        (lo, hi, y2, y1, y0), each with a shape of (n_combinations, n_h).
+
+    """
+    n_h = len(pieces)
+    idx = np.indices([len(p) for p in pieces]).reshape((n_h, -1)).T
+    arr = np.stack(
+        [np.asarray(pieces[h], dtype=float)[idx[:, h]] for h in range(n_h)], axis=1
+    )  # (n_combinations, n_h, 5)
+    return tuple(arr[:, :, i] for i in range(5))
+
+
+def maximize_pieces(q, lo, hi, blocks, n_iter=100):
+    """
+    Maximize sum(q2 * d^2 + q1 * d + q0) over the years subject to
+    lo <= d <= hi and the water right blocks for each row (combination) with
+    q2 < 0. Without binding water rights, the maximum is the clipped
+    stationary point of each year. Otherwise, the Lagrange multiplier of each
+    water right block is found by bisection.
+
+    Parameters
+    ----------
+    q : tuple
+        (q2, q1, q0), each with a shape of (n_combinations, n_h).
+    lo, hi : 2darray
+        Bounds of the irrigation depths (n_combinations, n_h).
+    blocks : list
+        A list of disjoint (start, end, wr), where
+        sum(d[start:end]) <= wr.
+    n_iter : int, optional
+        Number of the bisection iterations. The default is 100.
+
+    Returns
+    -------
+    tuple
+        The solutions (n_combinations, n_h) and the objective values
+        (n_combinations), where infeasible rows are -inf.
+
+    """
+    q2, q1, q0 = q
+    d = np.clip(-q1 / (2 * q2), lo, hi)
+    feasible = np.ones(len(d), dtype=bool)
+    for start, end, wr in blocks:
+        sl = slice(start, end)
+        feasible &= lo[:, sl].sum(axis=1) <= wr + 1e-9
+        over = feasible & (d[:, sl].sum(axis=1) > wr)
+        if not np.any(over):
+            continue
+        q1_, q2_ = q1[over, sl], q2[over, sl]
+        lo_, hi_ = lo[over, sl], hi[over, sl]
+        lam_lo = np.zeros((len(q1_), 1))
+        lam_hi = np.maximum(q1_ + 2 * q2_ * lo_, 0).max(axis=1, keepdims=True)
+        for _ in range(n_iter):
+            lam = (lam_lo + lam_hi) / 2
+            d_ = np.clip((lam - q1_) / (2 * q2_), lo_, hi_)
+            exceed = d_.sum(axis=1, keepdims=True) > wr
+            lam_lo = np.where(exceed, lam, lam_lo)
+            lam_hi = np.where(exceed, lam_hi, lam)
+        d[over, sl] = np.clip((lam_hi - q1_) / (2 * q2_), lo_, hi_)
+    values = np.sum(q2 * d**2 + q1 * d + q0, axis=1)
+    values[~feasible] = -np.inf
+    return d, values
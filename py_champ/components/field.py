@@ -6,6 +6,9 @@ import numpy as np
 import pandas as pd
 import os
 
+from .array_attribute import ArrayAttribute
+
+
 class Field(mesa.Agent):
     """
     This module is a field simulator.
@@ -69,8 +72,32 @@ class Field(mesa.Agent):
     - The yield is measured in bushels [1e4 bu].
     - The irrigation volume is measured in meter-hectares [m-ha].
     - Field area should be provided in hectares [ha].
+    - The states below are stored in the arrays of a StateStore if the field
+      is attached to one.
     """
 
+    # States stored in a StateStore (see StateStore)
+    ymax = ArrayAttribute()
+    wmax = ArrayAttribute()
+    a = ArrayAttribute()
+    b = ArrayAttribute()
+    c = ArrayAttribute()
+    unit_area = ArrayAttribute()
+    te = ArrayAttribute(options="tech_options")
+    pre_te = ArrayAttribute(options="tech_options")
+    a_te = ArrayAttribute()
+    b_te = ArrayAttribute()
+    l_pr = ArrayAttribute()
+    crops = ArrayAttribute(options="crop_options")
+    i_crop = ArrayAttribute()
+    pre_i_crop = ArrayAttribute()
+    t = ArrayAttribute(dtype=int)
+    y = ArrayAttribute()
+    w = ArrayAttribute(nullable=True)
+    pumping_rate = ArrayAttribute(nullable=True)
+    yield_rate_per_field = ArrayAttribute(nullable=True)
+    irr_vol_per_field = ArrayAttribute(nullable=True)
+
     def __init__(self, unique_id, model, settings: dict, **kwargs):
         """Initialize a Field agent in the Mesa model."""
         # MESA required attributes => (unique_id, model)
@@ -0,0 +1,179 @@
+from collections import OrderedDict
+
+from .decision_cache import freeze
+
+
+class ModelTemplates:
+    """
+    A registry of optimization model templates, which can be shared by all
+    behavior agents over the simulation. Building a Gurobi model takes much
+    longer than solving it for a small farmer model. However, agents with the
+    same model structure (e.g., the same settings, numbers of fields and
+    wells, field properties, and pump constants) only differ in the well
+    properties and the year-dependent data (e.g., precipitation, water levels,
+    prices, given decisions, and water rights). A template of each structure
+    is built once and copied (see Optimization.copy()) for other agents, where
+    the data are filled in with the update_constr_* methods.
+
+    The templates are copied into their own Gurobi environments so that they
+    are not affected by the disposal of the agents' models.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        The maximum number of templates. The least recently used template is
+        disposed when the registry is full. If None, the number of templates
+        is unlimited. The default is 64.
+
+    Attributes
+    ----------
+    hits : int
+        The number of models copied from a template.
+    misses : int
+        The number of models that have to be built.
+    evictions : int
+        The number of disposed templates.
+
+    Examples
+    --------
+    >>> # Share the templates among all behavior agents of a model
+    >>> templates = ModelTemplates()
+    >>> m = SD6Model(..., model_templates=templates)
+    >>> templates.info()
+    """
+
+    def __init__(self, maxsize=64):
+        if maxsize is not None and maxsize < 1:
+            raise ValueError("maxsize must be a positive integer or None.")
+        self.maxsize = maxsize
+        self._templates = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        """Return the number of stored templates."""
+        return len(self._templates)
+
+    def make_key(self, inputs, ids):
+        """
+        Build a hashable fingerprint of the model structure.
+
+        Parameters
+        ----------
+        inputs : dict
+            The inputs determining the model structure. Nested dictionaries,
+            lists, and arrays are supported.
+        ids : list
+            The field and well ids, which are replaced by their positions.
+
+        Returns
+        -------
+        tuple
+            The fingerprint.
+
+        """
+        id_map = {i: f"<{k}>" for k, i in enumerate(ids)}
+        return freeze(inputs, id_map)
+
+    def get(self, key, ids, unique_id="", log_to_console=1, gpenv=None):
+        """
+        Copy the template with its field and well ids renamed to the given
+        ones. The year-dependent data and the well properties of the copy
+        still have to be updated.
+
+        Parameters
+        ----------
+        key : tuple
+            The fingerprint from make_key().
+        ids : list
+            The field and well ids of the requesting agent in the same order
+            as in make_key().
+        unique_id : str, optional
+            The name of the copy. The default is "".
+        log_to_console, gpenv :
+            See Optimization.__init__().
+
+        Returns
+        -------
+        Optimization or None
+            The copy. None if no template is registered for the key.
+
+        """
+        item = self._templates.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self._templates.move_to_end(key)
+        self.hits += 1
+        template_ids, template, plan = item
+        return template.copy(
+            unique_id=unique_id,
+            log_to_console=log_to_console,
+            gpenv=gpenv,
+            ids=dict(zip(template_ids, ids, strict=True)),
+            plan=plan,
+        )
+
+    def put(self, key, ids, dm):
+        """
+        Register a copy of an optimization model, which is set up but not yet
+        solved, as the template of the key.
+
+        Parameters
+        ----------
+        key : tuple
+            The fingerprint from make_key().
+        ids : list
+            The field and well ids used in the model.
+        dm : Optimization
+            The optimization model.
+
+        Returns
+        -------
+        None.
+
+        """
+        if key in self._templates:
+            return
+        template = dm.copy(log_to_console=0, gpenv=True)
+        self._templates[key] = (list(ids), template, template.get_copy_plan())
+        if self.maxsize is not None and len(self._templates) > self.maxsize:
+            _, (_, evicted, _) = self._templates.popitem(last=False)
+            _dispose(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        """Dispose all templates and reset the statistics."""
+        for _, template, _ in self._templates.values():
+            _dispose(template)
+        self._templates.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def info(self):
+        """
+        Return the registry statistics.
+
+        Returns
+        -------
+        dict
+            hits, misses, evictions, hit_rate, size, and maxsize.
+
+        """
+        n = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / n if n > 0 else 0.0,
+            "size": len(self._templates),
+            "maxsize": self.maxsize,
+        }
+
+
+def _dispose(template):
+    """Dispose the Gurobi model and environment of a template."""
+    template.model.dispose()
+    template.depose_gp_env()
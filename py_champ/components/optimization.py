@@ -2,10 +2,32 @@
 # Email: chungyi@vt.edu
 # Last modified on Dec 30, 2023
 import json
+import time
+from copy import deepcopy
+from itertools import pairwise
 
 import gurobipy as gp
 import numpy as np
 
+from .enumeration import combine_pieces, get_yield_pieces, maximize_pieces
+from .solver import SolverResult, solve_model, solve_models, solver_options
+
+# The solutions of the decisions shared by all the years of the planning
+# horizon (and all the precipitation scenarios).
+FIRST_STAGE_KEYS = (
+    "i_crop",
+    "i_rainfed",
+    "i_crop_change",
+    "i_te",
+    "i_tech_change",
+    "pre_i_crop",
+    "pre_i_te",
+)
+
+# The extraction plans of the solutions shared by the models with the same
+# variable layout (see Optimization._get_sol_plan())
+_SOL_PLANS = {}
+
 #################
 
 
@@ -37,12 +59,25 @@ class Optimization:
     on any changes or new information.
 
     This class provides an option to approximate the solving process by setting
-    the "approx_horizon" parameter to True. This approximation assumes a linear
-    decrement in water levels and helps speed up the solving process. However,
-    it's important to note that if there is a water right constraint with a
-    time_window argument greater than 1, the approximation option is restricted
-    and cannot be used. This ensures accurate handling of water right
-    constraints over multiple time periods.
+    the "approx_horizon" parameter to True. The model is then formulated only at
+    a few evenly spaced years (collocation points, see "approx_points") over
+    the planning horizon, and the other years are linearly interpolated between
+    them. This approximation assumes a linear decrement in water levels and
+    helps speed up the solving process. Water right constraints with a
+    time_window argument greater than 1 are enforced on the interpolated
+    irrigation depths of the years in each time window.
+
+    A solved model can be kept (solve(keep_gp_model=True)) and reused in the
+    subsequent years. The year-dependent data are updated in place with
+    update_constr_field(), update_constr_well(), update_constr_finance(), and
+    remove_constr_wr() followed by setup_constr_wr(). This avoids rebuilding
+    the model from scratch every year.
+
+    Precipitation uncertainty can be represented by multiple precipitation
+    scenarios (see "scenario_weights" in setup_ini_model()). The model is then
+    solved as a two-stage stochastic program in its extensive form, where the
+    crop types, rainfed option, and irrigation technologies are shared by all
+    scenarios and the irrigation depths are decided for each scenario.
 
 
     Notations
@@ -51,7 +86,8 @@ class Optimization:
 
     n_c: Number of the crop choices.
 
-    n_h: Planning horizon or approximated horizon.
+    n_h: Planning horizon or number of approximation points (times the number
+    of the precipitation scenarios, which are stacked along the horizon axis).
 
     n_te: Number of the irrigation technology choices.
 
@@ -74,7 +110,7 @@ class Optimization:
 
     """
 
-    def __init__(self, unique_id="", log_to_console=1, gpenv=None):
+    def __init__(self, unique_id="", log_to_console=1, gpenv=None, names=True):
         """
         Instantiate an optimization environment and object for a farmer agent.
 
@@ -82,23 +118,23 @@ class Optimization:
         parameters, you can set the parameter OutputFlag or LogToConsole to 0
         on an empty environment before it is started.  Please note that this
         only works if you set these parameters before starting the environment.
+
+        If names is False, the variables and constraints are not named, which
+        saves the time and memory of creating the names in production runs.
+        The names are only needed for debugging, e.g., write_lp() and
+        do_IIS_gp().
         """
         # Model name
         self.unique_id = unique_id
+        self.names = names
         # Create a gurobi environment to ensure thread safety for parallel
         # computing.
         # self.gpenv = gp.Env()
 
         # This will remove all output from gurobi to the console.
-        if gpenv:
-            self.gpenv = gp.Env(empty=True)
-            if log_to_console is not None:
-                self.gpenv.setParam("LogToConsole", log_to_console)
-            self.gpenv.start()
-        else:
-            self.gpenv = gpenv
+        self.gpenv = _start_gp_env(log_to_console, gpenv)
 
-        self.model = gp.Model(name=unique_id, env=self.gpenv)
+        self.model = self._new_gp_model()
 
         # Note from gurobi
         # In general, you should aim to create a single Gurobi environment in
@@ -109,6 +145,11 @@ class Optimization:
         # this case, you will need a separate environment for each of your
         # threads.
 
+    def _new_gp_model(self):
+        """Create an empty gurobi model in the Gurobi environment."""
+        model_class = gp.Model if self.names else _UnnamedModel
+        return model_class(name=self.unique_id, env=self.gpenv)
+
     def depose_gp_env(self):
         """
         Depose the Gurobi environment, ensuring that it is executed only when
@@ -133,6 +174,12 @@ class Optimization:
         consumat_dict=None,
         approx_horizon=False,
         gurobi_kwargs=None,
+        formulation="nonconvex",
+        pwl_breakpoints=10,
+        solver="gurobi",
+        symmetry_breaking=False,
+        scenario_weights=None,
+        approx_points=2,
     ):
         """
         Set up the initial settings for an optimization model. The new
@@ -172,74 +219,107 @@ class Optimization:
             >>>    }
 
         approx_horizon: bool, optional
-            When set to True, the model will calculate two points (start and
-            end) over the given horizon to determine the objective, which is
-            the average over the horizon. This approach can significantly
-            enhance the solving speed, particularly for long horizons. In most
-            cases, this approximation is equivalent to solving the original
-            problem. It relies on the assumption that the groundwater level
-            will linearly decrease in the projected future. However, it is
-            important to note that if there is a water right constraint with a
-            time_window argument larger than 1, the approximation option is
-            restricted and cannot be used. This ensures accurate handling of
-            water right constraints over multiple time periods. The default is
+            When set to True, the model will calculate approx_points evenly
+            spaced points (including the start and end) over the given horizon
+            and linearly interpolate the years in between to determine the
+            objective, which is the average over the horizon. This approach can
+            significantly enhance the solving speed, particularly for long
+            horizons. In most cases, this approximation is equivalent to
+            solving the original problem. It relies on the assumption that the
+            groundwater level will linearly decrease in the projected future.
+            Water right constraints with a time_window argument larger than 1
+            are applied to the interpolated irrigation depths. The default is
             False.
         gurobi_kwargs:
             The gurobi keywords. These will be fed to the solver in solve().
+        formulation: str, optional
+            "nonconvex", "convex", or "pwl". The "nonconvex" formulation
+            directly uses the bilinear products of binary and continuous
+            variables, which requires Gurobi's NonConvex=2. The "convex"
+            formulation linearizes these products with big-M constraints
+            tightened by the water and yield bounds, relaxes the concave yield
+            curve and the energy equations to inequalities that are tight at
+            the optimum, and reduces the Cooper-Jacob drawdown to a linear
+            term. The resulting model is a convex MIQCP for a farmer with a
+            single field and a single well. Its objective may differ slightly
+            (about 1e-4 relative) from the "nonconvex" one, which approximates
+            the log of the drawdown with Gurobi's piecewise-linear general
+            constraint. The "pwl" formulation further
+            replaces the quadratic yield curve and the quadratic energy term
+            with piecewise-linear interpolations, resulting in a MILP for a
+            farmer with a single field and a single well. For farmers with
+            multiple wells, the well allocation part remains bilinear and
+            NonConvex=2 is still applied. The default is "nonconvex".
+        pwl_breakpoints: int, optional
+            The number of evenly spaced breakpoints of the piecewise-linear
+            interpolations when formulation is "pwl". The yield curve is
+            interpolated over w/wmax in [0, 1] and the energy term over the
+            range of the irrigation volume. More breakpoints give a smaller
+            approximation error but a larger model. See pwl_max_errors() for
+            the maximum errors. The default is 10.
+        solver: str, optional
+            "gurobi" or "highs". The model is always built with gurobipy. The
+            "highs" solver solves it with the open-source HiGHS solver through
+            scipy, which does not require a Gurobi license for large models.
+            It only supports MILP models, i.e., the "pwl" formulation for a
+            farmer with a single field and a single well. The default is
+            "gurobi".
+        symmetry_breaking: bool, optional
+            When set to True, the interchangeable splits of a field (i.e.,
+            the splits with the same field type and previous crop type) are
+            ordered by their crop and rainfed choices when the crop types are
+            optimized. This removes the equivalent permutations of the choices
+            across the splits, which otherwise grow factorially with
+            area_split in the branch-and-bound. The default is False.
+        scenario_weights: list, optional
+            The probabilities of the precipitation scenarios. If given, the
+            prec_aw of each field is given as a list of dictionaries, one for
+            each scenario (see setup_constr_field()). The model maximizes the
+            expected objective over the scenarios with the crop types, rainfed
+            option, and irrigation technologies shared by all scenarios and
+            the irrigation depths decided for each scenario. Internally, the
+            scenarios are stacked along the horizon axis, i.e., n_h is the
+            horizon times the number of scenarios. The reported solutions are
+            the expected values over the scenarios, and the solutions of each
+            scenario are given in sols["scenarios"]. The weights are
+            normalized to sum to one. The default is None (a single
+            scenario).
+        approx_points : int, optional
+            The number of points used by approx_horizon, which has to be at
+            least 2. The approximation is not applied if the horizon is not
+            longer than approx_points. The default is 2.
 
         Returns
         -------
         None.
 
         """
-        if gurobi_kwargs is None:
-            gurobi_kwargs = {}
-        if consumat_dict is None:
-            consumat_dict = {
-                "alpha": {"profit": 1, "yield_rate": 1},
-                "scale": {"profit": 0.23 * 50, "yield_rate": 1},
-            }
-        if tech_options is None:
-            tech_options = ["center pivot", "center pivot LEPA"]
-        if crop_options is None:
-            crop_options = ["corn", "sorghum", "soybeans", "fallow"]
-        self.target = target
-        self.horizon = horizon
-        self.crop_options = crop_options
-        self.tech_options = tech_options
-        self.approx_horizon = approx_horizon
-
-        ## The gurobi keywords. These will be fed to the solver in solve().
-        self.gurobi_kwargs = gurobi_kwargs
-
-        ## Dimension coefficients
-        self.n_s = area_split
-        self.n_c = len(crop_options)  # No. of crop choice options
-        self.n_te = len(tech_options)  # No. of irr_depth tech options
-        self.n_h = horizon
-        if approx_horizon and horizon > 2:
-            # Approximate obj with the average of the start and end points.
-            self.n_h = 2
-
-        ## Records fields and wells
-        self.field_ids = []
-        self.well_ids = []
-        self.water_right_ids = []
-        self.n_fields = 0
-        self.n_wells = 0
-        self.n_water_rights = 0
-
-        # For consumat
-        self.alphas = consumat_dict["alpha"]
-        self.scales = consumat_dict["scale"]
-        self.eval_metrics = [
-            metric for metric, v in self.alphas.items() if v is not None
-        ]
+        self._set_ini_settings(
+            target,
+            horizon,
+            area_split,
+            crop_options,
+            tech_options,
+            consumat_dict,
+            approx_horizon,
+            gurobi_kwargs,
+            formulation,
+            pwl_breakpoints,
+            solver,
+            symmetry_breaking,
+            scenario_weights,
+            approx_points,
+        )
 
         ## Optimization Model
         # self.model.dispose()    # release the memory of the previous model
-        self.model = gp.Model(name=self.unique_id, env=self.gpenv)
+        self.model = self._new_gp_model()
         self.vars_ = {}  # A container to store variables.
+        # Variables not in the solutions but used by tighten_bounds().
+        self.vars_aux = {}
+        # A container to store the data-dependent constraints, which are
+        # updated in place by the update_constr_* methods.
+        self.constrs = {}
         self.bounds = {}
         self.inf = float("inf")
 
@@ -286,6 +366,113 @@ class Optimization:
         ## Record water rights info.
         self.wrs_info = {}
 
+        ## Record field and well info for in-place updates.
+        self.fields_info = {}
+        self.wells_info = {}
+
+    def _set_ini_settings(
+        self,
+        target,
+        horizon,
+        area_split,
+        crop_options,
+        tech_options,
+        consumat_dict,
+        approx_horizon,
+        gurobi_kwargs,
+        formulation,
+        pwl_breakpoints,
+        solver,
+        symmetry_breaking,
+        scenario_weights,
+        approx_points,
+    ):
+        """Check and store the settings of setup_ini_model()."""
+        if gurobi_kwargs is None:
+            gurobi_kwargs = {}
+        if consumat_dict is None:
+            consumat_dict = {
+                "alpha": {"profit": 1, "yield_rate": 1},
+                "scale": {"profit": 0.23 * 50, "yield_rate": 1},
+            }
+        if tech_options is None:
+            tech_options = ["center pivot", "center pivot LEPA"]
+        if crop_options is None:
+            crop_options = ["corn", "sorghum", "soybeans", "fallow"]
+        self.target = target
+        self.horizon = horizon
+        self.crop_options = crop_options
+        self.tech_options = tech_options
+        self.approx_horizon = approx_horizon
+        if formulation not in ("nonconvex", "convex", "pwl"):
+            raise ValueError(f"{formulation} is not a valid value for formulation.")
+        if int(pwl_breakpoints) < 2:
+            raise ValueError("pwl_breakpoints has to be at least 2.")
+        if solver not in solver_options:
+            raise ValueError(f"{solver} is not a valid value for solver.")
+        self.formulation = formulation
+        self.pwl_breakpoints = int(pwl_breakpoints)
+        self.solver = solver
+        self.symmetry_breaking = symmetry_breaking
+        # Will be set to False if any nonconvex part is added to the model.
+        self.is_convex = formulation != "nonconvex"
+
+        ## The gurobi keywords. These will be fed to the solver in solve().
+        self.gurobi_kwargs = gurobi_kwargs
+
+        ## Dimension coefficients
+        self.n_s = area_split
+        self.n_c = len(crop_options)  # No. of crop choice options
+        self.n_te = len(tech_options)  # No. of irr_depth tech options
+        self.n_h = horizon
+        # The years of the collocation points if the horizon is approximated
+        self.approx_years = None
+        if approx_horizon:
+            if int(approx_points) < 2:
+                raise ValueError("approx_points has to be at least 2.")
+            if horizon > approx_points:
+                # Approximate obj with evenly spaced points over the horizon.
+                self.n_h = int(approx_points)
+                self.approx_years = np.linspace(0, horizon - 1, self.n_h)
+        # Linear interpolation weights of the points for each year (horizon, n_h)
+        if self.approx_years is None:
+            self.horizon_interp = np.eye(self.n_h)
+        else:
+            self.horizon_interp = np.column_stack(
+                [
+                    np.interp(np.arange(horizon), self.approx_years, e)
+                    for e in np.eye(self.n_h)
+                ]
+            )
+
+        ## Precipitation scenarios stacked along the horizon axis
+        if scenario_weights is None:
+            scenario_weights = [1]
+        scenario_weights = np.asarray(scenario_weights, dtype=float)
+        if scenario_weights.ndim != 1 or len(scenario_weights) == 0:
+            raise ValueError("scenario_weights has to be a non-empty list.")
+        if np.any(scenario_weights < 0) or scenario_weights.sum() <= 0:
+            raise ValueError("scenario_weights has to be nonnegative.")
+        self.scenario_weights = scenario_weights / scenario_weights.sum()
+        self.n_scen = len(scenario_weights)
+        self.n_yr = self.n_h  # Horizon of each scenario
+        self.n_h = self.n_yr * self.n_scen
+
+        ## Records fields and wells
+        self.field_ids = []
+        self.well_ids = []
+        self.water_right_ids = []
+        self.n_fields = 0
+        self.n_wells = 0
+        self.n_water_rights = 0
+
+        # For consumat
+        self.alphas = consumat_dict["alpha"]
+        self.scales = consumat_dict["scale"]
+        self.eval_metrics = [
+            metric for metric, v in self.alphas.items() if v is not None
+        ]
+
     def setup_constr_field(
         self,
         field_id,
@@ -315,8 +502,10 @@ class Optimization:
             for different fields.
         field_area: str or int
             The field area associated with the corresponding field_id.
-        prec_aw : dict
-            Perceived precipitation for each crop's growing season [cm].
+        prec_aw : dict or list
+            Perceived precipitation for each crop's growing season [cm]. A
+            list of dictionaries gives the precipitation of each scenario if
+            scenario_weights is given in setup_ini_model().
         water yield curves: dict
             A dictionary containing water-yield response curves for different crop types.
             This has to be given as an input under settings dictionary for a field.
@@ -377,15 +566,7 @@ class Optimization:
             min_y_ratio = np.zeros((n_c, 1))
 
         # Assign field type for each split of the field.
-        if isinstance(field_type, str):  # Apply to all splits
-            field_type_list = [field_type] * n_s  # [rainfed, rainfed, rainfed] if n_s=3
-        elif isinstance(field_type, list):
-            field_type_list = field_type
-
-        # Overwrite field_type_list if i_rainfed is given.
-        if i_rainfed is not None:
-            rain_feds = np.sum(i_rainfed, axis=1).flatten()
-            field_type_list = ["rainfed" if r > 0.5 else "irrigated" for r in rain_feds]
+        field_type_list = self._get_field_type_list(field_type, i_rainfed)
 
         # Summary message for the setting.
         self.msg[fid] = {
@@ -411,9 +592,7 @@ class Optimization:
         self.bounds[fid]["ub_irr"] = ub_irr
 
         # Create the available precipitiation for each crop.
-        prec_aw_ = np.ones((n_s, n_c, n_h))
-        for ci, crop in enumerate(crop_options):
-            prec_aw_[:, ci, :] = prec_aw[crop]
+        prec_aw_ = self._get_prec_aw_array(prec_aw)
 
         # Approximate robust optimization by prorating prec_aw with a ratio
         # This is only for internal testing.
@@ -429,6 +608,8 @@ class Optimization:
         w_temp = m.addMVar(
             (n_s, n_c, n_h), vtype="C", name=f"{fid}.w_temp", lb=0, ub=inf
         )
+        if self.formulation != "nonconvex":
+            w_temp.UB = np.broadcast_to(ub_w / wmax, w_temp.shape)
         w_ = m.addMVar((n_s, n_c, n_h), vtype="C", name=f"{fid}.w_", lb=0, ub=1)
         y = m.addMVar((n_s, n_c, n_h), vtype="C", name=f"{fid}.y(1e4bu)", lb=0, ub=inf)
         y_ = m.addMVar((n_s, n_c, n_h), vtype="C", name=f"{fid}.y_", lb=0, ub=1)
@@ -447,11 +628,28 @@ class Optimization:
         i_crop = m.addMVar((n_s, n_c, 1), vtype="B", name=f"{fid}.i_crop")
         i_rainfed = m.addMVar((n_s, n_c, 1), vtype="B", name=f"{fid}.i_rainfed")
 
-        # Given crop type
-        ## Crop type is set to be the same accross the planning horizon.
-        if i_crop_input is not None:
-            m.addConstr(i_crop == i_crop_input, name=f"c.{fid}.i_crop_input")
-            self.msg[fid]["Crop types"] = "user input"
+        self.vars_[fid] = {}
+        self.vars_[fid]["irr_depth"] = irr_depth
+        self.vars_[fid]["i_crop"] = i_crop
+        self.vars_[fid]["i_rainfed"] = i_rainfed
+        self.vars_aux[fid] = {
+            "w": w,
+            "w_temp": w_temp,
+            "w_": w_,
+            "yw_temp": yw_temp,
+            "v_c": v_c,
+        }
+        # Constraints carrying the given decisions. They are removed and added
+        # again when the field is updated.
+        self.constrs[fid] = {"choices": []}
+        self.fields_info[fid] = {
+            "tech_pumping_rate_coefs": tech_pumping_rate_coefs,
+            "field_area": field_area,
+            "ymax": ymax,
+            "wmax": wmax,
+            "abc": (a, b, c),
+            "prec_aw": prec_aw_,
+        }
 
         # One unit area can be occupied by only one type of crop.
         m.addConstr(
@@ -459,45 +657,17 @@ class Optimization:
             name=f"c.{fid}.i_crop",
         )
 
-        ### Include rain-fed option
-        for si, field_type in enumerate(field_type_list):
-            if field_type == "rainfed":
-                # Given i_rainfed,
-                if i_rainfed_input is not None:
-                    m.addConstr(
-                        i_rainfed[si, :, :] == i_rainfed_input[si, :, :],
-                        name=f"c.{fid}_{si}.i_rainfed_input",
-                    )
-                    self.msg[fid]["Rainfed field"] = "user input"
-
-                # i_rainfed[si, ci, hi] can be 1 only when i_crop[si, ci, hi] is 1.
-                # Otherwise, it has to be zero.
-                m.addConstr(
-                    i_crop[si, :, :] - i_rainfed[si, :, :] >= 0,
-                    name=f"c.{fid}_{si}.i_rainfed",
-                )
-                m.addConstr(irr_depth[si, :, :] == 0, name=f"c.{fid}_{si}.irr_rain_fed")
-
-            elif field_type == "irrigated":
-                m.addConstr(i_rainfed[si, :, :] == 0, name=f"c.{fid}_{si}.no_i_rainfed")
-
-            elif field_type == "optimize":
-                # i_rainfed[si, ci, hi] can be 1 only when i_crop[si, ci, hi] is 1.
-                # Otherwise, it has to be zero.
-                m.addConstr(
-                    i_crop[si, :, :] - i_rainfed[si, :, :] >= 0,
-                    name=f"c.{fid}_{si}.i_rainfed",
-                )
-                m.addConstr(
-                    irr_depth[si, :, :] * i_rainfed[si, :, :] == 0,
-                    name=f"c.{fid}_{si}.irr_rainfed",
-                )
-            else:
-                raise ValueError(f"{field_type} is not a valid value for field_type.")
+        # Given crop type and field type (including rain-fed option)
+        ## Crop type is set to be the same accross the planning horizon.
+        self._add_constr_field_choices(
+            fid, field_type_list, i_crop_input, i_rainfed_input
+        )
 
         # See the numpy broadcast rules:
         # https://numpy.org/doc/stable/user/basics.broadcasting.html
-        m.addConstr((w == irr_depth + prec_aw_), name=f"c.{fid}.w(cm)")
+        self.constrs[fid]["w"] = m.addConstr(
+            (w == irr_depth + prec_aw_), name=f"c.{fid}.w(cm)"
+        )
         m.addConstr((w_temp == w / wmax), name=f"c.{fid}.w_temp")
         m.addConstrs(
             (
@@ -514,21 +684,34 @@ class Optimization:
         # Also, we need to seperate yw_ and y_ into two constraints. Otherwise,
         # gurobi will crash. No idea why.
 
-        m.addConstr((yw_temp == (a * w_**2 + b * w_ + c)), name=f"c.{fid}.yw_temp")
+        if self.formulation != "nonconvex":
+            self._add_constr_yield_convex(
+                fid, a, b, c, min_y_ratio, w_, yw_temp, yw_bi, yw_, y_, i_crop
+            )
+            m.addConstr(
+                (irr_depth <= ub_irr * i_crop), name=f"c.{fid}.irr_depth(cm)"
+            )
+        else:
+            m.addConstr(
+                (yw_temp == (a * w_**2 + b * w_ + c)), name=f"c.{fid}.yw_temp"
+            )
 
-        # Minimum yield_rate cutoff (aim to capture fallow field)
-        m.addConstr(
-            (
-                yw_bi * (yw_temp - min_y_ratio) + (1 - yw_bi) * (min_y_ratio - yw_temp)
-                >= 0
-            ),
-            name=f"c.{fid}.yw_bi",
-        )  # yw_bi is 1 or 0 based on yw_temp is greater or less than min_y_ratio
-        m.addConstr((yw_ == yw_bi * yw_temp), name=f"c.{fid}.yw_")
+            # Minimum yield_rate cutoff (aim to capture fallow field)
+            m.addConstr(
+                (
+                    yw_bi * (yw_temp - min_y_ratio)
+                    + (1 - yw_bi) * (min_y_ratio - yw_temp)
+                    >= 0
+                ),
+                name=f"c.{fid}.yw_bi",
+            )  # yw_bi is 1 or 0 based on yw_temp is greater or less than min_y_ratio
+            m.addConstr((yw_ == yw_bi * yw_temp), name=f"c.{fid}.yw_")
 
-        m.addConstr((y_ == yw_ * i_crop), name=f"c.{fid}.y_")
+            m.addConstr((y_ == yw_ * i_crop), name=f"c.{fid}.y_")
+            m.addConstr(
+                (irr_depth * (1 - i_crop) == 0), name=f"c.{fid}.irr_depth(cm)"
+            )
         m.addConstr((y == y_ * ymax * unit_area * 1e-4), name=f"c.{fid}.y")  # 1e4 bu
-        m.addConstr((irr_depth * (1 - i_crop) == 0), name=f"c.{fid}.irr_depth(cm)")
         cm2m = 0.01
         m.addConstr((v_c == irr_depth * unit_area * cm2m), name=f"c.{fid}.v_c(m-ha)")
         m.addConstr(
@@ -564,15 +747,15 @@ class Optimization:
         #     penalties.append(penalty)
 
         # Create i_crop_change to indicate crop type change
-        if isinstance(pre_i_crop, str):
-            i_c = crop_options.index(pre_i_crop)
-            pre_i_crop = np.zeros((n_s, n_c, 1))
-            pre_i_crop[:, i_c, :] = 1
+        pre_i_crop = self._get_i_crop_array(pre_i_crop)
+        self._add_constr_split_symmetry(
+            fid, field_type_list, pre_i_crop, i_crop_input, i_rainfed_input
+        )
         i_crop_change_ = m.addMVar(
             (n_s, n_c, 1), vtype="I", name=f"{fid}.i_crop_change_", lb=-1, ub=1
         )
         i_crop_change = m.addMVar((n_s, n_c, 1), vtype="B", name=f"{fid}.i_crop_change")
-        m.addConstr(
+        self.constrs[fid]["i_crop_change_"] = m.addConstr(
             i_crop_change_ == i_crop - pre_i_crop, name=f"c.{fid}.i_crop_change_"
         )
         m.addConstrs(
@@ -591,14 +774,50 @@ class Optimization:
         q = m.addMVar((n_h), vtype="C", name=f"{fid}.q(m-ha/d)", lb=0, ub=inf)
         l_pr = m.addVar(vtype="C", name=f"{fid}.l_pr(m)", lb=0, ub=inf)
         i_te = m.addMVar((n_te), vtype="B", name=f"{fid}.i_te")
-        m.addConstr(
-            q
-            == gp.quicksum(
-                (techs[te][0] * v + techs[te][1]) * i_te[i]
-                for i, te in enumerate(tech_options)
-            ),
-            name=f"c.{fid}.q(m-ha/d)",
-        )
+        if self.formulation != "nonconvex":
+            # v_te = v * i_te, linearized with the upper bound of v.
+            ub_v = ub_irr * field_area * cm2m
+            v_te = m.addMVar(
+                (n_te, n_h), vtype="C", name=f"{fid}.v_te(m-ha)", lb=0, ub=ub_v
+            )
+            for i in range(n_te):
+                m.addConstr(v_te[i, :] <= ub_v * i_te[i], name=f"c.{fid}.v_te_{i}.ub")
+                m.addConstr(v_te[i, :] <= v, name=f"c.{fid}.v_te_{i}.v")
+                m.addConstr(
+                    v_te[i, :] >= v - ub_v * (1 - i_te[i]), name=f"c.{fid}.v_te_{i}.lb"
+                )
+            m.addConstr(
+                q
+                == gp.quicksum(
+                    techs[te][0] * v_te[i, :] + techs[te][1] * i_te[i]
+                    for i, te in enumerate(tech_options)
+                ),
+                name=f"c.{fid}.q(m-ha/d)",
+            )
+            self.vars_[fid]["v_te"] = v_te
+            if self.formulation == "pwl":
+                # v_te_sq >= v_te**2 interpolated at the breakpoints, i.e., the
+                # maximum of the secants, which is tight at the optimum since
+                # the energy cost is minimized.
+                v_te_sq = m.addMVar(
+                    (n_te, n_h), vtype="C", name=f"{fid}.v_te_sq", lb=0, ub=ub_v**2
+                )
+                x = np.linspace(0, ub_v, self.pwl_breakpoints)
+                for k in range(self.pwl_breakpoints - 1):
+                    m.addConstr(
+                        v_te_sq >= (x[k] + x[k + 1]) * v_te - x[k] * x[k + 1],
+                        name=f"c.{fid}.v_te_sq_{k}",
+                    )
+                self.vars_[fid]["v_te_sq"] = v_te_sq
+        else:
+            m.addConstr(
+                q
+                == gp.quicksum(
+                    (techs[te][0] * v + techs[te][1]) * i_te[i]
+                    for i, te in enumerate(tech_options)
+                ),
+                name=f"c.{fid}.q(m-ha/d)",
+            )
         m.addConstr(
             gp.quicksum(i_te[i] for i in range(n_te)) == 1, name=f"c.{fid}.i_te"
         )
@@ -607,30 +826,21 @@ class Optimization:
             == gp.quicksum(techs[te][2] * i_te[i] for i, te in enumerate(tech_options)),
             name=f"c.{fid}.l_pr(m)",
         )
+        self.vars_[fid]["i_te"] = i_te
+        self.vars_[fid]["l_pr"] = l_pr
 
         # Given tech as an input
-        if i_te_input is not None:
-            self.msg[fid]["Irr tech"] = "user input"
-            if isinstance(i_te_input, str):
-                te = i_te_input
-                i_te_input = np.zeros(n_te)
-                i_te_input[tech_options.index(te)] = 1
-            else:
-                te = tech_options[np.argmax(i_te_input)]
-            m.addConstr(i_te == i_te_input, name=f"c.{fid}.i_te_input")
-            qa_input, qb_input, l_pr_input = techs[te]
-            m.addConstr(l_pr == l_pr_input, name=f"c.{fid}.l_pr(m)_input")
+        self._add_constr_tech_choice(fid, i_te_input)
 
         # Create variable for tech change
-        if isinstance(pre_i_te, str):
-            i_t = tech_options.index(pre_i_te)
-            pre_i_te = np.zeros(n_te)
-            pre_i_te[i_t] = 1
+        pre_i_te = self._get_i_te_array(pre_i_te)
         i_tech_change_ = m.addMVar(
             (n_te), vtype="I", name=f"{fid}.i_tech_change_", lb=-1, ub=1
         )
         i_tech_change = m.addMVar((n_te), vtype="B", name=f"{fid}.i_tech_change")
-        m.addConstr(i_tech_change_ == i_te - pre_i_te, name=f"c.{fid}.i_tech_change_")
+        self.constrs[fid]["i_tech_change_"] = m.addConstr(
+            i_tech_change_ == i_te - pre_i_te, name=f"c.{fid}.i_tech_change_"
+        )
         m.addConstrs(
             (
                 i_tech_change[t] == gp.max_(i_tech_change_[t], constant=0)
@@ -639,15 +849,9 @@ class Optimization:
             name=f"c.{fid}.i_tech_change",
         )
 
-        self.vars_[fid] = {}
         self.vars_[fid]["v"] = v
         self.vars_[fid]["y"] = y
         self.vars_[fid]["y_y"] = y_y
-        self.vars_[fid]["irr_depth"] = irr_depth
-        self.vars_[fid]["i_crop"] = i_crop
-        self.vars_[fid]["i_rainfed"] = i_rainfed
-        self.vars_[fid]["i_te"] = i_te
-        self.vars_[fid]["l_pr"] = l_pr
         self.vars_[fid]["q"] = q
 
         self.vars_[fid]["pre_i_crop"] = pre_i_crop
@@ -655,87 +859,432 @@ class Optimization:
         self.vars_[fid]["i_crop_change"] = i_crop_change
         self.vars_[fid]["i_tech_change"] = i_tech_change
 
-        self.vars_[fid]["field_type"] = field_type
+        self.vars_[fid]["field_type"] = field_type_list[-1]
 
         self.n_fields += 1
 
-    def setup_constr_well(
+    def update_constr_field(
         self,
-        well_id,
-        dwl,
-        st,
-        l_wt,
-        r,
-        k,
-        sy,
-        eff_pump,
-        eff_well,
-        pumping_days,
-        pumping_capacity=None,
-        rho=1000.0,
-        g=9.8016,
+        field_id,
+        prec_aw,
+        pre_i_crop,
+        pre_i_te,
+        field_type="optimize",
+        i_crop=None,
+        i_rainfed=None,
+        i_te=None,
     ):
         """
-        Set up well constraints for the optimization model. You can assign multiple wells by calling
-        this function repeatedly with different well_id.
+        Update the year-dependent data of a field that has been added by
+        setup_constr_field() without rebuilding the model. The precipitation
+        and the previous decisions are updated in place as right-hand-side
+        values, while the constraints fixing crop types, field types, and
+        irrigation technologies are replaced.
 
         Parameters
         ----------
-        well_id: str or int
-            The well id serves as a means to differentiate the equation sets
-            for different wells.
-        dwl: float
-            Percieved annual water level change rate [m/yr].
-        st: float
-            Aquifer saturated thickness at the initial time step [m].
-            Given as an input in the init dicitonary of well settings.
-        l_wt: float
-            The head required to lift water from the water table to the ground
-            surface at the start of the pumping season at the initial time step
-            [m]. Given as an input in the init dicitonary of well settings.
-        r: float
-            Well radius [m]. Given as an input in the well settings.
-        k: float
-            Hydraulic conductivity [m/day]. This will be used to calculate
-            transmissivity [m²/day] by multipling k with the saturated thickness [m]. Given as an input in the well settings.
-        sy: float
-            Specific yield of the aquifer [-]. Given as an input in the well settings.
-        eff_pump: float
-            Pump efficiency as a fraction [-]. Given as an input in the well settings.
-        eff_well: float
-            Well efficiency as a fraction [-]. Given as an input in the well settings.
-        pumping_days: int
-            Number of days the well is operational [day]. Given as an input in the init dictionary
-            of the well settings.
-        pumping_capacity: float
-            Maximum pumping capacity of the well [m-ha/yr]. The default is None.
-            Given as an input in the well settings.
-        rho: float
-            density of water [kg/m3].
-        g: float
-            acceleration due to gravity [m/s²].
-
+        field_id : str or int
+            The field id given in setup_constr_field().
+        prec_aw : dict or list
+            Perceived precipitation for each crop's growing season [cm]. A
+            list of dictionaries gives the precipitation of each scenario if
+            scenario_weights is given in setup_ini_model().
+        pre_i_crop: str or 3darray
+            Crop name or the i_crop from the previous time step.
+        pre_i_te: str or 3darray
+            Irrigation technology or i_te from the previous time step.
+        field_type : str or list, optional
+            Field type can be "rainfed", "irrigated", or "optimize". The
+            default value is "optimize".
+        i_crop : 3darray, optional
+            The crop type for the current time step. The default is None.
+        i_rainfed : 3darray, optional
+            The field type (irrigated or rainfed) for the current time step.
+            The default is None.
+        i_te : 1darray or str, optional
+            The irrigation technology chosen for the current time step. The
+            default is None.
 
         Returns
         -------
         None.
 
         """
-        self.well_ids.append(well_id)
-        wid = well_id
-
+        fid = field_id
         m = self.model
-        n_h = self.n_h
-        inf = self.inf
+        constrs = self.constrs[fid]
+        vars_fid = self.vars_[fid]
 
-        # Project the future lift head.
-        approx_horizon = self.approx_horizon
-        if approx_horizon and self.horizon > 2:
-            dwls = np.array([0, dwl * (self.horizon - 1)])
-        else:
-            dwls = np.array([dwl * (i) for i in range(n_h)])
-        # Assume a linear projection to the future
-        l_wt = l_wt - dwls
+        field_type_list = self._get_field_type_list(field_type, i_rainfed)
+        self.msg[fid] = {
+            "Crop types": "optimize",
+            "Irr tech": "optimize",
+            "Field type": field_type_list,
+        }
+
+        # Replace the constraints of the given decisions.
+        for c in constrs["choices"]:
+            m.remove(c)
+        constrs["choices"] = []
+        self._add_constr_field_choices(fid, field_type_list, i_crop, i_rainfed)
+        self._add_constr_tech_choice(fid, i_te)
+
+        # Update right-hand-side values. Constants are moved to the
+        # right-hand side by gurobi, i.e., w - irr_depth == prec_aw_.
+        prec_aw_ = self._get_prec_aw_array(prec_aw)
+        constrs["w"].RHS = prec_aw_
+        self.fields_info[fid]["prec_aw"] = prec_aw_
+        pre_i_crop = self._get_i_crop_array(pre_i_crop)
+        pre_i_te = self._get_i_te_array(pre_i_te)
+        self._add_constr_split_symmetry(
+            fid, field_type_list, pre_i_crop, i_crop, i_rainfed
+        )
+        constrs["i_crop_change_"].RHS = -pre_i_crop
+        constrs["i_tech_change_"].RHS = -pre_i_te
+
+        vars_fid["pre_i_crop"] = pre_i_crop
+        vars_fid["pre_i_te"] = pre_i_te
+        vars_fid["field_type"] = field_type_list[-1]
+
+    def _get_field_type_list(self, field_type, i_rainfed=None):
+        """Assign field type for each split of the field."""
+        if isinstance(field_type, str):  # Apply to all splits
+            # [rainfed, rainfed, rainfed] if n_s=3
+            field_type_list = [field_type] * self.n_s
+        elif isinstance(field_type, list):
+            field_type_list = field_type
+
+        # Overwrite field_type_list if i_rainfed is given.
+        if i_rainfed is not None:
+            rain_feds = np.sum(i_rainfed, axis=1).flatten()
+            field_type_list = ["rainfed" if r > 0.5 else "irrigated" for r in rain_feds]
+        return field_type_list
+
+    def _get_prec_aw_array(self, prec_aw):
+        """
+        Create the available precipitiation (n_s, n_c, n_h) for each crop. A
+        list of dictionaries gives the precipitation of each scenario, while a
+        dictionary is applied to all scenarios.
+        """
+        if isinstance(prec_aw, dict):
+            prec_aw = [prec_aw] * self.n_scen
+        elif len(prec_aw) != self.n_scen:
+            raise ValueError(
+                f"prec_aw has {len(prec_aw)} scenarios but {self.n_scen} are expected."
+            )
+        n_yr = self.n_yr
+        prec_aw_ = np.ones((self.n_s, self.n_c, self.n_h))
+        for k, prec_aw_k in enumerate(prec_aw):
+            for ci, crop in enumerate(self.crop_options):
+                prec_aw_[:, ci, k * n_yr : (k + 1) * n_yr] = prec_aw_k[crop]
+        return prec_aw_
+
+    def _get_i_crop_array(self, i_crop):
+        """Convert a crop name into an i_crop indicator matrix."""
+        if isinstance(i_crop, str):
+            i_c = self.crop_options.index(i_crop)
+            i_crop = np.zeros((self.n_s, self.n_c, 1))
+            i_crop[:, i_c, :] = 1
+        return i_crop
+
+    def _get_i_te_array(self, i_te):
+        """Convert a tech name into an i_te indicator array."""
+        if isinstance(i_te, str):
+            i_t = self.tech_options.index(i_te)
+            i_te = np.zeros(self.n_te)
+            i_te[i_t] = 1
+        return i_te
+
+    def _add_constr_field_choices(
+        self, fid, field_type_list, i_crop_input=None, i_rainfed_input=None
+    ):
+        """Add constraints for the given crop types and field types."""
+        m = self.model
+        vars_fid = self.vars_[fid]
+        irr_depth = vars_fid["irr_depth"]
+        i_crop = vars_fid["i_crop"]
+        i_rainfed = vars_fid["i_rainfed"]
+        constrs = self.constrs[fid]["choices"]
+
+        if i_crop_input is not None:
+            constrs.append(
+                m.addConstr(i_crop == i_crop_input, name=f"c.{fid}.i_crop_input")
+            )
+            self.msg[fid]["Crop types"] = "user input"
+
+        ### Include rain-fed option
+        for si, field_type in enumerate(field_type_list):
+            if field_type == "rainfed":
+                # Given i_rainfed,
+                if i_rainfed_input is not None:
+                    constrs.append(
+                        m.addConstr(
+                            i_rainfed[si, :, :] == i_rainfed_input[si, :, :],
+                            name=f"c.{fid}_{si}.i_rainfed_input",
+                        )
+                    )
+                    self.msg[fid]["Rainfed field"] = "user input"
+
+                # i_rainfed[si, ci, hi] can be 1 only when i_crop[si, ci, hi] is 1.
+                # Otherwise, it has to be zero.
+                constrs.append(
+                    m.addConstr(
+                        i_crop[si, :, :] - i_rainfed[si, :, :] >= 0,
+                        name=f"c.{fid}_{si}.i_rainfed",
+                    )
+                )
+                constrs.append(
+                    m.addConstr(
+                        irr_depth[si, :, :] == 0, name=f"c.{fid}_{si}.irr_rain_fed"
+                    )
+                )
+
+            elif field_type == "irrigated":
+                constrs.append(
+                    m.addConstr(
+                        i_rainfed[si, :, :] == 0, name=f"c.{fid}_{si}.no_i_rainfed"
+                    )
+                )
+
+            elif field_type == "optimize":
+                # i_rainfed[si, ci, hi] can be 1 only when i_crop[si, ci, hi] is 1.
+                # Otherwise, it has to be zero.
+                constrs.append(
+                    m.addConstr(
+                        i_crop[si, :, :] - i_rainfed[si, :, :] >= 0,
+                        name=f"c.{fid}_{si}.i_rainfed",
+                    )
+                )
+                if self.formulation != "nonconvex":
+                    ub_irr = self.bounds[fid]["ub_irr"]
+                    irr_rainfed = irr_depth[si, :, :] <= ub_irr * (
+                        1 - i_rainfed[si, :, :]
+                    )
+                else:
+                    irr_rainfed = irr_depth[si, :, :] * i_rainfed[si, :, :] == 0
+                constrs.append(
+                    m.addConstr(irr_rainfed, name=f"c.{fid}_{si}.irr_rainfed")
+                )
+            else:
+                raise ValueError(f"{field_type} is not a valid value for field_type.")
+
+    def _add_constr_split_symmetry(
+        self, fid, field_type_list, pre_i_crop, i_crop_input=None, i_rainfed_input=None
+    ):
+        """
+        Order the interchangeable splits of a field by their choices (see
+        symmetry_breaking in setup_ini_model()). The choice of a split is
+        encoded as 2 * (crop index) + (rainfed), which is non-decreasing over
+        the splits with the same field type and previous crop type.
+        """
+        if (
+            not self.symmetry_breaking
+            or self.n_s < 2
+            or i_crop_input is not None
+            or i_rainfed_input is not None
+        ):
+            return
+        m = self.model
+        i_crop = self.vars_[fid]["i_crop"]
+        i_rainfed = self.vars_[fid]["i_rainfed"]
+        crop_codes = 2 * np.arange(self.n_c)
+
+        groups = {}
+        for si, field_type in enumerate(field_type_list):
+            key = (field_type, tuple(pre_i_crop[si, :, 0]))
+            groups.setdefault(key, []).append(si)
+
+        constrs = self.constrs[fid]["choices"]
+        for splits in groups.values():
+            for s0, s1 in pairwise(splits):
+                code0 = crop_codes @ i_crop[s0, :, 0] + i_rainfed[s0, :, 0].sum()
+                code1 = crop_codes @ i_crop[s1, :, 0] + i_rainfed[s1, :, 0].sum()
+                constrs.append(
+                    m.addConstr(code0 <= code1, name=f"c.{fid}_{s0}.split_symmetry")
+                )
+
+    def _add_constr_tech_choice(self, fid, i_te_input=None):
+        """Add constraints for the given irrigation technology."""
+        if i_te_input is None:
+            return
+        m = self.model
+        tech_options = self.tech_options
+        techs = self.fields_info[fid]["tech_pumping_rate_coefs"]
+        constrs = self.constrs[fid]["choices"]
+
+        self.msg[fid]["Irr tech"] = "user input"
+        if isinstance(i_te_input, str):
+            te = i_te_input
+            i_te_input = self._get_i_te_array(te)
+        else:
+            te = tech_options[np.argmax(i_te_input)]
+        constrs.append(
+            m.addConstr(
+                self.vars_[fid]["i_te"] == i_te_input, name=f"c.{fid}.i_te_input"
+            )
+        )
+        qa_input, qb_input, l_pr_input = techs[te]
+        constrs.append(
+            m.addConstr(
+                self.vars_[fid]["l_pr"] == l_pr_input, name=f"c.{fid}.l_pr(m)_input"
+            )
+        )
+
+    def _add_constr_yield_convex(
+        self, fid, a, b, c, min_y_ratio, w_, yw_temp, yw_bi, yw_, y_, i_crop
+    ):
+        """
+        Add the yield constraints of the convex formulation. The concave yield
+        curve is relaxed to an inequality, which is tight at the optimum since
+        a higher yield is always preferred. The products of binary and
+        continuous variables are linearized with the bounds of the curve.
+        """
+        m = self.model
+        if self.formulation == "pwl":
+            self._add_constr_yield_pwl(fid, a, b, c, w_, yw_temp)
+        elif np.any(a > 0):
+            # The curve is not concave. Keep the equality.
+            self.is_convex = False
+            m.addConstr(
+                (yw_temp == (a * w_**2 + b * w_ + c)), name=f"c.{fid}.yw_temp"
+            )
+        else:
+            m.addConstr(
+                (yw_temp <= (a * w_**2 + b * w_ + c)), name=f"c.{fid}.yw_temp"
+            )
+
+        # Bounds of the yield curve over w_ in [0, 1] (evaluated at the end
+        # points and the vertex).
+        vertex = np.divide(-b, 2 * a, out=np.zeros_like(b), where=a != 0)
+        vertex = np.clip(vertex, 0, 1)
+        points = np.hstack([np.zeros_like(a), np.ones_like(a), vertex])
+        curve = a * points**2 + b * points + c
+        lb_yw = np.minimum(curve.min(axis=1, keepdims=True), min_y_ratio)
+        ub_yw = np.maximum(np.minimum(curve.max(axis=1, keepdims=True), 1), min_y_ratio)
+        yw_temp.LB = np.broadcast_to(lb_yw, yw_temp.shape)
+        yw_temp.UB = np.broadcast_to(ub_yw, yw_temp.shape)
+
+        # Minimum yield_rate cutoff (aim to capture fallow field)
+        # yw_bi is 1 or 0 based on yw_temp is greater or less than min_y_ratio
+        m.addConstr(
+            (yw_temp - min_y_ratio >= (lb_yw - min_y_ratio) * (1 - yw_bi)),
+            name=f"c.{fid}.yw_bi.lb",
+        )
+        m.addConstr(
+            (yw_temp - min_y_ratio <= (ub_yw - min_y_ratio) * yw_bi),
+            name=f"c.{fid}.yw_bi.ub",
+        )
+        # yw_ = yw_bi * yw_temp
+        m.addConstr((yw_ <= ub_yw * yw_bi), name=f"c.{fid}.yw_.ub")
+        m.addConstr((yw_ <= yw_temp - lb_yw * (1 - yw_bi)), name=f"c.{fid}.yw_.ub2")
+        m.addConstr((yw_ >= yw_temp - ub_yw * (1 - yw_bi)), name=f"c.{fid}.yw_.lb")
+        # y_ = yw_ * i_crop
+        m.addConstr((y_ <= i_crop), name=f"c.{fid}.y_.ub")
+        m.addConstr((y_ <= yw_), name=f"c.{fid}.y_.ub2")
+        m.addConstr((y_ >= yw_ - (1 - i_crop)), name=f"c.{fid}.y_.lb")
+
+    def _add_constr_yield_pwl(self, fid, a, b, c, w_, yw_temp):
+        """
+        Add the piecewise-linear interpolation of the yield curve over w_ in
+        [0, 1]. A concave interpolation is the minimum of its segments, which
+        is added as linear inequalities that are tight at the optimum.
+        Otherwise, Gurobi's piecewise-linear constraints are used.
+        """
+        m = self.model
+        x = np.linspace(0, 1, self.pwl_breakpoints)
+        y = a * x**2 + b * x + c  # (n_c, n_bp)
+        if np.any(a > 0):
+            n_s, n_c, n_h = yw_temp.shape
+            for si in range(n_s):
+                for ci in range(n_c):
+                    for hi in range(n_h):
+                        m.addGenConstrPWL(
+                            w_[si, ci, hi],
+                            yw_temp[si, ci, hi],
+                            x,
+                            y[ci],
+                            name=f"c.{fid}.yw_temp[{si},{ci},{hi}]",
+                        )
+            return
+        slopes = np.diff(y, axis=1) / np.diff(x)
+        intercepts = y[:, :-1] - slopes * x[:-1]
+        for k in range(self.pwl_breakpoints - 1):
+            m.addConstr(
+                (yw_temp <= slopes[:, [k]] * w_ + intercepts[:, [k]]),
+                name=f"c.{fid}.yw_temp_{k}",
+            )
+
+    def setup_constr_well(
+        self,
+        well_id,
+        dwl,
+        st,
+        l_wt,
+        r,
+        k,
+        sy,
+        eff_pump,
+        eff_well,
+        pumping_days,
+        pumping_capacity=None,
+        rho=1000.0,
+        g=9.8016,
+    ):
+        """
+        Set up well constraints for the optimization model. You can assign multiple wells by calling
+        this function repeatedly with different well_id.
+
+        Parameters
+        ----------
+        well_id: str or int
+            The well id serves as a means to differentiate the equation sets
+            for different wells.
+        dwl: float
+            Percieved annual water level change rate [m/yr].
+        st: float
+            Aquifer saturated thickness at the initial time step [m].
+            Given as an input in the init dicitonary of well settings.
+        l_wt: float
+            The head required to lift water from the water table to the ground
+            surface at the start of the pumping season at the initial time step
+            [m]. Given as an input in the init dicitonary of well settings.
+        r: float
+            Well radius [m]. Given as an input in the well settings.
+        k: float
+            Hydraulic conductivity [m/day]. This will be used to calculate
+            transmissivity [m²/day] by multipling k with the saturated thickness [m]. Given as an input in the well settings.
+        sy: float
+            Specific yield of the aquifer [-]. Given as an input in the well settings.
+        eff_pump: float
+            Pump efficiency as a fraction [-]. Given as an input in the well settings.
+        eff_well: float
+            Well efficiency as a fraction [-]. Given as an input in the well settings.
+        pumping_days: int
+            Number of days the well is operational [day]. Given as an input in the init dictionary
+            of the well settings.
+        pumping_capacity: float
+            Maximum pumping capacity of the well [m-ha/yr]. The default is None.
+            Given as an input in the well settings.
+        rho: float
+            density of water [kg/m3].
+        g: float
+            acceleration due to gravity [m/s²].
+
+
+        Returns
+        -------
+        None.
+
+        """
+        self.well_ids.append(well_id)
+        wid = well_id
+
+        m = self.model
+        n_h = self.n_h
+        inf = self.inf
+
+        # Project the future lift head.
+        l_wt = self._get_projected_l_wt(dwl, l_wt)
         self.l_wt = l_wt
 
         # Calculate proportion of the irrigation water (v), daily pumping rate
@@ -743,57 +1292,251 @@ class Optimization:
         v = m.addMVar((n_h), vtype="C", name=f"{wid}.v(m-ha)", lb=0, ub=inf)
         q = m.addMVar((n_h), vtype="C", name=f"{wid}.q(m-ha/d)", lb=0, ub=inf)
         l_pr = m.addVar(vtype="C", name=f"{wid}.l_pr(m)", lb=0, ub=inf)
+        self.vars_[wid] = {}
+        self.vars_[wid]["v"] = v
+        self.vars_[wid]["q"] = q
+        self.constrs[wid] = {}
+        self.wells_info[wid] = {
+            "r": r,
+            "k": k,
+            "sy": sy,
+            "eff_well": eff_well,
+            "pumping_days": pumping_days,
+        }
         # The allocation constraints are added when run finish setup.
         # E.g., m.addConstr((v == v * a_r[w_c, :]), name=f"c.{wid}.v")
-        if pumping_capacity is not None:
-            m.addConstr((v <= pumping_capacity), name=f"c.{wid}.pumping_capacity")
-
-        tr = st * k
-        # Cannot divided by zero
-        if tr < 0.001:
-            tr = 0.001
+        self._add_constr_pumping_capacity(wid, pumping_capacity)
 
-        fpitr = 4 * np.pi * tr
-        ftrd = 4 * tr * pumping_days
+        fpitr, ftrd = self._get_well_coefs(wid, st)
 
         e = m.addMVar((n_h), vtype="C", name=f"{wid}.e(PJ)", lb=0, ub=inf)
         l_t = m.addMVar(
             (n_h), vtype="C", name=f"{wid}.l_t(m)", lb=0, ub=inf
         )  # total effective lift needed
-        q_lnx = m.addMVar((n_h), vtype="C", name=f"{wid}.q_lnx", lb=0, ub=inf)
-        # The upper bound of q_lny is set to -0.5772 to avoid l_cd_l_wd to be
-        # negative.
-        q_lny = m.addMVar((n_h), vtype="C", name=f"{wid}.q_lny", lb=-inf, ub=-0.5772)
         l_cd_l_wd = m.addMVar(
             (n_h), vtype="C", name=f"{wid}.l_cd_l_wd(m)", lb=0, ub=inf
         )
+        self.vars_[wid]["l_cd_l_wd"] = l_cd_l_wd
 
         # 10000 is to convert m-ha to m3
         m_ha_2_m3 = 10000
-        m.addConstr((q_lnx == r**2 * sy / ftrd), name=f"c.{wid}.q_lnx")
-        # y = ln(x)  addGenConstrLog(x, y)
-        # m.addConstr((q_lny == np.log(r**2*sy/fpitr)), name=f"c.{wid}.q_lny")
-        # Due to TypeError: unsupported operand type(s) for *: 'MLinExpr' and
-        # 'gurobipy.LinExpr'
-        for h in range(n_h):
-            m.addGenConstrLog(q_lnx[h], q_lny[h])
-        m.addConstr(
-            l_cd_l_wd == q / fpitr * (-0.5772 - q_lny) * m_ha_2_m3 / eff_well,
-            name=f"c.{wid}.l_cd_l_wd(m)",
+        if self.formulation == "nonconvex":
+            q_lnx = m.addMVar((n_h), vtype="C", name=f"{wid}.q_lnx", lb=0, ub=inf)
+            # The upper bound of q_lny is set to -0.5772 to avoid l_cd_l_wd to be
+            # negative.
+            q_lny = m.addMVar(
+                (n_h), vtype="C", name=f"{wid}.q_lny", lb=-inf, ub=-0.5772
+            )
+            self.constrs[wid]["q_lnx"] = m.addConstr(
+                (q_lnx == r**2 * sy / ftrd), name=f"c.{wid}.q_lnx"
+            )
+            # y = ln(x)  addGenConstrLog(x, y)
+            # m.addConstr((q_lny == np.log(r**2*sy/fpitr)), name=f"c.{wid}.q_lny")
+            # Due to TypeError: unsupported operand type(s) for *: 'MLinExpr' and
+            # 'gurobipy.LinExpr'
+            for h in range(n_h):
+                m.addGenConstrLog(q_lnx[h], q_lny[h])
+            self.vars_[wid]["q_lny"] = q_lny
+        self._add_constr_well_loss(wid, fpitr, ftrd)
+        self.constrs[wid]["l_t"] = m.addConstr(
+            (l_t == l_wt + l_cd_l_wd + l_pr), name=f"c.{wid}.l_t(m)"
         )
-        m.addConstr((l_t == l_wt + l_cd_l_wd + l_pr), name=f"c.{wid}.l_t(m)")
         # e could be large. Make sure no numerical issue here.
         # J to PJ (1e-15)
         r_g_m_ha_2_m3_eff = rho * g * m_ha_2_m3 / eff_pump / 1e15
-        m.addConstr((e == r_g_m_ha_2_m3_eff * v * l_t), name=f"c.{wid}.e(PJ)")
-
-        self.vars_[wid] = {}
+        self.wells_info[wid]["r_g_m_ha_2_m3_eff"] = r_g_m_ha_2_m3_eff
+        self.wells_info[wid]["l_wt"] = l_wt
+        self.wells_info[wid]["fpitr"] = fpitr
+        self.wells_info[wid]["ftrd"] = ftrd
         self.vars_[wid]["e"] = e
-        self.vars_[wid]["v"] = v
-        self.vars_[wid]["q"] = q
+        self.vars_[wid]["l_t"] = l_t
         self.vars_[wid]["l_pr"] = l_pr
+        if self.formulation != "nonconvex":
+            # The energy constraint is added in finish_setup() once the fields
+            # connected to the well are known.
+            self.constrs[wid]["e"] = None
+        else:
+            m.addConstr((e == r_g_m_ha_2_m3_eff * v * l_t), name=f"c.{wid}.e(PJ)")
+
         self.n_wells += 1
 
+    def update_constr_well(
+        self,
+        well_id,
+        dwl,
+        st,
+        l_wt,
+        pumping_capacity=None,
+        r=None,
+        k=None,
+        sy=None,
+        eff_well=None,
+        pumping_days=None,
+    ):
+        """
+        Update the year-dependent data of a well that has been added by
+        setup_constr_well() without rebuilding the model. The lift head and
+        the Cooper-Jacob term are updated in place, while the well loss
+        constraint, whose coefficient depends on the transmissivity, is
+        replaced. The well properties (r, k, sy, eff_well, and pumping_days)
+        can also be replaced, e.g., when the model is copied from a template
+        built for another well (see copy()).
+
+        Parameters
+        ----------
+        well_id: str or int
+            The well id given in setup_constr_well().
+        dwl: float
+            Percieved annual water level change rate [m/yr].
+        st: float
+            Aquifer saturated thickness at the current time step [m].
+        l_wt: float
+            The head required to lift water from the water table to the ground
+            surface at the start of the pumping season [m].
+        pumping_capacity: float
+            Maximum pumping capacity of the well [m-ha/yr]. The default is None.
+        r, k, sy, eff_well, pumping_days: float, optional
+            The well properties. See setup_constr_well(). The values given in
+            setup_constr_well() are kept if None. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        wid = well_id
+        m = self.model
+        constrs = self.constrs[wid]
+        info = self.wells_info[wid]
+        props = {
+            "r": r,
+            "k": k,
+            "sy": sy,
+            "eff_well": eff_well,
+            "pumping_days": pumping_days,
+        }
+        info.update({key: v for key, v in props.items() if v is not None})
+
+        l_wt = self._get_projected_l_wt(dwl, l_wt)
+        self.l_wt = l_wt
+        fpitr, ftrd = self._get_well_coefs(wid, st)
+
+        if constrs["pumping_capacity"] is not None:
+            m.remove(constrs["pumping_capacity"])
+        self._add_constr_pumping_capacity(wid, pumping_capacity)
+        # Constants are moved to the right-hand side by gurobi.
+        if "q_lnx" in constrs:
+            constrs["q_lnx"].RHS = np.full(
+                self.n_h, info["r"] ** 2 * info["sy"] / ftrd
+            )
+        constrs["l_t"].RHS = l_wt
+        m.remove(constrs["l_cd_l_wd"])
+        self._add_constr_well_loss(wid, fpitr, ftrd)
+        info["l_wt"] = l_wt
+        info["fpitr"] = fpitr
+        info["ftrd"] = ftrd
+        if constrs.get("e") is not None:
+            m.remove(constrs["e"])
+            self._add_constr_energy_convex(wid)
+
+    def _get_projected_l_wt(self, dwl, l_wt):
+        """Project the future lift head assuming a linear water level change."""
+        n_yr = self.n_yr
+        if self.approx_years is not None:
+            dwls = dwl * self.approx_years
+        else:
+            dwls = np.array([dwl * (i) for i in range(n_yr)])
+        # Repeat for each precipitation scenario
+        return l_wt - np.tile(dwls, self.n_scen)
+
+    def _get_well_coefs(self, wid, st):
+        """Compute 4*pi*tr and 4*tr*pumping_days for the Cooper-Jacob method."""
+        tr = st * self.wells_info[wid]["k"]
+        # Cannot divided by zero
+        if tr < 0.001:
+            tr = 0.001
+
+        fpitr = 4 * np.pi * tr
+        ftrd = 4 * tr * self.wells_info[wid]["pumping_days"]
+        return fpitr, ftrd
+
+    def _add_constr_pumping_capacity(self, wid, pumping_capacity):
+        """Add the pumping capacity constraint of a well if given."""
+        constr = None
+        if pumping_capacity is not None:
+            constr = self.model.addConstr(
+                (self.vars_[wid]["v"] <= pumping_capacity),
+                name=f"c.{wid}.pumping_capacity",
+            )
+        self.constrs[wid]["pumping_capacity"] = constr
+        self.wells_info[wid]["pumping_capacity"] = pumping_capacity
+
+    def _add_constr_well_loss(self, wid, fpitr, ftrd):
+        """Add the well loss and drawdown constraint of a well."""
+        vars_wid = self.vars_[wid]
+        info = self.wells_info[wid]
+        # 10000 is to convert m-ha to m3
+        m_ha_2_m3 = 10000
+        if self.formulation != "nonconvex":
+            # q_lnx is a constant. Therefore, the drawdown is linear in q.
+            q_lny = min(np.log(info["r"] ** 2 * info["sy"] / ftrd), -0.5772)
+            l_cd_l_wd = vars_wid["q"] / fpitr * (-0.5772 - q_lny)
+        else:
+            l_cd_l_wd = vars_wid["q"] / fpitr * (-0.5772 - vars_wid["q_lny"])
+        self.constrs[wid]["l_cd_l_wd"] = self.model.addConstr(
+            vars_wid["l_cd_l_wd"] == l_cd_l_wd * m_ha_2_m3 / info["eff_well"],
+            name=f"c.{wid}.l_cd_l_wd(m)",
+        )
+
+    def _add_constr_energy_convex(self, wid):
+        """
+        Add the energy constraint of the convex formulation for a well that
+        serves a single field. Given v_te = v * i_te, the energy
+        e = c * v * (l_wt + l_cd_l_wd + l_pr) becomes a convex quadratic
+        function of v_te. It is relaxed to an inequality, which is tight at the
+        optimum since the energy cost is minimized. For the "pwl" formulation,
+        the quadratic term is replaced by its piecewise-linear interpolation
+        (v_te_sq).
+        """
+        m = self.model
+        n_h = self.n_h
+        info = self.wells_info[wid]
+        fid = self.field_ids[0]
+        v_te = self.vars_[fid]["v_te"]
+        techs = self.fields_info[fid]["tech_pumping_rate_coefs"]
+        v = self.vars_[wid]["v"]
+        e = self.vars_[wid]["e"]
+        coef = info["r_g_m_ha_2_m3_eff"]
+        l_wt = info["l_wt"]
+        # l_cd_l_wd = k_q * q
+        q_lny = min(np.log(info["r"] ** 2 * info["sy"] / info["ftrd"]), -0.5772)
+        k_q = (-0.5772 - q_lny) / info["fpitr"] * 10000 / info["eff_well"]
+
+        if self.formulation == "pwl":
+            v_te_sq = self.vars_[fid]["v_te_sq"].tolist()
+        else:
+            v_te_sq = [
+                [v_te[i, h] * v_te[i, h] for h in range(n_h)]
+                for i in range(self.n_te)
+            ]
+
+        self.constrs[wid]["e"] = m.addConstrs(
+            (
+                e[h]
+                >= coef
+                * (
+                    l_wt[h] * v[h]
+                    + gp.quicksum(
+                        k_q * techs[te][0] * v_te_sq[i][h]
+                        + (k_q * techs[te][1] + techs[te][2]) * v_te[i, h]
+                        for i, te in enumerate(self.tech_options)
+                    )
+                )
+                for h in range(n_h)
+            ),
+            name=f"c.{wid}.e(PJ)",
+        )
+
     def setup_constr_finance(self, finance_dict):
         """
         Set up financial constraints for the optimization model. The output is in 1e4 $.
@@ -811,39 +1554,62 @@ class Optimization:
 
         """
         m = self.model
+        n_h = self.n_h
+        inf = self.inf
+        vars_ = self.vars_
+
+        cost_e = m.addMVar((n_h), vtype="C", name="cost_e(1e4$)", lb=0, ub=inf)
+        rev = m.addMVar((n_h), vtype="C", name="rev(1e4$)", lb=-inf, ub=inf)
+        annual_cost = m.addMVar(
+            (n_h), vtype="C", name="annual_cost(1e4$)", lb=-inf, ub=inf
+        )
+        vars_["rev"] = rev
+        vars_["cost_e"] = cost_e
+        vars_["other_cost"] = annual_cost
+
+        self._add_constr_finance(finance_dict)
+
+        # Note the average profit per field is calculated in finish_setup().
+        # That way we can ensure the final field numbers added by users.
+
+    def update_constr_finance(self, finance_dict):
+        """
+        Update the financial constraints with a new finance_dict (e.g., crop
+        prices of a new year) without rebuilding the model. The constraints
+        carrying prices and costs as coefficients are replaced.
+
+        Parameters
+        ----------
+        finance_dict: dict
+            A dictionary containing financial settings. See
+            setup_constr_finance().
+
+        Returns
+        -------
+        None.
+
+        """
+        m = self.model
+        for c in self.constrs["finance"]:
+            m.remove(c)
+        self._add_constr_finance(finance_dict)
+
+    def _add_constr_finance(self, finance_dict):
+        """Add the constraints carrying prices and costs as coefficients."""
+        m = self.model
         crop_options = self.crop_options
         tech_options = self.tech_options
-        n_h = self.n_h
+        # Spread over the years of the planning horizon
+        n_yr = self.horizon
         n_c = self.n_c
         n_s = self.n_s
         n_te = self.n_te
-        inf = self.inf
         vars_ = self.vars_
         field_ids = self.field_ids
 
-        ## Form tech change cost matrix from the finance_dict
-        irr_tech_change_cost = finance_dict["irr_tech_change_cost"]
-        tech_change_cost_matrix = np.zeros((n_te, n_te))
-        for k, v in irr_tech_change_cost.items():
-            try:
-                i = tech_options.index(k[0])
-                j = tech_options.index(k[1])
-                tech_change_cost_matrix[i, j] = v
-            except:
-                pass
-        tech_change_cost_matrix = tech_change_cost_matrix
-
-        ## Form crop change cost matrix from the finance_dict
-        crop_change_cost = finance_dict["crop_change_cost"]
-        crop_change_cost_matrix = np.zeros((n_c, n_c))
-        for k, v in crop_change_cost.items():
-            try:
-                i = crop_options.index(k[0])
-                j = crop_options.index(k[1])
-                crop_change_cost_matrix[i, j] = v
-            except:
-                pass
-        crop_change_cost_matrix = crop_change_cost_matrix
+        tech_change_cost_matrix, crop_change_cost_matrix = self._get_change_costs(
+            finance_dict
+        )
 
         energy_price = finance_dict["energy_price"]  # [1e4$/PJ]
         crop_profit = {
@@ -857,8 +1623,12 @@ class Optimization:
         e = vars_["e"]  # (n_h) [PJ]
         y = vars_["y"]  # (n_s, n_c, n_h) [1e4 bu]
 
-        cost_e = m.addMVar((n_h), vtype="C", name="cost_e(1e4$)", lb=0, ub=inf)
-        rev = m.addMVar((n_h), vtype="C", name="rev(1e4$)", lb=-inf, ub=inf)
+        # Ranges of the costs for tighten_bounds()
+        cost_lb, cost_ub = 0, 0
+
+        cost_e = vars_["cost_e"]
+        rev = vars_["rev"]
+        annual_cost = vars_["other_cost"]
 
         annual_tech_cost = 0
         annual_tech_change_cost = 0
@@ -872,8 +1642,11 @@ class Optimization:
                 np.argmax(pre_i_te), :
             ]  # ==1
             i_tech_change = vars_[fid]["i_tech_change"]
-            # uniformly allocate into planning horizon, "/n_h"
-            annual_tech_change_cost += tech_change_cost_arr * i_tech_change / n_h
+            # uniformly allocate into planning horizon, "/n_yr"
+            annual_tech_change_cost += tech_change_cost_arr * i_tech_change / n_yr
+            # Only one tech is chosen and at most one change happens.
+            cost_lb += min(cost_tech) + min(min(tech_change_cost_arr), 0) / n_yr
+            cost_ub += max(cost_tech) + max(max(tech_change_cost_arr), 0) / n_yr
 
             for s in range(n_s):
                 pre_i_crop = vars_[fid]["pre_i_crop"][s, :, 0]
@@ -881,35 +1654,70 @@ class Optimization:
                     np.argmax(pre_i_crop), :
                 ]  # ==1
                 i_crop_change = vars_[fid]["i_crop_change"][s, :, 0]
-                # uniformly allocate into planning horizon, "/n_h"
-                annual_crop_change_cost += crop_change_cost_arr * i_crop_change / n_h
-        annual_cost = m.addMVar(
-            (n_h), vtype="C", name="annual_cost(1e4$)", lb=-inf, ub=inf
+                # uniformly allocate into planning horizon, "/n_yr"
+                annual_crop_change_cost += crop_change_cost_arr * i_crop_change / n_yr
+                cost_lb += min(min(crop_change_cost_arr), 0) / n_yr
+                cost_ub += max(max(crop_change_cost_arr), 0) / n_yr
+        constrs = []
+        constrs.append(
+            m.addConstr(
+                annual_cost
+                == gp.quicksum(annual_tech_cost[t] for t in range(n_te))
+                + gp.quicksum(annual_tech_change_cost[t] for t in range(n_te))
+                + gp.quicksum(annual_crop_change_cost[c] for c in range(n_c)),
+                name="c.annual_cost(1e4$)",
+            )
         )
-        m.addConstr(
-            annual_cost
-            == gp.quicksum(annual_tech_cost[t] for t in range(n_te))
-            + gp.quicksum(annual_tech_change_cost[t] for t in range(n_te))
-            + gp.quicksum(annual_crop_change_cost[c] for c in range(n_c)),
-            name="c.annual_cost(1e4$)",
+        constrs.append(m.addConstr((cost_e == e * energy_price), name="c.cost_e"))
+        constrs.append(
+            m.addConstr(
+                rev
+                == gp.quicksum(
+                    y[i, j, :] * crop_profit[c]
+                    for i in range(n_s)
+                    for j, c in enumerate(crop_options)
+                ),
+                name="c.rev",
+            )
         )
+        self.constrs["finance"] = constrs
+        self.bounds["finance"] = {
+            "energy_price": energy_price,
+            "crop_profit": np.array([crop_profit[c] for c in crop_options]),
+            "annual_cost": (cost_lb, cost_ub),
+        }
 
-        m.addConstr((cost_e == e * energy_price), name="c.cost_e")
-        m.addConstr(
-            rev
-            == gp.quicksum(
-                y[i, j, :] * crop_profit[c]
-                for i in range(n_s)
-                for j, c in enumerate(crop_options)
-            ),
-            name="c.rev",
-        )
-        vars_["rev"] = rev
-        vars_["cost_e"] = cost_e
-        vars_["other_cost"] = annual_cost
+    def _get_change_costs(self, finance_dict):
+        """Form the tech and crop change cost matrices from the finance_dict."""
+        crop_options = self.crop_options
+        tech_options = self.tech_options
+        n_c = self.n_c
+        n_te = self.n_te
 
-        # Note the average profit per field is calculated in finish_setup().
-        # That way we can ensure the final field numbers added by users.
+        ## Form tech change cost matrix from the finance_dict
+        irr_tech_change_cost = finance_dict["irr_tech_change_cost"]
+        tech_change_cost_matrix = np.zeros((n_te, n_te))
+        for k, v in irr_tech_change_cost.items():
+            try:
+                i = tech_options.index(k[0])
+                j = tech_options.index(k[1])
+                tech_change_cost_matrix[i, j] = v
+            except:
+                pass
+        tech_change_cost_matrix = tech_change_cost_matrix
+
+        ## Form crop change cost matrix from the finance_dict
+        crop_change_cost = finance_dict["crop_change_cost"]
+        crop_change_cost_matrix = np.zeros((n_c, n_c))
+        for k, v in crop_change_cost.items():
+            try:
+                i = crop_options.index(k[0])
+                j = crop_options.index(k[1])
+                crop_change_cost_matrix[i, j] = v
+            except:
+                pass
+        crop_change_cost_matrix = crop_change_cost_matrix
+        return tech_change_cost_matrix, crop_change_cost_matrix
 
     def setup_constr_wr(
         self,
@@ -972,17 +1780,8 @@ class Optimization:
         None.
 
         """
-        # As the msg said.
-        if time_window != 1 and self.approx_horizon:
-            raise ValueError(
-                "Approximation is not allowed with the water rights "
-                + "constraints that have time_window larger than 1."
-                + " Please set approx_horizon parameter to False."
-            )
-
         m = self.model
         fids = applied_field_ids
-        n_h = self.n_h
         n_c = self.n_c
         n_s = self.n_s
         vars_ = self.vars_
@@ -1000,25 +1799,60 @@ class Optimization:
                     irr_sub += vars_[fid]["irr_depth"]
             irr_sub = irr_sub / len(fids)
 
-        # Initial period
-        # The structure is to fit within a larger simulation framework, which
-        # we allow the remaining water rights that are not used in the previous
-        # year.
-        c_i = 0
-
-        if remaining_tw is not None and remaining_wr is not None:
-            m.addConstr(
+        wr_constrs = []
+        blocks = self._get_wr_coefs(
+            self._get_wr_blocks(
+                wr_depth, time_window, remaining_tw, remaining_wr, tail_method
+            )
+        )
+        for c_i, (coefs, wr) in enumerate(blocks):
+            wr_constr = m.addConstr(
                 gp.quicksum(
-                    irr_sub[i, j, h]
+                    float(coefs[h]) * irr_sub[i, j, h]
                     for i in range(n_s)
                     for j in range(n_c)
-                    for h in range(remaining_tw)
+                    for h in np.flatnonzero(coefs).tolist()
                 )
                 / n_s
-                <= remaining_wr,
+                <= wr,
                 name=f"c.{water_right_id}.wr_{c_i}(cm)",
             )
-            c_i += 1
+            wr_constrs.append(wr_constr)
+        self.constrs.setdefault("water_rights", {})[water_right_id] = wr_constrs
+        self.bounds.setdefault("water_rights", {})[water_right_id] = (
+            applied_field_ids,
+            blocks,
+        )
+
+        self._record_wr(
+            water_right_id,
+            wr_depth,
+            applied_field_ids,
+            time_window,
+            remaining_tw,
+            remaining_wr,
+            tail_method,
+        )
+
+    def _get_wr_blocks(
+        self, wr_depth, time_window, remaining_tw, remaining_wr, tail_method
+    ):
+        """
+        Split the planning horizon into the periods constrained by a water
+        right. Return a list of (start year index, end year index, water right
+        depth [cm]). The periods are repeated for each precipitation scenario.
+        The year indices refer to the points of the model only if the horizon
+        is not approximated (see _get_wr_coefs()).
+        """
+        n_h = self.horizon
+        blocks = []
+
+        # Initial period
+        # The structure is to fit within a larger simulation framework, which
+        # we allow the remaining water rights that are not used in the previous
+        # year.
+        if remaining_tw is not None and remaining_wr is not None:
+            blocks.append((0, remaining_tw, remaining_wr))
             start_index = remaining_tw
             remaining_length = n_h - remaining_tw
         else:
@@ -1027,18 +1861,7 @@ class Optimization:
 
         # Middle period
         while remaining_length >= time_window:
-            m.addConstr(
-                gp.quicksum(
-                    irr_sub[i, j, h]
-                    for i in range(n_s)
-                    for j in range(n_c)
-                    for h in range(start_index, start_index + time_window)
-                )
-                / n_s
-                <= wr_depth,
-                name=f"c.{water_right_id}.wr_{c_i}(cm)",
-            )
-            c_i += 1
+            blocks.append((start_index, start_index + time_window, wr_depth))
             start_index += time_window
             remaining_length -= time_window
 
@@ -1051,19 +1874,42 @@ class Optimization:
             # Otherwise, we expect a value given by users.
             else:
                 wr_tail = tail_method
+            blocks.append((start_index, n_h, wr_tail))
+        return [
+            (start + k * n_h, end + k * n_h, wr)
+            for k in range(self.n_scen)
+            for start, end, wr in blocks
+        ]
 
-            m.addConstr(
-                gp.quicksum(
-                    irr_sub[i, j, h]
-                    for i in range(n_s)
-                    for j in range(n_c)
-                    for h in range(start_index, n_h)
-                )
-                / n_s
-                <= wr_tail,
-                name=f"c.{water_right_id}.wr_{c_i}(cm)",
-            )
-
+    def _get_wr_coefs(self, blocks):
+        """
+        Convert the periods from _get_wr_blocks() into the coefficients of the
+        irrigation depth at each point (n_h,), i.e., the total interpolation
+        weights of the years in a period. Return a list of (coefficients,
+        water right depth [cm]).
+        """
+        horizon, n_yr = self.horizon, self.n_yr
+        wr_coefs = []
+        for start, end, wr in blocks:
+            k = start // horizon  # Precipitation scenario
+            coefs = np.zeros(self.n_h)
+            coefs[k * n_yr : (k + 1) * n_yr] = self.horizon_interp[
+                start - k * horizon : end - k * horizon
+            ].sum(axis=0)
+            wr_coefs.append((coefs, wr))
+        return wr_coefs
+
+    def _record_wr(
+        self,
+        water_right_id,
+        wr_depth,
+        applied_field_ids,
+        time_window,
+        remaining_tw,
+        remaining_wr,
+        tail_method,
+    ):
+        """Record the water right setting for the next run."""
         self.water_right_ids.append(water_right_id)
         self.n_water_rights += 1
 
@@ -1094,6 +1940,29 @@ class Optimization:
             "tail_method": tail_method,
         }
 
+    def remove_constr_wr(self):
+        """
+        Remove all the water right constraints added by setup_constr_wr(). This
+        is used to update the water rights (e.g., the remaining water rights of
+        a time window or a newly activated water right) of an existing model.
+        Call setup_constr_wr() afterward to add the updated water rights.
+
+        Returns
+        -------
+        None.
+
+        """
+        m = self.model
+        for wr_constrs in self.constrs.get("water_rights", {}).values():
+            for c in wr_constrs:
+                m.remove(c)
+        self.constrs["water_rights"] = {}
+        self.bounds["water_rights"] = {}
+        self.water_right_ids = []
+        self.n_water_rights = 0
+        # A new dictionary so that the previous sols are not affected.
+        self.wrs_info = {}
+
     def setup_obj(self, alpha_dict=None):
         """
         This method sets the objective of the optimization model, i.e., to maximize the agent's expected satisfaction. Note
@@ -1144,10 +2013,20 @@ class Optimization:
             # fakeSa will be forced to be nonnegative later on for Sa calculation
             fakeSa = m.addVar(vtype="C", name=f"fakeSa.{metric}", lb=-inf, ub=inf)
             metric_var = eval_metric_vars.get(metric)
-            m.addConstr(
-                (fakeSa == gp.quicksum(metric_var[h] for h in range(n_h)) / n_h),
-                name=f"c.Sa.{metric}",
-            )
+            if self.approx_years is not None:
+                # Each point weighs the years interpolated from it.
+                weights = np.kron(
+                    self.scenario_weights,
+                    self.horizon_interp.sum(axis=0) / self.horizon,
+                )
+                expr = gp.quicksum(weights[h] * metric_var[h] for h in range(n_h))
+            elif self.n_scen > 1:
+                # Expected value over the precipitation scenarios
+                weights = np.repeat(self.scenario_weights, self.n_yr) / self.n_yr
+                expr = gp.quicksum(weights[h] * metric_var[h] for h in range(n_h))
+            else:
+                expr = gp.quicksum(metric_var[h] for h in range(n_h)) / n_h
+            m.addConstr((fakeSa == expr), name=f"c.Sa.{metric}")
             vars_["Sa"][metric] = fakeSa  # fake Sa for each metric (profit and y_Y)
 
         penalties = self.penalties
@@ -1204,7 +2083,29 @@ class Optimization:
             name="c.allo_r",
         )
         v = vars_["v"]
-        for k, wid in enumerate(wids):
+        if self.formulation != "nonconvex" and n_f == 1 and n_w == 1:
+            # A single field and a single well. All the water is from the well.
+            fid, wid = fids[0], wids[0]
+            allo_r.LB = 1
+            allo_r_w.LB = 1
+            m.addConstr((vars_[wid]["v"] == v), name=f"c.{wid}.v(m-ha)")
+            m.addConstr((vars_[wid]["q"] == vars_[fid]["q"]), name=f"c.{wid}.q(m-ha/d)")
+            m.addConstr(
+                (vars_[wid]["l_pr"] == vars_[fid]["l_pr"]), name=f"c.{wid}.l_pr(m)"
+            )
+            self._add_constr_energy_convex(wid)
+            wids_allo = []
+        else:
+            wids_allo = wids
+        for k, wid in enumerate(wids_allo):
+            if self.formulation != "nonconvex":
+                # The allocation among wells remains bilinear.
+                self.is_convex = False
+                coef = self.wells_info[wid]["r_g_m_ha_2_m3_eff"]
+                m.addConstr(
+                    (vars_[wid]["e"] == coef * vars_[wid]["v"] * vars_[wid]["l_t"]),
+                    name=f"c.{wid}.e(PJ)",
+                )
             m.addConstr(
                 (vars_[wid]["v"] == v * allo_r_w[k, :]), name=f"c.{wid}.v(m-ha)"
             )
@@ -1248,365 +2149,1910 @@ class Optimization:
         m.addConstr(
             irr_depth == get_sum(fids, vars_, "irr_depth"), name="c.irr_depth(cm)"
         )
-        m.addConstr(v == get_sum(fids, vars_, "v"), name="c.v(m-ha)")
-        m.addConstr(y == get_sum(fids, vars_, "y"), name="c.y(1e4bu)")
-        m.addConstr(e == get_sum(wids, vars_, "e"), name="c.e(PJ)")
+        m.addConstr(v == get_sum(fids, vars_, "v"), name="c.v(m-ha)")
+        m.addConstr(y == get_sum(fids, vars_, "y"), name="c.y(1e4bu)")
+        m.addConstr(e == get_sum(wids, vars_, "e"), name="c.e(PJ)")
+
+        # Calculate average value per field
+        m.addConstr(y_y == get_sum(fids, vars_, "y_y") / n_f, name="c.y_y")
+        m.addConstr(
+            irr_depth_per_field == get_sum(fids, vars_, "irr_depth") / n_f,
+            name="c.irr_depth_per_field(cm)",
+        )
+        profit = vars_["profit"]
+        rev = vars_["rev"]
+        cost_e = vars_["cost_e"]
+        annual_cost = vars_["other_cost"]
+        m.addConstr((profit == (rev - cost_e - annual_cost) / n_f), name="c.profit")
+
+        m.update()
+        self._make_summary(display_summary)
+
+    def _make_summary(self, display_summary=True):
+        """Create (and display) the model summary."""
+        if self.approx_horizon:
+            h_msg = str(self.horizon) + f" (approximate with {self.n_yr})"
+        else:
+            h_msg = str(self.n_yr)
+        if self.n_scen > 1:
+            h_msg += f" with {self.n_scen} precipitation scenarios"
+        msg = dict_to_string(self.msg, prefix="\t\t", level=2)
+        summary = f"""
+        ########## Model Summary ##########\n
+        Name:   {self.unique_id}\n
+        Planning horizon:   {h_msg}
+        No. of Crop fields:    {self.n_fields}
+        No. of splits          {self.n_s}
+        No. of Wells:          {self.n_wells}
+        NO. of Water rights:   {self.n_water_rights}\n
+        Decision settings:\n{msg}\n
+        ###################################
+        """
+        self.summary = summary
+        if display_summary:
+            print(summary)
+
+    def get_copy_plan(self):
+        """
+        Record the positions of the gurobi variables and constraints kept in
+        the attributes of the model (e.g., vars_ and constrs), which are used
+        to map them to a copy of the model in copy(). The plan is valid as long
+        as the model is unchanged.
+
+        Returns
+        -------
+        dict
+            The attributes with the gurobi objects replaced by their positions.
+
+        """
+        m = self.model
+        m.update()
+        positions = {
+            gp.QConstr: {c: i for i, c in enumerate(m.getQConstrs())},
+            gp.GenConstr: {c: i for i, c in enumerate(m.getGenConstrs())},
+        }
+        return {
+            k: _to_copy_plan(v, positions)
+            for k, v in self.__dict__.items()
+            if k not in ("unique_id", "gpenv", "model")
+        }
+
+    def copy(self, unique_id=None, log_to_console=1, gpenv=None, ids=None, plan=None):
+        """
+        Copy the model into a new instance with its own Gurobi environment. The
+        gurobi model is copied with Model.copy(), and the gurobi variables and
+        constraints kept in the attributes (e.g., vars_ and constrs) are mapped
+        to the copied model. Together with the update_constr_* methods, a model
+        built once can serve other agents with the same model structure without
+        being rebuilt (see ModelTemplates).
+
+        Parameters
+        ----------
+        unique_id : str, optional
+            The name of the new model. The default is None (the same name).
+        log_to_console : int, optional
+            See __init__(). The default is 1.
+        gpenv : object, optional
+            See __init__(). The default is None.
+        ids : dict, optional
+            A dictionary renaming the field and well ids in the copy, e.g.,
+            {"f1": "f3", "w1": "w2"}. The default is None.
+        plan : dict, optional
+            The output of get_copy_plan(), which can be reused for multiple
+            copies of an unchanged model. The default is None.
+
+        Returns
+        -------
+        Optimization
+            The copy.
+
+        """
+        if plan is None:
+            plan = self.get_copy_plan()
+        new = self.__class__.__new__(self.__class__)
+        new.unique_id = self.unique_id if unique_id is None else unique_id
+        new.gpenv = _start_gp_env(log_to_console, gpenv)
+        self.model.update()
+        new.model = self.model.copy(env=new.gpenv)
+        new.model.ModelName = new.unique_id
+        m = new.model
+        objs = {
+            gp.Var: m.getVars(),
+            gp.Constr: m.getConstrs(),
+            gp.QConstr: m.getQConstrs(),
+            gp.GenConstr: m.getGenConstrs(),
+        }
+        id_map = {} if ids is None else ids
+        for k, v in plan.items():
+            setattr(new, k, _from_copy_plan(v, objs, id_map))
+        return new
+
+    def set_start(self, start_sols, var_hint=False):
+        """
+        Provide a MIP start (warm start) to the solver from given decisions,
+        e.g., the decisions of the previous year or a neighbor's decisions.
+        Gurobi completes or repairs the start if it is partial or infeasible.
+
+        Parameters
+        ----------
+        start_sols : dict
+            A dictionary in the same format as the solutions (sols), keyed by
+            the field ids of this model. For each field, "i_crop", "i_te",
+            "i_rainfed", and "irr_depth" are used if available. Since the
+            given irr_depth is a plan made in the previous year, it is shifted
+            by one year to match the current planning horizon.
+        var_hint : bool, optional
+            If True, the start values are also given as variable hints
+            (VarHintVal), which guide the branching beyond the initial
+            solution. The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+        n_h = self.n_h
+
+        def set_values(var, values):
+            var.Start = values
+            if var_hint:
+                var.VarHintVal = values
+
+        for fid in self.field_ids:
+            sols_fid = start_sols.get(fid)
+            if sols_fid is None:
+                continue
+            vars_fid = self.vars_[fid]
+            i_crop = sols_fid.get("i_crop")
+            if i_crop is not None:
+                set_values(vars_fid["i_crop"], self._get_i_crop_array(i_crop))
+            i_te = sols_fid.get("i_te")
+            if i_te is not None:
+                set_values(vars_fid["i_te"], self._get_i_te_array(i_te))
+            i_rainfed = sols_fid.get("i_rainfed")
+            if i_rainfed is not None:
+                set_values(vars_fid["i_rainfed"], i_rainfed)
+            irr_depth = sols_fid.get("irr_depth")
+            if irr_depth is not None and irr_depth.shape[:2] == (self.n_s, self.n_c):
+                # Shift the previous plan by one year and repeat its last year.
+                irr_depth = irr_depth[:, :, 1:] if irr_depth.shape[2] > 1 else irr_depth
+                idx = np.minimum(np.arange(n_h) % self.n_yr, irr_depth.shape[2] - 1)
+                set_values(vars_fid["irr_depth"], irr_depth[:, :, idx])
+
+    def tighten_bounds(self, tol=1e-6):
+        """
+        Derive finite bounds of the variables that are declared unbounded
+        (e.g., y, v, e, profit, w_temp, and q) from the field areas, the
+        water-yield curves, the precipitation, the water rights, the pumping
+        capacities, the well properties, the tech coefficients, and the prices.
+        Unbounded variables in the nonconvex products weaken the relaxations
+        in Gurobi's spatial branching. The bounds are implied by the
+        constraints and, hence, do not cut off any solution. Since they are
+        derived from the current data, call this method after the
+        update_constr_* methods and right before solve().
+
+        The optimal objective value is unchanged, but Gurobi may stop at a
+        different solution within its tolerances (e.g., MIPGap), such as
+        slightly different irrigation depths. Hence, the solutions are only
+        equivalent to those without the bounds up to the solver tolerances.
+
+        Parameters
+        ----------
+        tol : float, optional
+            A relative margin added to the derived bounds to avoid cutting off
+            solutions within the solver's feasibility tolerance. The default
+            is 1e-6.
+
+        Returns
+        -------
+        None.
+
+        """
+        vars_ = self.vars_
+        wr_caps = self._get_wr_caps()
+        sums = {}
+        for fid in self.field_ids:
+            ubs = self._tighten_field_bounds(fid, wr_caps[fid], tol)
+            for key, value in ubs.items():
+                sums[key] = sums.get(key, 0) + value
+
+        caps = [self.wells_info[wid]["pumping_capacity"] for wid in self.well_ids]
+        v_ub_sum = sums["v"]
+        if all(cap is not None for cap in caps):
+            v_ub_sum = np.minimum(v_ub_sum, sum(caps))
+        _set_bounds(vars_["irr_depth"], 0, sums["irr"], tol)
+        _set_bounds(vars_["irr_depth_per_field"], 0, sums["irr"] / self.n_fields, tol)
+        _set_bounds(vars_["v"], 0, v_ub_sum, tol)
+        _set_bounds(vars_["y"], 0, sums["y"], tol)
+
+        e_ub_sum = 0
+        for wid in self.well_ids:
+            e_ub_sum = e_ub_sum + self._tighten_well_bounds(
+                wid, v_ub_sum, sums["q"], sums["l_pr"], tol
+            )
+        _set_bounds(vars_["e"], 0, e_ub_sum, tol)
+
+        # profit = (rev - cost_e - annual_cost) / n_f
+        finance = self.bounds["finance"]
+        cost_e_ub = max(finance["energy_price"], 0) * e_ub_sum
+        cost_lb, cost_ub = finance["annual_cost"]
+        rev_lb, rev_ub = sums["rev_lb"], sums["rev_ub"]
+        _set_bounds(vars_["cost_e"], 0, cost_e_ub, tol)
+        no_lim = (-np.inf, np.inf)
+        _set_bounds(vars_["rev"], rev_lb, rev_ub, tol, no_lim)
+        _set_bounds(vars_["other_cost"], cost_lb, cost_ub, tol, no_lim)
+        _set_bounds(
+            vars_["profit"],
+            (rev_lb - cost_e_ub - cost_ub) / self.n_fields,
+            (rev_ub - cost_lb) / self.n_fields,
+            tol,
+            no_lim,
+        )
+
+    def _get_wr_caps(self):
+        """
+        Get the cap of the irrigation depth of each field in each year given
+        by the water rights applied to it, i.e., wr * n_s * (No. of the
+        applied fields). With an approximated horizon, the cap is divided by
+        the coefficient of each point in the constraint. See tighten_bounds().
+        """
+        n_h = self.n_h
+        wr_caps = {fid: np.full(n_h, np.inf) for fid in self.field_ids}
+        for fids, blocks in self.bounds.get("water_rights", {}).values():
+            if fids == "all":
+                fids = self.field_ids
+            for coefs, wr in blocks:
+                cap = np.divide(
+                    max(wr, 0) * self.n_s * len(fids),
+                    coefs,
+                    out=np.full(n_h, np.inf),
+                    where=coefs > 0,
+                )
+                for fid in fids:
+                    if fid in wr_caps:
+                        wr_caps[fid] = np.minimum(wr_caps[fid], cap)
+        return wr_caps
+
+    def _tighten_field_bounds(self, fid, wr_cap, tol):
+        """
+        Bound the variables of a field given its cap of the irrigation depth
+        (wr_cap). Return the upper bounds (irr, v, y, q, and l_pr) and the
+        revenue bounds (rev_lb and rev_ub) of the field, which are summed over
+        the fields. See tighten_bounds().
+        """
+        n_s = self.n_s
+        n_c = self.n_c
+        n_h = self.n_h
+        cm2m = 0.01
+        info = self.fields_info[fid]
+        vars_fid = self.vars_[fid]
+        aux = self.vars_aux[fid]
+        unit_area = info["field_area"] / n_s
+        wmax = info["wmax"].reshape((1, n_c, 1))
+        ymax = info["ymax"].reshape((1, n_c, 1))
+        ub_w = np.max(wmax)
+
+        # w = irr_depth + prec_aw <= ub_w
+        prec = np.broadcast_to(info["prec_aw"], (n_s, n_c, n_h))
+        w_lb = np.clip(prec, 0, ub_w)
+        ub_irr = self.bounds[fid]["ub_irr"]
+        irr_ub = np.clip(ub_w - prec, 0, ub_irr)
+        irr_ub = np.minimum(irr_ub, wr_cap)
+        _set_bounds(vars_fid["irr_depth"], 0, irr_ub, tol, (0, ub_irr))
+        _set_bounds(aux["w"], w_lb, ub_w, tol, (0, ub_w))
+        _set_bounds(aux["w_temp"], w_lb / wmax, ub_w / wmax, tol, (0, ub_w / wmax))
+        w__lb = np.minimum(w_lb / wmax, 1)
+        w__ub = np.minimum(ub_w / wmax, 1)
+        _set_bounds(aux["w_"], w__lb, w__ub, tol, (0, 1))
+
+        if self.formulation == "nonconvex":
+            # The range of the yield curve a * w_^2 + b * w_ + c over w_ (the
+            # end points and the vertex). The other formulations bound yw_temp
+            # in _add_constr_yield_convex().
+            a, b, c = (coef.reshape((1, n_c, 1)) for coef in info["abc"])
+            yws = [a * w_**2 + b * w_ + c for w_ in (w__lb, w__ub)]
+            vertex = np.divide(-b, 2 * a, out=np.zeros_like(b), where=a != 0)
+            vertex = np.clip(vertex, w__lb, w__ub)
+            yws.append(a * vertex**2 + b * vertex + c)
+            yw_lb = np.minimum.reduce(np.broadcast_arrays(*yws))
+            _set_bounds(aux["yw_temp"], yw_lb, 1, tol, (-np.inf, 1))
+
+        # Only one crop is chosen in a split.
+        v_c_ub = irr_ub * unit_area * cm2m
+        v_ub = v_c_ub.max(axis=1).sum(axis=0)  # (n_h)
+        y_ub = np.broadcast_to(ymax * unit_area * 1e-4, (n_s, n_c, n_h))
+        _set_bounds(aux["v_c"], 0, v_c_ub, tol)
+        _set_bounds(vars_fid["v"], 0, v_ub, tol)
+        _set_bounds(vars_fid["y"], 0, y_ub, tol)
+        if "v_te" in vars_fid:
+            ub_v = ub_irr * info["field_area"] * cm2m
+            _set_bounds(vars_fid["v_te"], 0, v_ub, tol, (0, ub_v))
+
+        # Only one tech is chosen.
+        techs = info["tech_pumping_rate_coefs"]
+        coefs = np.array([techs[te] for te in self.tech_options])  # (n_te, 3)
+        q_ends = coefs[:, :1] * np.array([np.zeros(n_h), v_ub])[:, None, :]
+        q_ub = np.max(q_ends + coefs[:, 1:2], axis=(0, 1))  # (n_h)
+        l_pr_lb, l_pr_ub = np.min(coefs[:, 2]), np.max(coefs[:, 2])
+        _set_bounds(vars_fid["q"], 0, q_ub, tol)
+        _set_bounds(vars_fid["l_pr"], l_pr_lb, l_pr_ub, tol)
+
+        crop_profit = self.bounds["finance"]["crop_profit"].reshape((1, n_c, 1))
+        revs = y_ub * crop_profit
+        return {
+            "irr": irr_ub,
+            "v": v_ub,
+            "y": y_ub,
+            "q": q_ub,
+            "l_pr": l_pr_ub,
+            "rev_lb": np.minimum(revs, 0).min(axis=1).sum(axis=0),
+            "rev_ub": np.maximum(revs, 0).max(axis=1).sum(axis=0),
+        }
+
+    def _tighten_well_bounds(self, wid, v_ub_sum, q_ub_sum, l_pr_ub_sum, tol):
+        """
+        Bound the variables of a well given the upper bounds summed over the
+        fields. Return the upper bound of its energy use. See
+        tighten_bounds().
+        """
+        info = self.wells_info[wid]
+        vars_wid = self.vars_[wid]
+        v_ub = v_ub_sum
+        if info["pumping_capacity"] is not None:
+            v_ub = np.minimum(v_ub, info["pumping_capacity"])
+        # l_cd_l_wd = k_q * q, where q_lny is given by the well properties.
+        q_lny = min(np.log(info["r"] ** 2 * info["sy"] / info["ftrd"]), -0.5772)
+        k_q = (-0.5772 - q_lny) / info["fpitr"] * 10000 / info["eff_well"]
+        l_cd_ub = k_q * q_ub_sum
+        l_t_lb = np.maximum(info["l_wt"], 0)
+        l_t_ub = np.maximum(info["l_wt"] + l_cd_ub + l_pr_ub_sum, l_t_lb)
+        e_ub = info["r_g_m_ha_2_m3_eff"] * v_ub * l_t_ub
+        _set_bounds(vars_wid["v"], 0, v_ub, tol)
+        _set_bounds(vars_wid["q"], 0, q_ub_sum, tol)
+        _set_bounds(vars_wid["l_pr"], 0, l_pr_ub_sum, tol)
+        _set_bounds(vars_wid["l_cd_l_wd"], 0, l_cd_ub, tol)
+        _set_bounds(vars_wid["l_t"], l_t_lb, l_t_ub, tol)
+        _set_bounds(vars_wid["e"], 0, e_ub, tol)
+        return e_ub
+
+    def solve(
+        self, keep_gp_model=False, keep_gp_output=False, display_report=True, **kwargs
+    ):
+        """
+        This method solves the optimization problem.
+        Note that, by default, we set the gurobi parameter, NonConvex = 2 for a
+        non-convex model.
+
+        Parameters
+        ----------
+        keep_gp_model : bool
+            Keep the gurobi model instance for further use. This should be used
+            with caution.
+            The default is False.
+
+        keep_gp_output : bool
+            If True, the gurobi model output will be stored in "gp_output" in a
+            dictionary format. This is only available for the "gurobi" solver.
+            The default is False.
+
+        display_report : bool
+            This parameter displays the summary report if set to True.
+            The default is True.
+
+        **kwargs : **kwargs
+            Pass the gurobi keywords to the gurobi solver. See solve_model()
+            for the ones used by the "highs" solver.
+
+        Returns
+        -------
+        None.
+
+        Notes
+        -----
+        More info on Gurobi MIP Models can be accessed at:
+            https://www.gurobi.com/documentation/9.5/refman/mip_models.html
+
+        """
+
+        ## Solving model
+        m = self.model
+        params = self._get_solver_params(**kwargs)
+        result = solve_model(m, solver=self.solver, **params)
+        self._set_result(result, display_report)
+
+        if keep_gp_output and self.solver == "gurobi":
+            self.gp_output = json.loads(m.getJSONSolution())
+
+        if keep_gp_model is False:
+            # release the memory of the previous model
+            m.dispose()
+
+    def resolve(self, display_report=True, **kwargs):
+        """
+        Solve the model again (e.g., with a longer TimeLimit) starting from
+        its current solutions, and keep the better of the two solutions
+        (i.e., the best incumbent). The new solutions are kept if they are as
+        good as the current ones, since their MIP gap can only be tighter.
+        The model must be kept by solve() with keep_gp_model=True.
+
+        Parameters
+        ----------
+        display_report : bool, optional
+            See solve(). The default is True.
+        **kwargs :
+            See solve().
+
+        Returns
+        -------
+        bool
+            True if the new solutions are kept.
+
+        """
+        keys = ("sols", "optimal_obj_value", "incumbent", "gp_report", "decisions")
+        prev = {k: getattr(self, k, None) for k in keys}
+        prev_obj = prev["optimal_obj_value"]
+        m = self.model
+        if prev["incumbent"] is not None:
+            m.setAttr("Start", m.getVars(), prev["incumbent"])
+        self.solve(keep_gp_model=True, display_report=display_report, **kwargs)
+        obj = self.optimal_obj_value
+        if prev_obj is None:
+            return obj is not None
+        # ModelSense is -1 for maximization.
+        if obj is None or (obj - prev_obj) * m.ModelSense > 0:
+            for k, v in prev.items():
+                setattr(self, k, v)
+            return False
+        return True
+
+    def _get_solver_params(self, **kwargs):
+        """Get the solver parameters of solve() given the gurobi keywords."""
+        gurobi_kwargs = self.gurobi_kwargs
+        gurobi_kwargs.update(kwargs)
+        params = {}
+        if "NonConvex" not in gurobi_kwargs.keys() and not self.is_convex:
+            params["NonConvex"] = 2  # Set to solve a non-convex problem
+        params.update(gurobi_kwargs)
+        return params
+
+    def _set_result(self, result, display_report=True):
+        """
+        Collect the solutions given a SolverResult and do some post
+        calculations.
+        """
+        # Optimal solution found or reach time limit with a solution
+        if (result.status == 2 or result.status == 9) and result.obj_val is not None:
+            self.optimal_obj_value = result.obj_val
+            self.sols = self._extract_sols(result)
+            self._finish_sols(result, display_report)
+        else:
+            print("Optimal solution is not found.")
+            self.optimal_obj_value = None
+            self.incumbent = None
+            sols = {}
+            sols["gp_status"] = result.status
+            sols["gp_Runtime"] = result.runtime
+            sols["gp_report"] = "Optimal solution is not found."
+            self.sols = sols
+
+    def _extract_sols(self, result):
+        """
+        Extract the solutions in the structure of self.vars_, where the
+        gurobi variables are replaced by their values and the others are kept.
+        All the values are read with one bulk query and mapped back through
+        the variable indices (see _get_sol_plan()).
+        """
+        x = result.x
+        if x is None:
+            x = np.asarray(self.model.getAttr("X"))  # All variables
+        self.incumbent = x  # The solution vector, e.g., a start of resolve()
+        items, plan = self._get_sol_plan()
+        sols = {}
+        for (path, v), idx in zip(items, plan, strict=True):
+            d = sols
+            for k in path[:-1]:
+                d = d.setdefault(k, {})
+            if idx is not None:
+                v = x[idx]
+            elif isinstance(v, dict):
+                v = {}  # An empty dictionary
+            d[path[-1]] = v
+        return sols
+
+    def _get_sol_plan(self):
+        """
+        Get the items of self.vars_ as (path, value) pairs and the indices of
+        the gurobi variables among them (None for the others). The indices are
+        computed once for each variable layout, which is determined by the
+        model settings and the numbers of fields, wells, and variables.
+        """
+        items = []
+
+        def walk(d, path):
+            for k, v in d.items():
+                if isinstance(v, dict) and v:
+                    walk(v, (*path, k))
+                else:
+                    items.append(((*path, k), v))
+
+        walk(self.vars_, ())
+        key = (
+            type(self).__name__,
+            self.model.NumVars,
+            len(items),
+            self.n_fields,
+            self.n_wells,
+            self.n_s,
+            self.n_c,
+            self.n_h,
+            self.n_te,
+            self.formulation,
+            tuple(self.eval_metrics),
+        )
+        plan = _SOL_PLANS.get(key)
+        if plan is None:
+            plan = []
+            for _, v in items:
+                if isinstance(v, gp.MVar):
+                    idx = [var.index for var in v.reshape(-1).tolist()]
+                    plan.append(np.array(idx, dtype=int).reshape(v.shape))
+                elif isinstance(v, gp.Var):
+                    plan.append(v.index)
+                else:
+                    plan.append(None)
+            _SOL_PLANS[key] = plan
+        return items, plan
+
+    def _finish_sols(self, result, display_report=True):
+        """
+        Add the solver information, the post calculations, and the report to
+        the solutions (self.sols) given a SolverResult.
+        """
+        sols = self.sols
+        sols["obj"] = result.obj_val
+        sols["field_ids"] = self.field_ids
+        sols["well_ids"] = self.well_ids
+        sols["gp_status"] = result.status
+        sols["gp_MIPGap"] = result.mip_gap
+        sols["gp_Runtime"] = result.runtime
+        sols["gp_NodeCount"] = result.node_count
+
+        # Calculate satisfaction
+        if self.obj_post_calculation:
+            eval_metrics = self.eval_metrics
+            alphas = self.alphas
+            scales = self.scales
+
+            # The expected satisfaction over the precipitation scenarios
+            n_yr = self.n_yr
+            Sas = dict.fromkeys(eval_metrics, 0)
+            for k, weight in enumerate(self.scenario_weights):
+                profits = sols["profit"][k * n_yr : (k + 1) * n_yr]
+                y_ys = sols["y_y"][k * n_yr : (k + 1) * n_yr]
+                # Currently supported metrices
+                if self.approx_years is not None:
+                    # Interpolate the years between the points
+                    interp = self.horizon_interp
+                    eval_metric_vars = {
+                        "profit": interp @ profits / scales["profit"],
+                        "yield_rate": interp @ y_ys / scales["yield_rate"],
+                    }
+                else:
+                    eval_metric_vars = {
+                        "profit": profits / scales["profit"],
+                        "yield_rate": y_ys / scales["yield_rate"],
+                    }
+                for metric in eval_metrics:
+                    alpha = alphas[metric]
+                    metric_var = eval_metric_vars.get(metric)
+                    # force the minimum value to be zero since there is an exponential function
+                    metric_var[metric_var < 0] = 0
+                    N_yr = 1 - np.exp(-alpha * metric_var)
+                    Sas[metric] += weight * np.mean(N_yr)
+            for metric in eval_metrics:
+                sols["Sa"][metric] = Sas[metric]
+
+        # Replace the solutions of the scenarios by their expected values
+        if self.n_scen > 1:
+            self._collapse_scenarios(sols)
+
+        self._update_rainfed(sols)
+
+        # Update remaining water rights
+        # Keep the water rights of the model intact for a re-solve.
+        wrs_info = deepcopy(self.wrs_info)
+        for k, v in wrs_info.items():
+            if v["remaining_wr"] is not None:
+                fids = v["applied_field_ids"]
+                if fids == "all":
+                    irr_sub = sols["irr_depth_per_field"]  # (n_s, n_c, n_h)
+                else:
+                    for i, fid in enumerate(fids):
+                        if i == 0:
+                            irr_sub = sols[fid]["irr_depth"].copy()
+                        else:
+                            irr_sub += sols[fid]["irr_depth"]
+                    irr_sub = irr_sub / len(fids)
+                v["remaining_wr"] -= np.sum(irr_sub[:, :, 0])
+        sols["water_rights"] = wrs_info
+
+        # Display report
+        crop_options = self.crop_options
+        tech_options = self.tech_options
+        n_s = self.n_s
+        fids = self.field_ids
+        # sols = self.sols
+        irrs = list(sols["irr_depth"].mean(axis=0).sum(axis=0).round(2))
+        decisions = {"Irrigation depths": irrs}
+        for fid in fids:
+            sols_fid = sols[fid]
+            i_crop = sols_fid["i_crop"][:, :, 0]
+            # Avoid using == 0 or 1 => it can have numerical issues
+            crop_type = [crop_options[np.argmax(i_crop[s, :])] for s in range(n_s)]
+            tech = tech_options[np.argmax(sols_fid["i_te"][:])]
+            Irrigated = list(
+                sols_fid["i_rainfed"][:, :, 0].sum(axis=1).round(0) <= 0
+            )
+            decisions[fid] = {
+                "Crop types": crop_type,
+                "Irr tech": tech,
+                "Irrigated": Irrigated,
+            }
+        self.decisions = decisions
+        if self.approx_horizon:
+            h_msg = str(self.horizon) + f" (approximated with {self.n_yr})"
+        else:
+            h_msg = str(self.n_yr)
+        if self.n_scen > 1:
+            h_msg += f" with {self.n_scen} precipitation scenarios"
+        # The report is formatted only when it is displayed or accessed.
+        gp_report = ModelReport(
+            name=self.unique_id,
+            horizon=h_msg,
+            n_fields=self.n_fields,
+            n_s=self.n_s,
+            n_wells=self.n_wells,
+            n_water_rights=self.n_water_rights,
+            msg={
+                k: v.copy() if isinstance(v, dict) else v for k, v in self.msg.items()
+            },
+            decisions=decisions,
+            mip_gap=result.mip_gap,
+            sas=dict(sols["Sa"]),
+        )
+        self.gp_report = gp_report
+        if display_report:
+            print(gp_report)
+        sols["gp_report"] = gp_report
+
+    def _update_rainfed(self, sols):
+        """
+        Mark the area splits without irrigation in the first year as rainfed
+        in the solutions.
+        """
+        for fid in self.field_ids:
+            sols_fid = sols[fid]
+            irr_depth = sols_fid["irr_depth"][:, :, 0].sum(axis=1)
+            i_rainfed = sols_fid["i_rainfed"]
+            i_rainfed[
+                np.where(irr_depth <= 0), :, :
+            ] = 1  # avoid using irr_depth == 0
+            sols_fid["i_rainfed"] = i_rainfed * sols_fid["i_crop"]
+
+    def _collapse_scenarios(self, sols):
+        """
+        Move the solutions stacked along the horizon axis (n_h) to
+        sols["scenarios"] with the shape (..., n_scen, n_yr) and replace them
+        by their expected values over the scenarios with the shape
+        (..., n_yr). The first-stage decisions (e.g., i_crop and i_te) are
+        shared by all scenarios and kept as they are.
+        """
+        n_scen, n_yr = self.n_scen, self.n_yr
+        weights = self.scenario_weights.reshape((-1, 1))
+        first_stage = FIRST_STAGE_KEYS
+
+        def collapse(d, scen):
+            for k, v in d.items():
+                if isinstance(v, dict):
+                    if k != "Sa":
+                        scen[k] = {}
+                        collapse(v, scen[k])
+                elif (
+                    isinstance(v, np.ndarray)
+                    and v.ndim > 0
+                    and v.shape[-1] == self.n_h
+                    and k not in first_stage
+                ):
+                    scen[k] = v.reshape((*v.shape[:-1], n_scen, n_yr))
+                    d[k] = np.sum(scen[k] * weights, axis=-2)
+
+        scenarios = {}
+        collapse(sols, scenarios)
+        scenarios["weights"] = self.scenario_weights
+        sols["scenarios"] = scenarios
+
+    def do_IIS_gp(self, filename=None):
+        """
+        Compute an Irreducible Inconsistent Subsystem (IIS). This function can
+        only be executed if the model is infeasible.
+
+        An IIS is a subset of the constraints and variable bounds with the
+        following properties:
+
+        - It is still infeasible, and
+        - If a single constraint or bound is removed, the subsystem becomes feasible.
+
+        Note that an infeasible model may have multiple IISs. The one returned
+        by Gurobi is not necessarily the smallest one; others may exist
+        with a fewer constraints or bounds.
+
+        More info: https://www.gurobi.com/documentation/10.0/refman/py_model_computeiis.html
+
+        Parameters
+        ----------
+        filename : str
+            Output filename. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        m = self.model
+        # do IIS
+        m.computeIIS()
+        if m.IISMinimal:
+            print("IIS is minimal\n")
+        else:
+            print("IIS is not minimal\n")
+        print("\nThe following constraint(s) cannot be satisfied:")
+        for c in m.getConstrs():
+            if c.IISConstr:
+                print("%s" % c.ConstrName)
+
+        if filename is not None:
+            if filename[-4:] != ".ilp":
+                filename += ".ilp"
+            m.write(filename)
+
+    def write_ilp(self, filename):
+        """
+        This function outputs the information about the results of the IIS computation to
+        .ilp and can only be executed after do_IIS_gp().
+
+        Parameters
+        ----------
+        filename : str
+            Output filename.
+
+        Returns
+        -------
+        None.
+
+        """
+        if filename[-4:] != ".ilp":
+            filename += ".ilp"
+        m = self.model
+        m.write(filename)
+
+    def write_sol(self, filename):
+        """
+        This function outputs the solution of the model to a .sol file.
+
+        Parameters
+        ----------
+        filename : str
+            Output filename.
+
+        Returns
+        -------
+        None.
+
+        """
+        if filename[-4:] != ".sol":
+            filename += ".sol"
+        m = self.model
+        m.write(filename)
+
+    def write_lp(self, filename):
+        """
+        This function outputs the model to a .lp file.
+
+        Parameters
+        ----------
+        filename : str
+            Output filename.
+
+        Returns
+        -------
+        None.
+
+        """
+        if filename[-3:] != ".lp":
+            filename += ".lp"
+        m = self.model
+        m.write(filename)
+
+    def write_mps(self, filename):
+        """
+        This funtion outputs the model to an .mps file.
+
+        Parameters
+        ----------
+        filename : str
+            Output filename.
+
+        Returns
+        -------
+        None.
+
+        """
+        if filename[-3:] != ".mps":
+            filename += ".mps"
+        m = self.model
+        m.write(filename)
+
+
+# Utility code
+class DeferredOptimization(Optimization):
+    """
+    A base of the drop-in replacements of Optimization that solve some models
+    without building the Gurobi model of Optimization. The inputs of the setup
+    methods are recorded, and the model is only built (by replaying the
+    inputs on Optimization) if it is not supported by the subclass. The
+    subclasses implement _setup_fast() and _solve_fast().
+    """
+
+    def __init__(self, unique_id="", log_to_console=1, gpenv=None, names=True):
+        """
+        Store the arguments of Optimization. The Gurobi environment and model
+        are created only if the model falls back to Optimization.
+        """
+        self.unique_id = unique_id
+        self._init_kwargs = {
+            "unique_id": unique_id,
+            "log_to_console": log_to_console,
+            "gpenv": gpenv,
+            "names": names,
+        }
+        self.gpenv = None
+        self.model = None
+        # Whether the model is solved without Optimization. Determined in
+        # finish_setup().
+        self.fast = None
+
+    def depose_gp_env(self):
+        """Depose the Gurobi environment if it has been created."""
+        if self.gpenv is not None:
+            self.gpenv.dispose()
+
+    def setup_ini_model(
+        self,
+        target="profit",
+        horizon=1,
+        area_split=1,
+        crop_options=None,
+        tech_options=None,
+        consumat_dict=None,
+        approx_horizon=False,
+        gurobi_kwargs=None,
+        formulation="nonconvex",
+        pwl_breakpoints=10,
+        solver="gurobi",
+        symmetry_breaking=False,
+        scenario_weights=None,
+        approx_points=2,
+    ):
+        """See Optimization.setup_ini_model()."""
+        # Record the inputs, which are replayed on Optimization if the model
+        # cannot be solved by the fast path.
+        self._calls = [
+            (
+                "setup_ini_model",
+                {
+                    "target": target,
+                    "horizon": horizon,
+                    "area_split": area_split,
+                    "crop_options": crop_options,
+                    "tech_options": tech_options,
+                    "consumat_dict": consumat_dict,
+                    "approx_horizon": approx_horizon,
+                    "gurobi_kwargs": gurobi_kwargs,
+                    "formulation": formulation,
+                    "pwl_breakpoints": pwl_breakpoints,
+                    "solver": solver,
+                    "symmetry_breaking": symmetry_breaking,
+                    "scenario_weights": scenario_weights,
+                    "approx_points": approx_points,
+                },
+            )
+        ]
+        self._set_ini_settings(
+            target,
+            horizon,
+            area_split,
+            crop_options,
+            tech_options,
+            consumat_dict,
+            approx_horizon,
+            gurobi_kwargs,
+            formulation,
+            pwl_breakpoints,
+            solver,
+            symmetry_breaking,
+            scenario_weights,
+            approx_points,
+        )
+        self.penalties = []
+        self.msg = {}
+        self.wrs_info = {}
+        self.fields_info = {}
+        self.wells_info = {}
+        self._wr_blocks = []
+        self._finance_dict = None
+
+    def setup_constr_field(
+        self,
+        field_id,
+        field_area,
+        prec_aw,
+        water_yield_curves,
+        tech_pumping_rate_coefs,
+        pre_i_crop,
+        pre_i_te,
+        field_type="optimize",
+        i_crop=None,
+        i_rainfed=None,
+        i_te=None,
+        **kwargs,
+    ):
+        """See Optimization.setup_constr_field()."""
+        self._calls.append(
+            (
+                "setup_constr_field",
+                {
+                    "field_id": field_id,
+                    "field_area": field_area,
+                    "prec_aw": prec_aw,
+                    "water_yield_curves": water_yield_curves,
+                    "tech_pumping_rate_coefs": tech_pumping_rate_coefs,
+                    "pre_i_crop": pre_i_crop,
+                    "pre_i_te": pre_i_te,
+                    "field_type": field_type,
+                    "i_crop": i_crop,
+                    "i_rainfed": i_rainfed,
+                    "i_te": i_te,
+                    **kwargs,
+                },
+            )
+        )
+        field_type_list = self._get_field_type_list(field_type, i_rainfed)
+        for ft in field_type_list:
+            if ft not in ("rainfed", "irrigated", "optimize"):
+                raise ValueError(f"{ft} is not a valid value for field_type.")
+
+        self.field_ids.append(field_id)
+        self.msg[field_id] = {
+            "Crop types": "optimize" if i_crop is None else "user input",
+            "Irr tech": "optimize" if i_te is None else "user input",
+            "Field type": field_type_list,
+        }
+        if i_rainfed is not None and "rainfed" in field_type_list:
+            self.msg[field_id]["Rainfed field"] = "user input"
+        self.fields_info[field_id] = {
+            "field_area": field_area,
+            "prec_aw": prec_aw,
+            "water_yield_curves": water_yield_curves,
+            "tech_pumping_rate_coefs": tech_pumping_rate_coefs,
+            "pre_i_crop": self._get_i_crop_array(pre_i_crop),
+            "pre_i_te": self._get_i_te_array(pre_i_te),
+            "field_type_list": field_type_list,
+            "i_crop": i_crop,
+            "i_rainfed": i_rainfed,
+            "i_te": i_te,
+        }
+        self.n_fields += 1
+
+    def setup_constr_well(
+        self,
+        well_id,
+        dwl,
+        st,
+        l_wt,
+        r,
+        k,
+        sy,
+        eff_pump,
+        eff_well,
+        pumping_days,
+        pumping_capacity=None,
+        rho=1000.0,
+        g=9.8016,
+    ):
+        """See Optimization.setup_constr_well()."""
+        self._calls.append(
+            (
+                "setup_constr_well",
+                {
+                    "well_id": well_id,
+                    "dwl": dwl,
+                    "st": st,
+                    "l_wt": l_wt,
+                    "r": r,
+                    "k": k,
+                    "sy": sy,
+                    "eff_pump": eff_pump,
+                    "eff_well": eff_well,
+                    "pumping_days": pumping_days,
+                    "pumping_capacity": pumping_capacity,
+                    "rho": rho,
+                    "g": g,
+                },
+            )
+        )
+        self.well_ids.append(well_id)
+        l_wt = self._get_projected_l_wt(dwl, l_wt)
+        self.l_wt = l_wt
+        self.wells_info[well_id] = {
+            "r": r,
+            "k": k,
+            "sy": sy,
+            "eff_well": eff_well,
+            "pumping_days": pumping_days,
+        }
+        fpitr, ftrd = self._get_well_coefs(well_id, st)
+        # 10000 is to convert m-ha to m3 and 1e15 is to convert J to PJ.
+        self.wells_info[well_id].update(
+            {
+                "r_g_m_ha_2_m3_eff": rho * g * 10000 / eff_pump / 1e15,
+                "l_wt": l_wt,
+                "fpitr": fpitr,
+                "ftrd": ftrd,
+                "pumping_capacity": pumping_capacity,
+            }
+        )
+        self.n_wells += 1
+
+    def setup_constr_wr(
+        self,
+        water_right_id,
+        wr_depth,
+        applied_field_ids="all",
+        time_window=1,
+        remaining_tw=None,
+        remaining_wr=None,
+        tail_method="proportion",
+    ):
+        """See Optimization.setup_constr_wr()."""
+        self._calls.append(
+            (
+                "setup_constr_wr",
+                {
+                    "water_right_id": water_right_id,
+                    "wr_depth": wr_depth,
+                    "applied_field_ids": applied_field_ids,
+                    "time_window": time_window,
+                    "remaining_tw": remaining_tw,
+                    "remaining_wr": remaining_wr,
+                    "tail_method": tail_method,
+                },
+            )
+        )
+        blocks = self._get_wr_blocks(
+            wr_depth, time_window, remaining_tw, remaining_wr, tail_method
+        )
+        self._wr_blocks.append((applied_field_ids, blocks))
+        self._record_wr(
+            water_right_id,
+            wr_depth,
+            applied_field_ids,
+            time_window,
+            remaining_tw,
+            remaining_wr,
+            tail_method,
+        )
+
+    def setup_constr_finance(self, finance_dict):
+        """See Optimization.setup_constr_finance()."""
+        self._calls.append(("setup_constr_finance", {"finance_dict": finance_dict}))
+        self._finance_dict = finance_dict
+
+    def setup_obj(self, alpha_dict=None):
+        """See Optimization.setup_obj()."""
+        self._calls.append(("setup_obj", {"alpha_dict": alpha_dict}))
+        if alpha_dict is not None:
+            self.alphas.update(alpha_dict)
+            self.eval_metrics = [
+                metric for metric, v in self.alphas.items() if v is not None
+            ]
+        if self.target not in self.eval_metrics:
+            raise ValueError(f"Alpha value of '{self.target}' is not given.")
+        self.obj_post_calculation = True
+
+    def finish_setup(self, display_summary=True):
+        """
+        Complete the setup. The model is prepared for _solve_fast() if
+        possible. Otherwise, the recorded inputs are used to build the model
+        with Optimization.
+
+        Parameters
+        ----------
+        display_summary : bool, optional
+            Display the model summary. The default is True.
+
+        Returns
+        -------
+        None
+
+        """
+        self.fast = self._setup_fast()
+        if self.fast:
+            self._make_summary(display_summary)
+            return
+        self._fall_back(display_summary)
+
+    def _fall_back(self, display_summary=False):
+        """Build the model with Optimization from the recorded inputs."""
+        self.fast = False
+        Optimization.__init__(self, **self._init_kwargs)
+        for name, kwargs in self._calls:
+            getattr(Optimization, name)(self, **kwargs)
+        Optimization.finish_setup(self, display_summary=display_summary)
+
+    def set_start(self, start_sols, var_hint=False):
+        """
+        See Optimization.set_start(). The start is only used if the model is
+        built by Optimization.
+        """
+        if not self.fast:
+            super().set_start(start_sols, var_hint=var_hint)
+
+    def tighten_bounds(self, tol=1e-6):
+        """
+        See Optimization.tighten_bounds(). The bounds are only used if the
+        model is built by Optimization.
+        """
+        if not self.fast:
+            super().tighten_bounds(tol=tol)
+
+    def solve(
+        self, keep_gp_model=False, keep_gp_output=False, display_report=True, **kwargs
+    ):
+        """
+        Solve the model with _solve_fast(). If the model falls back to
+        Optimization, Optimization.solve() is used with the same arguments.
+        Otherwise, keep_gp_model and keep_gp_output are ignored.
+        """
+        if not self.fast:
+            super().solve(
+                keep_gp_model=keep_gp_model,
+                keep_gp_output=keep_gp_output,
+                display_report=display_report,
+                **kwargs,
+            )
+            return
+        self._solve_fast(display_report=display_report, **kwargs)
+
+    def _setup_fast(self):
+        """
+        Prepare the model for _solve_fast(). Return False if the model is not
+        supported.
+        """
+        raise NotImplementedError
+
+    def _solve_fast(self, display_report=True, **kwargs):
+        """Solve the model and set the solutions (self.sols)."""
+        raise NotImplementedError
+
+
+class OptimizationFixedChoices(DeferredOptimization):
+    """
+    A replacement of Optimization for decisions with given crop types and
+    irrigation technologies (e.g., the "Repetition" state), which solves the
+    model without building a Gurobi model.
+
+    With the discrete choices given, only the irrigation depths remain to be
+    optimized. The yield rate of each year is a piecewise quadratic function
+    of the irrigation depth (see get_yield_pieces()), and the pumping energy
+    is a convex quadratic function of the irrigation volume. Therefore, for
+    each combination of the yield pieces over the planning horizon, the
+    objective is a separable concave quadratic function, which is maximized
+    with vectorized NumPy operations (see maximize_pieces()). The solutions
+    are returned in the same format as Optimization.
+
+    The fast path covers a farmer with a single field (area_split = 1) and a
+    single well, i.e., the setting of the SD6 model, with "profit" as the
+    target and a single precipitation scenario. The exact (i.e.,
+    "nonconvex") model is solved to optimality regardless of the given
+    formulation. Other settings are solved by replaying the inputs on
+    Optimization, and so are the models where zero irrigation is optimal in
+    the first year although the field can be irrigated (see
+    _set_fast_sols()). The irrigation depths match those of Optimization up
+    to the solver tolerances (e.g., MIPGap).
+    """
+
+    def _setup_fast(self):
+        """
+        Collect the coefficients of the fast path. Return False if the model
+        is not supported.
+        """
+        if self.n_fields != 1 or self.n_wells != 1 or self.n_s != 1:
+            return False
+        if self.approx_horizon or self.target != "profit" or self.n_scen > 1:
+            return False
+        if self._finance_dict is None or not getattr(
+            self, "obj_post_calculation", False
+        ):
+            return False
+        fid = self.field_ids[0]
+        field = self.fields_info[fid]
+        well = self.wells_info[self.well_ids[0]]
+        choices = self._get_fast_choices(field)
+        if choices is None:
+            return False
+        i_crop, j, i_te, te = choices
+        curve = self._get_fast_curve(field, j)
+        energy = self._get_fast_energy(field, well, te)
+        if curve is None or energy is None:
+            return False
+        caps = self._get_fast_caps(fid, field, well, curve, energy)
+        if caps is None:
+            return False
+        cap, blocks = caps
+        data = self._get_fast_finance(field, j, i_crop, i_te, te)
+        data.update(
+            {
+                "crop": j,
+                "i_crop": i_crop.astype(float),
+                "i_te": np.asarray(i_te, dtype=float),
+                "blocks": blocks,
+                "ymax": curve["ymax"],
+                **energy,
+            }
+        )
+        if not self._set_fast_pieces(data, curve, cap):
+            return False
+        self._fast_data = data
+        return True
+
+    def _set_fast_pieces(self, data, curve, cap):
+        """
+        Add the yield pieces of each year (see get_yield_pieces()) and the
+        objective coefficients of their combinations to data, where both are
+        None if no piece is feasible. Return False if the objective is not
+        concave.
+        """
+        blocks = data["blocks"]
+        pieces = []
+        for h in range(self.n_h):
+            pieces_h = get_yield_pieces(
+                curve["a"],
+                curve["b"],
+                curve["c"],
+                curve["wmax"],
+                curve["min_y_ratio"],
+                curve["prec"][h],
+                cap[h],
+                curve["tol"],
+            )
+            if not pieces_h:
+                pieces = None  # Infeasible
+                break
+            pieces.append(pieces_h)
+        data["q"] = data["pieces"] = None
+        data["rainfed"] = False
+        if pieces is not None:
+            lo, hi, y2, y1, y0 = combine_pieces(pieces)
+            k_rev = data["crop_profit"] * curve["ymax"] * data["unit_area"] * 1e-4
+            q2 = k_rev * y2 - data["energy_price"] * data["e_a"]
+            if np.any(q2 > 0):
+                return False  # Non-concave (e.g., negative crop profit)
+            data["q"] = (
+                np.minimum(q2, -1e-12),
+                k_rev * y1 - data["energy_price"] * data["e_b"],
+                k_rev * y0,
+            )
+            data["pieces"] = (lo, hi, y2, y1, y0)
+            # Whether the field cannot be irrigated in the first year, where
+            # Gurobi also returns an exact zero irrigation depth (see
+            # _set_fast_sols()).
+            data["rainfed"] = bool(np.all(hi[:, 0] <= 0)) or any(
+                start == 0 and wr <= 0 for start, _, wr in blocks
+            )
+        return True
+
+    def _get_fast_choices(self, field):
+        """
+        Get the given crop and technology choices as (i_crop, crop index,
+        i_te, tech). Return None if they are not given as single choices.
+        """
+        if field["i_crop"] is None or field["i_te"] is None:
+            return None
+        if field["i_rainfed"] is not None:
+            return None
+        i_crop = self._get_i_crop_array(field["i_crop"])
+        crops = np.where(i_crop[0, :, 0] > 0.5)[0]
+        i_te = self._get_i_te_array(field["i_te"])
+        if len(crops) != 1 or np.sum(np.asarray(i_te) > 0.5) != 1:
+            return None
+        return i_crop, crops[0], i_te, self.tech_options[np.argmax(i_te)]
+
+    def _get_fast_curve(self, field, j):
+        """
+        Get the water-yield curve of the given crop j and the available
+        precipitation. Return None if the yield rate of a crop that is not
+        planted exceeds 1, which is reported by Gurobi as infeasible.
+        """
+        tol = 1e-6
+        crop_par = np.array([field["water_yield_curves"][c] for c in self.crop_options])
+        ymax, wmax, a, b, c = (crop_par[:, i] for i in range(5))
+        if crop_par.shape[1] > 5:
+            min_y_ratio = crop_par[:, 5]
+        else:
+            min_y_ratio = np.zeros(self.n_c)
+        if a[j] > 0:
+            return None  # Convex yield curve
+        prec = self._get_prec_aw_array(field["prec_aw"])[0]  # (n_c, n_h)
+        ub_w = np.max(wmax)
+        # Let Gurobi report an infeasible model (e.g., a yield rate above 1
+        # for a crop that is not planted).
+        if np.any(prec > ub_w):
+            return None
+        x0 = np.minimum(prec / wmax.reshape((-1, 1)), 1)
+        yw0 = a.reshape((-1, 1)) * x0**2 + b.reshape((-1, 1)) * x0 + c.reshape((-1, 1))
+        if np.any(np.delete(yw0, j, axis=0) > 1 + tol):
+            return None
+        return {
+            "ymax": ymax[j],
+            "wmax": wmax[j],
+            "a": a[j],
+            "b": b[j],
+            "c": c[j],
+            "min_y_ratio": min_y_ratio[j],
+            "prec": prec[j],
+            "ub_w": ub_w,
+            "tol": tol,
+        }
+
+    def _get_fast_energy(self, field, well, te):
+        """
+        Get the coefficients of the pumping energy given the irrigation
+        technology te. Return None if the energy is not convex.
+        """
+        # Energy [PJ] = coef * v * (l_wt + k_q * q + l_pr), where the daily
+        # pumping rate q = qa * v + qb.
+        q_lny = np.log(well["r"] ** 2 * well["sy"] / well["ftrd"])
+        if q_lny > -0.5772:
+            if self.formulation == "nonconvex":
+                return None
+            q_lny = -0.5772
+        k_q = (-0.5772 - q_lny) / well["fpitr"] * 10000 / well["eff_well"]
+        qa, qb, l_pr = field["tech_pumping_rate_coefs"][te]
+        coef = well["r_g_m_ha_2_m3_eff"]
+        unit_area = field["field_area"] / self.n_s
+        s = unit_area * 0.01  # v [m-ha] = s * irrigation depth [cm]
+        l_t0 = well["l_wt"] + k_q * qb + l_pr  # (n_h)
+        if np.any(l_t0 < 0) or k_q * qa < 0:
+            return None
+        return {
+            "e_a": coef * k_q * qa * s**2 * np.ones(self.n_h),
+            "e_b": coef * l_t0 * s,
+            "unit_area": unit_area,
+            "s": s,
+            "qa": qa,
+            "qb": qb,
+            "l_pr": l_pr,
+            "k_q": k_q,
+            "q_lny": q_lny,
+            "coef": coef,
+        }
+
+    def _get_fast_caps(self, fid, field, well, curve, energy):
+        """
+        Get the upper bounds of the yearly irrigation depths and the
+        multi-year water rights as (start, end, wr), which are clipped to the
+        planning horizon. Return None if the water rights are not supported.
+        """
+        n_h = self.n_h
+        cap = np.full(n_h, curve["ub_w"] - curve["prec"])
+        if well["pumping_capacity"] is not None:
+            cap = np.minimum(cap, well["pumping_capacity"] / energy["s"])
+        if field["field_type_list"][0] == "rainfed":
+            cap[:] = 0
+        blocks = []
+        for fids, wr_blocks in self._wr_blocks:
+            if fids != "all" and list(fids) != [fid]:
+                return None
+            for start, end, wr in wr_blocks:
+                end = min(end, n_h)
+                if end - start == 1:
+                    cap[start] = min(cap[start], wr)
+                elif end - start > 1:
+                    blocks.append((start, end, wr))
+        blocks.sort()
+        for (_, end, _), (start, _, _) in pairwise(blocks):
+            if start < end:
+                return None  # Overlapping multi-year water rights
+        return cap, blocks
+
+    def _get_fast_finance(self, field, j, i_crop, i_te, te):
+        """Get the finance coefficients of the given crop j and technology te."""
+        n_h = self.n_h
+        crop_options = self.crop_options
+        finance_dict = self._finance_dict
+        crop_profit = (
+            finance_dict["crop_price"][crop_options[j]]
+            - finance_dict["crop_cost"][crop_options[j]]
+        )
+        cost_tech = np.array(
+            [finance_dict["irr_tech_operational_cost"][t] for t in self.tech_options]
+        )
+        tech_change_cost_matrix, crop_change_cost_matrix = self._get_change_costs(
+            finance_dict
+        )
+        pre_i_te = field["pre_i_te"]
+        pre_i_crop = field["pre_i_crop"]
+        i_tech_change = np.maximum(i_te - pre_i_te, 0)
+        i_crop_change = np.maximum(i_crop - pre_i_crop, 0)
+        annual_cost = (
+            np.sum(i_te * cost_tech)
+            + np.sum(tech_change_cost_matrix[np.argmax(pre_i_te), :] * i_tech_change)
+            / n_h
+            + np.sum(
+                crop_change_cost_matrix[np.argmax(pre_i_crop[0, :, 0]), :]
+                * i_crop_change[0, :, 0]
+            )
+            / n_h
+        )
+        return {
+            "i_crop_change": i_crop_change,
+            "i_tech_change": i_tech_change,
+            "energy_price": finance_dict["energy_price"],  # [1e4$/PJ]
+            "crop_profit": crop_profit,
+            "annual_cost": annual_cost,
+        }
 
-        # Calculate average value per field
-        m.addConstr(y_y == get_sum(fids, vars_, "y_y") / n_f, name="c.y_y")
-        m.addConstr(
-            irr_depth_per_field == get_sum(fids, vars_, "irr_depth") / n_f,
-            name="c.irr_depth_per_field(cm)",
+    def _solve_fast(self, display_report=True, **kwargs):
+        """
+        Solve the model with the fast path. The gurobi keywords are only used
+        if the model falls back to Optimization (see _set_fast_sols()).
+        """
+        start = time.perf_counter()
+        data = self._fast_data
+        ds = values = None
+        if data["q"] is not None:
+            lo, hi = data["pieces"][:2]
+            ds, values = maximize_pieces(data["q"], lo, hi, data["blocks"])
+        self._set_fast_sols(
+            ds, values, time.perf_counter() - start, display_report, **kwargs
         )
-        profit = vars_["profit"]
-        rev = vars_["rev"]
-        cost_e = vars_["cost_e"]
-        annual_cost = vars_["other_cost"]
-        m.addConstr((profit == (rev - cost_e - annual_cost) / n_f), name="c.profit")
-
-        m.update()
 
-        if self.approx_horizon:
-            h_msg = str(self.horizon) + " (approximate with 2)"
-        else:
-            h_msg = str(self.n_h)
-        msg = dict_to_string(self.msg, prefix="\t\t", level=2)
-        summary = f"""
-        ########## Model Summary ##########\n
-        Name:   {self.unique_id}\n
-        Planning horizon:   {h_msg}
-        No. of Crop fields:    {self.n_fields}
-        No. of splits          {self.n_s}
-        No. of Wells:          {self.n_wells}
-        NO. of Water rights:   {self.n_water_rights}\n
-        Decision settings:\n{msg}\n
-        ###################################
+    def _set_fast_sols(self, ds, values, runtime, display_report=True, **kwargs):
         """
-        self.summary = summary
-        if display_summary:
-            print(summary)
-
-    def solve(
-        self, keep_gp_model=False, keep_gp_output=False, display_report=True, **kwargs
-    ):
+        Form the solutions from the maximized piece combinations given by
+        maximize_pieces(). ds and values are None if no piece is feasible.
+
+        If zero irrigation is optimal in the first year although the field can
+        be irrigated, the model falls back to Optimization and is solved with
+        the gurobi keywords. Gurobi returns a small positive irrigation depth
+        (e.g., 1e-7) in this case, which keeps the field irrigated and charges
+        the operational cost of the technology in Finance, and the exact zero
+        of the fast path would not.
         """
-        This method solves the optimization problem.
-        Note that, by default, we set the gurobi parameter, NonConvex = 2 for a
-        non-convex model.
+        data = self._fast_data
+        d = None
+        if values is not None:
+            i = np.argmax(values)
+            if values[i] > -np.inf:
+                y2, y1, y0 = data["pieces"][2:]
+                d = ds[i]
+                yw = y2[i] * d**2 + y1[i] * d + y0[i]  # (n_h)
+        if d is None:
+            print("Optimal solution is not found.")
+            self.optimal_obj_value = None
+            self.sols = {"gp_report": "Optimal solution is not found."}
+            return
+        if d[0] <= 0 and not data["rainfed"]:
+            self._fall_back()
+            self.solve(display_report=display_report, **kwargs)
+            return
 
-        Parameters
-        ----------
-        keep_gp_model : bool
-            Keep the gurobi model instance for further use. This should be used
-            with caution.
-            The default is False.
+        n_s = self.n_s
+        n_c = self.n_c
+        n_h = self.n_h
+        n_f = self.n_fields
+        j = data["crop"]
+        fid = self.field_ids[0]
+        wid = self.well_ids[0]
+
+        irr_depth = np.zeros((n_s, n_c, n_h))
+        irr_depth[:, j, :] = d
+        y = np.zeros((n_s, n_c, n_h))
+        y[:, j, :] = yw * data["ymax"] * data["unit_area"] * 1e-4
+        v = d * data["s"]
+        q = data["qa"] * v + data["qb"]
+        l_cd_l_wd = data["k_q"] * q
+        l_t = self.wells_info[wid]["l_wt"] + l_cd_l_wd + data["l_pr"]
+        e = data["coef"] * v * l_t
+        cost_e = e * data["energy_price"]
+        rev = y[:, j, :].sum(axis=0) * data["crop_profit"]
+        other_cost = np.full(n_h, data["annual_cost"])
+        profit = (rev - cost_e - other_cost) / n_f
+        obj = np.mean(profit)
+
+        sols_fid = {
+            "irr_depth": irr_depth,
+            "i_crop": data["i_crop"],
+            "i_rainfed": np.zeros((n_s, n_c, 1)),
+            "i_te": data["i_te"],
+            "l_pr": data["l_pr"],
+            "v": v,
+            "y": y,
+            "y_y": yw,
+            "q": q,
+            "pre_i_crop": self.fields_info[fid]["pre_i_crop"],
+            "pre_i_te": self.fields_info[fid]["pre_i_te"],
+            "i_crop_change": data["i_crop_change"],
+            "i_tech_change": data["i_tech_change"],
+            "field_type": self.fields_info[fid]["field_type_list"][-1],
+        }
+        if self.formulation != "nonconvex":
+            sols_fid["v_te"] = np.outer(data["i_te"], v)
+            if self.formulation == "pwl":
+                sols_fid["v_te_sq"] = sols_fid["v_te"] ** 2
+        sols_wid = {
+            "v": v,
+            "q": q,
+            "l_pr": data["l_pr"],
+            "l_cd_l_wd": l_cd_l_wd,
+            "e": e,
+            "l_t": l_t,
+        }
+        if self.formulation == "nonconvex":
+            sols_wid["q_lny"] = np.full(n_h, data["q_lny"])
+        self.sols = {
+            "irr_depth": irr_depth,
+            "v": v,
+            "y": y,
+            "e": e,
+            "y_y": yw,
+            "profit": profit,
+            "irr_depth_per_field": irr_depth / n_f,
+            fid: sols_fid,
+            wid: sols_wid,
+            "rev": rev,
+            "cost_e": cost_e,
+            "other_cost": other_cost,
+            "Sa": {self.target: obj},
+            "allo_r": np.ones((n_f, self.n_wells, n_h)),
+            "allo_r_w": np.ones((self.n_wells, n_h)),
+        }
+        self.optimal_obj_value = obj
+        result = SolverResult(
+            status=2, obj_val=obj, mip_gap=0.0, runtime=runtime, node_count=0
+        )
+        self._finish_sols(result, display_report)
 
-        keep_gp_output : bool
-            If True, the gurobi model output will be stored in "gp_output" in a
-            dictionary format. The default is False.
 
-        display_report : bool
-            This parameter displays the summary report if set to True.
-            The default is True.
+def solve_fixed_choices(dms, display_report=True, **kwargs):
+    """
+    Solve multiple OptimizationFixedChoices models in one vectorized pass,
+    e.g., the candidate decisions evaluated by a farmer under the "Social
+    comparison" state. The models solved by the fast path are grouped by
+    their water right blocks, and the piece combinations of all the models
+    in a group are maximized together. The other models are solved one by
+    one.
 
-        **kwargs : **kwargs
-            Pass the gurobi keywords to the gurobi solver.
+    Parameters
+    ----------
+    dms : list
+        OptimizationFixedChoices models after finish_setup().
+    display_report : bool, optional
+        Display the report of each model. The default is True.
+    **kwargs :
+        Gurobi keywords passed to the models that fall back to Optimization.
 
-        Returns
-        -------
-        None.
+    Returns
+    -------
+    None.
 
-        Notes
-        -----
-        More info on Gurobi MIP Models can be accessed at:
-            https://www.gurobi.com/documentation/9.5/refman/mip_models.html
+    """
+    groups = {}
+    for dm in dms:
+        if dm.fast and dm._fast_data["q"] is not None:
+            key = (dm.n_h, tuple(dm._fast_data["blocks"]))
+            groups.setdefault(key, []).append(dm)
+        else:
+            dm.solve(display_report=display_report, **kwargs)
 
-        """
+    for (_, blocks), group in groups.items():
+        start = time.perf_counter()
+        q = tuple(
+            np.concatenate([dm._fast_data["q"][i] for dm in group]) for i in range(3)
+        )
+        lo = np.concatenate([dm._fast_data["pieces"][0] for dm in group])
+        hi = np.concatenate([dm._fast_data["pieces"][1] for dm in group])
+        ds, values = maximize_pieces(q, lo, hi, list(blocks))
+        runtime = (time.perf_counter() - start) / len(group)
+        i = 0
+        for dm in group:
+            n = len(dm._fast_data["pieces"][0])
+            dm._set_fast_sols(
+                ds[i : i + n], values[i : i + n], runtime, display_report, **kwargs
+            )
+            i += n
 
-        def extract_sol(vars_):
-            sols = {}
 
-            def get_inner_dict(d, new_dict):
-                for k, v in d.items():
-                    if isinstance(v, dict):
-                        new_dict[k] = {}
-                        get_inner_dict(v, new_dict[k])
-                    else:
-                        try:
-                            new_dict[
-                                k
-                            ] = v.X  # for variables associated with the gurobi solver
-                        except:
-                            new_dict[k] = v  # for all others
-
-            get_inner_dict(vars_, sols)
-            return sols
+def solve_batch(dms, keep_gp_model=False, display_report=True, **kwargs):
+    """
+    Solve multiple models in one block-diagonal model (see solve_models()),
+    e.g., the decisions of all the farmers in the same CONSUMAT state in a
+    step. Each model gets the same solutions as solve() would give, up to
+    alternative optima. The models with different solvers or solver
+    parameters are solved in separate block-diagonal models. The
+    OptimizationFixedChoices models solved by the fast path are solved
+    together by solve_fixed_choices(), and the other DeferredOptimization
+    models not built by Optimization are solved one by one.
+
+    If the block-diagonal model cannot be solved by Gurobi (e.g., it exceeds
+    the size limit of the license), the models are solved one by one.
 
-        ## Solving model
-        m = self.model
-        gurobi_kwargs = self.gurobi_kwargs
-        gurobi_kwargs.update(kwargs)
-        if "NonConvex" not in gurobi_kwargs.keys():
-            m.setParam("NonConvex", 2)  # Set to solve a non-convex problem
-        for k, v in gurobi_kwargs.items():
-            m.setParam(k, v)
-        m.optimize()
-
-        ## Collect the results and do some post calculations.
-        # Optimal solution found or reach time limit
-        if m.Status == 2 or m.Status == 9:
-            self.optimal_obj_value = m.objVal
-            self.sols = extract_sol(self.vars_)
-            sols = self.sols
-            sols["obj"] = m.objVal
-            sols["field_ids"] = self.field_ids
-            sols["well_ids"] = self.well_ids
-            sols["gp_status"] = m.Status
-            sols["gp_MIPGap"] = m.MIPGap
-
-            # Calculate satisfaction
-            if self.obj_post_calculation:
-                eval_metrics = self.eval_metrics
-                alphas = self.alphas
-                scales = self.scales
+    Parameters
+    ----------
+    dms : list
+        Optimization models after finish_setup().
+    keep_gp_model : bool, optional
+        See Optimization.solve(). The default is False.
+    display_report : bool, optional
+        Display the report of each model. The default is True.
+    **kwargs :
+        Gurobi keywords. See Optimization.solve().
 
-                # Currently supported metrices
-                if self.approx_horizon and self.horizon > 2:
-                    horizon = self.horizon
-                    profits = sols["profit"]
-                    y_ys = sols["y_y"]
-                    eval_metric_vars = {
-                        "profit": np.linspace(profits[0], profits[1], num=horizon)
-                        / scales["profit"],
-                        "yield_rate": np.linspace(y_ys[0], y_ys[1], num=horizon)
-                        / scales["yield_rate"],
-                    }
-                else:
-                    eval_metric_vars = {
-                        "profit": sols["profit"] / scales["profit"],
-                        "yield_rate": sols["y_y"] / scales["yield_rate"],
-                    }
-                for metric in eval_metrics:
-                    alpha = alphas[metric]
-                    metric_var = eval_metric_vars.get(metric)
-                    # force the minimum value to be zero since there is an exponential function
-                    metric_var[metric_var < 0] = 0
-                    N_yr = 1 - np.exp(-alpha * metric_var)
-                    Sa = np.mean(N_yr)
-                    sols["Sa"][metric] = Sa
-
-            # Update rainfed info
-            for fid in self.field_ids:
-                sols_fid = sols[fid]
-                irr_depth = sols_fid["irr_depth"][:, :, 0].sum(axis=1)
-                i_rainfed = sols_fid["i_rainfed"]
-                i_rainfed[
-                    np.where(irr_depth <= 0), :, :
-                ] = 1  # avoid using irr_depth == 0
-                sols_fid["i_rainfed"] = i_rainfed * sols_fid["i_crop"]
-
-            # Update remaining water rights
-            wrs_info = self.wrs_info
-            for k, v in wrs_info.items():
-                if v["remaining_wr"] is not None:
-                    fids = v["applied_field_ids"]
-                    if fids == "all":
-                        irr_sub = sols["irr_depth_per_field"]  # (n_s, n_c, n_h)
-                    else:
-                        for i, fid in enumerate(fids):
-                            if i == 0:
-                                irr_sub = sols[fid]["irr_depth"].copy()
-                            else:
-                                irr_sub += sols[fid]["irr_depth"]
-                        irr_sub = irr_sub / len(fids)
-                    v["remaining_wr"] -= np.sum(irr_sub[:, :, 0])
-            sols["water_rights"] = wrs_info
-
-            # Display report
-            crop_options = self.crop_options
-            tech_options = self.tech_options
-            n_s = self.n_s
-            fids = self.field_ids
-            # sols = self.sols
-            irrs = list(sols["irr_depth"].mean(axis=0).sum(axis=0).round(2))
-            decisions = {"Irrigation depths": irrs}
-            for fid in fids:
-                sols_fid = sols[fid]
-                i_crop = sols_fid["i_crop"][:, :, 0]
-                # Avoid using == 0 or 1 => it can have numerical issues
-                crop_type = [crop_options[np.argmax(i_crop[s, :])] for s in range(n_s)]
-                tech = tech_options[np.argmax(sols_fid["i_te"][:])]
-                Irrigated = list(
-                    sols_fid["i_rainfed"][:, :, 0].sum(axis=1).round(0) <= 0
-                )
-                decisions[fid] = {
-                    "Crop types": crop_type,
-                    "Irr tech": tech,
-                    "Irrigated": Irrigated,
-                }
-            self.decisions = decisions
-            decisions = dict_to_string(decisions, prefix="\t\t", level=2)
-            msg = dict_to_string(self.msg, prefix="\t\t", level=2)
-            sas = dict_to_string(sols["Sa"], prefix="\t\t", level=2, roun=4)
-            if self.approx_horizon:
-                h_msg = str(self.horizon) + " (approximated with 2)"
+    Returns
+    -------
+    None.
+
+    """
+    fixed = []
+    groups = {}
+    for dm in dms:
+        if isinstance(dm, DeferredOptimization) and dm.fast:
+            if isinstance(dm, OptimizationFixedChoices):
+                fixed.append(dm)
             else:
-                h_msg = str(self.n_h)
-            gp_report = f"""
-        ########## Model Report ##########\n
-        Name:   {self.unique_id}\n
-        Planning horizon:   {h_msg}
-        No. of Crop fields:    {self.n_fields}
-        No. of splits          {self.n_s}
-        No. of Wells:          {self.n_wells}
-        No. of Water rights:   {self.n_water_rights}\n
-        Decision settings:\n{msg}\n
-        Solutions (gap {round(m.MIPGap * 100, 4)}%):\n{decisions}\n
-        Satisfaction:\n{sas}\n
-        ###################################
-            """
-            self.gp_report = gp_report
-            if display_report:
-                print(gp_report)
-            sols["gp_report"] = gp_report
-            # self.sols = sols
-        else:
-            print("Optimal solution is not found.")
-            self.optimal_obj_value = None
-            sols = {}
-            sols["gp_report"] = "Optimal solution is not found."
-            self.sols = sols
+                dm.solve(display_report=display_report, **kwargs)
+            continue
+        params = dm._get_solver_params(**kwargs)
+        key = (dm.solver, tuple(sorted(params.items())))
+        groups.setdefault(key, []).append(dm)
+    if fixed:
+        solve_fixed_choices(fixed, display_report=display_report, **kwargs)
+
+    for (solver, params), group in groups.items():
+        try:
+            results = solve_models(
+                [dm.model for dm in group],
+                solver=solver,
+                env=group[0].gpenv,
+                **dict(params),
+            )
+        except gp.GurobiError:
+            results = None
+        for i, dm in enumerate(group):
+            if results is None:
+                dm.solve(
+                    keep_gp_model=keep_gp_model,
+                    display_report=display_report,
+                    **kwargs,
+                )
+                continue
+            dm._set_result(results[i], display_report)
+            if keep_gp_model is False:
+                dm.model.dispose()
 
-        if keep_gp_output:
-            self.gp_output = json.loads(m.getJSONSolution())
 
-        if keep_gp_model is False:
-            # release the memory of the previous model
-            m.dispose()
+def pwl_max_errors(water_yield_curves, pwl_breakpoints=10):
+    """
+    Calculate the maximum absolute errors of the piecewise-linear
+    interpolations used by the "pwl" formulation of Optimization.
 
-    def do_IIS_gp(self, filename=None):
-        """
-        Compute an Irreducible Inconsistent Subsystem (IIS). This function can
-        only be executed if the model is infeasible.
+    Parameters
+    ----------
+    water_yield_curves : dict
+        A dictionary containing water-yield response curves for different crop
+        types.
+    pwl_breakpoints : int, optional
+        The number of evenly spaced breakpoints. The default is 10.
 
-        An IIS is a subset of the constraints and variable bounds with the
-        following properties:
+    Returns
+    -------
+    dict
+        The maximum absolute error of the yield rate (y/ymax) for each crop
+        type and the maximum relative error of the quadratic energy term with
+        respect to its value at the upper bound of the irrigation volume
+        ("energy").
 
-        - It is still infeasible, and
-        - If a single constraint or bound is removed, the subsystem becomes feasible.
+    Notes
+    -----
+    For a quadratic function a*x**2 + b*x + c, the largest deviation of the
+    linear interpolation over an interval of width h is abs(a)*h**2/4. The
+    actual errors in the solutions are usually smaller, as shown by the
+    "pwl_error_report.py" example of the SD6 model.
+    """
+    h = 1 / (pwl_breakpoints - 1)
+    errors = {
+        crop: abs(curve[2]) * h**2 / 4 for crop, curve in water_yield_curves.items()
+    }
+    errors["energy"] = h**2 / 4
+    return errors
 
-        Note that an infeasible model may have multiple IISs. The one returned
-        by Gurobi is not necessarily the smallest one; others may exist
-        with a fewer constraints or bounds.
 
-        More info: https://www.gurobi.com/documentation/10.0/refman/py_model_computeiis.html
+def _start_gp_env(log_to_console, gpenv):
+    """
+    Start a new Gurobi environment if gpenv is given. Otherwise, the default
+    environment (None) is used.
+    """
+    if gpenv:
+        env = gp.Env(empty=True)
+        if log_to_console is not None:
+            env.setParam("LogToConsole", log_to_console)
+        env.start()
+        return env
+    return gpenv
 
-        Parameters
-        ----------
-        filename : str
-            Output filename. The default is None.
 
-        Returns
-        -------
-        None.
+def _set_bounds(var, lb, ub, tol, lim=(0, np.inf)):
+    """
+    Set the bounds of a gurobi variable (Var or MVar) widened by the relative
+    margin tol within the declared bounds (lim). See
+    Optimization.tighten_bounds().
+    """
+    lb = np.maximum(lb - tol * (np.abs(lb) + 1), lim[0])
+    ub = np.minimum(ub + tol * (np.abs(ub) + 1), lim[1])
+    if isinstance(var, gp.Var):
+        var.LB, var.UB = float(lb), float(ub)
+    else:
+        var.LB = np.broadcast_to(lb, var.shape)
+        var.UB = np.broadcast_to(ub, var.shape)
 
-        """
-        m = self.model
-        # do IIS
-        m.computeIIS()
-        if m.IISMinimal:
-            print("IIS is minimal\n")
-        else:
-            print("IIS is not minimal\n")
-        print("\nThe following constraint(s) cannot be satisfied:")
-        for c in m.getConstrs():
-            if c.IISConstr:
-                print("%s" % c.ConstrName)
 
-        if filename is not None:
-            if filename[-4:] != ".ilp":
-                filename += ".ilp"
-            m.write(filename)
+class _UnnamedModel(gp.Model):
+    """A gurobi model ignoring the names of variables and constraints."""
 
-    def write_ilp(self, filename):
-        """
-        This function outputs the information about the results of the IIS computation to
-        .ilp and can only be executed after do_IIS_gp().
+    def addVar(self, *args, name="", **kwargs):  # noqa: N802
+        return super().addVar(*args, **kwargs)
 
-        Parameters
-        ----------
-        filename : str
-            Output filename.
+    def addMVar(self, *args, name="", **kwargs):  # noqa: N802
+        return super().addMVar(*args, **kwargs)
 
-        Returns
-        -------
-        None.
+    def addConstr(self, *args, name="", **kwargs):  # noqa: N802
+        return super().addConstr(*args, **kwargs)
 
-        """
-        if filename[-4:] != ".ilp":
-            filename += ".ilp"
-        m = self.model
-        m.write(filename)
+    def addConstrs(self, *args, name="", **kwargs):  # noqa: N802
+        return super().addConstrs(*args, **kwargs)
 
-    def write_sol(self, filename):
-        """
-        This function outputs the solution of the model to a .sol file.
+    def addGenConstrPWL(self, *args, name="", **kwargs):  # noqa: N802
+        return super().addGenConstrPWL(*args, **kwargs)
 
-        Parameters
-        ----------
-        filename : str
-            Output filename.
 
-        Returns
-        -------
-        None.
+class _CopyPlan:
+    """The positions of the gurobi objects of a given type in a model."""
 
-        """
-        if filename[-4:] != ".sol":
-            filename += ".sol"
-        m = self.model
-        m.write(filename)
+    def __init__(self, obj_type, idx, shape=None):
+        self.obj_type = obj_type
+        self.idx = idx
+        self.shape = shape  # None for a single object
 
-    def write_lp(self, filename):
-        """
-        This function outputs the model to a .lp file.
 
-        Parameters
-        ----------
-        filename : str
-            Output filename.
+# Matrix types of the gurobi objects and the types of their elements
+_matrix_types = (
+    (gp.MVar, gp.Var),
+    (gp.MConstr, gp.Constr),
+    (gp.MQConstr, gp.QConstr),
+    (gp.MGenConstr, gp.GenConstr),
+)
 
-        Returns
-        -------
-        None.
 
-        """
-        if filename[-3:] != ".lp":
-            filename += ".lp"
-        m = self.model
-        m.write(filename)
+def _get_position(obj, obj_type, positions):
+    """Get the position of a gurobi object among the objects of its type."""
+    if obj_type in positions:
+        return positions[obj_type][obj]
+    return obj.index
 
-    def write_mps(self, filename):
-        """
-        This funtion outputs the model to an .mps file.
 
-        Parameters
-        ----------
-        filename : str
-            Output filename.
+def _to_copy_plan(obj, positions):
+    """Replace the gurobi objects in obj with _CopyPlan. See get_copy_plan()."""
+    for matrix_type, obj_type in _matrix_types:
+        if isinstance(obj, obj_type):
+            return _CopyPlan(obj_type, _get_position(obj, obj_type, positions))
+        if isinstance(obj, matrix_type):
+            flat = np.array(obj.tolist(), dtype=object).ravel()
+            idx = [_get_position(o, obj_type, positions) for o in flat]
+            return _CopyPlan(obj_type, idx, obj.shape)
+    if isinstance(obj, dict):
+        return obj.__class__({k: _to_copy_plan(v, positions) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return obj.__class__(_to_copy_plan(v, positions) for v in obj)
+    return obj
 
-        Returns
-        -------
-        None.
 
-        """
-        if filename[-3:] != ".mps":
-            filename += ".mps"
-        m = self.model
-        m.write(filename)
+def _from_copy_plan(obj, objs, id_map):
+    """
+    Map _CopyPlan in obj to the objects of a copied model (objs) and rename the
+    ids. Other objects are copied. See copy().
+    """
+    if isinstance(obj, _CopyPlan):
+        model_objs = objs[obj.obj_type]
+        if obj.shape is None:
+            return model_objs[obj.idx]
+        items = [model_objs[i] for i in obj.idx]
+        if obj.obj_type is gp.Var:
+            return gp.MVar.fromlist(items).reshape(obj.shape)
+        # Only MVar can be reshaped.
+        matrix_type = {t: mt for mt, t in _matrix_types}[obj.obj_type]
+        nested = np.array(items, dtype=object).reshape(obj.shape).tolist()
+        return matrix_type.fromlist(nested)
+    if isinstance(obj, dict):
+        return obj.__class__(
+            {id_map.get(k, k): _from_copy_plan(v, objs, id_map) for k, v in obj.items()}
+        )
+    if isinstance(obj, list):
+        return [
+            id_map.get(v, v) if isinstance(v, str) else _from_copy_plan(v, objs, id_map)
+            for v in obj
+        ]
+    if isinstance(obj, tuple):
+        return tuple(_from_copy_plan(v, objs, id_map) for v in obj)
+    if isinstance(obj, np.ndarray):
+        return obj.copy()
+    if obj is None or isinstance(obj, (str, int, float)):
+        return obj
+    return deepcopy(obj)
+
+
+class ModelReport:
+    """
+    The summary report of a solved optimization model, which is formatted
+    only when it is converted into a string (e.g., printed).
+
+    Parameters
+    ----------
+    **info :
+        The report items, i.e., name, horizon, n_fields, n_s, n_wells,
+        n_water_rights, msg, decisions, mip_gap, and sas.
+    """
+
+    def __init__(self, **info):
+        self.info = info
+        self._text = None
+
+    def __str__(self):
+        """Return the formatted report, which is formatted once."""
+        if self._text is None:
+            info = self.info
+            msg = dict_to_string(info["msg"], prefix="\t\t", level=2)
+            decisions = dict_to_string(info["decisions"], prefix="\t\t", level=2)
+            sas = dict_to_string(info["sas"], prefix="\t\t", level=2, roun=4)
+            self._text = f"""
+        ########## Model Report ##########\n
+        Name:   {info['name']}\n
+        Planning horizon:   {info['horizon']}
+        No. of Crop fields:    {info['n_fields']}
+        No. of splits          {info['n_s']}
+        No. of Wells:          {info['n_wells']}
+        No. of Water rights:   {info['n_water_rights']}\n
+        Decision settings:\n{msg}\n
+        Solutions (gap {round(info['mip_gap'] * 100, 4)}%):\n{decisions}\n
+        Satisfaction:\n{sas}\n
+        ###################################
+            """
+        return self._text
+
+    def __repr__(self):
+        """Return the formatted report."""
+        return str(self)
 
 
-# Utility code
 def dict_to_string(dictionary, prefix="", indentor="  ", level=2, roun=None):
     """Ture a dictionary into a printable string.
 
@@ -1,11 +1,13 @@
 # The code is developed by Chung-Yi Lin at Virginia Tech, in May 2024.
 # Email: chungyi@vt.edu
 import json
+from itertools import pairwise
 
 import gurobipy as gp
 import numpy as np
 
 from ..utility.util import dict_to_string
+from .enumeration import combine_pieces, get_yield_pieces, maximize_pieces
 
 class Optimization4SingleFieldAndWell:
     """A class to set up an optimization model for a single field and well."""
@@ -295,7 +297,7 @@ class Optimization4SingleFieldAndWell:
         self,
         well_id,
         dwl,
-        B,
+        b,
         l_wt,
         eff_pump,
         pumping_capacity=None,
@@ -311,8 +313,8 @@ class Optimization4SingleFieldAndWell:
             Well id.
         dwl : float
             Drawdown per unit pumping [m].
-        B : float
-            Aquifer storage coefficient.
+        b : float
+            Aquifer storage coefficient (B).
         l_wt : float
             Lift head [m].
         eff_pump : float
@@ -344,9 +346,9 @@ class Optimization4SingleFieldAndWell:
         # Assume a linear projection to the future
         l_wt = l_wt - dwls
         #!!!! From our precalculation for sd6
-        B = B - 0.00015 * dwls
+        b = b - 0.00015 * dwls
         self.l_wt = l_wt
-        self.B = B
+        self.B = b
 
         #!!!! Center-pivot LEPA (fixed)
         tech_a = 0.0058
@@ -354,8 +356,8 @@ class Optimization4SingleFieldAndWell:
         l_pr = 12.65
 
         A = rho * g / eff_pump * 1e-11
-        AaB = A * tech_a * B  # (n_h)
-        A_L_bB = A * (l_wt + l_pr + tech_b * B)  # (n_h)
+        AaB = A * tech_a * b  # (n_h)
+        A_L_bB = A * (l_wt + l_pr + tech_b * b)  # (n_h)
 
         e = self.vars_["e"]
         m.addConstr((e == AaB * v * v + A_L_bB * v), name=f"c.{wid}.e(PJ)")
@@ -456,27 +458,47 @@ class Optimization4SingleFieldAndWell:
 
         """
         m = self.model
-        n_h = self.n_h
         n_c = self.n_c
-        vars_ = self.vars_
+        irr_sub = self.vars_["irr_depth"]
 
-        irr_sub = vars_["irr_depth"]
+        blocks = self._get_wr_blocks(
+            wr_depth, time_window, remaining_tw, remaining_wr, tail_method
+        )
+        for c_i, (start, end, wr) in enumerate(blocks):
+            m.addConstr(
+                gp.quicksum(
+                    irr_sub[j, h] for j in range(n_c) for h in range(start, end)
+                )
+                <= wr,
+                name=f"c.{water_right_id}.wr_{c_i}(cm)",
+            )
+
+        self._record_wr(
+            water_right_id,
+            wr_depth,
+            time_window,
+            remaining_tw,
+            remaining_wr,
+            tail_method,
+        )
+
+    def _get_wr_blocks(
+        self, wr_depth, time_window, remaining_tw, remaining_wr, tail_method
+    ):
+        """
+        Split the planning horizon into the periods constrained by a water
+        right. Return a list of (start year index, end year index, water right
+        depth [cm]).
+        """
+        n_h = self.n_h
+        blocks = []
 
         # Initial period
         # The structure is to fit within a larger simulation framework, which
         # we allow the remaining water rights that are not used in the previous
         # year.
-        c_i = 0
-
         if remaining_tw is not None and remaining_wr is not None:
-            m.addConstr(
-                gp.quicksum(
-                    irr_sub[j, h] for j in range(n_c) for h in range(remaining_tw)
-                )
-                <= remaining_wr,
-                name=f"c.{water_right_id}.wr_{c_i}(cm)",
-            )
-            c_i += 1
+            blocks.append((0, remaining_tw, remaining_wr))
             start_index = remaining_tw
             remaining_length = n_h - remaining_tw
         else:
@@ -485,16 +507,7 @@ class Optimization4SingleFieldAndWell:
 
         # Middle period
         while remaining_length >= time_window:
-            m.addConstr(
-                gp.quicksum(
-                    irr_sub[j, h]
-                    for j in range(n_c)
-                    for h in range(start_index, start_index + time_window)
-                )
-                <= wr_depth,
-                name=f"c.{water_right_id}.wr_{c_i}(cm)",
-            )
-            c_i += 1
+            blocks.append((start_index, start_index + time_window, wr_depth))
             start_index += time_window
             remaining_length -= time_window
 
@@ -507,15 +520,19 @@ class Optimization4SingleFieldAndWell:
             # Otherwise, we expect a value given by users.
             else:
                 wr_tail = tail_method
+            blocks.append((start_index, n_h, wr_tail))
+        return blocks
 
-            m.addConstr(
-                gp.quicksum(
-                    irr_sub[j, h] for j in range(n_c) for h in range(start_index, n_h)
-                )
-                <= wr_tail,
-                name=f"c.{water_right_id}.wr_{c_i}(cm)",
-            )
-
+    def _record_wr(
+        self,
+        water_right_id,
+        wr_depth,
+        time_window,
+        remaining_tw,
+        remaining_wr,
+        tail_method,
+    ):
+        """Record the water right setting for the next run."""
         self.water_right_ids.append(water_right_id)
         self.n_water_rights += 1
 
@@ -626,7 +643,10 @@ class Optimization4SingleFieldAndWell:
         m.addConstr((profit == (rev - cost_e - annual_cost) / n_f), name="c.profit")
 
         m.update()
+        self._make_summary(display_summary)
 
+    def _make_summary(self, display_summary=True):
+        """Create (and display) the model summary."""
         h_msg = str(self.n_h)
 
         msg = dict_to_string(self.msg, prefix="\t\t", level=2)
@@ -675,88 +695,7 @@ class Optimization4SingleFieldAndWell:
         if m.Status == 2 or m.Status == 9:
             self.optimal_obj_value = m.objVal
             self.sols = extract_sol(self.vars_)
-            sols = self.sols
-            sols["obj"] = m.objVal
-            sols["field_ids"] = self.field_ids
-            sols["well_ids"] = self.well_ids
-            sols["gp_status"] = m.Status
-            sols["gp_MIPGap"] = m.MIPGap
-
-            # Calculate satisfaction
-            if self.obj_post_calculation:
-                alphas = self.alphas
-                scales = self.scales
-                metric = self.target
-
-                # Currently supported metrices
-                eval_metric_vars = {
-                    "profit": sols["profit"] / scales["profit"],
-                    # "yield_rate": sols['y_y']/scales['yield_rate']
-                }
-
-                alpha = alphas[metric]
-                metric_var = eval_metric_vars.get(metric)
-                # force the minimum value to be zero since there is an exponential 
-                # function
-                metric_var[metric_var < 0] = 0
-                N_yr = 1 - np.exp(-alpha * metric_var)
-                Sa = np.mean(N_yr)
-                sols["Sa"][metric] = Sa
-
-            # Update rainfed info
-            for fid in self.field_ids:
-                sols_fid = sols[fid]
-                irr_depth = sum(sols["irr_depth"][:, 0])
-                i_rainfed = sols_fid["i_rainfed"]
-                if irr_depth <= 0:
-                    i_rainfed[:, :] = 1  # avoid using irr_depth == 0
-                sols_fid["i_rainfed"] = i_rainfed * sols_fid["i_crop"]
-
-            # Update remaining water rights
-            wrs_info = self.wrs_info
-            for _k, v in wrs_info.items():
-                if v["remaining_wr"] is not None:
-                    irr_sub = sols["irr_depth"]  # (n_c, n_h)
-                    v["remaining_wr"] -= np.sum(irr_sub[:, 0])
-            sols["water_rights"] = wrs_info
-
-            # Display report
-            crop_options = self.crop_options
-            fids = self.field_ids
-            irrs = sols["irr_depth"].mean().round(2)
-            decisions = {"Irrigation depths": irrs}
-            for fid in fids:
-                sols_fid = sols[fid]
-                i_crop = sols_fid["i_crop"][:, 0]
-                # Avoid using == 0 or 1 => it can have numerical issues
-                crop_type = crop_options[np.argmax(i_crop)]
-                Irrigated = sols_fid["i_rainfed"][:, 0].sum().round(0) <= 0
-                decisions[fid] = {
-                    "Crop types": crop_type,
-                    "Irr tech": "center pivot LEPA",
-                    "Irrigated": Irrigated,
-                }
-            self.decisions = decisions
-            decisions = dict_to_string(decisions, prefix="\t\t", level=2)
-            msg = dict_to_string(self.msg, prefix="\t\t", level=2)
-            sas = dict_to_string(sols["Sa"], prefix="\t\t", level=2)#, roun=4)
-            h_msg = str(self.n_h)
-            gp_report = f"""
-        ########## Model Report ##########\n
-        Name:   {self.unique_id}\n
-        Planning horizon:   {h_msg}
-        No. of Crop fields:    {self.n_fields}
-        No. of Wells:          {self.n_wells}
-        No. of Water rights:   {self.n_water_rights}\n
-        Decision settings:\n{msg}\n
-        Solutions (gap {round(m.MIPGap * 100, 4)}%):\n{decisions}\n
-        Satisfaction:\n{sas}\n
-        ###################################
-            """
-            self.gp_report = gp_report
-            if display_report:
-                print(gp_report)
-            sols["gp_report"] = gp_report
+            self._finish_sols(m.objVal, m.Status, m.MIPGap, display_report)
         else:
             print("Optimal solution is not found.")
             self.optimal_obj_value = None
@@ -771,6 +710,95 @@ class Optimization4SingleFieldAndWell:
             # release the memory of the previous model
             m.dispose()
 
+    def _finish_sols(self, obj, status, mip_gap, display_report=True):
+        """Add the post calculations and the report to the solutions."""
+        sols = self.sols
+        sols["obj"] = obj
+        sols["field_ids"] = self.field_ids
+        sols["well_ids"] = self.well_ids
+        sols["gp_status"] = status
+        sols["gp_MIPGap"] = mip_gap
+
+        # Calculate satisfaction
+        if self.obj_post_calculation:
+            alphas = self.alphas
+            scales = self.scales
+            metric = self.target
+
+            # Currently supported metrices
+            eval_metric_vars = {
+                "profit": sols["profit"] / scales["profit"],
+                # "yield_rate": sols['y_y']/scales['yield_rate']
+            }
+
+            alpha = alphas[metric]
+            metric_var = eval_metric_vars.get(metric)
+            # force the minimum value to be zero since there is an exponential 
+            # function
+            metric_var[metric_var < 0] = 0
+            N_yr = 1 - np.exp(-alpha * metric_var)
+            Sa = np.mean(N_yr)
+            sols["Sa"][metric] = Sa
+
+        # Update rainfed info
+        self._update_rainfed(sols)
+
+        # Update remaining water rights
+        wrs_info = self.wrs_info
+        for _k, v in wrs_info.items():
+            if v["remaining_wr"] is not None:
+                irr_sub = sols["irr_depth"]  # (n_c, n_h)
+                v["remaining_wr"] -= np.sum(irr_sub[:, 0])
+        sols["water_rights"] = wrs_info
+
+        # Display report
+        crop_options = self.crop_options
+        fids = self.field_ids
+        irrs = sols["irr_depth"].mean().round(2)
+        decisions = {"Irrigation depths": irrs}
+        for fid in fids:
+            sols_fid = sols[fid]
+            i_crop = sols_fid["i_crop"][:, 0]
+            # Avoid using == 0 or 1 => it can have numerical issues
+            crop_type = crop_options[np.argmax(i_crop)]
+            Irrigated = sols_fid["i_rainfed"][:, 0].sum().round(0) <= 0
+            decisions[fid] = {
+                "Crop types": crop_type,
+                "Irr tech": "center pivot LEPA",
+                "Irrigated": Irrigated,
+            }
+        self.decisions = decisions
+        decisions = dict_to_string(decisions, prefix="\t\t", level=2)
+        msg = dict_to_string(self.msg, prefix="\t\t", level=2)
+        sas = dict_to_string(sols["Sa"], prefix="\t\t", level=2)#, roun=4)
+        h_msg = str(self.n_h)
+        gp_report = f"""
+    ########## Model Report ##########\n
+    Name:   {self.unique_id}\n
+    Planning horizon:   {h_msg}
+    No. of Crop fields:    {self.n_fields}
+    No. of Wells:          {self.n_wells}
+    No. of Water rights:   {self.n_water_rights}\n
+    Decision settings:\n{msg}\n
+    Solutions (gap {round(mip_gap * 100, 4)}%):\n{decisions}\n
+    Satisfaction:\n{sas}\n
+    ###################################
+        """
+        self.gp_report = gp_report
+        if display_report:
+            print(gp_report)
+        sols["gp_report"] = gp_report
+
+    def _update_rainfed(self, sols):
+        """Mark the field as rainfed if it is not irrigated in the first year."""
+        for fid in self.field_ids:
+            sols_fid = sols[fid]
+            irr_depth = sum(sols["irr_depth"][:, 0])
+            i_rainfed = sols_fid["i_rainfed"]
+            if irr_depth <= 0:
+                i_rainfed[:, :] = 1  # avoid using irr_depth == 0
+            sols_fid["i_rainfed"] = i_rainfed * sols_fid["i_crop"]
+
     def do_IIS_gp(self, filename=None):
         """
         Compute an Irreducible Inconsistent Subsystem (IIS). This function can
@@ -844,4 +872,518 @@ class Optimization4SingleFieldAndWell:
 
         # Write the model to the file
         m = self.model
-        m.write(filename)
\ No newline at end of file
+        m.write(filename)
+
+class Optimization4SingleFieldAndWellEnum(Optimization4SingleFieldAndWell):
+    """
+    A drop-in replacement of Optimization4SingleFieldAndWell that solves the
+    model by enumeration without calling Gurobi.
+
+    Crop choice is the only discrete decision in the single field and well
+    model. Given a crop, the yield rate of a year is a piecewise function of
+    the irrigation depth, where the pieces are separated by the saturation
+    point (w = wmax), the minimum yield ratio cutoff, and the upper bound of
+    the yield rate. For each combination of pieces over the planning horizon,
+    the objective is a separable concave quadratic function of the yearly
+    irrigation depths, which is maximized in closed form. Multi-year water
+    rights are handled by bisection on their Lagrange multipliers. All crops
+    and piece combinations are evaluated with vectorized NumPy operations, and
+    the best one is returned in the same sols format as the parent class.
+
+    The enumeration is exact. Settings that it does not cover (more than one
+    field or well, water-yield curves with a > 0, a given i_rainfed,
+    overlapping multi-year water rights, or a target other than "profit")
+    automatically fall back to the Gurobi model of the parent class.
+    """
+
+    def setup_ini_model(self, unique_id, gpenv, horizon=1, crop_options=None):
+        """See Optimization4SingleFieldAndWell.setup_ini_model()."""
+        if crop_options is None:
+            crop_options = ["corn", "others"]
+        self.unique_id = unique_id
+        self.horizon = horizon
+        self.crop_options = crop_options
+        self.n_c = len(crop_options)
+        self.n_h = horizon
+
+        self.field_ids = []
+        self.well_ids = []
+        self.water_right_ids = []
+        self.n_fields = 0
+        self.n_wells = 0
+        self.n_water_rights = 0
+        self.msg = {}
+        self.wrs_info = {}
+        self.model = None  # Only created when falling back to Gurobi.
+
+        # Record the inputs, which are replayed on the parent class if the
+        # model cannot be solved by enumeration.
+        self._calls = [
+            (
+                "setup_ini_model",
+                {
+                    "unique_id": unique_id,
+                    "gpenv": gpenv,
+                    "horizon": horizon,
+                    "crop_options": crop_options,
+                },
+            )
+        ]
+        self._fields = []
+        self._wells = []
+        self._wr_blocks = []
+        self._finance = None
+        self.target = None
+        self.enum = None  # Determined in finish_setup()
+
+    def setup_constr_field(
+        self,
+        field_id,
+        field_area,
+        prec_aw,
+        water_yield_curves,
+        field_type="optimize",
+        i_crop=None,
+        i_rainfed=None,
+        **kwargs,
+    ):
+        """See Optimization4SingleFieldAndWell.setup_constr_field()."""
+        self._calls.append(
+            (
+                "setup_constr_field",
+                {
+                    "field_id": field_id,
+                    "field_area": field_area,
+                    "prec_aw": prec_aw,
+                    "water_yield_curves": water_yield_curves,
+                    "field_type": field_type,
+                    "i_crop": i_crop,
+                    "i_rainfed": i_rainfed,
+                    **kwargs,
+                },
+            )
+        )
+        if i_rainfed is not None:
+            if np.sum(i_rainfed) > 0.5:
+                field_type = "rainfed"
+            else:
+                field_type = "irrigated"
+        if field_type not in ("rainfed", "irrigated", "optimize"):
+            raise ValueError(f"{field_type} is not a valid value for field_type.")
+
+        self.field_ids.append(field_id)
+        self.msg[field_id] = {
+            "Crop types": "optimize" if i_crop is None else "user input",
+            "Irr tech": "optimize",
+            "Field type": field_type,
+        }
+        if field_type == "rainfed" and i_rainfed is not None:
+            self.msg[field_id]["Rainfed field"] = "user input"
+        self._fields.append(
+            {
+                "field_id": field_id,
+                "field_area": field_area,
+                "prec_aw": prec_aw,
+                "water_yield_curves": water_yield_curves,
+                "field_type": field_type,
+                "i_crop": i_crop,
+                "i_rainfed": i_rainfed,
+            }
+        )
+        self.n_fields += 1
+
+    def setup_constr_well(
+        self,
+        well_id,
+        dwl,
+        b,
+        l_wt,
+        eff_pump,
+        pumping_capacity=None,
+        rho=1000.0,
+        g=9.8016,
+    ):
+        """See Optimization4SingleFieldAndWell.setup_constr_well()."""
+        self._calls.append(
+            (
+                "setup_constr_well",
+                {
+                    "well_id": well_id,
+                    "dwl": dwl,
+                    "b": b,
+                    "l_wt": l_wt,
+                    "eff_pump": eff_pump,
+                    "pumping_capacity": pumping_capacity,
+                    "rho": rho,
+                    "g": g,
+                },
+            )
+        )
+        self.well_ids.append(well_id)
+
+        # Same projection and energy coefficients as the parent class
+        dwls = np.array([dwl * (i) for i in range(self.n_h)])
+        l_wt = l_wt - dwls
+        b = b - 0.00015 * dwls
+        self.l_wt = l_wt
+        self.B = b
+        tech_a = 0.0058
+        tech_b = 0.212206
+        l_pr = 12.65
+        A = rho * g / eff_pump * 1e-11
+        self._wells.append(
+            {
+                "pumping_capacity": pumping_capacity,
+                "AaB": A * tech_a * b,  # (n_h)
+                "A_L_bB": A * (l_wt + l_pr + tech_b * b),  # (n_h)
+            }
+        )
+        self.n_wells += 1
+
+    def setup_constr_finance(self, finance_dict):
+        """See Optimization4SingleFieldAndWell.setup_constr_finance()."""
+        self._calls.append(("setup_constr_finance", {"finance_dict": finance_dict}))
+        self._finance = {
+            "energy_price": finance_dict["energy_price"],  # [1e4$/PJ]
+            "crop_profit": np.array(
+                [
+                    finance_dict["crop_price"][c] - finance_dict["crop_cost"][c]
+                    for c in self.crop_options
+                ]
+            ),
+            "cost_tech": 1.876,  # center pivot LEPA
+        }
+
+    def setup_constr_wr(
+        self,
+        water_right_id,
+        wr_depth,
+        time_window=1,
+        remaining_tw=None,
+        remaining_wr=None,
+        tail_method="proportion",
+    ):
+        """See Optimization4SingleFieldAndWell.setup_constr_wr()."""
+        self._calls.append(
+            (
+                "setup_constr_wr",
+                {
+                    "water_right_id": water_right_id,
+                    "wr_depth": wr_depth,
+                    "time_window": time_window,
+                    "remaining_tw": remaining_tw,
+                    "remaining_wr": remaining_wr,
+                    "tail_method": tail_method,
+                },
+            )
+        )
+        self._wr_blocks += self._get_wr_blocks(
+            wr_depth, time_window, remaining_tw, remaining_wr, tail_method
+        )
+        self._record_wr(
+            water_right_id,
+            wr_depth,
+            time_window,
+            remaining_tw,
+            remaining_wr,
+            tail_method,
+        )
+
+    def setup_obj(self, target="profit", consumat_dict=None):
+        """See Optimization4SingleFieldAndWell.setup_obj()."""
+        self._calls.append(
+            ("setup_obj", {"target": target, "consumat_dict": consumat_dict})
+        )
+        if consumat_dict is None:
+            consumat_dict = {"alpha": {"profit": 1}, "scale": {"profit": 0.23 * 50}}
+        self.target = target
+        self.alphas = consumat_dict["alpha"]
+        self.scales = consumat_dict["scale"]
+        self.obj_post_calculation = True
+
+    def finish_setup(self, display_summary=True):
+        """
+        Complete the setup. The model is prepared for enumeration if possible.
+        Otherwise, the recorded inputs are used to build the Gurobi model of
+        the parent class.
+
+        Parameters
+        ----------
+        display_summary : bool, optional
+            Display the model summary. The default is True.
+
+        Returns
+        -------
+        None
+
+        """
+        self.enum = self._setup_enum()
+        if self.enum:
+            self._make_summary(display_summary)
+            return
+
+        # Fall back to the Gurobi model
+        parent = Optimization4SingleFieldAndWell
+        for name, kwargs in self._calls:
+            getattr(parent, name)(self, **kwargs)
+        parent.finish_setup(self, display_summary=display_summary)
+
+    def _setup_enum(self):
+        """
+        Build the yield pieces of all candidate crops. Return False if the
+        model is not supported by the enumeration.
+        """
+        if self.n_fields != 1 or self.n_wells != 1:
+            return False
+        if self._finance is None or self.target != "profit":
+            return False
+        field = self._fields[0]
+        well = self._wells[0]
+        if field["i_rainfed"] is not None:
+            return False
+        curve = self._get_enum_curve(field)
+        if curve is None:
+            return False
+
+        # Energy [PJ] = e_a * d^2 + e_b * d for irrigation depth d [cm]
+        cm2m = 0.01
+        s = field["field_area"] * cm2m
+        e_a = well["AaB"] * s**2
+        e_b = well["A_L_bB"] * s
+        if np.any(e_a < 0) or np.any(e_b < 0):
+            return False
+        caps = self._get_enum_caps(field, well, s)
+        if caps is None:
+            return False
+        cap, blocks = caps
+        candidates = self._get_enum_candidates(field, curve, cap, blocks, e_a, e_b)
+        if candidates is None:
+            return False
+
+        self._enum_data = {
+            "candidates": candidates,
+            "blocks": blocks,
+            "field": field,
+            "s": s,
+            "e_a": e_a,
+            "e_b": e_b,
+            "ymax": curve["ymax"],
+        }
+        return True
+
+    def _get_enum_curve(self, field):
+        """
+        Get the water-yield curve coefficients and the precipitation of all
+        crops. Return None if they are not supported by the enumeration.
+        """
+        n_c = self.n_c
+        crop_par = np.array([field["water_yield_curves"][c] for c in self.crop_options])
+        ymax, wmax, a, b, c = (crop_par[:, i] for i in range(5))
+        if crop_par.shape[1] > 5:
+            min_y_ratio = crop_par[:, 5]
+        else:
+            min_y_ratio = np.zeros(n_c)
+        if np.any(a > 0):
+            return None  # Convex yield curves
+        prec = np.ones((n_c, self.n_h))
+        for ci, crop in enumerate(self.crop_options):
+            prec[ci, :] = field["prec_aw"][crop]
+        ub_w = np.max(wmax)
+        if np.any(prec > ub_w):
+            return None  # Let Gurobi report the infeasibility.
+        return {
+            "ymax": ymax,
+            "wmax": wmax,
+            "a": a,
+            "b": b,
+            "c": c,
+            "min_y_ratio": min_y_ratio,
+            "prec": prec,
+            "ub_w": ub_w,
+        }
+
+    def _get_enum_caps(self, field, well, s):
+        """
+        Get the upper bounds of the yearly irrigation depths and the
+        multi-year water right blocks as (cap, blocks), where s converts the
+        irrigation depth [cm] into the volume [m-ha]. Return None if the
+        blocks overlap.
+        """
+        cap = np.full(self.n_h, np.inf)
+        if well["pumping_capacity"] is not None:
+            cap[:] = well["pumping_capacity"] / s
+        if field["field_type"] == "rainfed":
+            cap[:] = 0
+        blocks = []
+        for start, end, wr in self._wr_blocks:
+            end = min(end, self.n_h)
+            if end - start == 1:
+                cap[start] = min(cap[start], wr)
+            elif end - start > 1:
+                blocks.append((start, end, wr))
+        blocks.sort()
+        for (_, end, _), (start, _, _) in pairwise(blocks):
+            if start < end:
+                return None  # Overlapping multi-year water rights
+        return cap, blocks
+
+    def _get_enum_candidates(self, field, curve, cap, blocks, e_a, e_b):
+        """
+        Get the yield pieces and the objective coefficients of each feasible
+        candidate crop. Return None if the given crop choice or the objective
+        is not supported by the enumeration.
+        """
+        tol = 1e-6
+        a, b, c = curve["a"], curve["b"], curve["c"]
+        wmax, prec = curve["wmax"], curve["prec"]
+        energy_price = self._finance["energy_price"]
+        # Revenue [1e4$] per unit yield rate
+        k_rev = (
+            self._finance["crop_profit"] * curve["ymax"] * field["field_area"] * 1e-4
+        )
+
+        # Crops that are not planted still need a feasible yield rate (<= 1).
+        x0 = np.minimum(prec / wmax.reshape((-1, 1)), 1)
+        yw0 = a.reshape((-1, 1)) * x0**2 + b.reshape((-1, 1)) * x0 + c.reshape((-1, 1))
+        infeasible = np.any(yw0 > 1 + tol, axis=1)
+
+        if field["i_crop"] is not None:
+            i_crop = np.asarray(field["i_crop"]).reshape(-1)
+            crops = np.where(i_crop > 0.5)[0]
+            if len(crops) != 1:
+                return None
+        else:
+            crops = np.arange(self.n_c)
+
+        candidates = []
+        for j in crops:
+            if np.any(np.delete(infeasible, j)):
+                continue
+            pieces = []
+            for h in range(self.n_h):
+                pieces_h = get_yield_pieces(
+                    a[j],
+                    b[j],
+                    c[j],
+                    wmax[j],
+                    curve["min_y_ratio"][j],
+                    prec[j, h],
+                    min(curve["ub_w"] - prec[j, h], cap[h]),
+                    tol,
+                )
+                if not pieces_h:
+                    break
+                pieces.append(pieces_h)
+            else:
+                lo, hi, y2, y1, y0 = combine_pieces(pieces)
+                q2 = k_rev[j] * y2 - energy_price * e_a
+                if np.any(q2 > 0):
+                    return None  # Non-concave (e.g., negative crop profit)
+                # The field is rainfed only if it cannot be irrigated in the
+                # first year, not when zero irrigation is merely optimal.
+                rainfed = np.all(hi[:, 0] <= 0) or any(
+                    start == 0 and wr <= 0 for start, _, wr in blocks
+                )
+                candidates.append(
+                    {
+                        "crop": j,
+                        "rainfed": bool(rainfed),
+                        "lo": lo,
+                        "hi": hi,
+                        "yield": (y2, y1, y0),
+                        "q": (
+                            np.minimum(q2, -1e-12),
+                            k_rev[j] * y1 - energy_price * e_b,
+                            k_rev[j] * y0,
+                        ),
+                    }
+                )
+        return candidates
+
+    def _update_rainfed(self, sols):
+        """
+        See Optimization4SingleFieldAndWell._update_rainfed(). The enumeration
+        decides the rainfed field from the candidate crop instead, as its
+        irrigation depth is exactly zero whenever zero irrigation is optimal.
+        """
+        if not self.enum:
+            super()._update_rainfed(sols)
+            return
+        for fid in self.field_ids:
+            sols[fid]["i_rainfed"] = sols[fid]["i_rainfed"] * sols[fid]["i_crop"]
+
+    def solve(
+        self, keep_gp_model=False, keep_gp_output=False, display_report=True, **kwargs
+    ):
+        """
+        Solve the model by enumeration. If the model falls back to Gurobi,
+        Optimization4SingleFieldAndWell.solve() is used with the same
+        arguments. Otherwise, keep_gp_model and keep_gp_output are ignored.
+        """
+        if not self.enum:
+            super().solve(
+                keep_gp_model=keep_gp_model,
+                keep_gp_output=keep_gp_output,
+                display_report=display_report,
+                **kwargs,
+            )
+            return
+
+        data = self._enum_data
+        best = None
+        for cand in data["candidates"]:
+            d, values = maximize_pieces(
+                cand["q"], cand["lo"], cand["hi"], data["blocks"]
+            )
+            i = np.argmax(values)
+            if values[i] > -np.inf and (best is None or values[i] > best[0]):
+                best = (values[i], cand, i, d[i])
+
+        if best is None:
+            print("Optimal solution is not found.")
+            self.optimal_obj_value = None
+            self.sols = {"gp_report": "Optimal solution is not found."}
+            return
+
+        _, cand, i, d = best
+        n_c = self.n_c
+        n_h = self.n_h
+        j = cand["crop"]
+        field = data["field"]
+        finance = self._finance
+        y2, y1, y0 = (y[i] for y in cand["yield"])
+        yw = y2 * d**2 + y1 * d + y0  # (n_h)
+
+        irr_depth = np.zeros((n_c, n_h))
+        irr_depth[j, :] = d
+        y = np.zeros((n_c, n_h))
+        y[j, :] = yw * data["ymax"][j] * field["field_area"] * 1e-4
+        e = data["e_a"] * d**2 + data["e_b"] * d  # [PJ]
+        cost_e = e * finance["energy_price"]
+        rev = y[j, :] * finance["crop_profit"][j]
+        other_cost = np.full(n_h, finance["cost_tech"])
+        profit = (rev - cost_e - other_cost) / self.n_fields
+        obj = np.mean(profit)
+
+        i_crop = np.zeros((n_c, 1))
+        i_crop[j, 0] = 1
+        fid = field["field_id"]
+        self.sols = {
+            "irr_depth": irr_depth,
+            "v": d * data["s"],
+            "y": y,
+            "e": e,
+            "y_y": yw,
+            "profit": profit,
+            fid: {
+                "i_crop": i_crop,
+                "i_rainfed": np.full((n_c, 1), float(cand["rainfed"])),
+                "field_type": field["field_type"],
+            },
+            "rev": rev,
+            "cost_e": cost_e,
+            "other_cost": other_cost,
+            "Sa": {self.target: obj},
+        }
+        self.optimal_obj_value = obj
+        self._finish_sols(obj, 2, 0.0, display_report)
@@ -262,7 +262,7 @@ class Optimization_1f1w_ci:
         self,
         well_id,
         dwl,
-        B,
+        b,
         l_wt,
         eff_pump,
         pumping_capacity=None,
@@ -284,9 +284,9 @@ class Optimization_1f1w_ci:
         # Assume a linear projection to the future
         l_wt = l_wt - dwls
         #!!!! From our precalculation for sd6
-        B = B - 0.00015 * dwls
+        b = b - 0.00015 * dwls
         self.l_wt = l_wt
-        self.B = B
+        self.B = b
 
         #!!!! Center pivot LEPA (fixed)
         tech_a = 0.0058
@@ -294,8 +294,8 @@ class Optimization_1f1w_ci:
         l_pr = 12.65
 
         A = rho * g / eff_pump * 1e-11
-        AaB = A * tech_a * B  # (n_h)
-        A_L_bB = A * (l_wt + l_pr + tech_b * B)  # (n_h)
+        AaB = A * tech_a * b  # (n_h)
+        A_L_bB = A * (l_wt + l_pr + tech_b * b)  # (n_h)
 
         e = self.vars_["e"]
         m.addConstr((e == AaB * v * v + A_L_bB * v), name=f"c.{wid}.e(PJ)")
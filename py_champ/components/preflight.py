@@ -0,0 +1,131 @@
+from copy import deepcopy
+
+import numpy as np
+
+
+def preflight_dm_args(fields_args, wells_args, wrs_args, water_yield_curves):
+    """
+    Check the inputs of an optimization model (see Behavior._get_dm_args())
+    for the conflicts that make the model infeasible before it is built, and
+    relax them to a fallback decision problem that can be solved. This skips
+    the futile build, solve, and IIS of an infeasible model.
+
+    The conflicts and their fallbacks are:
+
+    - A negative water right (wr_depth, remaining_wr, or a tail_method
+      value), e.g., the remaining water right of a time window overdrawn by
+      the tolerance of the previous solve. Since the irrigation depth cannot
+      be negative, it is set to zero, i.e., no irrigation under the water
+      right. The irrigated fields are then supplied by precipitation only.
+    - A negative pumping capacity of a well. It is set to zero, i.e., no
+      pumping from the well.
+    - An available precipitation above the largest water requirement (wmax)
+      of a field's crops, which cannot be met by w <= max(wmax) even without
+      irrigation. It is capped at max(wmax), which does not change the yields
+      since the water use ratio w/wmax is capped at 1.
+
+    Note that a zero water right or pumping capacity is feasible for an
+    irrigated field (i.e., a field with a zero irrigation depth that is not
+    labeled rainfed), so it is not relaxed.
+
+    Parameters
+    ----------
+    fields_args : dict
+        The inputs of each field with "prec_aw" (a dictionary or a list of
+        dictionaries for the precipitation scenarios).
+    wells_args : dict
+        The inputs of each well with "pumping_capacity".
+    wrs_args : dict
+        The inputs of each water right with "wr_depth", "remaining_wr", and
+        "tail_method".
+    water_yield_curves : dict
+        The water yield curves of each field.
+
+    Returns
+    -------
+    tuple
+        (fields_args, wells_args, wrs_args, issues), where the inputs are
+        relaxed copies if any conflict is found (or the given ones
+        otherwise), and issues is a list of the messages of the conflicts.
+
+    """
+    issues = []
+    prec_caps = _check_prec_aw(fields_args, water_yield_curves, issues)
+    capacities = _check_pumping_capacities(wells_args, issues)
+    depths = _check_water_rights(wrs_args, issues)
+    if not issues:
+        return fields_args, wells_args, wrs_args, issues
+
+    fields_args = dict(fields_args)
+    for fi, ub_w in prec_caps.items():
+        prec_aw = fields_args[fi]["prec_aw"]
+        if isinstance(prec_aw, dict):
+            prec_aw = _cap_prec_aw(prec_aw, ub_w)
+        else:
+            prec_aw = [_cap_prec_aw(prec, ub_w) for prec in prec_aw]
+        fields_args[fi] = {**fields_args[fi], "prec_aw": prec_aw}
+    wells_args = dict(wells_args)
+    for wi, cap in capacities.items():
+        wells_args[wi] = {**wells_args[wi], "pumping_capacity": cap}
+    wrs_args = deepcopy(wrs_args)
+    for (wr_id, k), v in depths.items():
+        wrs_args[wr_id][k] = v
+    return fields_args, wells_args, wrs_args, issues
+
+
+def _check_prec_aw(fields_args, water_yield_curves, issues):
+    """
+    Find the fields with an available precipitation above the largest water
+    requirement of their crops. Return the caps of the fields, and append
+    the messages to issues.
+    """
+    prec_caps = {}
+    for fi, args in fields_args.items():
+        curves = water_yield_curves[fi]
+        ub_w = max(curves[c][1] for c in curves)
+        prec_aw = args["prec_aw"]
+        scenarios = [prec_aw] if isinstance(prec_aw, dict) else prec_aw
+        if any(
+            np.any(np.asarray(p) > ub_w) for prec in scenarios for p in prec.values()
+        ):
+            prec_caps[fi] = ub_w
+            issues.append(
+                f"The available precipitation of {fi} exceeds the largest water"
+                f" requirement of its crops ({ub_w} cm) and is capped."
+            )
+    return prec_caps
+
+
+def _check_pumping_capacities(wells_args, issues):
+    """
+    Find the wells with a negative pumping capacity. Return their relaxed
+    capacities, and append the messages to issues.
+    """
+    capacities = {}
+    for wi, args in wells_args.items():
+        cap = args["pumping_capacity"]
+        if cap is not None and cap < 0:
+            capacities[wi] = 0.0
+            issues.append(f"The pumping capacity of {wi} ({cap}) is set to 0.")
+    return capacities
+
+
+def _check_water_rights(wrs_args, issues):
+    """
+    Find the negative values of the water rights. Return their relaxed
+    values keyed by (water right id, key), and append the messages to issues.
+    """
+    depths = {}
+    for wr_id, args in wrs_args.items():
+        for k in ("wr_depth", "remaining_wr", "tail_method"):
+            v = args[k]
+            if isinstance(v, str) or v is None or v >= 0:
+                continue
+            depths[(wr_id, k)] = 0.0
+            issues.append(f"The {k} of the water right {wr_id} ({v}) is set to 0.")
+    return depths
+
+
+def _cap_prec_aw(prec_aw, ub_w):
+    """Cap the available precipitation of each crop [cm]."""
+    return {c: np.minimum(p, ub_w) for c, p in prec_aw.items()}
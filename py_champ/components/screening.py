@@ -0,0 +1,349 @@
+from itertools import pairwise
+
+import numpy as np
+
+from .enumeration import get_yield_pieces
+
+# Solution entries with a crop dimension (axis 1) and a tech dimension
+# (axis 0). See Optimization.setup_constr_field() and setup_ini_model().
+CROP_KEYS = ("irr_depth", "i_crop", "i_rainfed", "y", "pre_i_crop", "i_crop_change")
+SHARED_CROP_KEYS = ("irr_depth", "y", "irr_depth_per_field")
+TECH_KEYS = ("i_te", "pre_i_te", "i_tech_change", "v_te", "v_te_sq")
+
+
+def screen_crop_options(crop_options, fields, finance_dict, tol=1e-9):
+    """
+    Find the crop types that are not dominated given the perceived
+    precipitation and the prices of the year. A crop c is dominated by a crop
+    d if, for every field, year, and precipitation scenario, d yields at least
+    the same revenue per unit area as c at any irrigation depth that is
+    feasible for c, and switching to d does not cost more. Then, replacing c
+    by d with the same irrigation depths never decreases the profit or uses
+    more water.
+
+    The previous crops of the fields and the crop with the largest water
+    requirement (which sets the upper bound of the irrigation depth in the
+    model) are always kept.
+
+    Parameters
+    ----------
+    crop_options : list
+        The crop type options.
+    fields : list
+        A list of dictionaries with "water_yield_curves", "prec_aw" (a
+        dictionary or a list of dictionaries for the precipitation
+        scenarios), and "pre_i_crop" (crop name or the previous i_crop) of
+        each field. See Optimization.setup_constr_field().
+    finance_dict : dict
+        The finance settings with "crop_price", "crop_cost", and
+        "crop_change_cost".
+    tol : float, optional
+        The tolerance of the revenue comparison. The default is 1e-9.
+
+    Returns
+    -------
+    list
+        The indices of the kept crop types in crop_options.
+
+    """
+    n_c = len(crop_options)
+    profit = np.array(
+        [
+            finance_dict["crop_price"][c] - finance_dict["crop_cost"][c]
+            for c in crop_options
+        ]
+    )
+    change_cost = _get_change_cost_matrix(
+        crop_options, finance_dict.get("crop_change_cost", {})
+    )
+
+    protected = set()
+    fields_ = []
+    for field in fields:
+        pre, pieces, wettest = _get_crop_pieces(field, crop_options, profit)
+        protected.add(wettest)
+        protected.update(pre)
+        fields_.append((pre, pieces))
+
+    def dominates(d, c):
+        for pre, pieces in fields_:
+            if np.any(change_cost[pre, d] > change_cost[pre, c] + tol):
+                return False
+            for pieces_d, pieces_c in zip(pieces[d], pieces[c], strict=True):
+                if not _dominates_pieces(pieces_d, pieces_c, tol):
+                    return False
+        return True
+
+    return _screen(n_c, protected, dominates)
+
+
+def screen_tech_options(tech_options, fields, finance_dict, tol=1e-9):
+    """
+    Find the irrigation technologies that are not dominated. A tech t is
+    dominated by a tech t' if t' has no larger pumping rate coefficients and
+    pressure head for every field, no larger operational cost, and no larger
+    change cost from the previous tech of every field. Then, t' never needs
+    more energy or money to irrigate the same amount of water.
+
+    The previous techs of the fields are always kept.
+
+    Parameters
+    ----------
+    tech_options : list
+        The irrigation technology options.
+    fields : list
+        A list of dictionaries with "tech_pumping_rate_coefs" and "pre_i_te"
+        (tech name or the previous i_te) of each field. See
+        Optimization.setup_constr_field().
+    finance_dict : dict
+        The finance settings with "irr_tech_operational_cost" and
+        "irr_tech_change_cost".
+    tol : float, optional
+        The tolerance of the comparison. The default is 1e-9.
+
+    Returns
+    -------
+    list
+        The indices of the kept techs in tech_options.
+
+    """
+    cost = np.array(
+        [finance_dict["irr_tech_operational_cost"][te] for te in tech_options]
+    )
+    change_cost = _get_change_cost_matrix(
+        tech_options, finance_dict.get("irr_tech_change_cost", {})
+    )
+
+    protected = set()
+    fields_ = []
+    for field in fields:
+        techs = field["tech_pumping_rate_coefs"]
+        coefs = np.array([techs[te] for te in tech_options], dtype=float)
+        pre = _get_indices(field["pre_i_te"], tech_options, axis=0)
+        protected.update(pre)
+        fields_.append((pre, coefs))
+
+    def dominates(d, t):
+        if cost[d] > cost[t] + tol:
+            return False
+        for pre, coefs in fields_:
+            if np.any(change_cost[pre, d] > change_cost[pre, t] + tol):
+                return False
+            if np.any(coefs[d] > coefs[t] + tol):
+                return False
+        return True
+
+    return _screen(len(tech_options), protected, dominates)
+
+
+def reduce_sols(sols, field_ids, crop_idx, tech_idx):
+    """
+    Select the kept crop types and techs from the solutions given in the full
+    dimensions, e.g., to provide a warm start to the reduced model.
+
+    Parameters
+    ----------
+    sols : dict
+        The solutions (dm_sols) in the full dimensions.
+    field_ids : list
+        The field ids.
+    crop_idx, tech_idx : list
+        The indices of the kept crop types and techs.
+
+    Returns
+    -------
+    dict
+        The solutions of the fields with the crop and tech dimensions reduced.
+
+    """
+    reduced = {}
+    for fid in field_ids:
+        sols_fid = sols.get(fid)
+        if sols_fid is None:
+            continue
+        reduced[fid] = {
+            k: take_options(v, crop_idx, 1)
+            if k in CROP_KEYS
+            else take_options(v, tech_idx, 0)
+            if k in TECH_KEYS
+            else v
+            for k, v in sols_fid.items()
+        }
+    return reduced
+
+
+def expand_sols(sols, field_ids, crop_idx, n_c, tech_idx, n_te):
+    """
+    Map the solutions of a model built with the kept crop types and techs
+    back to the full dimensions in place. The pruned options are filled with
+    zeros.
+
+    Parameters
+    ----------
+    sols : dict
+        The solutions (dm_sols) of the reduced model.
+    field_ids : list
+        The field ids.
+    crop_idx, tech_idx : list
+        The indices of the kept crop types and techs.
+    n_c, n_te : int
+        The numbers of all crop types and techs.
+
+    Returns
+    -------
+    dict
+        The solutions in the full dimensions.
+
+    """
+    for k in SHARED_CROP_KEYS:
+        if k in sols:
+            sols[k] = _put(sols[k], crop_idx, n_c, 1)
+    for fid in field_ids:
+        sols_fid = sols[fid]
+        for k in CROP_KEYS:
+            if k in sols_fid:
+                sols_fid[k] = _put(sols_fid[k], crop_idx, n_c, 1)
+        for k in TECH_KEYS:
+            if k in sols_fid:
+                sols_fid[k] = _put(sols_fid[k], tech_idx, n_te, 0)
+    return sols
+
+
+def take_options(v, idx, axis):
+    """
+    Select the kept options along the axis of an indicator or solution array,
+    e.g., the previous i_crop (axis 1) or i_te (axis 0). Other values (e.g.,
+    a crop name) are returned as they are.
+    """
+    if isinstance(v, np.ndarray) and v.ndim > axis:
+        return np.take(v, idx, axis=axis)
+    return v
+
+
+def _get_crop_pieces(field, crop_options, profit):
+    """
+    Get the previous crops of a field, the revenue pieces of each crop in
+    each year of each precipitation scenario, and the crop with the largest
+    water requirement. See screen_crop_options().
+    """
+    n_c = len(crop_options)
+    curves = field["water_yield_curves"]
+    pars = np.array([curves[c] for c in crop_options], dtype=float)
+    if pars.shape[1] < 6:  # No minimum yield ratio
+        pars = np.hstack([pars[:, :5], np.zeros((n_c, 1))])
+    ub_w = pars[:, 1].max()  # Upper bound of w (see setup_constr_field())
+    pre = _get_indices(field["pre_i_crop"], crop_options, axis=1)
+    prec_aws = field["prec_aw"]
+    if isinstance(prec_aws, dict):
+        prec_aws = [prec_aws]
+    precs = [[] for _ in crop_options]
+    for prec_aw in prec_aws:
+        prec_k = [
+            np.atleast_1d(np.asarray(prec_aw[c], dtype=float)) for c in crop_options
+        ]
+        n_yr = max(len(p) for p in prec_k)
+        for ci, p in enumerate(prec_k):
+            precs[ci].extend(np.broadcast_to(p, n_yr))
+    pieces = []
+    for ci in range(n_c):
+        ymax, wmax, a, b, c, min_y_ratio = pars[ci]
+        scale = ymax * profit[ci]
+        pieces.append(
+            [
+                [
+                    (lo, hi, y2 * scale, y1 * scale, y0 * scale)
+                    for lo, hi, y2, y1, y0 in get_yield_pieces(
+                        a, b, c, wmax, min_y_ratio, prec, ub_w - prec
+                    )
+                ]
+                for prec in precs[ci]
+            ]
+        )
+    return pre, pieces, int(np.argmax(pars[:, 1]))
+
+
+def _screen(n, protected, dominates):
+    """
+    Remove the options dominated by any kept option one by one. Identical
+    options do not remove each other since the removed ones are no longer
+    compared.
+    """
+    kept = list(range(n))
+    for i in range(n):
+        if i in protected:
+            continue
+        if any(dominates(j, i) for j in kept if j != i):
+            kept.remove(i)
+    return kept
+
+
+def _dominates_pieces(pieces_d, pieces_c, tol):
+    """
+    Check whether the revenue pieces of d are no lower than those of c over
+    the feasible irrigation depths of c, which must be feasible for d.
+    """
+    if not pieces_c:
+        return True
+    if not pieces_d:
+        return False
+    points = np.unique([p for lo, hi, *_ in pieces_c + pieces_d for p in (lo, hi)])
+    if len(points) == 1:
+        intervals = [(points[0], points[0])]
+    else:
+        intervals = list(pairwise(points))
+    for lo, hi in intervals:
+        mid = (lo + hi) / 2
+        piece_c = _find_piece(pieces_c, mid)
+        if piece_c is None:  # Infeasible for c
+            continue
+        piece_d = _find_piece(pieces_d, mid)
+        if piece_d is None:
+            return False
+        # Minimum of the difference (a quadratic function) over [lo, hi]
+        q2, q1, q0 = np.subtract(piece_d[2:], piece_c[2:])
+        xs = [lo, hi]
+        if q2 != 0:
+            xs.append(np.clip(-q1 / (2 * q2), lo, hi))
+        if min(q2 * x**2 + q1 * x + q0 for x in xs) < -tol:
+            return False
+    return True
+
+
+def _find_piece(pieces, x, eps=1e-12):
+    """Find the piece containing x."""
+    for piece in pieces:
+        if piece[0] - eps <= x <= piece[1] + eps:
+            return piece
+    return None
+
+
+def _get_change_cost_matrix(options, change_cost):
+    """Form the change cost matrix from a dictionary keyed by (from, to)."""
+    matrix = np.zeros((len(options), len(options)))
+    for (i, j), v in change_cost.items():
+        if i in options and j in options:
+            matrix[options.index(i), options.index(j)] = v
+    return matrix
+
+
+def _get_indices(choice, options, axis):
+    """Get the indices of the chosen options (a name or an indicator array)."""
+    if isinstance(choice, str):
+        return [options.index(choice)]
+    choice = np.asarray(choice)
+    if axis == 1:  # i_crop (n_s, n_c, 1)
+        return sorted(set(np.argmax(choice[:, :, 0], axis=1).tolist()))
+    return [int(np.argmax(choice))]
+
+
+def _put(v, idx, n, axis):
+    """Place an array into the full dimension along the axis with zeros."""
+    if not isinstance(v, np.ndarray) or v.ndim <= axis:
+        return v
+    shape = list(v.shape)
+    shape[axis] = n
+    full = np.zeros(shape, dtype=v.dtype)
+    index = [slice(None)] * v.ndim
+    index[axis] = idx
+    full[tuple(index)] = v
+    return full
@@ -0,0 +1,596 @@
+import time
+
+import gurobipy as gp
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+from scipy.sparse import coo_matrix, csr_matrix, vstack
+
+GRB = gp.GRB
+solver_options = ("gurobi", "highs")
+
+
+class SolverResult:
+    """
+    The result of an optimization model solved by solve_model(). The status
+    follows the Gurobi status codes (e.g., 2 for optimal and 9 for time limit)
+    regardless of the solver.
+
+    Attributes
+    ----------
+    status : int
+        The solver status in Gurobi status codes.
+    obj_val : float
+        The objective value. None if no solution is found.
+    mip_gap : float
+        The relative MIP gap. None if no solution is found.
+    runtime : float
+        The solver runtime [sec].
+    node_count : float
+        The number of explored branch-and-bound nodes.
+
+    """
+
+    def __init__(
+        self, status, obj_val=None, mip_gap=None, runtime=None, node_count=None, x=None
+    ):
+        self.status = status
+        self.obj_val = obj_val
+        self.mip_gap = mip_gap
+        self.runtime = runtime
+        self.node_count = node_count
+        self.x = x  # Solution vector indexed by Var.index (HiGHS only)
+
+    def get_value(self, var):
+        """
+        Get the solution value of a gurobi variable (Var or MVar). A TypeError
+        is raised for any other object.
+        """
+        if self.x is None:
+            return var.X
+        if isinstance(var, gp.MVar):
+            idx = [v.index for v in var.reshape(-1).tolist()]
+            return self.x[idx].reshape(var.shape)
+        if isinstance(var, gp.Var):
+            return self.x[var.index]
+        raise TypeError(f"{type(var)} is not a gurobi variable.")
+
+
+def solve_model(model, solver="gurobi", **kwargs):
+    """
+    Solve a gurobipy model with the selected solver.
+
+    Parameters
+    ----------
+    model : gurobipy.Model
+        The optimization model built with gurobipy.
+    solver : str, optional
+        "gurobi" or "highs". The "highs" solver uses the open-source HiGHS
+        solver through scipy.optimize.milp, where gurobipy serves only as the
+        modeling interface. Therefore, it does not require a Gurobi license
+        for large models. It supports linear models with MIN, MAX, and PWL
+        general constraints, e.g., the "pwl" formulation of Optimization. The
+        default is "gurobi".
+    **kwargs :
+        Gurobi parameters. For the "highs" solver, TimeLimit, MIPGap,
+        NodeLimit, Presolve, LogToConsole, and OutputFlag are translated to
+        the corresponding HiGHS options and the others are ignored.
+
+    Returns
+    -------
+    SolverResult
+        The solver result.
+
+    """
+    if solver == "gurobi":
+        return solve_gurobi(model, **kwargs)
+    if solver == "highs":
+        return solve_highs(model, **kwargs)
+    raise ValueError(f"{solver} is not a valid value for solver.")
+
+
+def solve_models(models, solver="gurobi", env=None, **kwargs):
+    """
+    Solve independent gurobipy models together as one block-diagonal model
+    (see merge_models()), which saves the overhead of solving many small
+    models one by one (e.g., presolve setup and solver calls). The models
+    are unchanged.
+
+    Since the objective of the merged model is the sum of the objectives of
+    the models, the MIPGap is divided by the number of models to bound the
+    gap of each model as if it were solved by itself, and the TimeLimit is
+    multiplied by the number of models.
+
+    Parameters
+    ----------
+    models : list
+        The gurobipy models.
+    solver : str, optional
+        "gurobi" or "highs". See solve_model(). The default is "gurobi".
+    env : gurobipy.Env, optional
+        The Gurobi environment of the merged model. The default is None (the
+        default environment).
+    **kwargs :
+        Gurobi parameters for each model. See solve_model().
+
+    Returns
+    -------
+    list
+        The SolverResult of each model, where the solution vector (x) is
+        always given. The status, runtime, and node count are those of the
+        merged model, and the runtime is shared equally by the models. The
+        MIP gap is the upper bound of the gap of each model given the gap of
+        the merged model.
+
+    """
+    n = len(models)
+    params = dict(kwargs)
+    params["MIPGap"] = params.get("MIPGap", 1e-4) / n
+    if "TimeLimit" in params:
+        params["TimeLimit"] = params["TimeLimit"] * n
+
+    merged, blocks = merge_models(models, env=env)
+    try:
+        result = solve_model(merged, solver=solver, **params)
+        x = result.x
+        if x is None and result.obj_val is not None:
+            x = np.asarray(merged.getAttr("X", merged.getVars()))
+    finally:
+        merged.dispose()
+
+    runtime = result.runtime / n
+    if result.obj_val is None:
+        return [SolverResult(status=result.status, runtime=runtime) for _ in blocks]
+    abs_gap = result.mip_gap * abs(result.obj_val)
+    results = []
+    for block in blocks:
+        x_block = x[block.start : block.end]
+        obj_val = block.get_obj_val(x_block)
+        if abs_gap == 0:
+            mip_gap = 0.0
+        elif obj_val != 0:
+            mip_gap = abs_gap / abs(obj_val)
+        else:
+            mip_gap = GRB.INFINITY
+        results.append(
+            SolverResult(
+                status=result.status,
+                obj_val=obj_val,
+                mip_gap=mip_gap,
+                runtime=runtime,
+                node_count=result.node_count,
+                x=x_block,
+            )
+        )
+    return results
+
+
+def merge_models(models, env=None):
+    """
+    Copy gurobipy models into one block-diagonal model, where each model is
+    a block of variables and constraints that shares nothing with the
+    others. The objective is the sum of the objectives of the models in the
+    sense (minimize or maximize) of the first model. Linear, quadratic, and
+    MIN, MAX, PWL, and LOG general constraints are supported.
+
+    Parameters
+    ----------
+    models : list
+        The gurobipy models.
+    env : gurobipy.Env, optional
+        The Gurobi environment of the merged model. The default is None.
+
+    Returns
+    -------
+    tuple
+        (merged, blocks), where blocks give the range of the variables and
+        the objective of each model in the merged model.
+
+    """
+    merged = gp.Model(name="merged", env=env)
+    sense = models[0].ModelSense
+    merged.ModelSense = sense
+    blocks = []
+    quad_obj = gp.QuadExpr()
+    func_attrs = []  # Set after the function constraints are added
+    obj_con = 0.0
+    start = 0
+    for m in models:
+        m.update()
+        if m.NumSOS > 0:
+            raise ValueError("SOS constraints cannot be merged.")
+        x, c = _copy_vars(merged, m, sense)
+        xs = x.tolist()
+        obj_con += m.ObjCon * m.ModelSense * sense
+        _copy_constrs(merged, m, x, xs)
+        quad = None
+        if m.NumQNZs > 0:
+            quad = m.getObjective()
+            quad_obj.add(_copy_quad_expr(quad, xs, linear=False), m.ModelSense * sense)
+        func_attrs += _copy_gen_constrs(merged, m, xs)
+
+        blocks.append(_ModelBlock(start, start + len(xs), c, m.ObjCon, quad))
+        start += len(xs)
+
+    if quad_obj.size() > 0:
+        merged.setObjective(merged.getObjective() + quad_obj)
+    merged.ObjCon = obj_con
+    if func_attrs:
+        merged.update()
+        for gc, values in func_attrs:
+            for attr, value in zip(_FUNC_ATTRS, values, strict=True):
+                gc.setAttr(attr, value)
+    return merged, blocks
+
+
+def _copy_vars(merged, m, sense):
+    """
+    Copy the variables of a model into the merged model with their linear
+    objective coefficients in the given sense. Return the copied variables
+    (MVar) and the original objective coefficients.
+    """
+    vars_ = m.getVars()
+    c = np.array(m.getAttr("Obj", vars_), dtype=float)
+    x = merged.addMVar(
+        len(vars_),
+        lb=m.getAttr("LB", vars_),
+        ub=m.getAttr("UB", vars_),
+        obj=c * m.ModelSense * sense,
+        vtype=m.getAttr("VType", vars_),
+    )
+    xs = x.tolist()
+    for attr in ("Start", "VarHintVal", "VarHintPri"):
+        merged.setAttr(attr, xs, m.getAttr(attr, vars_))
+    return x, c
+
+
+def _copy_constrs(merged, m, x, xs):
+    """
+    Copy the linear and quadratic constraints of a model into the merged
+    model, where x (MVar) and xs (list) are the copied variables.
+    """
+    if m.NumConstrs > 0:
+        constrs = m.getConstrs()
+        merged.addMConstr(
+            m.getA(),
+            x,
+            np.array(m.getAttr("Sense", constrs)),
+            np.array(m.getAttr("RHS", constrs), dtype=float),
+        )
+    for qc in m.getQConstrs():
+        expr = _copy_quad_expr(m.getQCRow(qc), xs)
+        merged.addQConstr(expr, qc.QCSense, qc.QCRHS)
+
+
+def _copy_gen_constrs(merged, m, xs):
+    """
+    Copy the general constraints of a model into the merged model, where xs
+    are the copied variables. Return the copied function constraints with
+    the values of their attributes (_FUNC_ATTRS), which are set after the
+    merged model is updated.
+    """
+    func_attrs = []
+    for gc in m.getGenConstrs():
+        gc_type = gc.GenConstrType
+        if gc_type == GRB.GENCONSTR_MAX:
+            resvar, operands, constant = m.getGenConstrMax(gc)
+            merged.addGenConstrMax(
+                xs[resvar.index], [xs[v.index] for v in operands], constant
+            )
+        elif gc_type == GRB.GENCONSTR_MIN:
+            resvar, operands, constant = m.getGenConstrMin(gc)
+            merged.addGenConstrMin(
+                xs[resvar.index], [xs[v.index] for v in operands], constant
+            )
+        elif gc_type == GRB.GENCONSTR_PWL:
+            xvar, yvar, xpts, ypts = m.getGenConstrPWL(gc)
+            merged.addGenConstrPWL(xs[xvar.index], xs[yvar.index], xpts, ypts)
+        elif gc_type == GRB.GENCONSTR_LOG:
+            xvar, yvar = m.getGenConstrLog(gc)
+            new = merged.addGenConstrLog(xs[xvar.index], xs[yvar.index])
+            func_attrs.append((new, [gc.getAttr(a) for a in _FUNC_ATTRS]))
+        else:
+            raise ValueError(f"General constraint {gc.GenConstrName} cannot be merged.")
+    return func_attrs
+
+
+# The attributes of the function constraints (e.g., LOG)
+_FUNC_ATTRS = (
+    "FuncPieces",
+    "FuncPieceError",
+    "FuncPieceLength",
+    "FuncPieceRatio",
+    "FuncNonlinear",
+)
+
+
+def _copy_quad_expr(expr, xs, linear=True):
+    """
+    Copy a QuadExpr of a model with its variables replaced by xs (indexed by
+    Var.index). The linear part is dropped if linear is False.
+    """
+    new = gp.QuadExpr()
+    n = expr.size()
+    new.addTerms(
+        [expr.getCoeff(i) for i in range(n)],
+        [xs[expr.getVar1(i).index] for i in range(n)],
+        [xs[expr.getVar2(i).index] for i in range(n)],
+    )
+    if linear:
+        lin = expr.getLinExpr()
+        n = lin.size()
+        new.add(
+            gp.LinExpr(
+                [lin.getCoeff(i) for i in range(n)],
+                [xs[lin.getVar(i).index] for i in range(n)],
+            )
+            + lin.getConstant()
+        )
+    return new
+
+
+class _ModelBlock:
+    """The variables and the objective of a model in a merged model."""
+
+    def __init__(self, start, end, c, obj_con, quad=None):
+        self.start = start
+        self.end = end
+        self.c = c
+        self.obj_con = obj_con
+        # (coefficients, var1 indices, var2 indices) of the quadratic terms
+        self.quad = None
+        if quad is not None:
+            n = quad.size()
+            self.quad = (
+                np.array([quad.getCoeff(i) for i in range(n)]),
+                np.array([quad.getVar1(i).index for i in range(n)], dtype=int),
+                np.array([quad.getVar2(i).index for i in range(n)], dtype=int),
+            )
+
+    def get_obj_val(self, x):
+        """Evaluate the objective of the model given its solution vector."""
+        obj_val = float(self.c @ x) + self.obj_con
+        if self.quad is not None:
+            coefs, i1, i2 = self.quad
+            obj_val += float(np.sum(coefs * x[i1] * x[i2]))
+        return obj_val
+
+
+def solve_gurobi(model, **kwargs):
+    """Solve a gurobipy model with Gurobi. See solve_model()."""
+    m = model
+    for k, v in kwargs.items():
+        m.setParam(k, v)
+    m.optimize()
+    result = SolverResult(status=m.Status, runtime=m.Runtime)
+    if (m.Status == GRB.OPTIMAL or m.Status == GRB.TIME_LIMIT) and m.SolCount > 0:
+        result.obj_val = m.objVal
+        result.mip_gap = m.MIPGap
+        result.node_count = m.NodeCount
+    return result
+
+
+def solve_highs(model, **kwargs):
+    """Solve a gurobipy model with HiGHS. See solve_model()."""
+    c, integrality, bounds, constraints, obj_con, sense = to_milp_arrays(model)
+
+    options = {
+        "disp": bool(kwargs.get("LogToConsole", 0) and kwargs.get("OutputFlag", 1))
+    }
+    if "TimeLimit" in kwargs:
+        options["time_limit"] = kwargs["TimeLimit"]
+    if "MIPGap" in kwargs:
+        options["mip_rel_gap"] = kwargs["MIPGap"]
+    if "NodeLimit" in kwargs:
+        options["node_limit"] = int(kwargs["NodeLimit"])
+    if kwargs.get("Presolve") == 0:
+        options["presolve"] = False
+
+    start = time.perf_counter()
+    res = milp(
+        c * sense,
+        integrality=integrality,
+        bounds=bounds,
+        constraints=constraints,
+        options=options,
+    )
+    runtime = time.perf_counter() - start
+
+    status = {
+        0: GRB.OPTIMAL,
+        1: GRB.TIME_LIMIT,
+        2: GRB.INFEASIBLE,
+        3: GRB.UNBOUNDED,
+    }.get(res.status, GRB.NUMERIC)
+    if res.x is None:
+        if status == GRB.TIME_LIMIT:
+            status = GRB.INTERRUPTED
+        return SolverResult(status=status, runtime=runtime)
+    n_vars = model.NumVars
+    return SolverResult(
+        status=status,
+        obj_val=res.fun * sense + obj_con,
+        mip_gap=getattr(res, "mip_gap", 0.0) or 0.0,
+        runtime=runtime,
+        node_count=getattr(res, "mip_node_count", 0) or 0,
+        x=res.x[:n_vars],
+    )
+
+
+def to_milp_arrays(model):
+    """
+    Convert a gurobipy model into the arrays of scipy.optimize.milp. The MIN,
+    MAX, and PWL general constraints are reformulated with auxiliary binary
+    variables, which are appended after the model variables.
+
+    Parameters
+    ----------
+    model : gurobipy.Model
+        The optimization model built with gurobipy.
+
+    Returns
+    -------
+    tuple
+        (c, integrality, bounds, constraints, obj_con, sense), where the
+        objective is sense * (c @ x) + obj_con to be minimized.
+
+    """
+    m = model
+    m.update()
+    if m.NumQConstrs > 0 or m.NumQNZs > 0:
+        raise ValueError(
+            "The HiGHS solver only supports linear models. Use a linearized "
+            + "formulation (e.g., formulation='pwl')."
+        )
+    if m.NumSOS > 0:
+        raise ValueError("SOS constraints are not supported by the HiGHS solver.")
+
+    vars_ = m.getVars()
+    lb = np.array(m.getAttr("LB", vars_), dtype=float)
+    ub = np.array(m.getAttr("UB", vars_), dtype=float)
+    vtypes = np.array(m.getAttr("VType", vars_))
+    c = np.array(m.getAttr("Obj", vars_), dtype=float)
+    lb[lb <= -GRB.INFINITY] = -np.inf
+    ub[ub >= GRB.INFINITY] = np.inf
+    is_bin = vtypes == "B"
+    lb[is_bin] = np.maximum(lb[is_bin], 0)
+    ub[is_bin] = np.minimum(ub[is_bin], 1)
+    if np.any(~np.isin(vtypes, ["C", "B", "I"])):
+        raise ValueError("Only C, B, and I variables are supported by HiGHS.")
+    integrality = (vtypes != "C").astype(int)
+
+    # Linear constraints
+    constrs = m.getConstrs()
+    A = m.getA()
+    senses = np.array(m.getAttr("Sense", constrs))
+    rhs = np.array(m.getAttr("RHS", constrs), dtype=float)
+    row_lb = np.where(senses == "<", -np.inf, rhs)
+    row_ub = np.where(senses == ">", np.inf, rhs)
+
+    # General constraints
+    aux = _GenConstrRows(lb, ub)
+    for gc in m.getGenConstrs():
+        gc_type = gc.GenConstrType
+        if gc_type == GRB.GENCONSTR_MAX:
+            resvar, operands, constant = m.getGenConstrMax(gc)
+            aux.add_min_max(resvar, operands, constant, is_max=True)
+        elif gc_type == GRB.GENCONSTR_MIN:
+            resvar, operands, constant = m.getGenConstrMin(gc)
+            aux.add_min_max(resvar, operands, constant, is_max=False)
+        elif gc_type == GRB.GENCONSTR_PWL:
+            xvar, yvar, xpts, ypts = m.getGenConstrPWL(gc)
+            aux.add_pwl(xvar, yvar, xpts, ypts)
+        else:
+            raise ValueError(
+                f"General constraint {gc.GenConstrName} is not supported by HiGHS."
+            )
+
+    n_aux = len(aux.lb)
+    n = len(vars_) + n_aux
+    A = csr_matrix((A.data, A.indices, A.indptr), shape=(A.shape[0], n))
+    if aux.rows_lb:
+        A_aux = coo_matrix(
+            (aux.data, (aux.row_ids, aux.col_ids)), shape=(len(aux.rows_lb), n)
+        )
+        A = vstack([A, A_aux.tocsr()])
+        row_lb = np.concatenate([row_lb, aux.rows_lb])
+        row_ub = np.concatenate([row_ub, aux.rows_ub])
+
+    c = np.concatenate([c, np.zeros(n_aux)])
+    integrality = np.concatenate([integrality, aux.integrality])
+    bounds = Bounds(np.concatenate([lb, aux.lb]), np.concatenate([ub, aux.ub]))
+    constraints = []
+    if A.shape[0] > 0:
+        constraints.append(LinearConstraint(A, row_lb, row_ub))
+    return c, integrality, bounds, constraints, m.ObjCon, m.ModelSense
+
+
+class _GenConstrRows:
+    """Collect the auxiliary variables and rows of the general constraints."""
+
+    def __init__(self, lb, ub):
+        self.var_lb = lb
+        self.var_ub = ub
+        self.n_vars = len(lb)
+        self.lb = []
+        self.ub = []
+        self.integrality = []
+        self.row_ids = []
+        self.col_ids = []
+        self.data = []
+        self.rows_lb = []
+        self.rows_ub = []
+
+    def add_var(self, lb, ub, integrality):
+        self.lb.append(lb)
+        self.ub.append(ub)
+        self.integrality.append(integrality)
+        return self.n_vars + len(self.lb) - 1
+
+    def add_row(self, coefs, row_lb, row_ub):
+        row = len(self.rows_lb)
+        for col, coef in coefs.items():
+            self.row_ids.append(row)
+            self.col_ids.append(col)
+            self.data.append(coef)
+        self.rows_lb.append(row_lb)
+        self.rows_ub.append(row_ub)
+
+    def add_min_max(self, resvar, operands, constant, is_max):
+        """
+        Reformulate r = max(o_1, ..., o_k) with binaries z_i as r >= o_i,
+        r <= o_i + M_i * (1 - z_i), and sum(z_i) = 1. The min is formulated
+        symmetrically.
+        """
+        r = resvar.index
+        # (column, constant) for each operand
+        ops = [(v.index, 0.0) for v in operands]
+        if abs(constant) < 1e30:  # Gurobi treats 1e30 and above as infinite
+            ops.append((None, constant))
+        op_lb = [self.var_lb[i] if i is not None else k for i, k in ops]
+        op_ub = [self.var_ub[i] if i is not None else k for i, k in ops]
+        if not np.all(np.isfinite(op_lb + op_ub)):
+            raise ValueError(
+                "Operands of MIN and MAX general constraints must be bounded "
+                + "for the HiGHS solver."
+            )
+        z_sum = {}
+        for (i, k), lb_i, ub_i in zip(ops, op_lb, op_ub, strict=True):
+            z = self.add_var(0, 1, 1)
+            z_sum[z] = 1
+            coefs = {r: 1.0}
+            if i is not None:
+                coefs[i] = coefs.get(i, 0) - 1.0
+            if is_max:
+                big_m = max(op_ub) - lb_i
+                self.add_row(coefs, k, np.inf)  # r - o_i >= 0
+                self.add_row({**coefs, z: big_m}, -np.inf, big_m + k)
+            else:
+                big_m = ub_i - min(op_lb)
+                self.add_row(coefs, -np.inf, k)  # r - o_i <= 0
+                self.add_row({**coefs, z: -big_m}, -big_m + k, np.inf)
+        self.add_row(z_sum, 1, 1)
+
+    def add_pwl(self, xvar, yvar, xpts, ypts):
+        """
+        Reformulate y = f(x) given by the points (xpts, ypts) with the convex
+        combination of the points, where only two adjacent weights can be
+        nonzero.
+        """
+        n_pts = len(xpts)
+        lambdas = [self.add_var(0, 1, 0) for _ in range(n_pts)]
+        zs = [self.add_var(0, 1, 1) for _ in range(n_pts - 1)]
+        x_row = {xvar.index: 1.0}
+        y_row = {yvar.index: 1.0}
+        for j, lam in enumerate(lambdas):
+            x_row[lam] = -xpts[j]
+            y_row[lam] = -ypts[j]
+        self.add_row(x_row, 0, 0)
+        self.add_row(y_row, 0, 0)
+        self.add_row(dict.fromkeys(lambdas, 1.0), 1, 1)
+        self.add_row(dict.fromkeys(zs, 1.0), 1, 1)
+        for j, lam in enumerate(lambdas):
+            # lambda_j <= z_{j-1} + z_j
+            coefs = {lam: 1.0}
+            for z in zs[max(j - 1, 0) : j + 1]:
+                coefs[z] = -1.0
+            self.add_row(coefs, -np.inf, 0)
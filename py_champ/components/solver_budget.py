@@ -0,0 +1,306 @@
+import time
+
+import gurobipy as gp
+import numpy as np
+
+GRB = gp.GRB
+# Gurobi status code of a solve stopped by the time limit
+TIME_LIMIT = GRB.TIME_LIMIT
+
+
+class SolverBudget:
+    """
+    A wall-clock budget of the solver time per model step, which can be
+    shared by all behavior agents. Applying the same solver parameters (e.g.,
+    TimeLimit and MIPGap) to every agent lets a few hard models stall a whole
+    year. Instead, the budget left in a step is split among the agents that
+    have not made their decisions yet in proportion to their predicted
+    difficulty, i.e., the exponentially smoothed runtime of their previous
+    decisions, where the runtime of a decision stopped by the time limit
+    counts double. Each solve gets the unused share of its agent as the
+    TimeLimit (see get_params()). The models that are predicted to need more
+    time than their shares and that are known to branch (i.e., a nonzero
+    node count) get a looser MIPGap, up to max_gap.
+
+    The solves stopped by the time limit keep their best incumbents. Under
+    step_batch(), they are re-queued after all the models of the step are
+    solved and solved again with the budget left, starting from their
+    incumbents. The better of the two solutions is kept.
+
+    The achieved MIP gaps are recorded in the solutions ("gp_MIPGap") and in
+    the records of the budget for auditing.
+
+    Parameters
+    ----------
+    budget : float
+        The wall-clock time [sec] of the solvers per model step.
+    mip_gap : float, optional
+        The MIPGap of the models expected to finish within their shares if
+        MIPGap is not given in the Gurobi settings. The default is 1e-4 (the
+        Gurobi default).
+    max_gap : float, optional
+        The loosest MIPGap given to a hard model. The default is 0.01.
+    min_time_limit : float, optional
+        The minimum TimeLimit [sec] of a solve. The default is 0.05.
+    smoothing : float, optional
+        The weight of the latest runtime in the predicted difficulty. The
+        default is 0.5.
+
+    Attributes
+    ----------
+    records : list
+        A record (dict) of each solve, including the step, agent_id,
+        time_limit, mip_gap (the assigned MIPGap), runtime, gp_status,
+        gp_MIPGap (the achieved gap), and requeued.
+
+    Examples
+    --------
+    >>> # Share a budget of 60 seconds per step among all behavior agents
+    >>> budget = SolverBudget(60)
+    >>> m = SD6Model(..., solver_budget=budget)
+    >>> budget.info()
+    """
+
+    def __init__(
+        self, budget, mip_gap=1e-4, max_gap=0.01, min_time_limit=0.05, smoothing=0.5
+    ):
+        if budget <= 0:
+            raise ValueError("budget must be positive.")
+        if not 0 < smoothing <= 1:
+            raise ValueError("smoothing must be in (0, 1].")
+        self.budget = budget
+        self.mip_gap = mip_gap
+        self.max_gap = max(max_gap, mip_gap)
+        self.min_time_limit = min_time_limit
+        self.smoothing = smoothing
+        self.records = []
+        self.t = 0
+        self._runtimes = {}  # Predicted runtime of each agent
+        self._node_counts = {}  # Smoothed node count of each agent
+        self._shares = {}  # Time share of each agent in the step
+        self._used = {}  # Runtime used by each agent in the step
+        self._timed_out = set()  # Agents stopped by the time limit in the step
+        self._pending = {}  # Predicted runtime of the undecided agents
+        self._start = None
+
+    def start_step(self, agent_ids):
+        """
+        Start the budget of a new model step for the given agents.
+
+        Parameters
+        ----------
+        agent_ids : list
+            The ids of the agents making decisions in the step.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.t += 1
+        self._start = time.perf_counter()
+        self._pending = {agent_id: self.predict(agent_id) for agent_id in agent_ids}
+        self._shares = {}
+        self._used = {}
+        self._timed_out = set()
+
+    def get_remaining(self):
+        """Return the budget [sec] left in the current step."""
+        if self._start is None:
+            return self.budget
+        return max(self.budget - (time.perf_counter() - self._start), 0.0)
+
+    def predict(self, agent_id):
+        """
+        Predict the runtime [sec] of an agent's decisions from the previous
+        steps. The mean of all agents is used for an agent without history,
+        which only matters relative to the others.
+        """
+        runtime = self._runtimes.get(agent_id)
+        if runtime is None:
+            runtime = np.mean(list(self._runtimes.values())) if self._runtimes else 1.0
+        # Avoid zero weights for the agents solved without a solver.
+        return max(runtime, 1e-3)
+
+    def get_params(self, agent_id, n_solves=1, **kwargs):
+        """
+        Get the solver parameters of an agent's solve with the TimeLimit and
+        MIPGap assigned by the budget. The parameters are returned unchanged
+        if the agent is not making decisions in the current step (e.g., the
+        initial decisions).
+
+        Parameters
+        ----------
+        agent_id : str
+            The id of the agent.
+        n_solves : int, optional
+            The number of models the agent solves at once, which share the
+            unused time of the agent. The default is 1.
+        **kwargs :
+            The Gurobi settings of the agent. A given TimeLimit caps the
+            assigned one, and a given MIPGap replaces mip_gap.
+
+        Returns
+        -------
+        dict
+            The solver parameters.
+
+        """
+        params = dict(kwargs)
+        if agent_id not in self._pending:
+            return params
+        if agent_id not in self._shares:
+            pending = self._pending
+            weight = pending[agent_id] / sum(pending.values())
+            self._shares[agent_id] = self.get_remaining() * weight
+        unused = self._shares[agent_id] - self._used.get(agent_id, 0.0)
+        time_limit = max(unused / n_solves, self.min_time_limit)
+        if "TimeLimit" in params:
+            time_limit = min(time_limit, params["TimeLimit"])
+        params["TimeLimit"] = time_limit
+
+        mip_gap = params.get("MIPGap", self.mip_gap)
+        predicted = self._pending[agent_id] / n_solves
+        if self._node_counts.get(agent_id, 0) > 0 and predicted > time_limit:
+            mip_gap = min(max(mip_gap * predicted / time_limit, mip_gap), self.max_gap)
+        params["MIPGap"] = mip_gap
+        return params
+
+    def get_requeue_params(self, n_solves, **kwargs):
+        """
+        Get the solver parameters of re-queued solves, which share the budget
+        left in the current step. Return None if the budget is used up.
+
+        Parameters
+        ----------
+        n_solves : int
+            The number of re-queued solves left.
+        **kwargs :
+            The Gurobi settings of the agent.
+
+        Returns
+        -------
+        dict or None
+            The solver parameters.
+
+        """
+        time_limit = self.get_remaining() / n_solves
+        if time_limit < self.min_time_limit:
+            return None
+        params = dict(kwargs)
+        params["TimeLimit"] = time_limit
+        params.setdefault("MIPGap", self.mip_gap)
+        return params
+
+    def get_fallback_params(self, **kwargs):
+        """
+        Get the solver parameters of a solve without the budget, e.g., a
+        re-queued solve that found no solution within the budget. The
+        TimeLimit and MIPGap are reset to the given Gurobi settings or the
+        defaults, since they are kept by the Gurobi model.
+
+        Parameters
+        ----------
+        **kwargs :
+            The Gurobi settings of the agent.
+
+        Returns
+        -------
+        dict
+            The solver parameters.
+
+        """
+        params = {"TimeLimit": GRB.INFINITY, "MIPGap": self.mip_gap}
+        params.update(kwargs)
+        return params
+
+    def record(self, agent_id, sols, params=None, requeued=False):
+        """
+        Record a solve of an agent.
+
+        Parameters
+        ----------
+        agent_id : str
+            The id of the agent.
+        sols : dict
+            The solutions of the solve (dm_sols).
+        params : dict, optional
+            The solver parameters of the solve. The default is None.
+        requeued : bool, optional
+            Whether the solve is re-queued. The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+        if agent_id not in self._pending:
+            return
+        sols = {} if sols is None else sols
+        params = {} if params is None else params
+        runtime = sols.get("gp_Runtime") or 0.0
+        status = sols.get("gp_status")
+        self._used[agent_id] = self._used.get(agent_id, 0.0) + runtime
+        if status == TIME_LIMIT:
+            self._timed_out.add(agent_id)
+        node_count = sols.get("gp_NodeCount")
+        if node_count is not None:
+            prev = self._node_counts.get(agent_id, node_count)
+            s = self.smoothing
+            self._node_counts[agent_id] = s * node_count + (1 - s) * prev
+        self.records.append(
+            {
+                "step": self.t,
+                "agent_id": agent_id,
+                "time_limit": params.get("TimeLimit"),
+                "mip_gap": params.get("MIPGap"),
+                "runtime": runtime,
+                "gp_status": status,
+                "gp_MIPGap": sols.get("gp_MIPGap"),
+                "requeued": requeued,
+            }
+        )
+
+    def finish(self, agent_id):
+        """
+        Finish the decisions of an agent in the current step and update its
+        predicted difficulty.
+
+        Parameters
+        ----------
+        agent_id : str
+            The id of the agent.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self._pending.pop(agent_id, None) is None:
+            return
+        runtime = self._used.get(agent_id, 0.0)
+        if agent_id in self._timed_out:
+            runtime *= 2  # The runtime needed is underestimated.
+        prev = self._runtimes.get(agent_id, runtime)
+        s = self.smoothing
+        self._runtimes[agent_id] = s * runtime + (1 - s) * prev
+
+    def info(self):
+        """
+        Return the budget statistics.
+
+        Returns
+        -------
+        dict
+            steps, solves, time_limited (the solves stopped by the time
+            limit), requeued, and max_gap (the largest achieved gap).
+
+        """
+        gaps = [r["gp_MIPGap"] for r in self.records if r["gp_MIPGap"] is not None]
+        return {
+            "steps": self.t,
+            "solves": len(self.records),
+            "time_limited": sum(r["gp_status"] == TIME_LIMIT for r in self.records),
+            "requeued": sum(r["requeued"] for r in self.records),
+            "max_gap": max(gaps) if gaps else None,
+        }
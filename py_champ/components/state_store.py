@@ -0,0 +1,323 @@
+import warnings
+
+import numpy as np
+
+from .aquifer import calc_dwl, check_static_inflow
+from .array_attribute import ArrayAttribute
+from .well_kernel import WellKernel
+
+
+class StateStore:
+    """
+    An array-backed store of the states of all fields, wells, and aquifers of
+    a model (e.g., SD6Model), which steps each component type in one
+    vectorized call (see step_fields(), step_wells(), and step_aquifers())
+    instead of calling step() of every agent. This makes the simulation of
+    10^4-10^5 fields cheap compared to the decisions.
+
+    The states declared as ArrayAttribute by the agent classes (e.g., i_crop
+    and y of Field, st, l_wt, and tr of Well, and st and dwl of Aquifer) are
+    moved into one array per state, where the row of an agent is given by
+    its position in the given dictionaries. The agents are kept as views of
+    their rows, so they can be read, set, and stepped as before. The
+    tech_pumping_rate_coefs and prec_aw_id of the fields and the aquifer_id
+    and the constants of the wells (see WellKernel) are copied when the store
+    is created.
+
+    Parameters
+    ----------
+    fields : dict
+        The Field agents, mapped by their IDs.
+    wells : dict
+        The Well agents, mapped by their IDs.
+    aquifers : dict
+        The Aquifer agents, mapped by their IDs. They must include the
+        aquifers of the wells.
+    crop_options : list
+        The crop options of the model.
+    tech_options : list
+        The irrigation technology options of the model.
+
+    Attributes
+    ----------
+    field_states, well_states, aquifer_states : dict
+        The arrays of the states, mapped by their names.
+    field_rows, well_rows, aquifer_rows : dict
+        The row of each agent, mapped by its ID.
+    well_aquifers : 1d array
+        The aquifer row of each well.
+    well_kernel : WellKernel
+        The energy kernel of the wells.
+
+    Examples
+    --------
+    >>> # Create the store in SD6Model
+    >>> m = SD6Model(..., state_store=True)
+    >>> m.state_store.well_states["st"]  # Saturated thickness of all wells
+    """
+
+    def __init__(self, fields, wells, aquifers, crop_options, tech_options):
+        self.crop_options = crop_options
+        self.tech_options = tech_options
+        self.field_rows = {fid: i for i, fid in enumerate(fields)}
+        self.well_rows = {wid: i for i, wid in enumerate(wells)}
+        self.aquifer_rows = {aq_id: i for i, aq_id in enumerate(aquifers)}
+        self.field_states = _attach(list(fields.values()))
+        self.well_states = _attach(list(wells.values()))
+        self.aquifer_states = _attach(list(aquifers.values()))
+        self.aquifers = list(aquifers.values())
+
+        # Pumping rate coefficients (a_te, b_te, l_pr) of each field and tech
+        self.tech_coefs = np.full((len(fields), len(tech_options), 3), np.nan)
+        for i, field in enumerate(fields.values()):
+            for j, te in enumerate(tech_options):
+                coefs = field.tech_pumping_rate_coefs.get(te)
+                if coefs is not None:
+                    self.tech_coefs[i, j] = coefs
+        self.prec_aw_ids = list(dict.fromkeys(f.prec_aw_id for f in fields.values()))
+        self.field_prec = np.array(
+            [self.prec_aw_ids.index(f.prec_aw_id) for f in fields.values()], dtype=int
+        )
+        self.well_kernel = WellKernel(
+            *(
+                self.well_states.get(name, [])
+                for name in ("r", "k", "sy", "rho", "g", "eff_pump", "eff_well")
+            )
+        )
+        try:
+            self.well_aquifers = np.array(
+                [self.aquifer_rows[w.aquifer_id] for w in wells.values()], dtype=int
+            )
+        except KeyError as e:
+            raise ValueError(f"The aquifer {e} of the wells is not given.") from None
+        if self.aquifers:
+            s = self.aquifer_states
+            check_static_inflow(self.aquifers, s["aq_a"], s["aq_b"])
+
+    def get_prec_aw(self, prec_aw_step, year, rows):
+        """
+        Get the available precipitation of the fields in a year.
+
+        Parameters
+        ----------
+        prec_aw_step : dict
+            The available precipitation [cm], mapped by prec_aw_id, year, and
+            crop.
+        year : int
+            The year.
+        rows : 1d array
+            The rows of the fields.
+
+        Returns
+        -------
+        2d array
+            The available precipitation of each field and crop (n, n_c).
+
+        """
+        prec_aw = np.array(
+            [
+                [prec_aw_step[pid][year][crop] for crop in self.crop_options]
+                for pid in self.prec_aw_ids
+            ]
+        )
+        return prec_aw[self.field_prec[rows]]
+
+    def step_fields(self, rows, irr_depth, i_crop, i_te, prec_aw):
+        """
+        Step the fields in one vectorized call as Field.step() of each field.
+
+        Parameters
+        ----------
+        rows : 1d array
+            The rows of the fields.
+        irr_depth : 4d array
+            The irrigation depth [cm] of each field. Dimensions: (n, n_s, n_c,
+            1).
+        i_crop : 4d array
+            The crop indicators of each field. Dimensions: (n, n_s, n_c, 1).
+        i_te : list
+            The irrigation technology of each field as an indicator array or a
+            string.
+        prec_aw : 2d array
+            The available precipitation [cm] of each field and crop. See
+            get_prec_aw().
+
+        Returns
+        -------
+        tuple
+            The yields [1e4 bu], average yield rates [-], and irrigation
+            volumes [m-ha] of the fields.
+
+        """
+        s = self.field_states
+        n_s = s["i_crop"].shape[1]
+        unit_area = s["unit_area"][rows][:, None, None, None]
+        a = s["a"][rows][:, None]
+        b = s["b"][rows][:, None]
+        c = s["c"][rows][:, None]
+        ymax = s["ymax"][rows][:, None]
+        wmax = s["wmax"][rows][:, None]
+        s["t"][rows] += 1
+
+        ### Yield calculation
+        w = irr_depth + prec_aw[:, None, :, None]
+        w = w * i_crop
+        w_ = w / wmax  # normalized applied water
+        w_ = np.minimum(w_, 1)
+        y_ = a * w_**2 + b * w_ + c  # normalized yield
+        y_ = np.maximum(0, y_)
+        y_ = y_ * i_crop
+
+        # Update crops
+        s["pre_i_crop"][rows] = s["i_crop"][rows]
+        s["crops"][rows] = np.argmax(i_crop[:, :, :, 0], axis=2)
+        s["i_crop"][rows] = i_crop
+
+        y = y_ * ymax * unit_area * 1e-4  # 1e4 bu
+
+        cm2m = 0.01
+        n = len(rows)
+        v_c = irr_depth * unit_area * cm2m  # m-ha
+        irr_vol = v_c.reshape((n, -1)).sum(axis=1)  # m-ha
+        avg_y_y = y_.reshape((n, -1)).sum(axis=1) / n_s
+        avg_w = w.reshape((n, -1)).sum(axis=1) / n_s
+
+        ### Tech
+        tech_options = self.tech_options
+        te = np.array(
+            [
+                tech_options.index(v) if isinstance(v, str) else np.argmax(v)
+                for v in i_te
+            ],
+            dtype=int,
+        )
+        coefs = self.tech_coefs[rows, te]
+        s["pre_te"][rows] = s["te"][rows]
+        s["te"][rows] = te
+        s["a_te"][rows] = coefs[:, 0]
+        s["b_te"][rows] = coefs[:, 1]
+        s["l_pr"][rows] = coefs[:, 2]
+        s["pumping_rate"][rows] = coefs[:, 0] * irr_vol + coefs[:, 1]  # m-ha/day
+
+        # record
+        s["y"][rows] = y
+        s["w"][rows] = avg_w
+        s["yield_rate_per_field"][rows] = avg_y_y
+        s["irr_vol_per_field"][rows] = irr_vol  # m-ha
+
+        return y, avg_y_y, irr_vol
+
+    def step_wells(self, rows, withdrawal, pumping_rate, l_pr, dwl=None):
+        """
+        Step the wells in one vectorized call as Well.step() of each well.
+
+        Parameters
+        ----------
+        rows : 1d array
+            The rows of the wells.
+        withdrawal : 1d array
+            The withdrawal [m-ha] of each well.
+        pumping_rate : 1d array
+            The pumping rate [m-ha/day] of each well.
+        l_pr : 1d array
+            The loss due to pressurization [m] of each well.
+        dwl : 1d array, optional
+            The change in the water level [m] of each well. The default is
+            None (the dwl of the aquifers of the wells).
+
+        Returns
+        -------
+        1d array
+            The energy consumption [PJ] of the wells.
+
+        """
+        s = self.well_states
+        if dwl is None:
+            dwl = self.aquifer_states["dwl"][self.well_aquifers[rows]]
+        st, l_wt, tr, e = self.well_kernel.step(
+            s["st"][rows],
+            s["l_wt"][rows],
+            s["pumping_days"][rows],
+            withdrawal,
+            dwl,
+            pumping_rate,
+            l_pr,
+            idx=rows,
+        )
+        s["t"][rows] += 1
+        s["st"][rows] = st
+        s["l_wt"][rows] = l_wt
+        s["tr"][rows] = tr
+        s["withdrawal"][rows] = withdrawal
+        s["pumping_rate"][rows] = pumping_rate
+        s["e"][rows] = e
+        return e
+
+    def step_aquifers(self, withdrawal):
+        """
+        Step all the aquifers with the static inflow in one vectorized call as
+        Aquifer.step() of each aquifer.
+
+        Parameters
+        ----------
+        withdrawal : 1d array
+            The withdrawal [m-ha] from each aquifer.
+
+        Returns
+        -------
+        1d array
+            The change in water level [m] of the aquifers.
+
+        """
+        s = self.aquifer_states
+        s["t"] += 1
+
+        dwl = calc_dwl(withdrawal, s["aq_a"], s["aq_b"])
+
+        for aquifer, dwl_ in zip(self.aquifers, dwl, strict=True):
+            aquifer.dwl_list.append(dwl_)
+        s["st"] += dwl
+        s["dwl"][:] = dwl
+        s["withdrawal"][:] = withdrawal
+
+        # Check st is not negative
+        for i in np.flatnonzero(s["st"] < 0):
+            warnings.warn(
+                "The saturated thickness is negative in aquifer"
+                f" {self.aquifers[i].unique_id}.",
+                stacklevel=2,
+            )
+        return dwl
+
+
+def _attach(agents):
+    """
+    Move the ArrayAttribute states of the agents into arrays and attach the
+    agents to their rows.
+    """
+    if not agents:
+        return {}
+    cls = type(agents[0])
+    attrs = {
+        name: attr
+        for klass in reversed(cls.__mro__)
+        for name, attr in vars(klass).items()
+        if isinstance(attr, ArrayAttribute)
+    }
+    if not attrs:
+        raise ValueError(f"{cls.__name__} does not support the state store.")
+    if any(type(agent) is not cls for agent in agents):
+        raise ValueError("The agents of a state store must be of the same class.")
+    arrays = {}
+    for name, attr in attrs.items():
+        values = [attr.encode(agent, agent.__dict__.get(name)) for agent in agents]
+        template = next((v for v in values if np.ndim(v) > 0), None)
+        if template is not None:
+            fill = np.full(np.shape(template), np.nan)
+            values = [fill if np.ndim(v) == 0 else v for v in values]
+        arrays[name] = np.array(values, dtype=attr.dtype)
+    for i, agent in enumerate(agents):
+        for name in attrs:
+            agent.__dict__.pop(name, None)
+        agent.__dict__["_state_row"] = (arrays, i)
+    return arrays
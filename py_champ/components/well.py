@@ -4,6 +4,8 @@
 import mesa
 import numpy as np
 
+from .array_attribute import ArrayAttribute
+
 
 class Well(mesa.Agent):
     """
@@ -72,8 +74,28 @@ class Well(mesa.Agent):
     Notes
     -----
     - Transmissivity 'tr' is calculated as the product of saturated thickness and hydraulic conductivity.
+    - The states below are stored in the arrays of a StateStore if the well
+      is attached to one.
+    - WellKernel steps many wells in one pass with the same results.
     """
 
+    # States stored in a StateStore (see StateStore)
+    r = ArrayAttribute()
+    k = ArrayAttribute()
+    sy = ArrayAttribute()
+    rho = ArrayAttribute()
+    g = ArrayAttribute()
+    eff_pump = ArrayAttribute()
+    eff_well = ArrayAttribute()
+    st = ArrayAttribute()
+    l_wt = ArrayAttribute()
+    tr = ArrayAttribute()
+    pumping_days = ArrayAttribute()
+    t = ArrayAttribute(dtype=int)
+    e = ArrayAttribute(nullable=True)
+    withdrawal = ArrayAttribute(nullable=True)
+    pumping_rate = ArrayAttribute(nullable=True)
+
     def __init__(self, unique_id, model, settings: dict, **kwargs):
         """Initialize a Well agent in the Mesa model."""
         # MESA required attributes => (unique_id, model)
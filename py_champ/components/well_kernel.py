@@ -0,0 +1,149 @@
+import numpy as np
+
+# Unit conversion from m-ha to m3
+M_HA_2_M3 = 10000
+
+
+class WellKernel:
+    """
+    A batched kernel of the energy consumption of a set of wells, which steps
+    all the wells in one pass as Well.step() of each well. The drawdown at a
+    well is given by the Cooper-Jacob approximation with the transmissivity
+    updated from the saturated thickness. The constants of each well (r^2 * sy
+    and the energy factor rho * g / eff_pump) are precomputed, and the
+    results are identical to those of Well.step().
+
+    Parameters
+    ----------
+    r, k, sy, rho, g, eff_pump, eff_well : 1d array
+        The radius [m], hydraulic conductivity [m/day], specific yield [-],
+        water density [kg/m³], gravitational acceleration [m/s²], pump
+        efficiency [-], and well efficiency [-] of each well. See Well.
+
+    Examples
+    --------
+    >>> kernel = WellKernel.from_wells(wells)
+    >>> e = kernel.step_wells(wells, withdrawal, dwl, pumping_rate, l_pr)
+    """
+
+    def __init__(self, r, k, sy, rho, g, eff_pump, eff_well):
+        r, sy, rho, g, eff_pump = (
+            np.asarray(v, dtype=float) for v in (r, sy, rho, g, eff_pump)
+        )
+        self.k = np.asarray(k, dtype=float)
+        self.eff_well = np.asarray(eff_well, dtype=float)
+        self.r2_sy = r**2 * sy
+        # Energy [PJ] per withdrawal [m-ha] and lift [m]
+        self.e_coef = rho * g * M_HA_2_M3 / eff_pump / 1e15
+
+    @classmethod
+    def from_wells(cls, wells):
+        """
+        Create the kernel of the given Well agents.
+
+        Parameters
+        ----------
+        wells : list
+            The Well agents.
+
+        Returns
+        -------
+        WellKernel
+            The kernel, where the wells are in the given order.
+
+        """
+        names = ("r", "k", "sy", "rho", "g", "eff_pump", "eff_well")
+        return cls(
+            *(
+                np.array([getattr(w, name) for w in wells], dtype=float)
+                for name in names
+            )
+        )
+
+    def step(
+        self, st, l_wt, pumping_days, withdrawal, dwl, pumping_rate, l_pr, idx=None
+    ):
+        """
+        Calculate the states and the energy consumption of the wells.
+
+        Parameters
+        ----------
+        st : 1d array
+            The saturated thickness [m] of each well.
+        l_wt : 1d array
+            The water table lift [m] of each well.
+        pumping_days : 1d array
+            The pumping days of each well.
+        withdrawal : 1d array
+            The withdrawal [m-ha] of each well.
+        dwl : 1d array
+            The change in the water level [m] of each well.
+        pumping_rate : 1d array
+            The pumping rate [m-ha/day] of each well.
+        l_pr : 1d array
+            The loss due to pressurization [m] of each well.
+        idx : 1d array, optional
+            The positions of the given wells in the kernel. The default is None
+            (all the wells in order).
+
+        Returns
+        -------
+        tuple
+            The updated st, l_wt, and transmissivity (tr [m²/day]) and the
+            energy consumption (e [PJ]) of the wells.
+
+        """
+        k, eff_well, r2_sy, e_coef = self.k, self.eff_well, self.r2_sy, self.e_coef
+        if idx is not None:
+            k, eff_well, r2_sy, e_coef = k[idx], eff_well[idx], r2_sy[idx], e_coef[idx]
+        l_wt = l_wt - dwl
+        st = st + dwl
+        tr = st * k  # Update Transmissivity
+        tr = np.where(tr < 0.001, 0.001, tr)  # cannot divided by zero
+
+        fpitr = 4 * np.pi * tr
+        ftrd = 4 * tr * pumping_days
+        l_wd_l_cd = (
+            pumping_rate
+            / fpitr
+            * (-0.5772 - np.log(r2_sy / ftrd))
+            * M_HA_2_M3
+            / eff_well
+        )
+        l_t = l_wt + l_wd_l_cd + l_pr
+        e = e_coef * withdrawal * l_t  # PJ
+        return st, l_wt, tr, e
+
+    def step_wells(self, wells, withdrawal, dwl, pumping_rate, l_pr):
+        """
+        Step the Well agents of the kernel in one pass as Well.step() of each
+        well, where pumping_days remains fixed.
+
+        Parameters
+        ----------
+        wells : list
+            The Well agents in the order of the kernel.
+        withdrawal, dwl, pumping_rate, l_pr : 1d array
+            See step().
+
+        Returns
+        -------
+        1d array
+            The energy consumption [PJ] of the wells.
+
+        """
+        st = np.array([well.st for well in wells], dtype=float)
+        l_wt = np.array([well.l_wt for well in wells], dtype=float)
+        pumping_days = np.array([well.pumping_days for well in wells], dtype=float)
+        st, l_wt, tr, e = self.step(
+            st, l_wt, pumping_days, withdrawal, dwl, pumping_rate, l_pr
+        )
+        for i, well in enumerate(wells):
+            well.t += 1
+            well.st = st[i]
+            well.l_wt = l_wt[i]
+            well.tr = tr[i]
+            well.withdrawal = withdrawal[i]
+            well.pumping_rate = pumping_rate[i]
+            well.e = e[i]
+        return e
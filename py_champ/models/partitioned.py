@@ -0,0 +1,325 @@
+import multiprocessing
+import os
+import traceback
+
+import numpy as np
+import pandas as pd
+
+from .sd6_model import SD6Model
+
+
+def get_partitions(behaviors_dict, wells_dict, shared_config=None):
+    """
+    Split the behavior agents into independent groups. Two agents are in
+    the same group if their wells draw from the same aquifer or one is in
+    the social network of the other (directly or through other agents).
+    The groups only interact through their own aquifers.
+
+    Parameters
+    ----------
+    behaviors_dict : dict
+        Settings about the behaviors, mapped by their IDs. See SD6Model.
+    wells_dict : dict
+        Settings about the wells, mapped by their IDs. See SD6Model.
+    shared_config : dict, optional
+        The shared settings of SD6Model, which may override the aquifer_id
+        of the wells. The default is None.
+
+    Returns
+    -------
+    list
+        The groups (lists of behavior ids in the order of behaviors_dict),
+        sorted by their first agents.
+
+    """
+    config_well = (shared_config or {}).get("well", {})
+    parent = {bid: bid for bid in behaviors_dict}
+
+    def find(bid):
+        while parent[bid] != bid:
+            parent[bid] = parent[parent[bid]]
+            bid = parent[bid]
+        return bid
+
+    def union(bid1, bid2):
+        root1, root2 = find(bid1), find(bid2)
+        if root1 != root2:
+            parent[root2] = root1
+
+    aquifer_owners = {}
+    for bid, behavior_dict in behaviors_dict.items():
+        for wid in behavior_dict["well_ids"]:
+            aq_id = config_well.get("aquifer_id", wells_dict[wid]["aquifer_id"])
+            union(aquifer_owners.setdefault(aq_id, bid), bid)
+        for neighbor_id in behavior_dict["behavior_ids_in_network"]:
+            if neighbor_id in parent:
+                union(bid, neighbor_id)
+
+    groups = {}
+    for bid in behaviors_dict:
+        groups.setdefault(find(bid), []).append(bid)
+    return list(groups.values())
+
+
+class PartitionedSD6Model:
+    """
+    Run an SD6Model as independent sub-models in separate processes. The
+    behavior agents are split by aquifer connectivity and social network
+    (see get_partitions()), and each group becomes a sub-model with its own
+    fields, wells, and aquifers. The sub-models are distributed over
+    n_workers processes, where each process keeps its sub-models over the
+    simulation. The processes are synchronized at every step after the
+    annual aquifer update, when the aquifer states are gathered
+    (aquifer_records).
+
+    Each sub-model has its own random generator seeded from the given seed
+    and the index of its group, so a run is reproducible for the same inputs
+    regardless of n_workers. It is not identical to the single SD6Model,
+    which draws the random numbers of all agents from one generator, unless
+    there is only one group.
+
+    The aquifers without wells are simulated in the first sub-model. The
+    processes are spawned, so a script creating the model must guard its
+    entry point with ``if __name__ == "__main__":``.
+
+    Parameters
+    ----------
+    aquifers_dict, fields_dict, wells_dict, behaviors_dict :
+        See SD6Model.
+    n_workers : int, optional
+        The number of processes. If 0, the sub-models are run in this
+        process one after another. The default is None (the number of cores
+        or groups, whichever is smaller).
+    model_class : class, optional
+        The class of the sub-models. The default is SD6Model.
+    seed : int, optional
+        The seed of the random generators. The default is None.
+    **kwargs :
+        The other arguments of model_class (e.g., pars, crop_options,
+        tech_options, area_split, finances_dict, and prec_aw_step). They
+        must be picklable if n_workers is not 0.
+
+    Attributes
+    ----------
+    partitions : list
+        The behavior ids of each sub-model.
+    aquifer_records : list
+        The states ("withdrawal", "st", and "dwl") of each aquifer at each
+        step.
+
+    Examples
+    --------
+    >>> m = PartitionedSD6Model(
+    >>>     aquifers_dict=..., fields_dict=..., wells_dict=...,
+    >>>     behaviors_dict=..., n_workers=8, seed=3, pars=..., ...
+    >>> )
+    >>> for _ in range(10):
+    >>>     m.step()
+    >>> df = m.get_agent_vars_dataframe()
+    >>> m.end()
+    """
+
+    def __init__(
+        self,
+        aquifers_dict,
+        fields_dict,
+        wells_dict,
+        behaviors_dict,
+        n_workers=None,
+        model_class=SD6Model,
+        seed=None,
+        **kwargs,
+    ):
+        shared_config = kwargs.get("shared_config")
+        config_well = (shared_config or {}).get("well", {})
+        self.partitions = get_partitions(behaviors_dict, wells_dict, shared_config)
+        n_parts = len(self.partitions)
+        if n_workers is None:
+            n_workers = min(os.cpu_count(), n_parts)
+        if n_workers < 0:
+            raise ValueError("n_workers must be a non-negative integer or None.")
+        self.n_workers = min(n_workers, n_parts)
+
+        # Inputs of the sub-models
+        if n_parts == 1:
+            seeds = [seed]
+        else:
+            seeds = np.random.SeedSequence(seed).generate_state(n_parts).tolist()
+        assigned = set()
+        inputs = []
+        for bids, part_seed in zip(self.partitions, seeds, strict=True):
+            fids = [fid for bid in bids for fid in behaviors_dict[bid]["field_ids"]]
+            wids = [wid for bid in bids for wid in behaviors_dict[bid]["well_ids"]]
+            aq_ids = {
+                config_well.get("aquifer_id", wells_dict[wid]["aquifer_id"])
+                for wid in wids
+            }
+            assigned |= aq_ids
+            inputs.append(
+                {
+                    "aquifers_dict": {
+                        k: v for k, v in aquifers_dict.items() if k in aq_ids
+                    },
+                    "fields_dict": {fid: fields_dict[fid] for fid in fids},
+                    "wells_dict": {wid: wells_dict[wid] for wid in wids},
+                    "behaviors_dict": {bid: behaviors_dict[bid] for bid in bids},
+                    "seed": part_seed,
+                    **kwargs,
+                }
+            )
+        for aq_id, aquifer_dict in aquifers_dict.items():
+            if aq_id not in assigned:
+                inputs[0]["aquifers_dict"][aq_id] = aquifer_dict
+
+        self.aquifer_records = []
+        self.running = True
+        if self.n_workers == 0:
+            self._models = [model_class(**inp) for inp in inputs]
+            self._conns = []
+            self._processes = []
+            return
+
+        # Assign the largest groups first to the least loaded process.
+        loads = [0] * self.n_workers
+        worker_inputs = [[] for _ in range(self.n_workers)]
+        order = sorted(range(n_parts), key=lambda k: -len(self.partitions[k]))
+        for k in order:
+            w = int(np.argmin(loads))
+            loads[w] += len(self.partitions[k])
+            worker_inputs[w].append(inputs[k])
+
+        ctx = multiprocessing.get_context("spawn")
+        self._models = []
+        self._conns = []
+        self._processes = []
+        for w_inputs in worker_inputs:
+            conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=_run_worker, args=(child_conn, model_class, w_inputs)
+            )
+            process.start()
+            self._conns.append(conn)
+            self._processes.append(process)
+        self._gather("init")
+
+    def step(self):
+        """
+        Advance all the sub-models by one step and gather the aquifer states
+        after the annual aquifer update.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self._conns:
+            results = self._gather("step")
+        else:
+            results = [_step_models(self._models)]
+        aquifers = {}
+        running = False
+        for aquifers_w, running_w in results:
+            aquifers.update(aquifers_w)
+            running |= running_w
+        self.aquifer_records.append(aquifers)
+        self.running = running
+
+    def get_agent_vars_dataframe(self):
+        """
+        Get the agent variables collected by all the sub-models.
+
+        Returns
+        -------
+        pd.DataFrame
+            The agent variables (see SD6Model.datacollector).
+
+        """
+        if self._conns:
+            dfs = [df for dfs_w in self._gather("data") for df in dfs_w]
+        else:
+            dfs = _get_dfs(self._models)
+        return pd.concat(dfs).sort_index()
+
+    def end(self):
+        """
+        End all the sub-models and shut down the processes.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self._conns:
+            self._gather("end")
+            for process in self._processes:
+                process.join()
+            self._conns = []
+            self._processes = []
+        else:
+            for m in self._models:
+                m.end()
+
+    def _gather(self, command):
+        """Send a command to all the processes and wait for their results."""
+        for conn in self._conns:
+            conn.send(command)
+        results = [conn.recv() for conn in self._conns]
+        for status, result in results:
+            if status == "error":
+                for process in self._processes:
+                    process.terminate()
+                self._conns = []
+                self._processes = []
+                raise RuntimeError(f"A sub-model failed:\n{result}")
+        return [result for _, result in results]
+
+
+def _run_worker(conn, model_class, inputs):
+    """
+    Run the sub-models of a process until it receives "end". If a command
+    fails, its traceback is sent to the main process, which terminates all
+    the processes (see PartitionedSD6Model._gather()), and the error is
+    re-raised.
+    """
+    models = []
+    while True:
+        command = conn.recv()
+        try:
+            if command == "init":
+                models = [model_class(**inp) for inp in inputs]
+                result = None
+            elif command == "step":
+                result = _step_models(models)
+            elif command == "data":
+                result = _get_dfs(models)
+            elif command == "end":
+                for m in models:
+                    m.end()
+                result = None
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
+            raise
+        conn.send(("ok", result))
+        if command == "end":
+            break
+
+
+def _step_models(models):
+    """Step the sub-models and return their aquifer states and status."""
+    aquifers = {}
+    running = False
+    for m in models:
+        m.step()
+        running |= m.running
+        for aq_id, aquifer in m.aquifers.items():
+            aquifers[aq_id] = {
+                "withdrawal": aquifer.withdrawal,
+                "st": aquifer.st,
+                "dwl": aquifer.dwl,
+            }
+    return aquifers, running
+
+
+def _get_dfs(models):
+    """Get the agent variables collected by the sub-models."""
+    return [m.datacollector.get_agent_vars_dataframe() for m in models]
@@ -6,11 +6,17 @@ import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
-from ..components.aquifer import Aquifer
-from ..components.behavior import Behavior
+from ..components.aquifer import (
+    Aquifer,
+    get_well_aquifers,
+    step_aquifers,
+    sum_withdrawals,
+)
+from ..components.behavior import Behavior, step_batch
 from ..components.field import Field
 from ..components.finance import Finance
 from ..components.optimization import Optimization
+from ..components.state_store import StateStore
 from ..components.well import Well
 from ..utility.util import BaseSchedulerByTypeFiltered, Indicator, TimeRecorder
 
@@ -89,6 +95,28 @@ class SD6Model(mesa.Model):
     **kwargs : dict
         Additional keyword arguments including time-step data like crop price, type, irrigation depth, etc.
         - 'crop_price_step': crop_price_step
+        - 'decision_cache': A DecisionCache shared by all behavior agents to
+          reuse the optimal solutions of identical decision problems. The
+          default is None (no caching).
+        - 'model_templates': A ModelTemplates shared by all behavior agents
+          to copy the optimization models of the same structure instead of
+          building them from scratch. The default is None.
+        - 'batch_solve': If True, the optimization models of the behavior
+          agents in the same CONSUMAT state are solved together in one
+          block-diagonal model at each step (see step_batch()). The default
+          is False.
+        - 'solver_budget': A SolverBudget shared by all behavior agents to
+          assign the TimeLimit and MIPGap of each solve from a wall-clock
+          budget per step. The default is None (the Gurobi settings of the
+          agents are used as they are).
+        - 'decision_pool': A DecisionPool of worker processes in which the
+          optimization models of the behavior agents are solved in parallel
+          at each step before the decisions are applied in order (see
+          step_batch()). The pool is closed by end(). The default is None.
+        - 'state_store': If True, the states of the fields, wells, and
+          aquifers are stored in arrays (see StateStore), and each component
+          type is stepped in one vectorized call at each step. The agents
+          are kept as views of the arrays. The default is False.
 
     Attributes
     ----------
@@ -171,6 +199,11 @@ class SD6Model(mesa.Model):
         self.crop_price_step = kwargs.get("crop_price_step")  # [finance_id][year][crop]
         self.irr_depth_step = kwargs.get("irr_depth_step")
         self.field_type_step = kwargs.get("field_type_step")
+        self.decision_cache = kwargs.get("decision_cache")
+        self.model_templates = kwargs.get("model_templates")
+        self.batch_solve = kwargs.get("batch_solve", False)
+        self.solver_budget = kwargs.get("solver_budget")
+        self.decision_pool = kwargs.get("decision_pool")
 
         # These three variables will be used to define the dimension of the opt
         self.area_split = area_split  # n_s
@@ -261,6 +294,8 @@ class SD6Model(mesa.Model):
             wells[wid] = agt_well
             self.schedule.add(agt_well)
         self.wells = wells
+        # The aquifer position of each well for the aquifer updates
+        self.well_aquifers = get_well_aquifers(self.wells, self.aquifers)
 
         # Initialize behavior and finance agents and append them to the schedule
         ## Don't use parallelization. It is slower!
@@ -317,6 +352,13 @@ class SD6Model(mesa.Model):
         self.behaviors = behaviors
         self.finances = finances
 
+        # Move the states of the fields, wells, and aquifers into arrays.
+        self.state_store = None
+        if kwargs.get("state_store", False):
+            self.state_store = StateStore(
+                self.fields, self.wells, self.aquifers, crop_options, tech_options
+            )
+
         if self.crop_price_step is not None:
             for _unique_id, finance in self.finances.items():
                 crop_prices = self.crop_price_step.get(finance.finance_id)
@@ -485,26 +527,51 @@ class SD6Model(mesa.Model):
             # Save the decisions from the previous step. (very important)
             behavior.pre_dm_sols = behavior.dm_sols
 
+        # Split the solver budget of the step among the behavioral agents.
+        if self.solver_budget is not None:
+            self.solver_budget.start_step(list(self.behaviors))
+
         # Simulation
         # Exercute step() of all behavioral agents in a for loop
         # Note: fields, wells, and finance are simulation within a behavioral
         # agent to better accomondate heterogeneity among behavioral agents
-        self.schedule.step(agt_type="Behavior")  # Parallelization makes it slower!
-
-        ##### Nature Environment (aquifers)
-        for aq_id, aquifer in self.aquifers.items():
-            withdrawal = 0.0
-            # Collect all the well withdrawals of a given aquifer
-            withdrawal += sum(
+        if (
+            self.batch_solve
+            or self.decision_pool is not None
+            or self.state_store is not None
+        ):
+            # Solve the optimization models of the agents in batches or in
+            # the worker processes of the decision pool, and simulate the
+            # fields and wells in the state store.
+            step_batch(
                 [
-                    well.withdrawal if well.aquifer_id == aq_id else 0.0
-                    for _, well in self.wells.items()
-                ]
+                    agent
+                    for agent in self.schedule.agents
+                    if agent.agt_type == "Behavior"
+                ],
+                pool=self.decision_pool,
+                merge=self.batch_solve,
+                store=self.state_store,
             )
-            # withdrawal += sum([well.withdrawal if well.aquifer_id==aq_id else 0 \
-            #                for _, well in self.wells.items()])
-            # Update aquifer
-            aquifer.step(withdrawal)
+            self.schedule.steps += 1
+            self.schedule.time += 1
+        else:
+            self.schedule.step(agt_type="Behavior")  # Parallelization makes it slower!
+
+        ##### Nature Environment (aquifers)
+        # Collect all the well withdrawals of each aquifer
+        if self.state_store is None:
+            withdrawals = [well.withdrawal for _, well in self.wells.items()]
+        else:
+            withdrawals = self.state_store.well_states.get("withdrawal", [])
+        withdrawal = sum_withdrawals(
+            self.well_aquifers, withdrawals, len(self.aquifers)
+        )
+        # Update aquifers
+        if self.state_store is None:
+            step_aquifers(list(self.aquifers.values()), withdrawal)
+        else:
+            self.state_store.step_aquifers(withdrawal)
 
         # Collect df_sys and print info
         self.datacollector.collect(self)
@@ -525,6 +592,11 @@ class SD6Model(mesa.Model):
         """Depose the Gurobi environment, ensuring that it is executed only when
         the instance is no longer needed.
         """
+        # Release the optimization models kept by the behavior agents.
+        for behavior in self.behaviors.values():
+            behavior.dispose_dm()
+        if self.decision_pool is not None:
+            self.decision_pool.close()
         self.gpenv.dispose()
 
     @staticmethod
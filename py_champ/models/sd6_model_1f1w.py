@@ -6,7 +6,12 @@ import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
-from ..components.aquifer import Aquifer
+from ..components.aquifer import (
+    Aquifer,
+    get_well_aquifers,
+    step_aquifers,
+    sum_withdrawals,
+)
 from ..components.behavior import Behavior4SingleFieldAndWell
 from ..components.field import Field4SingleFieldAndWell
 from ..components.finance import Finance4SingleFieldAndWell
@@ -155,6 +160,8 @@ class SD6Model4SingleFieldAndWell(mesa.Model):
             wells[wid] = agt_well
             self.schedule.add(agt_well)
         self.wells = wells
+        # The aquifer position of each well for the aquifer updates
+        self.well_aquifers = get_well_aquifers(self.wells, self.aquifers)
 
         # Initialize behavior and finance agents and append them to the schedule
         ## Don't use parallelization. It is slower!
@@ -320,17 +327,14 @@ class SD6Model4SingleFieldAndWell(mesa.Model):
         self.schedule.step(agt_type="Behavior")  # Parallelization makes it slower!
 
         ##### Nature Environment (aquifers)
-        for aq_id, aquifer in self.aquifers.items():
-            withdrawal = 0.0
-            # Collect all the well withdrawals of a given aquifer
-            withdrawal += sum(
-                [
-                    well.withdrawal if well.aquifer_id == aq_id else 0.0
-                    for _, well in self.wells.items()
-                ]
-            )
-            # Update aquifer
-            aquifer.step(withdrawal)
+        # Collect all the well withdrawals of each aquifer
+        withdrawal = sum_withdrawals(
+            self.well_aquifers,
+            [well.withdrawal for _, well in self.wells.items()],
+            len(self.aquifers),
+        )
+        # Update aquifers
+        step_aquifers(list(self.aquifers.values()), withdrawal)
 
         # Collect df_sys and print info
         self.datacollector.collect(self)
@@ -0,0 +1,283 @@
+from pathlib import Path
+
+import dill
+import gurobipy as gp
+import numpy as np
+import pytest
+
+from py_champ.models.sd6_model import SD6Model
+
+# The settings of a farmer in the SD6 model with one field and one well
+CROP_OPTIONS = ["corn", "sorghum", "soybeans", "wheat", "fallow"]
+TECH_OPTIONS = ["center pivot LEPA"]
+FIELD = {
+    "field_area": 50.0,
+    "tech_pumping_rate_coefs": {"center pivot LEPA": [0.0058, 0.212206, 12.65]},
+    "water_yield_curves": {
+        "corn": [463.3923, 77.7756, -3.3901, 6.0872, -1.7325, 0.1319],
+        "sorghum": [194.0593, 60.152, -1.9821, 3.5579, -0.5966, 0.6198],
+        "soybeans": [146.3238, 68.7955, -2.43, 4.3674, -0.9623, 0.1186],
+        "wheat": [141.1518, 69.4979, -2.1377, 3.5254, -0.4535, 0.3493],
+        "fallow": [0.0, 100.0, 0, 0, 0.0, 0],
+    },
+}
+WELL = {
+    "st": 23.3773702,
+    "l_wt": 43.45352,
+    "r": 0.2032,
+    "k": 48.655224,
+    "sy": 0.0655,
+    "eff_pump": 0.77,
+    "eff_well": 0.5,
+    "pumping_days": 90,
+    "rho": 1000.0,
+    "g": 9.8016,
+}
+FINANCE = {
+    "crop_change_cost": {},
+    "crop_cost": dict.fromkeys(CROP_OPTIONS, 0.0),
+    "crop_price": {
+        "corn": 5.394667,
+        "sorghum": 6.598655566,
+        "soybeans": 13.3170448,
+        "wheat": 8.28157881,
+        "fallow": 0.0,
+    },
+    "energy_price": 2777.777778,
+    "irr_tech_change_cost": {},
+    "irr_tech_operational_cost": {"center pivot LEPA": 1.876},
+}
+PREC_AW = {"corn": 17.85, "sorghum": 18.09, "soybeans": 18.03, "wheat": 21.17}
+PREC_AW["fallow"] = 0.0
+GUROBI_KWARGS = {"LogToConsole": 0, "OutputFlag": 0, "MIPGap": 1e-9}
+SD6_INPUTS = Path(__file__).parents[1] / "examples" / "SD6 Model" / "Inputs_SD6.pkl"
+SD6_PARS = {
+    "perceived_risk": 0.7539,
+    "forecast_trust": 0.8032,
+    "sa_thre": 0.1421,
+    "un_thre": 0.0773,
+}
+
+
+@pytest.fixture
+def build_dm():
+    """
+    Return a function building a decision model of the farmer with the given
+    optimization class, where the keyword arguments override the defaults
+    below. The water right is given by wr as (wr_depth, time_window,
+    remaining_tw, remaining_wr), a given i_crop can be a crop name, and ini
+    updates the arguments of setup_ini_model().
+    """
+    dms = []
+
+    def build(cls, **kwargs):
+        args = {
+            "horizon": 1,
+            "prec_aw": PREC_AW,
+            "i_crop": None,
+            "i_te": None,
+            "pre_i_crop": "corn",
+            "wr": (60.96, 1, None, None),
+            "dwl": -0.4,
+            "ini": {},
+        }
+        args.update(kwargs)
+        wr_depth, time_window, remaining_tw, remaining_wr = args["wr"]
+        if isinstance(args["i_crop"], str):
+            i_crop = np.zeros((1, len(CROP_OPTIONS), 1))
+            i_crop[0, CROP_OPTIONS.index(args["i_crop"]), 0] = 1
+            args["i_crop"] = i_crop
+        dm = cls(unique_id="farmer", log_to_console=0, gpenv=True)
+        dm.setup_ini_model(
+            horizon=args["horizon"],
+            crop_options=CROP_OPTIONS,
+            tech_options=TECH_OPTIONS,
+            gurobi_kwargs=dict(GUROBI_KWARGS),
+            **args["ini"],
+        )
+        dm.setup_constr_field(
+            field_id="f1",
+            field_area=FIELD["field_area"],
+            prec_aw=args["prec_aw"],
+            water_yield_curves=FIELD["water_yield_curves"],
+            tech_pumping_rate_coefs=FIELD["tech_pumping_rate_coefs"],
+            pre_i_crop=args["pre_i_crop"],
+            pre_i_te="center pivot LEPA",
+            i_crop=args["i_crop"],
+            i_te=args["i_te"],
+        )
+        dm.setup_constr_well(well_id="w1", dwl=args["dwl"], **WELL)
+        dm.setup_constr_wr(
+            water_right_id="wr",
+            wr_depth=wr_depth,
+            time_window=time_window,
+            remaining_tw=remaining_tw,
+            remaining_wr=remaining_wr,
+        )
+        dm.setup_constr_finance(FINANCE)
+        dm.setup_obj()
+        dm.finish_setup(display_summary=False)
+        dms.append(dm)
+        return dm
+
+    yield build
+    for dm in dms:
+        dm.depose_gp_env()
+
+
+@pytest.fixture
+def build_1f1w_dm():
+    """
+    Return a function building a decision model of the farmer with the given
+    single field and well optimization class. See build_dm().
+    """
+    env = gp.Env(empty=True)
+    env.setParam("OutputFlag", 0)
+    env.start()
+    dms = []
+
+    def build(cls, horizon=1, i_crop=None, wr=(60.96, 1, None, None), dwl=-0.4):
+        wr_depth, time_window, remaining_tw, remaining_wr = wr
+        if isinstance(i_crop, str):
+            i_crop_ = np.zeros((len(CROP_OPTIONS), 1))
+            i_crop_[CROP_OPTIONS.index(i_crop), 0] = 1
+            i_crop = i_crop_
+        tr = WELL["st"] * WELL["k"]
+        b = (
+            -0.5772
+            - np.log(WELL["r"] ** 2 * WELL["sy"] / (4 * tr * WELL["pumping_days"]))
+        ) / (4 * np.pi * tr * WELL["eff_well"])
+        dm = cls()
+        dm.setup_ini_model(
+            unique_id="farmer", gpenv=env, horizon=horizon, crop_options=CROP_OPTIONS
+        )
+        dm.setup_constr_field(
+            field_id="f1",
+            field_area=FIELD["field_area"],
+            prec_aw=PREC_AW,
+            water_yield_curves=FIELD["water_yield_curves"],
+            i_crop=i_crop,
+        )
+        dm.setup_constr_well(
+            well_id="w1",
+            dwl=dwl,
+            b=b,
+            l_wt=WELL["l_wt"],
+            eff_pump=WELL["eff_pump"],
+            rho=WELL["rho"],
+            g=WELL["g"],
+        )
+        dm.setup_constr_wr(
+            water_right_id="wr",
+            wr_depth=wr_depth,
+            time_window=time_window,
+            remaining_tw=remaining_tw,
+            remaining_wr=remaining_wr,
+        )
+        dm.setup_constr_finance(FINANCE)
+        dm.setup_obj()
+        dm.finish_setup(display_summary=False)
+        dms.append(dm)
+        return dm
+
+    yield build
+    for dm in dms:
+        if dm.model is not None:
+            dm.model.dispose()
+    env.dispose()
+
+
+@pytest.fixture
+def sd6_kwargs():
+    """
+    Return a function giving the SD6Model arguments of the first n_behaviors
+    farmers with horizon 1, where dm updates the decision-making settings of
+    the farmers.
+    """
+
+    def get(n_behaviors=6, dm=None):
+        with open(SD6_INPUTS, "rb") as f:
+            (
+                aquifers,
+                fields,
+                wells,
+                finances,
+                behaviors,
+                prec_aw,
+                crop_price,
+                config,
+            ) = dill.load(f)
+        bids = list(behaviors)[:n_behaviors]
+        behaviors = {bid: behaviors[bid] for bid in bids}
+        for b in behaviors.values():
+            b["behavior_ids_in_network"] = [
+                bid for bid in b["behavior_ids_in_network"] if bid in behaviors
+            ] or [bid for bid in bids if bid not in b["field_ids"]][:2]
+            b["decision_making"]["horizon"] = 1
+            b["decision_making"].update(dm or {})
+        fids = {fid for b in behaviors.values() for fid in b["field_ids"]}
+        wids = {wid for b in behaviors.values() for wid in b["well_ids"]}
+        return {
+            "pars": SD6_PARS,
+            "crop_options": CROP_OPTIONS,
+            "tech_options": TECH_OPTIONS,
+            "area_split": 1,
+            "aquifers_dict": aquifers,
+            "fields_dict": {k: v for k, v in fields.items() if k in fids},
+            "wells_dict": {k: v for k, v in wells.items() if k in wids},
+            "finances_dict": finances,
+            "behaviors_dict": behaviors,
+            "prec_aw_step": prec_aw,
+            "init_year": 2007,
+            "end_year": 2022,
+            "show_step": False,
+            "seed": 3,
+            "shared_config": config,
+            "show_initialization": False,
+            "crop_price_step": crop_price,
+        }
+
+    return get
+
+
+@pytest.fixture
+def run_sd6(sd6_kwargs):
+    """
+    Return a function running the SD6 model of the first n_behaviors farmers
+    for n_steps (see sd6_kwargs()), where the keyword arguments are passed to
+    SD6Model. The function returns the model and its agent dataframe.
+    """
+
+    def run(n_steps=2, n_behaviors=6, dm=None, **kwargs):
+        m = SD6Model(**sd6_kwargs(n_behaviors, dm), **kwargs)
+        for _ in range(n_steps):
+            m.step()
+        m.end()
+        df = m.datacollector.get_agent_vars_dataframe().reset_index()
+        return m, df
+
+    return run
+
+
+@pytest.fixture
+def assert_same_sd6():
+    """
+    Return a function asserting that two agent dataframes of run_sd6() have
+    the same states and crops, and the same withdrawals and profits up to the
+    relative tolerance rtol.
+    """
+
+    def check(df, ref, rtol=0):
+        assert df["state"].dropna().tolist() == ref["state"].dropna().tolist()
+        np.testing.assert_array_equal(
+            np.stack(df["crop"].dropna()), np.stack(ref["crop"].dropna())
+        )
+        for col in ("withdrawal", "profit"):
+            np.testing.assert_allclose(
+                df[col].dropna().to_numpy(float),
+                ref[col].dropna().to_numpy(float),
+                rtol=rtol,
+                err_msg=col,
+            )
+
+    return check
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from py_champ.components.optimization import Optimization
+
+
+def solve(build_dm, horizon, approx_points=None, formulation="nonconvex", **kwargs):
+    ini = {"formulation": formulation}
+    if approx_points is not None:
+        ini |= {"approx_horizon": True, "approx_points": approx_points}
+    dm = build_dm(Optimization, horizon=horizon, ini=ini, **kwargs)
+    dm.solve(display_report=False)
+    return dm
+
+
+def test_approx_points_args(build_dm):
+    with pytest.raises(ValueError, match="approx_points"):
+        solve(build_dm, 4, approx_points=1)
+
+
+def test_horizon_interp(build_dm):
+    dm = build_dm(
+        Optimization, horizon=5, ini={"approx_horizon": True, "approx_points": 3}
+    )
+    assert dm.n_h == 3
+    np.testing.assert_array_equal(dm.approx_years, [0, 2, 4])
+    np.testing.assert_allclose(dm.horizon_interp.sum(axis=1), 1)
+    np.testing.assert_array_equal(dm.horizon_interp[[0, 2, 4]], np.eye(3))
+    np.testing.assert_allclose(dm.horizon_interp[1], [0.5, 0.5, 0])
+
+
+def test_approx_points_not_needed(build_dm):
+    # No approximation if the horizon is not longer than approx_points.
+    ref = solve(build_dm, 2)
+    dm = solve(build_dm, 2, approx_points=3)
+    assert dm.approx_years is None
+    assert dm.sols["obj"] == ref.sols["obj"]
+
+
+# The nonconvex model with three points exceeds a size-limited license.
+@pytest.mark.parametrize("approx_points, formulation", [(2, "nonconvex"), (3, "pwl")])
+def test_approx_points_wr(build_dm, approx_points, formulation):
+    # A water right over the whole horizon
+    wr = (30.0, 5, None, None)
+    dm = solve(build_dm, 5, approx_points, formulation, wr=wr)
+    assert dm.n_h == approx_points
+    irr = dm.horizon_interp @ dm.sols["irr_depth"].sum(axis=(0, 1))
+    assert irr.sum() <= wr[0] + 1e-6
+    # The water right is binding without the time window.
+    free = solve(build_dm, 5, approx_points, formulation)
+    irr_free = free.horizon_interp @ free.sols["irr_depth"].sum(axis=(0, 1))
+    assert irr_free.sum() > wr[0]
+    assert dm.sols["obj"] < free.sols["obj"]
+
+
+def test_approx_points_sd6(run_sd6, assert_same_sd6):
+    # The approximation is only applied to horizons longer than the points.
+    _, ref = run_sd6(n_steps=3)
+    _, df = run_sd6(n_steps=3, dm={"approx_points": 2})
+    assert_same_sd6(df, ref)
+    _, df = run_sd6(n_steps=3, dm={"horizon": 3, "approx_points": 2})
+    assert df["state"].notna().any()
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import mesa
+import numpy as np
+import pytest
+
+from py_champ.components.aquifer import (
+    Aquifer,
+    get_well_aquifers,
+    step_aquifers,
+    sum_withdrawals,
+)
+from py_champ.components.state_store import StateStore
+
+
+def get_aquifers(model, aq_a=0.0003, aq_b=-0.14):
+    return {
+        f"aq{i}": Aquifer(
+            f"aq{i}",
+            model,
+            {"aq_a": aq_a, "aq_b": aq_b, "init": {"st": st, "dwl": -0.4}},
+        )
+        for i, st in enumerate([20.0, 0.1])
+    }
+
+
+def test_sum_withdrawals():
+    aquifers = {"aq0": None, "aq1": None}
+    wells = {
+        f"w{i}": SimpleNamespace(aquifer_id=aq_id)
+        for i, aq_id in enumerate(["aq1", "aq0", "aq1", "other"])
+    }
+    well_aquifers = get_well_aquifers(wells, aquifers)
+    np.testing.assert_array_equal(well_aquifers, [1, 0, 1, 2])
+    withdrawal = sum_withdrawals(well_aquifers, [1.0, 2.0, 3.0, 4.0], 2)
+    np.testing.assert_array_equal(withdrawal, [2.0, 4.0])
+
+
+def test_step_aquifers():
+    refs = list(get_aquifers(mesa.Model()).values())
+    aquifers = list(get_aquifers(mesa.Model()).values())
+    withdrawal = np.array([500.0, 1000.0])
+    # The saturated thickness of aq1 becomes negative.
+    with pytest.warns(UserWarning, match="aq1"):
+        dwl_ref = [aquifer.step(w) for aquifer, w in zip(refs, withdrawal, strict=True)]
+    with pytest.warns(UserWarning, match="aq1"):
+        dwl = step_aquifers(aquifers, withdrawal)
+    np.testing.assert_array_equal(dwl, dwl_ref)
+    for ref, aquifer in zip(refs, aquifers, strict=True):
+        for attr in ("t", "st", "dwl", "withdrawal", "dwl_list"):
+            assert getattr(aquifer, attr) == getattr(ref, attr), attr
+
+
+def test_missing_static_inflow():
+    aquifers = get_aquifers(mesa.Model(), aq_a=None)
+    with pytest.raises(ValueError, match="aq0"):
+        step_aquifers(list(aquifers.values()), np.zeros(2))
+    with pytest.raises(ValueError, match="aq0"):
+        StateStore({}, {}, aquifers, [], [])
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from py_champ.components.optimization import Optimization
+from py_champ.components.solver import solve_model, solve_models
+
+
+@pytest.mark.parametrize(
+    "dm_kwargs",
+    [
+        # MAX and PWL constraints
+        [
+            {"i_crop": "corn", "ini": {"formulation": "pwl"}},
+            {"wr": (10.0, 1, None, None), "ini": {"formulation": "pwl"}},
+        ],
+        # Quadratic constraints, where the size-limited license only allows
+        # a single model.
+        [{"i_crop": "wheat", "i_te": np.ones(1)}],
+    ],
+)
+def test_solve_models(build_dm, dm_kwargs):
+    models = [build_dm(Optimization, **kwargs).model for kwargs in dm_kwargs]
+    results = solve_models(models, MIPGap=1e-9, OutputFlag=0)
+    for m, result in zip(models, results, strict=True):
+        ref = solve_model(m, MIPGap=1e-9, OutputFlag=0)
+        np.testing.assert_allclose(result.obj_val, ref.obj_val, rtol=1e-6)
+        assert len(result.x) == m.NumVars
+
+
+def test_batch_solve(run_sd6, assert_same_sd6):
+    _, ref = run_sd6(n_steps=3)
+    _, df = run_sd6(n_steps=3, batch_solve=True)
+    assert_same_sd6(df, ref)
@@ -0,0 +1,46 @@
+import pytest
+
+from py_champ.components.decision_cache import DecisionCache
+from py_champ.components.optimization import Optimization
+
+
+@pytest.mark.parametrize("batch_solve", [False, True])
+def test_decision_cache(run_sd6, assert_same_sd6, batch_solve):
+    _, ref = run_sd6(batch_solve=batch_solve)
+    cache = DecisionCache(maxsize=None)
+    _, df_miss = run_sd6(decision_cache=cache, batch_solve=batch_solve)
+    assert cache.hits == 0
+    n = len(cache)
+    # Rerun the same simulation, where all the decisions are cache hits.
+    _, df_hit = run_sd6(decision_cache=cache, batch_solve=batch_solve)
+    assert cache.hits == n
+    assert len(cache) == n
+    for df in (df_miss, df_hit):
+        assert_same_sd6(df, ref)
+
+
+def test_decision_cache_skips_non_optimal(run_sd6, monkeypatch):
+    solve = Optimization.solve
+
+    def solve_time_limit(self, *args, **kwargs):
+        solve(self, *args, **kwargs)
+        self.sols["gp_status"] = 9  # Stopped by the time limit
+
+    monkeypatch.setattr(Optimization, "solve", solve_time_limit)
+    cache = DecisionCache(maxsize=None)
+    run_sd6(decision_cache=cache)
+    assert len(cache) == 0
+    assert cache.hits == 0
+
+
+def test_decision_cache_key(run_sd6):
+    cache = DecisionCache(maxsize=None)
+    m, _ = run_sd6(n_steps=0, n_behaviors=2, decision_cache=cache)
+    behavior = next(iter(m.behaviors.values()))
+    args = behavior._get_dm_args("Deliberation", behavior.dm_sols)
+    key = behavior._get_dm_cache_key(cache, *args)
+    assert behavior._get_dm_cache_key(cache, *args) == key
+    for flag in ("dominance_pruning", "tighten_bounds"):
+        behavior.dm_dict[flag] = True
+        assert behavior._get_dm_cache_key(cache, *args) != key
+        behavior.dm_dict[flag] = False
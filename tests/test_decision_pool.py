@@ -0,0 +1,20 @@
+from py_champ.components.decision_pool import DecisionPool
+
+
+class CountingPool(DecisionPool):
+    n_submits = 0
+
+    def submit(self, job, **kwargs):
+        """Count the submitted models."""
+        self.n_submits += 1
+        return super().submit(job, **kwargs)
+
+
+def test_decision_pool(run_sd6, assert_same_sd6):
+    _, ref = run_sd6(n_steps=3)
+    with CountingPool(n_workers=2) as pool:
+        _, df = run_sd6(n_steps=3, decision_pool=pool)
+    assert pool.n_submits > 0
+    # The pool is closed by SD6Model.end().
+    assert pool._executor is None
+    assert_same_sd6(df, ref)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from py_champ.components.decomposition import OptimizationDecomposed
+from py_champ.components.optimization import Optimization
+
+
+@pytest.mark.parametrize(
+    "wr",
+    [
+        (10.0, 2, None, None),  # A time window within the horizon
+        (10.0, 5, 4, 10.0),  # A time window longer than the horizon
+        (40.0, 5, 5, 40.0),  # A non-binding time window
+    ],
+)
+def test_horizon_decomposition(build_dm, wr):
+    ref = build_dm(Optimization, horizon=2, wr=wr)
+    ref.solve(display_report=False)
+    dm = build_dm(OptimizationDecomposed, horizon=2, wr=wr)
+    dm.solve(display_report=False)
+    assert dm.fast
+    sols, ref_sols = dm.sols, ref.sols
+    assert np.array_equal(
+        np.round(sols["f1"]["i_crop"]), np.round(ref_sols["f1"]["i_crop"])
+    )
+    np.testing.assert_allclose(sols["obj"], ref_sols["obj"], rtol=1e-3)
+    # The water right of the time window is met.
+    irr = sols["irr_depth"].sum(axis=(0, 1))
+    assert irr[: wr[1]].sum() <= wr[0] + 1e-6
+    np.testing.assert_allclose(irr, ref_sols["irr_depth"].sum(axis=(0, 1)), atol=0.1)
+
+
+def test_horizon_decomposition_fall_back(build_dm, monkeypatch):
+    def fail(self):
+        raise IndexError("failed")
+
+    monkeypatch.setattr(OptimizationDecomposed, "_decompose", fail)
+    ref = build_dm(Optimization, horizon=2, wr=(10.0, 5, 4, 10.0))
+    ref.solve(display_report=False)
+    dm = build_dm(OptimizationDecomposed, horizon=2, wr=(10.0, 5, 4, 10.0))
+    with pytest.warns(UserWarning, match="decomposition failed"):
+        dm.solve(display_report=False)
+    assert not dm.fast
+    np.testing.assert_allclose(dm.sols["obj"], ref.sols["obj"], rtol=1e-6)
+
+
+@pytest.mark.parametrize("horizon, rtol", [(1, 0), (2, 1e-3)])
+def test_horizon_decomposition_sd6(run_sd6, assert_same_sd6, horizon, rtol):
+    _, ref = run_sd6(n_steps=3, dm={"horizon": horizon})
+    dm = {"horizon": horizon, "horizon_decomposition": True}
+    _, df = run_sd6(n_steps=3, dm=dm)
+    assert_same_sd6(df, ref, rtol=rtol)
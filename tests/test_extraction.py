@@ -0,0 +1,48 @@
+import gurobipy as gp
+import numpy as np
+
+from py_champ.components.optimization import ModelReport, Optimization
+
+
+def walk(d, path=()):
+    for k, v in d.items():
+        if isinstance(v, dict) and v:
+            yield from walk(v, (*path, k))
+        else:
+            yield (*path, k), v
+
+
+def get(d, path):
+    for k in path:
+        d = d[k]
+    return d
+
+
+def test_extract_sols(build_dm):
+    dm = build_dm(Optimization, horizon=2)
+    dm.solve(keep_gp_model=True, display_report=False)
+    n = 0
+    for path, v in walk(dm.vars_):
+        # The satisfactions are replaced by their post calculations.
+        if isinstance(v, (gp.MVar, gp.Var)) and path[0] != "Sa":
+            np.testing.assert_array_equal(get(dm.sols, path), v.X, err_msg=path)
+            n += 1
+    assert n > 0
+    # The variable indices are shared by the models of the same layout.
+    _, plan = dm._get_sol_plan()
+    dm2 = build_dm(Optimization, horizon=2, i_crop="corn")
+    assert dm2._get_sol_plan()[1] is plan
+
+
+def test_model_report(build_dm):
+    dm = build_dm(Optimization)
+    dm.solve(display_report=False)
+    report = dm.sols["gp_report"]
+    assert isinstance(report, ModelReport)
+    assert report._text is None  # Not formatted yet
+    text = str(report)
+    assert "Model Report" in text
+    assert "Name:   farmer" in text
+    assert "Satisfaction" in text
+    assert str(report) is text
+    assert repr(report) == text
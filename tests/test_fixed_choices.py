@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from py_champ.components.optimization import Optimization, OptimizationFixedChoices
+
+
+def solve(build_dm, fast=True, **kwargs):
+    ref = build_dm(Optimization, i_te=np.ones(1), **kwargs)
+    ref.solve(display_report=False)
+    dm = build_dm(OptimizationFixedChoices, i_te=np.ones(1), **kwargs)
+    dm.solve(display_report=False)
+    assert dm.fast == fast
+    np.testing.assert_allclose(dm.sols["obj"], ref.sols["obj"], rtol=1e-6)
+    return dm.sols, ref.sols
+
+
+@pytest.mark.parametrize(
+    ("i_crop", "wr", "horizon", "fast"),
+    [
+        ("corn", (60.96, 1, None, None), 1, True),
+        ("corn", (60.96, 1, None, None), 2, True),
+        ("corn", (10.0, 2, None, None), 2, False),  # No irrigation in year 1
+        ("corn", (0.0, 1, None, None), 1, True),  # Zero irrigation is forced
+        ("soybeans", (0.0, 2, None, None), 2, True),
+    ],
+)
+def test_fixed_choices(build_dm, i_crop, wr, horizon, fast):
+    sols, ref_sols = solve(build_dm, fast, i_crop=i_crop, wr=wr, horizon=horizon)
+    for key in ("i_crop", "i_te", "i_rainfed"):
+        assert np.array_equal(sols["f1"][key], ref_sols["f1"][key]), key
+    # The objective is flat around the optimal irrigation depth.
+    np.testing.assert_allclose(sols["irr_depth"], ref_sols["irr_depth"], atol=0.05)
+    np.testing.assert_allclose(
+        sols["f1"]["irr_depth"], ref_sols["f1"]["irr_depth"], atol=0.05
+    )
+
+
+def test_fixed_choices_rainfed(build_dm):
+    # Zero irrigation is optimal but not forced, where Gurobi returns a small
+    # positive irrigation depth that decides the rainfed field and the tech
+    # cost in Finance. Such models fall back to Optimization.
+    sols, ref_sols = solve(build_dm, False, i_crop="fallow")
+    np.testing.assert_array_equal(sols["f1"]["irr_depth"], ref_sols["f1"]["irr_depth"])
+    assert np.array_equal(sols["f1"]["i_rainfed"], ref_sols["f1"]["i_rainfed"])
+    # Rainfed if it cannot be irrigated
+    sols, ref_sols = solve(build_dm, i_crop="fallow", wr=(0.0, 1, None, None))
+    assert np.array_equal(sols["f1"]["i_rainfed"], ref_sols["f1"]["i_rainfed"])
+    assert sols["f1"]["i_rainfed"].any()
+
+
+def test_fixed_choices_sd6(run_sd6, assert_same_sd6):
+    _, ref = run_sd6(n_steps=3, n_behaviors=20)
+    _, df = run_sd6(n_steps=3, n_behaviors=20, dm={"fast_fixed_choices": True})
+    # The irrigation depths are the same up to the solver tolerances.
+    assert_same_sd6(df, ref, rtol=1e-6)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from conftest import FIELD
+
+from py_champ.components.optimization import Optimization, pwl_max_errors
+
+CASES = {
+    "h1": {"horizon": 1},
+    "sorghum h1": {"horizon": 1, "i_crop": "sorghum"},
+    "wr10 h2": {"horizon": 2, "wr": (10.0, 1, None, None)},
+    "corn wr20 tw2 h2": {"horizon": 2, "i_crop": "corn", "wr": (20.0, 2, None, None)},
+}
+
+
+def solve(build_dm, formulation, **kwargs):
+    dm = build_dm(Optimization, ini={"formulation": formulation}, **kwargs)
+    dm.solve(display_report=False)
+    return dm
+
+
+@pytest.mark.parametrize("kwargs", CASES.values(), ids=CASES.keys())
+def test_convex(build_dm, kwargs):
+    ref = solve(build_dm, "nonconvex", **kwargs)
+    dm = solve(build_dm, "convex", **kwargs)
+    assert dm.is_convex
+    assert "NonConvex" not in dm._get_solver_params()
+    np.testing.assert_array_equal(
+        np.round(dm.sols["f1"]["i_crop"]), np.round(ref.sols["f1"]["i_crop"])
+    )
+    # The nonconvex formulation approximates the log of the Cooper-Jacob
+    # drawdown with Gurobi's piecewise-linear function constraint.
+    np.testing.assert_allclose(dm.sols["obj"], ref.sols["obj"], rtol=1e-4)
+
+
+def test_convex_sd6(run_sd6, assert_same_sd6):
+    _, ref = run_sd6(n_steps=3)
+    _, df = run_sd6(n_steps=3, dm={"formulation": "convex"})
+    assert_same_sd6(df, ref, rtol=1e-3)
+
+
+def test_pwl_max_errors():
+    errors = pwl_max_errors(FIELD["water_yield_curves"], pwl_breakpoints=11)
+    assert errors["corn"] == pytest.approx(3.3901 * 0.1**2 / 4)
+    assert errors["fallow"] == 0
+    assert errors["energy"] == pytest.approx(0.1**2 / 4)
+
+
+@pytest.mark.parametrize("kwargs", CASES.values(), ids=CASES.keys())
+@pytest.mark.parametrize("n", [10, 40])
+def test_pwl(build_dm, kwargs, n):
+    ref = solve(build_dm, "nonconvex", **kwargs)
+    dm = build_dm(
+        Optimization, ini={"formulation": "pwl", "pwl_breakpoints": n}, **kwargs
+    )
+    dm.solve(display_report=False)
+    assert dm.is_convex
+    np.testing.assert_array_equal(
+        np.round(dm.sols["f1"]["i_crop"]), np.round(ref.sols["f1"]["i_crop"])
+    )
+    # The interpolations underestimate the concave yield curve and
+    # overestimate the convex energy term, so the objective is conservative.
+    obj, ref_obj = dm.sols["obj"], ref.sols["obj"]
+    assert obj <= ref_obj + 1e-6 * abs(ref_obj)
+    assert obj >= ref_obj - 0.1 * abs(ref_obj)
+
+
+def test_pwl_sd6(run_sd6, assert_same_sd6):
+    _, ref = run_sd6(n_steps=3)
+    _, df = run_sd6(n_steps=3, dm={"formulation": "pwl"})
+    assert_same_sd6(df, ref, rtol=1e-2)
@@ -0,0 +1,9 @@
+from py_champ.components.model_template import ModelTemplates
+
+
+def test_model_templates(run_sd6, assert_same_sd6):
+    _, ref = run_sd6(n_steps=3)
+    templates = ModelTemplates()
+    _, df = run_sd6(n_steps=3, model_templates=templates)
+    assert templates.hits > 0
+    assert_same_sd6(df, ref)
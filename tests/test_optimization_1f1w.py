@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from py_champ.components.optimization_1f1w import (
+    Optimization4SingleFieldAndWell,
+    Optimization4SingleFieldAndWellEnum,
+)
+
+
+def solve(build_1f1w_dm, **kwargs):
+    ref = build_1f1w_dm(Optimization4SingleFieldAndWell, **kwargs)
+    ref.solve(display_report=False)
+    dm = build_1f1w_dm(Optimization4SingleFieldAndWellEnum, **kwargs)
+    dm.solve(display_report=False)
+    assert dm.enum
+    np.testing.assert_allclose(dm.sols["obj"], ref.sols["obj"], rtol=1e-3)
+    return dm.sols, ref.sols
+
+
+@pytest.mark.parametrize(
+    ("i_crop", "wr", "horizon"),
+    [
+        (None, (60.96, 1, None, None), 1),
+        (None, (10.0, 2, None, None), 2),
+        ("corn", (60.96, 1, None, None), 1),
+        ("corn", (0.0, 1, None, None), 1),  # Zero irrigation is forced
+        ("soybeans", (0.0, 2, None, None), 2),
+    ],
+)
+def test_enumeration(build_1f1w_dm, i_crop, wr, horizon):
+    sols, ref_sols = solve(build_1f1w_dm, i_crop=i_crop, wr=wr, horizon=horizon)
+    for key in ("i_crop", "i_rainfed"):
+        assert np.array_equal(sols["f1"][key], ref_sols["f1"][key]), key
+    np.testing.assert_allclose(sols["irr_depth"], ref_sols["irr_depth"], atol=0.1)
+
+
+def test_enumeration_rainfed(build_1f1w_dm):
+    # Zero irrigation is optimal but not forced. The field remains irrigated
+    # as it can be irrigated.
+    sols, ref_sols = solve(build_1f1w_dm, i_crop="fallow")
+    assert np.all(sols["irr_depth"] == 0)
+    np.testing.assert_allclose(sols["irr_depth"], ref_sols["irr_depth"])
+    assert not sols["f1"]["i_rainfed"].any()
+    # Rainfed if it cannot be irrigated
+    sols, ref_sols = solve(build_1f1w_dm, i_crop="fallow", wr=(0.0, 1, None, None))
+    assert np.array_equal(sols["f1"]["i_rainfed"], ref_sols["f1"]["i_rainfed"])
+    assert sols["f1"]["i_rainfed"].any()
@@ -0,0 +1,53 @@
+import pytest
+
+from py_champ.models.partitioned import PartitionedSD6Model, get_partitions
+from py_champ.models.sd6_model import SD6Model
+
+
+class FailingSD6Model(SD6Model):
+    def step(self):
+        """Fail at the first step."""
+        raise ValueError("step failed")
+
+
+def test_get_partitions():
+    behaviors = {
+        "b1": {"well_ids": ["w1"], "behavior_ids_in_network": []},
+        "b2": {"well_ids": ["w2"], "behavior_ids_in_network": ["b3"]},
+        "b3": {"well_ids": ["w3"], "behavior_ids_in_network": []},
+        "b4": {"well_ids": ["w4"], "behavior_ids_in_network": []},
+    }
+    wells = {
+        "w1": {"aquifer_id": "a1"},
+        "w2": {"aquifer_id": "a2"},
+        "w3": {"aquifer_id": "a3"},
+        "w4": {"aquifer_id": "a1"},
+    }
+    assert get_partitions(behaviors, wells) == [["b1", "b4"], ["b2", "b3"]]
+    config = {"well": {"aquifer_id": "a1"}}
+    assert get_partitions(behaviors, wells, config) == [["b1", "b2", "b3", "b4"]]
+
+
+@pytest.mark.parametrize("n_workers", [0, 1])
+def test_partitioned(sd6_kwargs, run_sd6, assert_same_sd6, n_workers):
+    # All the farmers share one aquifer, so there is a single sub-model that
+    # reproduces SD6Model.
+    _, ref = run_sd6(n_steps=2)
+    m = PartitionedSD6Model(n_workers=n_workers, **sd6_kwargs())
+    assert len(m.partitions) == 1
+    for _ in range(2):
+        m.step()
+    df = m.get_agent_vars_dataframe().reset_index()
+    m.end()
+    assert len(m.aquifer_records) == 2
+    keys = ["Step", "AgentID"]
+    assert_same_sd6(df.sort_values(keys), ref.sort_values(keys))
+
+
+def test_partitioned_error(sd6_kwargs):
+    m = PartitionedSD6Model(
+        n_workers=1, model_class=FailingSD6Model, **sd6_kwargs(n_behaviors=2)
+    )
+    with pytest.raises(RuntimeError, match="step failed"):
+        m.step()
+    assert not m._processes
@@ -0,0 +1,24 @@
+from py_champ.components.optimization import Optimization
+
+
+def count_builds(monkeypatch):
+    n_builds = []
+    setup_ini_model = Optimization.setup_ini_model
+
+    def setup_ini_model_counted(self, *args, **kwargs):
+        n_builds.append(self.unique_id)
+        return setup_ini_model(self, *args, **kwargs)
+
+    monkeypatch.setattr(Optimization, "setup_ini_model", setup_ini_model_counted)
+    return n_builds
+
+
+def test_persistent_model(run_sd6, assert_same_sd6, monkeypatch):
+    n_builds = count_builds(monkeypatch)
+    _, ref = run_sd6(n_steps=3)
+    n_ref = len(n_builds)
+    n_builds.clear()
+    _, df = run_sd6(n_steps=3, dm={"persistent_model": True})
+    # Each agent builds its model once.
+    assert len(n_builds) == len(set(n_builds)) < n_ref
+    assert_same_sd6(df, ref)
@@ -0,0 +1,18 @@
+import numpy as np
+
+
+def test_prec_scenarios_centered(run_sd6):
+    m, _ = run_sd6(n_steps=0, n_behaviors=1, dm={"prec_scenarios": 3})
+    behavior = next(iter(m.behaviors.values()))
+    for fi, risks in behavior.percieved_risks.items():
+        for crop, risk in risks.items():
+            scens = behavior.percieved_risk_scenarios[fi][crop]
+            assert scens[1] == risk
+            assert np.all(np.diff(scens) >= 0)
+
+
+def test_prec_scenarios_single(run_sd6, assert_same_sd6):
+    # A single scenario is the perceived risk of the calibrated quantile.
+    _, ref = run_sd6(n_steps=3, n_behaviors=20)
+    _, df = run_sd6(n_steps=3, n_behaviors=20, dm={"prec_scenarios": 1})
+    assert_same_sd6(df, ref)
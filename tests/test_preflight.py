@@ -0,0 +1,50 @@
+import numpy as np
+
+from py_champ.components.preflight import preflight_dm_args
+
+CURVES = {"f1": {"corn": [463.0, 77.8], "fallow": [0.0, 100.0]}}
+
+
+def get_args(prec=17.85, cap=10.0, wr=30.0):
+    fields_args = {"f1": {"prec_aw": {"corn": prec, "fallow": 0.0}}}
+    wells_args = {"w1": {"pumping_capacity": cap}}
+    wrs_args = {
+        "wr": {"wr_depth": wr, "remaining_wr": None, "tail_method": "proportion"}
+    }
+    return fields_args, wells_args, wrs_args
+
+
+def test_preflight_feasible():
+    args = get_args()
+    *relaxed, issues = preflight_dm_args(*args, CURVES)
+    assert issues == []
+    assert all(r is a for r, a in zip(relaxed, args, strict=True))
+
+
+def test_preflight_relax():
+    args = get_args(prec=120.0, cap=-1.0, wr=-0.5)
+    fields_args, wells_args, wrs_args, issues = preflight_dm_args(*args, CURVES)
+    assert len(issues) == 3
+    assert fields_args["f1"]["prec_aw"]["corn"] == 100.0
+    assert wells_args["w1"]["pumping_capacity"] == 0.0
+    assert wrs_args["wr"]["wr_depth"] == 0.0
+    # The given inputs are unchanged.
+    assert args[0]["f1"]["prec_aw"]["corn"] == 120.0
+    assert args[2]["wr"]["wr_depth"] == -0.5
+
+
+def test_preflight_scenarios():
+    fields_args, wells_args, wrs_args = get_args()
+    fields_args["f1"]["prec_aw"] = [
+        {"corn": 17.85, "fallow": 0.0},
+        {"corn": np.array([101.0, 50.0]), "fallow": 0.0},
+    ]
+    relaxed, *_, issues = preflight_dm_args(fields_args, wells_args, wrs_args, CURVES)
+    assert len(issues) == 1
+    np.testing.assert_array_equal(relaxed["f1"]["prec_aw"][1]["corn"], [100.0, 50.0])
+
+
+def test_feasibility_preflight(run_sd6, assert_same_sd6):
+    _, ref = run_sd6(n_steps=3)
+    _, df = run_sd6(n_steps=3, dm={"feasibility_preflight": True})
+    assert_same_sd6(df, ref)
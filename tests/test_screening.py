@@ -0,0 +1,53 @@
+from py_champ.components.screening import screen_crop_options, screen_tech_options
+
+CURVE = [463.3923, 77.7756, -3.3901, 6.0872, -1.7325, 0.1319]
+FINANCE = {
+    "crop_price": {"corn": 5.4, "corn_cheap": 4.0, "wet": 5.0},
+    "crop_cost": {"corn": 0.0, "corn_cheap": 0.0, "wet": 0.0},
+    "crop_change_cost": {},
+    "irr_tech_operational_cost": {"lepa": 1.876, "old": 2.0},
+    "irr_tech_change_cost": {},
+}
+
+
+def get_field(pre_i_crop="corn", prec=17.85):
+    curves = {"corn": CURVE, "corn_cheap": CURVE, "wet": list(CURVE)}
+    curves["wet"][1] = 90.0  # The largest water requirement
+    return {
+        "water_yield_curves": curves,
+        "prec_aw": dict.fromkeys(curves, prec),
+        "pre_i_crop": pre_i_crop,
+        "tech_pumping_rate_coefs": {
+            "lepa": [0.0058, 0.212206, 12.65],
+            "old": [0.0060, 0.212206, 20.0],
+        },
+        "pre_i_te": "lepa",
+    }
+
+
+def test_screen_crop_options():
+    crops = ["corn", "corn_cheap", "wet"]
+    # The same curve at a lower price is dominated, but the crop with the
+    # largest water requirement is kept.
+    assert screen_crop_options(crops, [get_field()], FINANCE) == [0, 2]
+    # The previous crop is kept.
+    fields = [get_field(), get_field("corn_cheap")]
+    assert screen_crop_options(crops, fields, FINANCE) == [0, 1, 2]
+    # Dominated in every precipitation scenario
+    field = get_field()
+    field["prec_aw"] = [field["prec_aw"], dict.fromkeys(field["prec_aw"], 5.0)]
+    assert screen_crop_options(crops, [field], FINANCE) == [0, 2]
+
+
+def test_screen_tech_options():
+    techs = ["lepa", "old"]
+    assert screen_tech_options(techs, [get_field()], FINANCE) == [0]
+    field = get_field()
+    field["pre_i_te"] = "old"
+    assert screen_tech_options(techs, [field], FINANCE) == [0, 1]
+
+
+def test_dominance_pruning(run_sd6, assert_same_sd6):
+    _, ref = run_sd6(n_steps=3)
+    _, df = run_sd6(n_steps=3, dm={"dominance_pruning": True})
+    assert_same_sd6(df, ref)
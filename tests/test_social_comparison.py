@@ -0,0 +1,5 @@
+def test_batch_social_comparison(run_sd6, assert_same_sd6):
+    _, ref = run_sd6(n_steps=3)
+    assert (ref["state"] == "Social comparison").any()
+    _, df = run_sd6(n_steps=3, dm={"batch_social_comparison": True})
+    assert_same_sd6(df, ref)
@@ -0,0 +1,38 @@
+import gurobipy as gp
+import numpy as np
+import pytest
+
+from py_champ.components.optimization import Optimization
+from py_champ.components.solver import solve_model
+
+
+@pytest.mark.parametrize("horizon", [1, 2])
+def test_highs_pwl(build_dm, horizon):
+    sols = {}
+    for solver in ("gurobi", "highs"):
+        dm = build_dm(
+            Optimization,
+            horizon=horizon,
+            ini={"formulation": "pwl", "solver": solver},
+        )
+        dm.solve(display_report=False)
+        sols[solver] = dm.sols
+    np.testing.assert_allclose(sols["highs"]["obj"], sols["gurobi"]["obj"], rtol=1e-6)
+    for key in ("i_crop", "i_te"):
+        assert np.array_equal(sols["highs"]["f1"][key], sols["gurobi"]["f1"][key])
+
+
+def test_highs_min_max():
+    with gp.Env(params={"OutputFlag": 0}) as env, gp.Model(env=env) as m:
+        x = m.addVar(lb=-2, ub=3)
+        y = m.addVar(lb=0, ub=4)
+        r_max = m.addVar(lb=-10, ub=10)
+        r_min = m.addVar(lb=-10, ub=10)
+        m.addGenConstrMax(r_max, [x, y], 1.0)
+        m.addGenConstrMin(r_min, [x, y])
+        m.addConstr(x + y <= 4)
+        m.setObjective(r_min - 0.5 * r_max, gp.GRB.MAXIMIZE)
+        gurobi = solve_model(m, "gurobi")
+        highs = solve_model(m, "highs")
+    assert highs.status == gurobi.status == gp.GRB.OPTIMAL
+    assert highs.obj_val == pytest.approx(gurobi.obj_val)
@@ -0,0 +1,24 @@
+import pytest
+
+from py_champ.components.solver_budget import SolverBudget
+
+
+def test_solver_budget_args():
+    with pytest.raises(ValueError):
+        SolverBudget(0)
+    with pytest.raises(ValueError):
+        SolverBudget(10, smoothing=0)
+
+
+@pytest.mark.parametrize("batch_solve", [False, True])
+def test_solver_budget(run_sd6, assert_same_sd6, batch_solve):
+    _, ref = run_sd6(n_steps=3)
+    # A budget large enough for all the models gives the same decisions.
+    budget = SolverBudget(1000)
+    _, df = run_sd6(n_steps=3, solver_budget=budget, batch_solve=batch_solve)
+    info = budget.info()
+    assert info["steps"] == 3
+    assert info["solves"] > 0
+    assert info["time_limited"] == 0
+    assert all(r["time_limit"] is not None for r in budget.records)
+    assert_same_sd6(df, ref)
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("batch_solve", [False, True])
+def test_state_store(run_sd6, assert_same_sd6, batch_solve):
+    _, ref = run_sd6(n_steps=3)
+    m, df = run_sd6(n_steps=3, state_store=True, batch_solve=batch_solve)
+    assert m.state_store is not None
+    assert_same_sd6(df, ref)
+    # The agents are views of their rows in the store.
+    store = m.state_store
+    for wid, well in m.wells.items():
+        assert well.st == store.well_states["st"][store.well_rows[wid]]
+
+
+def test_state_store_copies(run_sd6):
+    m, _ = run_sd6(n_steps=1, state_store=True)
+    field = next(iter(m.fields.values()))
+    i_crop = field.i_crop
+    row = m.state_store.field_states["i_crop"][
+        m.state_store.field_rows[field.unique_id]
+    ]
+    assert np.array_equal(i_crop, row)
+    assert not np.shares_memory(i_crop, row)
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from py_champ.components.optimization import Optimization
+
+
+def count_symmetry_constrs(dm):
+    return sum("split_symmetry" in c.ConstrName for c in dm.model.getConstrs())
+
+
+# The nonconvex model with three splits exceeds a size-limited license.
+@pytest.mark.parametrize("formulation, area_split", [("nonconvex", 2), ("pwl", 3)])
+def test_symmetry_breaking(build_dm, formulation, area_split):
+    dms = []
+    for symmetry_breaking in (False, True):
+        ini = {
+            "area_split": area_split,
+            "formulation": formulation,
+            "symmetry_breaking": symmetry_breaking,
+        }
+        dm = build_dm(Optimization, wr=(30.0, 1, None, None), ini=ini)
+        dm.solve(keep_gp_model=True, display_report=False)
+        dms.append(dm)
+    ref, dm = dms
+    assert count_symmetry_constrs(ref) == 0
+    assert count_symmetry_constrs(dm) == area_split - 1
+    np.testing.assert_allclose(dm.sols["obj"], ref.sols["obj"], rtol=1e-6)
+    # The choices are ordered over the splits.
+    i_crop = np.round(dm.sols["f1"]["i_crop"][:, :, 0])
+    i_rainfed = np.round(dm.sols["f1"]["i_rainfed"][:, :, 0])
+    codes = i_crop @ (2 * np.arange(i_crop.shape[1])) + i_rainfed.sum(axis=1)
+    assert np.all(np.diff(codes) >= 0)
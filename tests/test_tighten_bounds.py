@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from py_champ.components.optimization import Optimization
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"horizon": 2},
+        {"wr": (10.0, 2, None, None), "horizon": 2},
+        {"ini": {"formulation": "pwl"}},
+        {"i_crop": "fallow"},
+    ],
+)
+def test_tighten_bounds(build_dm, kwargs):
+    ref = build_dm(Optimization, **kwargs)
+    ref.solve(keep_gp_model=True, display_report=False)
+    x = np.array(ref.model.getAttr("X", ref.model.getVars()))
+    dm = build_dm(Optimization, **kwargs)
+    dm.tighten_bounds()
+    dm.model.update()
+    vars_ = dm.model.getVars()
+    # The optimal solution without the bounds is within the bounds.
+    lb = np.array(dm.model.getAttr("LB", vars_))
+    ub = np.array(dm.model.getAttr("UB", vars_))
+    assert np.all(x >= lb - 1e-6 * (np.abs(lb) + 1))
+    assert np.all(x <= ub + 1e-6 * (np.abs(ub) + 1))
+    # The solutions are only equivalent up to the solver tolerances, but the
+    # bounds do not cut off the solution above.
+    dm.solve(display_report=False)
+    assert dm.sols["obj"] >= ref.sols["obj"] - 1e-6 * abs(ref.sols["obj"])
+    np.testing.assert_allclose(dm.sols["obj"], ref.sols["obj"], rtol=1e-3)
@@ -0,0 +1,28 @@
+import pytest
+
+from py_champ.components.optimization import Optimization
+
+
+@pytest.mark.parametrize(
+    "dm",
+    [
+        {"warm_start": True},
+        {"warm_start": True, "var_hint": True},
+        {"warm_start": True, "persistent_model": True},
+    ],
+)
+def test_warm_start(run_sd6, assert_same_sd6, monkeypatch, dm):
+    n_starts = []
+    set_start = Optimization.set_start
+
+    def set_start_counted(self, *args, **kwargs):
+        n_starts.append(self.unique_id)
+        return set_start(self, *args, **kwargs)
+
+    monkeypatch.setattr(Optimization, "set_start", set_start_counted)
+    _, ref = run_sd6(n_steps=3)
+    assert not n_starts
+    _, df = run_sd6(n_steps=3, dm=dm)
+    assert n_starts
+    # The MIP starts only change the solutions within the solver tolerances.
+    assert_same_sd6(df, ref, rtol=1e-6)
@@ -0,0 +1,40 @@
+import mesa
+import numpy as np
+import pytest
+from conftest import WELL
+
+from py_champ.components.well import Well
+from py_champ.components.well_kernel import WellKernel
+
+
+def get_wells(model, sts):
+    settings = {k: v for k, v in WELL.items() if k not in ("st", "l_wt")}
+    settings |= {"aquifer_id": "ag", "pumping_capacity": None}
+    wells = []
+    for i, st in enumerate(sts):
+        init = {"st": st, "l_wt": WELL["l_wt"], "pumping_days": 90}
+        wells.append(Well(f"w{i}", model, settings | {"init": init}))
+    return wells
+
+
+@pytest.mark.parametrize("dwl", [0.0, -0.5])
+def test_step_wells(dwl):
+    # The last well falls below the minimum transmissivity.
+    sts = [WELL["st"], 10.0, 0.0]
+    refs, wells = get_wells(mesa.Model(), sts), get_wells(mesa.Model(), sts)
+    withdrawal = np.array([100.0, 0.0, 20.0])
+    pumping_rate = np.array([1.2, 0.0, 0.3])
+    l_pr = np.array([12.65, 0.0, 12.65])
+    dwls = np.full(3, dwl)
+    kernel = WellKernel.from_wells(wells)
+    for _ in range(2):
+        e_ref = [
+            w.step(*args)
+            for w, *args in zip(refs, withdrawal, dwls, pumping_rate, l_pr, strict=True)
+        ]
+        e = kernel.step_wells(wells, withdrawal, dwls, pumping_rate, l_pr)
+        np.testing.assert_array_equal(e, e_ref)
+        for ref, well in zip(refs, wells, strict=True):
+            for attr in ("t", "st", "l_wt", "tr", "withdrawal", "pumping_rate", "e"):
+                assert getattr(well, attr) == getattr(ref, attr), attr
+    assert wells[-1].tr == 0.001